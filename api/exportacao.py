@@ -0,0 +1,158 @@
+import json
+from datetime import datetime, time, timedelta
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.renderers import BaseRenderer
+
+from sgea_app.models import Evento, EventoRemovido
+
+# Exportação do catálogo de eventos em NDJSON (um objeto JSON por linha), para os
+# portais parceiros que espelham o catálogo.
+#
+# Só as colunas dos campos pedidos (?fields=) são lidas do banco, com JOIN apenas
+# quando um campo pede (ex: organizador_nome). As linhas vêm de um cursor no servidor
+# (QuerySet.iterator) e são enviadas em blocos: a memória não cresce com o catálogo.
+#
+# Na exportação incremental, os eventos excluídos ou arquivados desde a data pedida vêm
+# depois dos alterados, uma linha cada: {"id": 12, "removido": true, "removido_em": ...}.
+
+def _banner(banner, variantes, hashes, request):
+    if not banner:
+        return {}
+    urls = Evento(banner=banner, banner_variantes=variantes or {}, banner_hashes=hashes or {}).banner_urls()
+    if request is None:
+        return urls
+    return {
+        variante: {formato: request.build_absolute_uri(url) for formato, url in formatos.items()}
+        for variante, formatos in urls.items()
+    }
+
+# Campo exportado -> (colunas lidas do banco, conversão dos valores ou None)
+CAMPOS = {
+    'id': (('id',), None),
+    'nome': (('nome',), None),
+    'tipo_evento': (('tipo_evento',), None),
+    'data_inicial': (('data_inicial',), None),
+    'data_final': (('data_final',), None),
+    'horario': (('horario',), None),
+    'inicio': (('inicio',), None),
+    'fim': (('fim',), None),
+    'local': (('local',), None),
+    'quantidade_participantes': (('quantidade_participantes',), None),
+    'politica_conflito': (('politica_conflito',), None),
+    'serie_id': (('serie_id',), None),
+    'organizador_nome': (('organizador__nome',), None),
+    'professor_nome': (('professor_responsavel__nome',), None),
+    'banner': (('banner', 'banner_variantes', 'banner_hashes'), _banner),
+    'atualizado_em': (('atualizado_em',), None),
+}
+
+# Sem ?fields=: os campos do EventoSerializer (/api/eventos/) e a data de alteração
+CAMPOS_PADRAO = ('id', 'nome', 'local', 'data_inicial', 'organizador_nome', 'banner', 'atualizado_em')
+
+# Linhas por bloco enviado e por leitura do cursor
+LINHAS_POR_BLOCO = 500
+LINHAS_POR_LEITURA = 2000
+
+# Recuo do X-Exportado-Em: atualizado_em é gravado antes do commit, então uma transação
+# em andamento durante a leitura pode aparecer depois com um horário anterior a ela. O
+# recuo faz a próxima exportação repetir essa faixa (reaplicar uma linha é inofensivo).
+SOBREPOSICAO = timedelta(minutes=1)
+
+
+class NDJSONRenderer(BaseRenderer):
+    """ Aceita 'Accept: application/x-ndjson'; respostas de erro saem como uma linha JSON. """
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return (json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n').encode()
+
+
+def campos_exportacao(valor):
+    """ 'id,nome' -> ('id', 'nome'). ValueError com campo desconhecido. """
+    if not valor:
+        return CAMPOS_PADRAO
+    campos = tuple(dict.fromkeys(campo.strip() for campo in valor.split(',') if campo.strip()))
+    desconhecidos = [campo for campo in campos if campo not in CAMPOS]
+    if desconhecidos or not campos:
+        raise ValueError(
+            f"Campos inválidos: {', '.join(desconhecidos) or '(vazio)'}. Opções: {', '.join(CAMPOS)}."
+        )
+    return campos
+
+
+def data_exportacao(valor):
+    """ Data/hora ISO 8601 de ?updated_since= (uma data sozinha vale desde 00:00). ValueError se inválida. """
+    if not valor:
+        return None
+    try:
+        momento = parse_datetime(valor)
+        if momento is None:
+            dia = parse_date(valor)
+            momento = datetime.combine(dia, time.min) if dia else None
+    except ValueError:
+        momento = None
+    if momento is None:
+        raise ValueError(f"updated_since inválido: '{valor}' (use ISO 8601, ex: 2025-03-01T12:00:00Z).")
+    if timezone.is_naive(momento):
+        momento = timezone.make_aware(momento)
+    return momento
+
+
+def eventos_exportacao(desde=None):
+    """ Eventos na ordem da exportação; com 'desde', só os alterados a partir dele. """
+    eventos = Evento.objects.order_by('atualizado_em', 'id')
+    if desde is not None:
+        eventos = eventos.filter(atualizado_em__gte=desde)
+    return eventos
+
+
+def removidos_exportacao(desde):
+    """ Ids e datas dos eventos excluídos ou arquivados a partir de 'desde', na ordem da remoção. """
+    return EventoRemovido.objects.filter(removido_em__gte=desde).order_by('removido_em', 'id').values_list(
+        'evento_id', 'removido_em'
+    )
+
+
+def marca_exportacao(agora=None):
+    """ Valor do X-Exportado-Em (próximo updated_since): o início da leitura, menos o recuo. """
+    return (agora or timezone.now()) - SOBREPOSICAO
+
+
+def linhas_ndjson(eventos, campos, request=None, removidos=None):
+    """
+    Gera o NDJSON dos eventos em blocos de LINHAS_POR_BLOCO linhas, seguido dos
+    registros de remoção de 'removidos' (pares evento_id, removido_em), se houver.
+    """
+    colunas = list(dict.fromkeys(coluna for campo in campos for coluna in CAMPOS[campo][0]))
+    extratores = []
+    for campo in campos:
+        colunas_campo, conversao = CAMPOS[campo]
+        indices = [colunas.index(coluna) for coluna in colunas_campo]
+        extratores.append((campo, indices[0] if conversao is None else indices, conversao))
+
+    codificador = DjangoJSONEncoder(ensure_ascii=False)
+    bloco = []
+    for valores in eventos.values_list(*colunas).iterator(chunk_size=LINHAS_POR_LEITURA):
+        registro = {}
+        for campo, indice, conversao in extratores:
+            if conversao is None:
+                registro[campo] = valores[indice]
+            else:
+                registro[campo] = conversao(*(valores[i] for i in indice), request)
+        bloco.append(codificador.encode(registro))
+        if len(bloco) >= LINHAS_POR_BLOCO:
+            yield '\n'.join(bloco) + '\n'
+            bloco = []
+
+    for evento_id, removido_em in (removidos.iterator(chunk_size=LINHAS_POR_LEITURA) if removidos is not None else ()):
+        bloco.append(codificador.encode({'id': evento_id, 'removido': True, 'removido_em': removido_em}))
+        if len(bloco) >= LINHAS_POR_BLOCO:
+            yield '\n'.join(bloco) + '\n'
+            bloco = []
+    if bloco:
+        yield '\n'.join(bloco) + '\n'
@@ -1,8 +1,12 @@
 from rest_framework import serializers
-from sgea_app.models import Evento, Usuario, Inscricao
+from sgea_app import espera
+from sgea_app.models import Evento, Usuario, Inscricao, EstatisticaOrganizador, ListaEspera
+from sgea_app.conflitos import eventos_conflitantes, inscricao_bloqueada, mensagem_conflito
+from sgea_app.checkin import TAMANHO_MAXIMO_LOTE
 
 class EventoSerializer(serializers.ModelSerializer):
     organizador_nome = serializers.CharField(source='organizador.nome', read_only=True)
+    banner = serializers.SerializerMethodField()
 
     class Meta:
         model = Evento
@@ -11,9 +15,90 @@ class EventoSerializer(serializers.ModelSerializer):
             'nome',
             'local',
             'data_inicial',
-            'organizador_nome'
+            'organizador_nome',
+            'banner'
         ]
 
+    def get_banner(self, evento):
+        # URLs das variantes (thumbnail, card, hero) em WebP e JPEG
+        request = self.context.get('request')
+        urls = evento.banner_urls()
+        if request is None:
+            return urls
+        return {
+            variante: {formato: request.build_absolute_uri(url) for formato, url in formatos.items()}
+            for variante, formatos in urls.items()
+        }
+
+
+class EstatisticaEventoSerializer(serializers.ModelSerializer):
+    total_inscritos = serializers.SerializerMethodField()
+    presencas_confirmadas = serializers.SerializerMethodField()
+    certificados_emitidos = serializers.SerializerMethodField()
+    taxa_ocupacao = serializers.SerializerMethodField()
+    taxa_presenca = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Evento
+        fields = [
+            'id',
+            'nome',
+            'data_inicial',
+            'quantidade_participantes',
+            'total_inscritos',
+            'presencas_confirmadas',
+            'certificados_emitidos',
+            'taxa_ocupacao',
+            'taxa_presenca'
+        ]
+
+    def _estatistica(self, evento):
+        return getattr(evento, 'estatistica', None)
+
+    def get_total_inscritos(self, evento):
+        estatistica = self._estatistica(evento)
+        return estatistica.total_inscritos if estatistica else 0
+
+    def get_presencas_confirmadas(self, evento):
+        estatistica = self._estatistica(evento)
+        return estatistica.presencas_confirmadas if estatistica else 0
+
+    def get_certificados_emitidos(self, evento):
+        estatistica = self._estatistica(evento)
+        return estatistica.certificados_emitidos if estatistica else 0
+
+    def get_taxa_ocupacao(self, evento):
+        estatistica = self._estatistica(evento)
+        return estatistica.taxa_ocupacao() if estatistica else 0.0
+
+    def get_taxa_presenca(self, evento):
+        estatistica = self._estatistica(evento)
+        return estatistica.taxa_presenca() if estatistica else 0.0
+
+
+class EstatisticaOrganizadorSerializer(serializers.ModelSerializer):
+    taxa_ocupacao = serializers.FloatField(read_only=True)
+    taxa_presenca = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = EstatisticaOrganizador
+        fields = [
+            'total_eventos',
+            'vagas_ofertadas',
+            'total_inscritos',
+            'presencas_confirmadas',
+            'certificados_emitidos',
+            'taxa_ocupacao',
+            'taxa_presenca',
+            'atualizado_em'
+        ]
+
+
+class IntervaloEventoSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Evento
+        fields = ['id', 'nome', 'inicio', 'fim']
+
 
 class InscricaoSerializer(serializers.Serializer):
     usuario_nome = serializers.CharField()
@@ -38,13 +123,40 @@ class InscricaoSerializer(serializers.Serializer):
         if Inscricao.objects.filter(usuario=usuario, evento=evento).exists():
             raise serializers.ValidationError({'detalhe': 'Usuário já inscrito neste evento.'})
 
+        # Verificar conflito de horário (bloqueia ou apenas avisa, conforme a política do evento)
+        conflitos = eventos_conflitantes(usuario, evento)
+        if inscricao_bloqueada(evento, conflitos):
+            raise serializers.ValidationError({'conflito': mensagem_conflito(conflitos)})
+        data['conflitos'] = conflitos
+
         # Adiciona instâncias para uso no create()
         data['usuario'] = usuario
         data['evento'] = evento
         return data
 
     def create(self, validated_data):
-        return Inscricao.objects.create(
-            usuario=validated_data['usuario'],
-            evento=validated_data['evento']
-        )
\ No newline at end of file
+        usuario = validated_data['usuario']
+        evento = validated_data['evento']
+
+        # Evento lotado (ou com gente esperando): lista de espera, como na inscrição pelo site.
+        # Retorna a entrada da lista, com a posição em 'posicao_atual'.
+        total_inscritos = Inscricao.objects.filter(evento=evento).count()
+        if total_inscritos >= evento.quantidade_participantes or ListaEspera.objects.filter(evento=evento).exists():
+            entrada, entrada.posicao_atual = espera.entrar(usuario, evento)
+            return entrada
+
+        return Inscricao.objects.create(usuario=usuario, evento=evento)
+
+class LoteCheckinSerializer(serializers.Serializer):
+    # Cursor da lista usada no dispositivo e os check-ins feitos offline: [[inscricao_id, presenca], ...]
+    cursor = serializers.CharField()
+    checkins = serializers.ListField(
+        child=serializers.ListField(child=serializers.IntegerField(min_value=0), min_length=2, max_length=2),
+        max_length=TAMANHO_MAXIMO_LOTE,
+    )
+
+    def validate_checkins(self, checkins):
+        # A presença é 0 ou 1; qualquer outro inteiro indica um dispositivo com defeito
+        if any(presenca > 1 for _inscricao_id, presenca in checkins):
+            raise serializers.ValidationError('A presença deve ser 0 ou 1.')
+        return checkins
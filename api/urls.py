@@ -1,10 +1,35 @@
 from django.urls import path
-from .views import ListaEventosAPIView, InscricaoAPIView, LoginAPIView
+from django.utils.module_loading import import_string
+
+
+def sob_demanda(nome):
+    """
+    View da API importada só na primeira requisição: o DRF (serializers, views,
+    autenticação) não é carregado na inicialização nem nas páginas do sgea_app.
+    """
+    view = None
+
+    def carregar(request, *args, **kwargs):
+        nonlocal view
+        if view is None:
+            view = import_string(f'api.views.{nome}').as_view()
+        return view(request, *args, **kwargs)
+
+    # Como no APIView.as_view(): a API usa autenticação por token, sem CSRF
+    carregar.csrf_exempt = True
+    return carregar
+
 
 urlpatterns = [
-    path('eventos/', ListaEventosAPIView.as_view(), name='api_eventos'), # URL para o endpoint que consulta a lista de eventos
-    path('inscricoes/', InscricaoAPIView.as_view(), name='api_inscricoes'), # URL para o endpoint que realiza a inscrição em eventos
-    path('login/', LoginAPIView.as_view(), name='api_login'), # URL para o endpoint de autenticação via login
+    path('eventos/', sob_demanda('ListaEventosAPIView'), name='api_eventos'), # URL para o endpoint que consulta a lista de eventos
+    path('eventos/exportar/', sob_demanda('ExportacaoEventosAPIView'), name='api_exportar_eventos'), # URL para exportar o catálogo de eventos em NDJSON (campos escolhidos e alterações desde uma data)
+    path('inscricoes/', sob_demanda('InscricaoAPIView'), name='api_inscricoes'), # URL para o endpoint que realiza a inscrição em eventos
+    path('inscricoes/conflitos/', sob_demanda('ConflitosAPIView'), name='api_conflitos'), # URL para os conflitos de horário entre as inscrições do usuário
+    path('eventos/<int:evento_id>/checkin/', sob_demanda('CheckinAPIView'), name='api_checkin'), # URL para baixar a lista de check-in do evento e enviar os check-ins feitos offline
+    path('login/', sob_demanda('LoginAPIView'), name='api_login'), # URL para o endpoint de autenticação via login
+    path('estatisticas/', sob_demanda('EstatisticasAPIView'), name='api_estatisticas'), # URL para as estatísticas dos eventos do organizador
+    path('fila/', sob_demanda('FilaAPIView'), name='api_fila'), # URL para as métricas da fila de tarefas (profundidade e latência)
+    path('certificados/verificar/<str:codigo>/', sob_demanda('VerificarCertificadoAPIView'), name='api_verificar_certificado'), # URL pública para verificar a autenticidade de um certificado
 ]
 
 
@@ -1,11 +1,24 @@
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404
 from rest_framework import generics, status
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
-from rest_framework.throttling import UserRateThrottle
+from rest_framework.renderers import JSONRenderer
+from rest_framework.permissions import AllowAny, BasePermission, IsAdminUser, IsAuthenticated
+from rest_framework.throttling import AnonRateThrottle, UserRateThrottle
+from rest_framework.views import APIView
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.authtoken.models import Token
-from sgea_app.models import Evento
-from .serializers import EventoSerializer, InscricaoSerializer
+from sgea_app.models import Evento, EstatisticaOrganizador, ListaEspera
+from sgea_app.busca import LIMITE_RESULTADOS, buscar_eventos
+from sgea_app.certificados import dados_verificacao
+from sgea_app.checkin import aplicar_checkins, lista_checkin
+from sgea_app.fila import metricas as metricas_fila
+from sgea_app.conflitos import conflitos_do_usuario, eventos_conflitantes, inscricao_bloqueada, mensagem_conflito
+from .exportacao import (
+    NDJSONRenderer, campos_exportacao, data_exportacao, eventos_exportacao, linhas_ndjson, marca_exportacao,
+    removidos_exportacao,
+)
+from .serializers import EventoSerializer, InscricaoSerializer, IntervaloEventoSerializer, EstatisticaEventoSerializer, EstatisticaOrganizadorSerializer, LoteCheckinSerializer
 
 
 # Controle do número de requisições
@@ -15,15 +28,68 @@ class EventoThrottle(UserRateThrottle):
 class InscricaoThrottle(UserRateThrottle):
     scope = 'inscricoes'
 
+class VerificacaoThrottle(AnonRateThrottle):
+    scope = 'verificacao'
+
+class CheckinThrottle(UserRateThrottle):
+    scope = 'checkin'
+
+class FilaThrottle(UserRateThrottle):
+    scope = 'fila'
+
+class ExportacaoThrottle(UserRateThrottle):
+    scope = 'exportacao'
+
+
+# Permissão: apenas usuários com perfil Organizador
+class IsOrganizador(BasePermission):
+    def has_permission(self, request, view):
+        return bool(request.user and request.user.is_authenticated and request.user.perfil == 'Organizador')
+
 
 
 # Endpoint de consulta à Lista de Eventos
 class ListaEventosAPIView(generics.ListAPIView):
-    queryset = Evento.objects.all()
+    queryset = Evento.objects.select_related('organizador')
     serializer_class = EventoSerializer
     permission_classes = [IsAuthenticated]
     throttle_classes = [EventoThrottle]
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        # Busca textual opcional: /api/eventos/?q=semana academica
+        consulta = self.request.query_params.get('q', '').strip()
+        if consulta:
+            queryset = buscar_eventos(queryset, consulta)[:LIMITE_RESULTADOS]
+        return queryset
+
+
+
+# Endpoint de exportação do catálogo em NDJSON: /api/eventos/exportar/?fields=id,nome&updated_since=2025-03-01T12:00:00Z
+class ExportacaoEventosAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [ExportacaoThrottle]
+    renderer_classes = [NDJSONRenderer, JSONRenderer]
+
+    def get(self, request):
+        try:
+            campos = campos_exportacao(request.query_params.get('fields'))
+            desde = data_exportacao(request.query_params.get('updated_since'))
+        except ValueError as erro:
+            return Response({'detail': str(erro)}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Próximo updated_since do parceiro: o momento anterior à leitura, com recuo
+        exportado_em = marca_exportacao()
+        # Exportação completa não precisa de remoções: o parceiro substitui o espelho
+        removidos = removidos_exportacao(desde) if desde is not None else None
+        response = StreamingHttpResponse(
+            linhas_ndjson(eventos_exportacao(desde), campos, request, removidos),
+            content_type='application/x-ndjson; charset=utf-8',
+        )
+        response['X-Exportado-Em'] = exportado_em.isoformat()
+        response['Cache-Control'] = 'no-store'
+        return response
+
 
 
 # Endpoint de inscrição em eventos
@@ -35,8 +101,53 @@ class InscricaoAPIView(generics.CreateAPIView):
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        serializer.save()
-        return Response({'mensagem': 'Inscrição realizada com sucesso!'}, status=status.HTTP_201_CREATED)
+        instancia = serializer.save()
+
+        if isinstance(instancia, ListaEspera):
+            # Evento lotado: o pedido foi aceito, mas a inscrição depende de uma vaga
+            return Response({
+                'mensagem': 'O evento atingiu o limite de vagas. O usuário entrou na lista de espera '
+                            'e será inscrito automaticamente quando surgir uma vaga.',
+                'posicao_espera': instancia.posicao_atual,
+            }, status=status.HTTP_202_ACCEPTED)
+
+        dados = {'mensagem': 'Inscrição realizada com sucesso!'}
+        conflitos = serializer.validated_data.get('conflitos')
+        if conflitos:
+            # Política 'avisar': a inscrição é feita, mas o conflito é informado
+            dados['aviso'] = mensagem_conflito(conflitos)
+            dados['conflitos'] = IntervaloEventoSerializer(conflitos, many=True).data
+        return Response(dados, status=status.HTTP_201_CREATED)
+
+
+
+# Endpoint de conflitos de horário do usuário autenticado
+class ConflitosAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [InscricaoThrottle]
+
+    def get(self, request):
+        # Com ?evento=<id>: conflitos que uma inscrição nesse evento causaria
+        evento_id = request.query_params.get('evento')
+        if evento_id:
+            evento = get_object_or_404(Evento, pk=evento_id)
+            conflitos = eventos_conflitantes(request.user, evento)
+            return Response({
+                'evento': IntervaloEventoSerializer(evento).data,
+                'bloqueia': inscricao_bloqueada(evento, conflitos),
+                'conflitos': IntervaloEventoSerializer(conflitos, many=True).data,
+            })
+
+        pares = conflitos_do_usuario(request.user)
+        return Response({
+            'conflitos': [
+                {
+                    'evento': IntervaloEventoSerializer(evento_a).data,
+                    'conflita_com': IntervaloEventoSerializer(evento_b).data,
+                }
+                for evento_a, evento_b in pares
+            ]
+        })
 
 
 
@@ -53,4 +164,77 @@ class LoginAPIView(ObtainAuthToken):
             'usuario_id': user.id,
             'usuario_nome': getattr(user, 'nome', str(user)),
             'mensagem': 'Login realizado com sucesso!'
-        })
\ No newline at end of file
+        })
+
+
+
+# Endpoint público de verificação de autenticidade de certificados
+class VerificarCertificadoAPIView(APIView):
+    authentication_classes = []
+    permission_classes = [AllowAny]
+    throttle_classes = [VerificacaoThrottle]
+
+    def get(self, request, codigo):
+        dados = dados_verificacao(codigo)
+        if dados is None:
+            response = Response({'valido': False, 'detalhe': 'Certificado não encontrado.'}, status=status.HTTP_404_NOT_FOUND)
+            response['Cache-Control'] = 'public, max-age=600'
+            return response
+
+        response = Response(dados)
+        response['Cache-Control'] = 'public, max-age=86400'
+        return response
+
+
+
+# Endpoint de estatísticas dos eventos do organizador (contadores mantidos incrementalmente)
+class EstatisticasAPIView(APIView):
+    permission_classes = [IsAuthenticated, IsOrganizador]
+    throttle_classes = [EventoThrottle]
+
+    def get(self, request):
+        eventos = Evento.objects.filter(
+            organizador=request.user
+        ).select_related('estatistica').order_by('data_inicial')
+        resumo = EstatisticaOrganizador.objects.filter(organizador=request.user).first()
+
+        return Response({
+            'organizador': EstatisticaOrganizadorSerializer(resumo).data if resumo else None,
+            'eventos': EstatisticaEventoSerializer(eventos, many=True).data,
+        })
+
+
+
+# Endpoint de check-in offline: download da lista do evento (GET) e envio dos check-ins em lote (POST)
+class CheckinAPIView(APIView):
+    permission_classes = [IsAuthenticated, IsOrganizador]
+    throttle_classes = [CheckinThrottle]
+
+    def get(self, request, evento_id):
+        # Com ?desde=<cursor>: só as inscrições alteradas depois da lista do cursor
+        evento = get_object_or_404(Evento.objects.only('pk'), pk=evento_id, organizador=request.user)
+        response = Response(lista_checkin(evento.pk, request.query_params.get('desde')))
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
+    def post(self, request, evento_id):
+        evento = get_object_or_404(Evento.objects.only('pk'), pk=evento_id, organizador=request.user)
+        serializer = LoteCheckinSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        resultado = aplicar_checkins(evento.pk, serializer.validated_data['cursor'], serializer.validated_data['checkins'])
+        if resultado is None:
+            return Response({'cursor': 'Cursor inválido para este evento.'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(resultado)
+
+
+
+# Endpoint de monitoramento da fila de tarefas (profundidade e latência), para a equipe (is_staff)
+class FilaAPIView(APIView):
+    permission_classes = [IsAuthenticated, IsAdminUser]
+    throttle_classes = [FilaThrottle]
+
+    def get(self, request):
+        response = Response(metricas_fila())
+        response['Cache-Control'] = 'no-store'
+        return response
@@ -15,8 +15,20 @@ def main():
             "available on your PYTHONPATH environment variable? Did you "
             "forget to activate a virtual environment?"
         ) from exc
+    if inicio_rapido() and sys.argv[1:2] == ['runserver']:
+        # Executável empacotado: o autoreloader reiniciaria o processo inteiro e as
+        # verificações do sistema já foram feitas no build
+        for opcao in ('--noreload', '--skip-checks'):
+            if opcao not in sys.argv:
+                sys.argv.append(opcao)
     execute_from_command_line(sys.argv)
 
 
+def inicio_rapido():
+    """ Mesmo critério de SGEA_INICIO_RAPIDO em settings.py (lido antes do Django). """
+    from decouple import config
+    return config('SGEA_INICIO_RAPIDO', default=getattr(sys, 'frozen', False), cast=bool)
+
+
 if __name__ == '__main__':
     main()
\ No newline at end of file
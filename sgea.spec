@@ -0,0 +1,79 @@
+# -*- mode: python ; coding: utf-8 -*-
+# Executável do SGEA para distribuição nos campi.
+#
+#   pyinstaller sgea.spec
+#   dist/sgea/sgea runserver 0.0.0.0:8000
+#
+# Otimizado para a inicialização:
+# - 'onedir' (COLLECT): o executável 'onefile' extrai tudo para uma pasta temporária
+#   a cada execução, o que sozinho passa de um segundo;
+# - sem UPX: descompactar as bibliotecas também custa tempo na abertura;
+# - bytecode pré-compilado com optimize=1 (sem asserts; as docstrings ficam, o DRF as usa);
+# - módulos de interface gráfica e de integrações não usadas ficam de fora;
+# - no executável, SGEA_INICIO_RAPIDO vem ativo (ver settings.py e manage.py).
+#
+# Antes da análise, o comando 'perfil_inicializacao' roda as verificações do sistema
+# (que o executável pula ao iniciar) e gera, a partir do código-fonte, o relatório de
+# tempo de importação que vai junto no build (perfil_inicializacao.txt).
+
+import os
+import subprocess
+import sys
+
+relatorio = os.path.join(SPECPATH, 'build', 'perfil_inicializacao.txt')
+subprocess.run(
+    [sys.executable, os.path.join(SPECPATH, 'manage.py'), 'perfil_inicializacao', '--saida', relatorio],
+    cwd=SPECPATH, check=True,
+)
+
+a = Analysis(
+    ['manage.py'],
+    pathex=[SPECPATH],
+    binaries=[],
+    datas=[(relatorio, '.')],
+    # Importados por caminho (import_string), invisíveis para a análise estática
+    hiddenimports=[
+        'api.urls',
+        'api.views',
+        'sgea_app.backends',
+        'sgea_app.middleware',
+        'sgea_app.management.commands.perfil_inicializacao',
+        'sgea_app.management.commands.processar_fila',
+        'sgea_app.management.commands.servir',
+    ],
+    hookspath=[],
+    hooksconfig={},
+    runtime_hooks=[],
+    excludes=[
+        'tkinter',
+        'PIL.ImageTk',
+        'PIL.ImageQt',
+        'PIL.ImageShow',
+        'numpy',
+        'IPython',
+    ],
+    noarchive=False,
+    optimize=1,
+)
+pyz = PYZ(a.pure)
+
+exe = EXE(
+    pyz,
+    a.scripts,
+    [],
+    exclude_binaries=True,
+    name='sgea',
+    debug=False,
+    bootloader_ignore_signals=False,
+    strip=False,
+    upx=False,
+    console=True,
+)
+coll = COLLECT(
+    exe,
+    a.binaries,
+    a.datas,
+    strip=False,
+    upx=False,
+    name='sgea',
+)
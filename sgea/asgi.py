@@ -1,5 +1,5 @@
 """
-ASGI config for Projeto_SGEA project.
+ASGI config for sgea project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
@@ -11,6 +11,8 @@ import os
 
 from django.core.asgi import get_asgi_application
 
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Projeto_SGEA.settings')
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sgea.settings')
 
+# Os contadores ao vivo da lista de inscritos (server-sent events) exigem este
+# ponto de entrada, por exemplo: uvicorn sgea.asgi:application
 application = get_asgi_application()
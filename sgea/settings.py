@@ -4,6 +4,7 @@ Django settings for sgea project.
 
 from pathlib import Path
 import os
+import sys
 from decouple import config # Importar aqui para uso na seção de e-mail
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -40,6 +41,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    # Compressão gzip das respostas textuais (HTML, CSS, JSON, .ics)
+    'sgea_app.middleware.CompressaoMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -54,8 +57,14 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [],
-        'APP_DIRS': True,
         'OPTIONS': {
+            # Templates compilados uma única vez por processo (carregador com cache)
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
             'context_processors': [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
@@ -66,6 +75,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'sgea.wsgi.application'
+ASGI_APPLICATION = 'sgea.asgi.application'
 
 
 # Database
@@ -75,10 +85,46 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # O worker da fila escreve em várias threads ao mesmo tempo: transações IMMEDIATE
+        # pegam o lock de escrita no início e esperam (timeout) em vez de falhar com
+        # "database is locked" ao promover uma leitura para escrita.
+        'OPTIONS': {
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
     }
 }
 
 
+# Cache
+# --------------------------------------------------------------------------
+# Padrão: memória de cada processo (LocMem), sem acesso a disco. Com SGEA_REDIS_URL
+# (ex: redis://127.0.0.1:6379/1), o cache passa a ser compartilhado entre processos e
+# servidores; requer o pacote 'redis'. O que precisa valer para todos os processos
+# (versões dos feeds, usuário em cache) tem prazo curto quando o cache não é compartilhado.
+
+SGEA_REDIS_URL = config('SGEA_REDIS_URL', default='')
+CACHE_COMPARTILHADO = bool(SGEA_REDIS_URL)
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': SGEA_REDIS_URL,
+    } if CACHE_COMPARTILHADO else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'sgea-default',
+        'OPTIONS': {'MAX_ENTRIES': 20000},
+    },
+    # Fragmentos de template (linhas de tabelas): a chave já contém a versão dos
+    # dados exibidos, então um cache em memória por processo é seguro e mais rápido.
+    'fragmentos': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'sgea-fragmentos',
+        'OPTIONS': {'MAX_ENTRIES': 20000},
+    },
+}
+
+
 # Password validation & User Model
 # --------------------------------------------------------------------------
 
@@ -99,6 +145,29 @@ AUTH_PASSWORD_VALIDATORS = [
 
 # Configuração do Modelo de Usuário Customizado
 AUTH_USER_MODEL = 'sgea_app.Usuario'
+
+# Backend com cache do usuário: evita a consulta ao Usuario em cada requisição
+AUTHENTICATION_BACKENDS = ['sgea_app.backends.UsuarioCacheBackend']
+
+
+# Sessões
+# --------------------------------------------------------------------------
+# 'cached_db' (padrão com Redis): leitura da sessão pelo cache, gravação no banco
+#   (sobrevive a uma limpeza do cache).
+# 'db' (padrão sem Redis): com o cache em memória de cada processo, um logout feito
+#   em um processo não apagaria a sessão em cache nos outros.
+# 'cache': sessões só no cache; nenhum acesso ao banco (requer Redis).
+# 'signed_cookies': sessão assinada no próprio cookie; nada no servidor.
+# Em todos os casos o logout e a troca de senha invalidam a sessão (hash da senha).
+SESSION_ENGINE = config(
+    'SGEA_SESSION_ENGINE',
+    default='django.contrib.sessions.backends.cached_db' if CACHE_COMPARTILHADO
+    else 'django.contrib.sessions.backends.db',
+)
+SESSION_COOKIE_HTTPONLY = True
+
+# Mensagens em cookie: exibir um aviso não exige gravar a sessão
+MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 
@@ -122,6 +191,21 @@ DATE_INPUT_FORMATS = [
 # --------------------------------------------------------------------------
 
 STATIC_URL = 'static/'
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+# Em produção, 'collectstatic' grava os arquivos com hash do conteúdo no nome
+# (ex: sgea.3f2a9c.css), permitindo cache de longa duração no navegador.
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': (
+            'django.contrib.staticfiles.storage.StaticFilesStorage' if DEBUG
+            else 'django.contrib.staticfiles.storage.ManifestStaticFilesStorage'
+        ),
+    },
+}
 
 # Configurações para Upload de Mídia (Imagens do Banner)
 MEDIA_URL = '/media/'
@@ -130,6 +214,25 @@ MEDIA_URL = '/media/'
 # Usamos o objeto BASE_DIR (que é um Pathlib.Path) e o operador /
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Arquivos que não podem ter URL pública (ex: exportações de dados pessoais): ficam
+# fora do MEDIA_ROOT, que em DEBUG é servido inteiro pelo static() das urls
+ARQUIVOS_PRIVADOS_ROOT = BASE_DIR / 'privado'
+
+# Limites do upload de banner (as variantes são geradas em segundo plano)
+BANNER_TAMANHO_MAXIMO = 10 * 1024 * 1024  # 10 MB
+BANNER_PIXELS_MAXIMO = 40_000_000  # ~40 megapixels
+
+# Entrega de mídia em produção (rota 'servir_midia')
+# Diretórios do MEDIA_ROOT que podem ser servidos sem autenticação
+MIDIA_PREFIXOS_PUBLICOS = ('eventos/banners/',)
+# Com nginx, defina um location 'internal' apontando para o MEDIA_ROOT
+# (ex: '/protegido/') para que ele faça o sendfile e os Range requests.
+MIDIA_X_ACCEL_REDIRECT = None
+
+# Arquivamento: eventos encerrados há mais meses que isto saem das tabelas ativas
+# (comando 'arquivar_eventos'). Certificados arquivados continuam baixáveis e verificáveis.
+ARQUIVO_MESES = 12
+
 
 # Authentication & Redirection
 # --------------------------------------------------------------------------
@@ -157,12 +260,40 @@ REST_FRAMEWORK = {
     'DEFAULT_THROTTLE_RATES': {
         'eventos': '20/day',
         'inscricoes': '50/day',
+        'verificacao': '100/hour',
+        'checkin': '2000/day',
+        'fila': '120/hour',
+        'exportacao': '60/hour',
     },
 }
 
 # E-mail Configuration
 # --------------------------------------------------------------------------
-# E-mail inventado para a funcionalidade
+# E-mail inventado para a funcionalidade: por padrão os e-mails só aparecem no console.
+# Para testar o envio por SMTP sem servidor externo, rode 'python manage.py smtp_local'
+# e use no .env: EMAIL_BACKEND=django.core.mail.backends.smtp.EmailBackend,
+# EMAIL_HOST=127.0.0.1, EMAIL_PORT=1025 e EMAIL_USE_TLS=False
 
-EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
-DEFAULT_FROM_EMAIL = "nao-responder@sgea.com"
\ No newline at end of file
+EMAIL_BACKEND = config('EMAIL_BACKEND', default="django.core.mail.backends.console.EmailBackend")
+EMAIL_HOST = config('EMAIL_HOST', default='127.0.0.1')
+EMAIL_PORT = config('EMAIL_PORT', default=25, cast=int)
+EMAIL_USE_TLS = config('EMAIL_USE_TLS', default=False, cast=bool)
+EMAIL_HOST_USER = config('EMAIL_HOST_USER', default='')
+EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
+DEFAULT_FROM_EMAIL = "nao-responder@sgea.com"
+
+
+# Inicialização rápida
+# --------------------------------------------------------------------------
+# Padrão no executável do PyInstaller (sgea.spec): o runserver sobe sem o autoreloader
+# e sem as verificações do sistema, e os templates são compilados em segundo plano
+# depois da primeira resposta. Ver sgea_app/inicializacao.py.
+
+SGEA_INICIO_RAPIDO = config('SGEA_INICIO_RAPIDO', default=getattr(sys, 'frozen', False), cast=bool)
+
+if SGEA_INICIO_RAPIDO:
+    # Sem o app 'rest_framework', o primeiro template compilado não carrega as
+    # templatetags do DRF (que importam o DRF inteiro); a API responde só em JSON,
+    # sem a interface navegável. O DRF é importado na primeira requisição a /api/.
+    INSTALLED_APPS.remove('rest_framework')
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'] = ['rest_framework.renderers.JSONRenderer']
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, re_path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
@@ -10,4 +10,10 @@ urlpatterns = [
 ]
 
 if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+else:
+    # Em produção, os estáticos (com hash no nome) são servidos com cache longo
+    from sgea_app.views import servir_estatico
+    urlpatterns += [
+        re_path(r'^%s(?P<caminho>.+)$' % settings.STATIC_URL.lstrip('/'), servir_estatico, name='servir_estatico'),
+    ]
\ No newline at end of file
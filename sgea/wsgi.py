@@ -1,5 +1,5 @@
 """
-WSGI config for Projeto_SGEA project.
+WSGI config for sgea project.
 
 It exposes the WSGI callable as a module-level variable named ``application``.
 
@@ -11,6 +11,6 @@ import os
 
 from django.core.wsgi import get_wsgi_application
 
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Projeto_SGEA.settings')
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sgea.settings')
 
 application = get_wsgi_application()
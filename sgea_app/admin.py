@@ -1,11 +1,261 @@
 # sgea_app/admin.py
 from django.contrib import admin
-from .models import Usuario, Evento # Importe todos os seus modelos
+from django.core.paginator import Paginator
+from django.db import connection
+from django.db.models import Q
+from django.utils.functional import cached_property
 
-# Registre o modelo de usuário customizado
-admin.site.register(Usuario) 
+from .models import Usuario, Evento, Inscricao, Certificado, RegistroAuditoria, TarefaFila # Importe todos os seus modelos
+from .fila import reenfileirar
+from . import busca, certificados, checkin
+from .utils import log_auditoria
 
-# Registre os demais modelos
-admin.site.register(Evento)
-# admin.site.register(Inscricao)
-# admin.site.register(Certificado)
\ No newline at end of file
+# Tabelas grandes (inscrições, certificados, auditoria) no admin:
+# - as colunas da lista vêm na mesma consulta (list_select_related);
+# - sem filtros, o total da lista é a estimativa do banco, não um COUNT(*) da tabela;
+# - a busca só usa colunas indexadas (id, login/e-mail, prefixo do nome, código,
+#   índice de busca dos eventos), nunca um LIKE '%termo%' em cada campo;
+# - as ações em lote são UPDATE/INSERT sobre o conjunto, com as estatísticas e a
+#   versão do check-in atualizadas explicitamente (não há signals nessas operações).
+
+# Abaixo disto o COUNT(*) é barato e o total exato é mostrado
+LIMITE_CONTAGEM_EXATA = 10000
+
+
+def estimar_linhas(modelo):
+    """ Quantidade aproximada de linhas da tabela, sem percorrê-la. None se o banco não informar. """
+    tabela = modelo._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [tabela])
+        elif connection.vendor == 'mysql':
+            cursor.execute(
+                "SELECT table_rows FROM information_schema.tables WHERE table_schema = DATABASE() AND table_name = %s",
+                [tabela],
+            )
+        elif connection.vendor == 'sqlite':
+            # Estatísticas do ANALYZE (o primeiro número de 'stat' é o total de linhas). Sem
+            # elas, o COUNT(*) exato: o maior rowid não serve, o arquivamento deixa buracos
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'")
+            if cursor.fetchone() is None:
+                return None
+            cursor.execute("SELECT CAST(stat AS INTEGER) FROM sqlite_stat1 WHERE tbl = %s LIMIT 1", [tabela])
+        else:
+            return None
+        linha = cursor.fetchone()
+    # O PostgreSQL informa -1 para tabelas ainda não analisadas
+    if not linha or linha[0] is None or linha[0] < 0:
+        return None
+    return linha[0]
+
+
+class PaginadorEstimado(Paginator):
+    """ Paginador do admin: sem filtros, usa a estimativa do banco para tabelas grandes. """
+
+    @cached_property
+    def count(self):
+        consulta = self.object_list
+        if not consulta.query.where:
+            estimativa = estimar_linhas(consulta.model)
+            if estimativa is not None and estimativa > LIMITE_CONTAGEM_EXATA:
+                return estimativa
+        return super().count
+
+
+def filtro_usuarios(termo):
+    """ Id, login ou e-mail exatos (índices únicos) ou início do nome (índice de nome_busca). """
+    if termo.isdigit():
+        return Q(pk=int(termo))
+    if '@' in termo:
+        return Q(email=termo) | Q(login=termo)
+    prefixo = busca.remover_acentos(termo)[:50]
+    return Q(login=termo) | Q(nome_busca__gte=prefixo, nome_busca__lt=prefixo + '\uffff')
+
+
+def filtro_eventos(termo):
+    """ Id exato ou o índice de busca dos eventos (o mesmo da busca pública). """
+    if termo.isdigit():
+        return Q(pk=int(termo))
+    return busca.filtro_busca(termo)
+
+
+class AdminTabelaGrande(admin.ModelAdmin):
+    """
+    Base dos admins das tabelas grandes. Nas subclasses que definem filtro_busca(),
+    search_fields só documenta as colunas buscadas (e habilita a caixa de busca).
+    """
+    paginator = PaginadorEstimado
+    show_full_result_count = False
+    list_per_page = 50
+
+    def filtro_busca(self, termo):
+        """ Q da busca; o padrão é o id exato, e None usa a busca do Django em search_fields. """
+        return Q(pk=int(termo)) if termo.isdigit() else None
+
+    def get_search_results(self, request, queryset, search_term):
+        termo = search_term.strip()
+        if not termo:
+            return queryset, False
+        filtro = self.filtro_busca(termo)
+        if filtro is None:
+            return super().get_search_results(request, queryset, search_term)
+        return queryset.filter(filtro), False
+
+
+# Usuários e eventos: a busca também atende o autocomplete das inscrições
+@admin.register(Usuario)
+class UsuarioAdmin(AdminTabelaGrande):
+    list_display = ('id', 'nome', 'login', 'email', 'perfil', 'is_active')
+    list_filter = ('perfil', 'is_active')
+    search_fields = ('=id', '=login', '=email', '^nome_busca')
+    search_help_text = "Id, login ou e-mail completos, ou o início do nome."
+    ordering = ('-id',)
+
+    def filtro_busca(self, termo):
+        return filtro_usuarios(termo)
+
+
+@admin.register(Evento)
+class EventoAdmin(AdminTabelaGrande):
+    list_display = ('id', 'nome', 'tipo_evento', 'data_inicial', 'local', 'organizador')
+    list_select_related = ('organizador',)
+    search_fields = ('=id', 'nome', 'tipo_evento', 'local')
+    search_help_text = "Id do evento ou palavras do nome, tipo, local ou responsáveis."
+    date_hierarchy = 'data_inicial'
+    autocomplete_fields = ('organizador', 'professor_responsavel')
+    ordering = ('-id',)
+
+    def filtro_busca(self, termo):
+        return filtro_eventos(termo)
+
+    def get_search_results(self, request, queryset, search_term):
+        termo = search_term.strip()
+        if termo and not termo.isdigit():
+            # Mantém a ordem por relevância da busca (autocomplete)
+            return busca.buscar_eventos(queryset, termo), False
+        return super().get_search_results(request, queryset, search_term)
+
+
+@admin.register(Inscricao)
+class InscricaoAdmin(AdminTabelaGrande):
+    list_display = ('id', 'usuario', 'evento', 'inicio_evento', 'presenca_confirmada')
+    list_select_related = ('usuario', 'evento')
+    list_filter = ('presenca_confirmada',)
+    search_fields = ('=id', '=evento__id', '=usuario__login', '=usuario__email', '^usuario__nome_busca', 'evento__nome')
+    search_help_text = "Id da inscrição ou do evento, login/e-mail ou início do nome do participante, ou palavras do evento."
+    date_hierarchy = 'evento__inicio'
+    autocomplete_fields = ('usuario', 'evento')
+    readonly_fields = ('versao_lista',)
+    ordering = ('-id',)
+    actions = ['confirmar_presenca', 'desfazer_presenca', 'emitir_certificados']
+
+    @admin.display(description="Início do evento", ordering='evento__inicio')
+    def inicio_evento(self, inscricao):
+        return inscricao.evento.inicio
+
+    def filtro_busca(self, termo):
+        if termo.isdigit():
+            return Q(pk=int(termo)) | Q(evento_id=int(termo))
+        # Duas subconsultas por colunas indexadas (usuario_id, evento_id), sem JOIN no filtro
+        return (
+            Q(usuario__in=Usuario.objects.filter(filtro_usuarios(termo)).values('pk'))
+            | Q(evento__in=Evento.objects.filter(busca.filtro_busca(termo)).values('pk'))
+        )
+
+    @admin.action(description="Confirmar presença nas inscrições selecionadas")
+    def confirmar_presenca(self, request, queryset):
+        quantidade = checkin.definir_presencas(queryset, True)
+        log_auditoria(request.user, f'Confirmação de presença em lote (admin): {quantidade} inscrições')
+        self.message_user(request, f"Presença confirmada em {quantidade} inscrições.")
+
+    @admin.action(description="Desfazer a presença nas inscrições selecionadas")
+    def desfazer_presenca(self, request, queryset):
+        quantidade = checkin.definir_presencas(queryset, False)
+        log_auditoria(request.user, f'Presença desfeita em lote (admin): {quantidade} inscrições')
+        self.message_user(request, f"Presença desfeita em {quantidade} inscrições.")
+
+    @admin.action(description="Emitir certificados das inscrições selecionadas (com presença)")
+    def emitir_certificados(self, request, queryset):
+        # Um único INSERT; inscrições sem presença ou já com certificado ficam de fora
+        quantidade = certificados.emitir_certificados(
+            certificados.inscricoes_sem_certificado().filter(pk__in=queryset.order_by().values('pk'))
+        )
+        log_auditoria(request.user, f'Emissão MANUAL de {quantidade} certificados (admin)')
+        self.message_user(request, f"{quantidade} certificados emitidos.")
+
+
+@admin.register(Certificado)
+class CertificadoAdmin(AdminTabelaGrande):
+    list_display = ('id', 'codigo_formatado', 'participante', 'evento', 'data_emissao', 'status_emissao')
+    list_select_related = ('inscricao__usuario', 'inscricao__evento')
+    list_filter = ('status_emissao',)
+    search_fields = ('=id', '=codigo_verificacao', '=inscricao__usuario__login', '^inscricao__usuario__nome_busca')
+    search_help_text = "Id ou código de verificação do certificado, ou login/e-mail ou início do nome do participante."
+    date_hierarchy = 'data_emissao'
+    autocomplete_fields = ('inscricao',)
+    readonly_fields = ('codigo_verificacao', 'data_emissao')
+    ordering = ('-id',)
+    actions = ['marcar_emitidos']
+
+    @admin.display(description="Código de Verificação", ordering='codigo_verificacao')
+    def codigo_formatado(self, certificado):
+        return certificado.codigo_formatado()
+
+    @admin.display(description="Participante", ordering='inscricao__usuario__nome')
+    def participante(self, certificado):
+        return certificado.inscricao.usuario.nome
+
+    @admin.display(description="Evento", ordering='inscricao__evento__nome')
+    def evento(self, certificado):
+        return certificado.inscricao.evento.nome
+
+    def filtro_busca(self, termo):
+        if termo.isdigit():
+            return Q(pk=int(termo))
+        filtro = Q(inscricao__usuario__in=Usuario.objects.filter(filtro_usuarios(termo)).values('pk'))
+        codigo = certificados.normalizar_codigo(termo)
+        if codigo:
+            filtro |= Q(codigo_verificacao=codigo)
+        return filtro
+
+    @admin.action(description="Marcar os certificados selecionados como emitidos")
+    def marcar_emitidos(self, request, queryset):
+        quantidade = queryset.exclude(status_emissao='Emitido').update(status_emissao='Emitido')
+        self.message_user(request, f"{quantidade} certificados marcados como emitidos.")
+
+
+# Auditoria: somente leitura
+@admin.register(RegistroAuditoria)
+class RegistroAuditoriaAdmin(AdminTabelaGrande):
+    list_display = ('data_hora', 'usuario', 'acao')
+    list_select_related = ('usuario',)
+    search_fields = ('=usuario__id', '=usuario__login', '=usuario__email', '^usuario__nome_busca')
+    search_help_text = "Id, login ou e-mail completos, ou o início do nome do usuário."
+    date_hierarchy = 'data_hora'
+    ordering = ('-data_hora',)
+
+    def filtro_busca(self, termo):
+        return Q(usuario__in=Usuario.objects.filter(filtro_usuarios(termo)).values('pk'))
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+# Fila de tarefas: as falhas definitivas (dead letter) podem ser devolvidas à fila
+@admin.register(TarefaFila)
+class TarefaFilaAdmin(admin.ModelAdmin):
+    list_display = ('id', 'nome', 'estado', 'prioridade', 'tentativas', 'criada_em', 'executar_em', 'concluida_em')
+    list_filter = ('estado', 'nome')
+    readonly_fields = ('criada_em', 'iniciada_em', 'concluida_em', 'dono', 'reservada_ate')
+    actions = ['reenfileirar_falhas']
+
+    @admin.action(description="Devolver as tarefas com falha à fila")
+    def reenfileirar_falhas(self, request, queryset):
+        quantidade = reenfileirar(queryset)
+        self.message_user(request, f"{quantidade} tarefas devolvidas à fila.")
@@ -0,0 +1,189 @@
+import asyncio
+import json
+import threading
+
+from asgiref.sync import sync_to_async
+
+# Contadores ao vivo da lista de inscritos (server-sent events).
+#
+# Cada processo ASGI mantém um canal por evento com ouvintes conectados. O canal
+# guarda o estado atual (inscritos, vagas, presenças) e o repassa a todos os
+# ouvintes, então centenas de organizadores assistindo o mesmo evento não geram
+# consultas por conexão:
+# - variações feitas neste processo chegam por publicar_variacao (chamada por
+#   estatisticas.registrar_variacao após o commit) e são aplicadas sem consultar o banco;
+# - variações feitas em outros processos (workers WSGI, comandos) são percebidas por
+#   uma única leitura da EstatisticaEvento a cada INTERVALO_SINCRONIA segundos, por evento.
+
+INTERVALO_SINCRONIA = 5
+INTERVALO_KEEPALIVE = 15
+
+# Mensagens acumuladas por ouvinte lento antes de descartar as mais antigas.
+TAMANHO_FILA = 50
+
+CONTADORES = ('total_inscritos', 'presencas_confirmadas')
+
+
+def _derivar(estado):
+    estado['vagas_restantes'] = estado['quantidade_participantes'] - estado['total_inscritos']
+    return estado
+
+
+async def _ler_contadores(evento_id):
+    from . import estatisticas
+    from .models import EstatisticaEvento
+
+    campos = ('total_inscritos', 'presencas_confirmadas', 'evento__quantidade_participantes')
+    linha = await EstatisticaEvento.objects.filter(evento_id=evento_id).values(*campos).afirst()
+    if linha is None:
+        await sync_to_async(estatisticas.recalcular_evento)(evento_id)
+        linha = await EstatisticaEvento.objects.filter(evento_id=evento_id).values(*campos).afirst()
+        if linha is None:
+            return None
+
+    return _derivar({
+        'total_inscritos': linha['total_inscritos'],
+        'presencas_confirmadas': linha['presencas_confirmadas'],
+        'quantidade_participantes': linha['evento__quantidade_participantes'],
+    })
+
+
+def _entregar(fila, mensagem):
+    """ Executado no loop do ouvinte. Ouvinte lento perde as mensagens mais antigas. """
+    if fila.full():
+        fila.get_nowait()
+    fila.put_nowait(mensagem)
+
+
+class Canal:
+    def __init__(self, loop):
+        self.loop = loop
+        self.filas = set()
+        self.estado = None
+        self.versao = 0
+        self.tarefa = None
+
+
+class Transmissor:
+    """
+    Fan-out em memória: um canal por evento, compartilhado pelos ouvintes do processo.
+    publicar_variacao pode ser chamada de qualquer thread (views síncronas, signals).
+    """
+
+    def __init__(self):
+        self._trava = threading.Lock()
+        self._canais = {}
+
+    def _difundir(self, canal, tipo, dados):
+        """ Chamado com a trava adquirida. """
+        canal.versao += 1
+        mensagem = (tipo, dados, canal.versao)
+        for fila in canal.filas:
+            try:
+                canal.loop.call_soon_threadsafe(_entregar, fila, mensagem)
+            except RuntimeError:
+                # Loop já encerrado (desligamento do servidor)
+                pass
+
+    async def entrar(self, evento_id):
+        loop = asyncio.get_running_loop()
+        fila = asyncio.Queue(maxsize=TAMANHO_FILA)
+
+        with self._trava:
+            canal = self._canais.get(evento_id)
+            if canal is None:
+                canal = self._canais[evento_id] = Canal(loop)
+            canal.filas.add(fila)
+            estado = canal.estado
+
+        if estado is None:
+            estado = await _ler_contadores(evento_id)
+            with self._trava:
+                if canal.estado is None:
+                    canal.estado = estado
+                estado = canal.estado
+
+        with self._trava:
+            if canal.tarefa is None and canal.filas:
+                canal.tarefa = loop.create_task(self._sincronizar(evento_id, canal))
+        return fila, dict(estado or {})
+
+    def sair(self, evento_id, fila):
+        with self._trava:
+            canal = self._canais.get(evento_id)
+            if canal is None:
+                return
+            canal.filas.discard(fila)
+            if not canal.filas:
+                del self._canais[evento_id]
+                if canal.tarefa is not None:
+                    canal.loop.call_soon_threadsafe(canal.tarefa.cancel)
+
+    def publicar_variacao(self, evento_id, deltas):
+        """ Aplica as variações de contadores ao estado do canal e avisa os ouvintes. """
+        variacao = {campo: deltas[campo] for campo in CONTADORES if deltas.get(campo)}
+        if not variacao:
+            return
+
+        with self._trava:
+            canal = self._canais.get(evento_id)
+            if canal is None or canal.estado is None:
+                return
+            for campo, delta in variacao.items():
+                canal.estado[campo] += delta
+            _derivar(canal.estado)
+            self._difundir(canal, 'variacao', dict(canal.estado, variacao=variacao))
+
+    async def _sincronizar(self, evento_id, canal):
+        """ Uma leitura por evento a cada intervalo, para mudanças feitas fora deste processo. """
+        while True:
+            await asyncio.sleep(INTERVALO_SINCRONIA)
+            estado = await _ler_contadores(evento_id)
+            if estado is None:
+                continue
+            with self._trava:
+                if estado != canal.estado:
+                    canal.estado = estado
+                    self._difundir(canal, 'contadores', dict(estado))
+
+    def total_ouvintes(self, evento_id):
+        with self._trava:
+            canal = self._canais.get(evento_id)
+            return len(canal.filas) if canal else 0
+
+
+transmissor = Transmissor()
+
+
+def _formatar(tipo, dados, versao=None):
+    linhas = []
+    if versao is not None:
+        linhas.append(f'id: {versao}')
+    linhas.append(f'event: {tipo}')
+    linhas.append(f'data: {json.dumps(dados)}')
+    return '\n'.join(linhas) + '\n\n'
+
+
+async def fluxo_eventos(evento_id):
+    """
+    Gerador assíncrono do stream SSE de um evento: primeiro o estado atual,
+    depois cada variação. Comentários de keepalive evitam que proxies fechem a conexão.
+    """
+    fila, estado = await transmissor.entrar(evento_id)
+    try:
+        # Reconexões do navegador após 3 s se a conexão cair
+        yield 'retry: 3000\n\n'
+        yield _formatar('contadores', estado)
+        while True:
+            try:
+                tipo, dados, versao = await asyncio.wait_for(fila.get(), INTERVALO_KEEPALIVE)
+            except asyncio.TimeoutError:
+                yield ': keepalive\n\n'
+                continue
+            yield _formatar(tipo, dados, versao)
+    finally:
+        transmissor.sair(evento_id, fila)
+
+
+def publicar_variacao(evento_id, deltas):
+    transmissor.publicar_variacao(evento_id, deltas)
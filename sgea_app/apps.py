@@ -1,6 +1,18 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.core.signals import request_finished
+from django.db.models.signals import post_migrate
 
 
 class SgeaAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'sgea_app'
\ No newline at end of file
+    name = 'sgea_app'
+
+    def ready(self):
+        # Registra os receivers (índice de busca etc.)
+        from . import signals
+        post_migrate.connect(signals.criar_indice_busca, sender=self)
+
+        if settings.SGEA_INICIO_RAPIDO:
+            from .inicializacao import aquecer_apos_primeira_resposta
+            request_finished.connect(aquecer_apos_primeira_resposta, dispatch_uid='sgea_aquecer_templates')
@@ -0,0 +1,158 @@
+import time
+from datetime import date
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from . import estatisticas
+from .models import (
+    Certificado, CertificadoArquivado, Evento, EventoArquivado, Inscricao, InscricaoArquivada,
+)
+
+# Eventos encerrados há mais de ARQUIVO_MESES meses saem das tabelas ativas (Evento,
+# Inscricao, Certificado) e vão para as tabelas de arquivo. As consultas do dia a dia
+# (lista de eventos, dashboards, vagas) passam a percorrer só os eventos ativos.
+
+TAMANHO_LOTE = 50
+
+
+def data_limite(meses, hoje=None):
+    """ Data de 'meses' meses atrás (eventos com data_final anterior a ela são arquivados). """
+    hoje = hoje or timezone.now().date()
+    mes = hoje.month - 1 - meses
+    ano = hoje.year + mes // 12
+    mes = mes % 12 + 1
+    # Dia 31 em mês mais curto: usa o último dia do mês
+    for dia in (hoje.day, 30, 29, 28):
+        try:
+            return date(ano, mes, dia)
+        except ValueError:
+            continue
+
+
+def eventos_para_arquivar(limite):
+    """
+    Eventos encerrados antes de 'limite' (índice em data_final). Eventos com presença
+    confirmada ainda sem certificado ficam de fora até a emissão automática rodar.
+    O evento principal de uma série só sai depois de todas as suas sessões: excluí-lo
+    apagaria em cascata (Evento.serie) as sessões ainda ativas, sem copiá-las.
+    """
+    pendente = Inscricao.objects.filter(
+        evento=OuterRef('pk'), presenca_confirmada=True, certificado__isnull=True
+    )
+    sessao_ativa = Evento.objects.filter(serie=OuterRef('pk'))
+    return Evento.objects.filter(data_final__lt=limite).exclude(Exists(pendente)).exclude(
+        Exists(sessao_ativa)
+    ).order_by('pk')
+
+
+def arquivar_lote(evento_ids):
+    """
+    Copia os eventos, inscrições e certificados para o arquivo e os remove das
+    tabelas ativas, numa única transação. Retorna (eventos, inscricoes, certificados).
+    """
+    with transaction.atomic():
+        # Eventos principais com sessões fora do lote ficam para depois (ver eventos_para_arquivar)
+        evento_ids = set(evento_ids) - set(
+            Evento.objects.filter(serie_id__in=evento_ids).exclude(pk__in=evento_ids).values_list('serie_id', flat=True)
+        )
+        eventos = list(Evento.objects.filter(pk__in=evento_ids).select_for_update())
+        inscricoes = list(Inscricao.objects.filter(evento_id__in=evento_ids))
+        certificados = list(Certificado.objects.filter(inscricao__evento_id__in=evento_ids))
+
+        EventoArquivado.objects.bulk_create([
+            EventoArquivado(
+                id=evento.pk,
+                organizador_id=evento.organizador_id,
+                professor_responsavel_id=evento.professor_responsavel_id,
+                nome=evento.nome,
+                tipo_evento=evento.tipo_evento,
+                data_inicial=evento.data_inicial,
+                data_final=evento.data_final,
+                horario=evento.horario,
+                local=evento.local,
+                quantidade_participantes=evento.quantidade_participantes,
+                banner=evento.banner.name if evento.banner else '',
+            )
+            for evento in eventos
+        ])
+        InscricaoArquivada.objects.bulk_create([
+            InscricaoArquivada(
+                id=inscricao.pk,
+                usuario_id=inscricao.usuario_id,
+                evento_id=inscricao.evento_id,
+                presenca_confirmada=inscricao.presenca_confirmada,
+            )
+            for inscricao in inscricoes
+        ], batch_size=500)
+        CertificadoArquivado.objects.bulk_create([
+            CertificadoArquivado(
+                id=certificado.pk,
+                inscricao_id=certificado.inscricao_id,
+                data_emissao=certificado.data_emissao,
+                texto_certificado=certificado.texto_certificado,
+                status_emissao=certificado.status_emissao,
+                arquivo_certificado=certificado.arquivo_certificado.name or None,
+                codigo_verificacao=certificado.codigo_verificacao,
+            )
+            for certificado in certificados
+        ], batch_size=500)
+
+        # A exclusão em cascata dispara os signals (índice de busca, calendário, cache de
+        # verificação); os contadores incrementais são recalculados uma vez no final.
+        with estatisticas.suspender():
+            Evento.objects.filter(pk__in=evento_ids).delete()
+
+        for organizador_id in {evento.organizador_id for evento in eventos}:
+            estatisticas.recalcular_organizador(organizador_id)
+
+    return len(eventos), len(inscricoes), len(certificados)
+
+
+def arquivar_eventos(meses=None, tamanho_lote=TAMANHO_LOTE, limite=None):
+    """ Arquiva todos os eventos elegíveis, em lotes. Retorna os totais arquivados. """
+    if limite is None:
+        meses = meses if meses is not None else settings.ARQUIVO_MESES
+        limite = data_limite(meses)
+
+    totais = [0, 0, 0]
+    while True:
+        ids = list(eventos_para_arquivar(limite).values_list('pk', flat=True)[:tamanho_lote])
+        if not ids:
+            break
+        for posicao, quantidade in enumerate(arquivar_lote(ids)):
+            totais[posicao] += quantidade
+    return tuple(totais)
+
+
+# --- Medição das consultas do dia a dia (antes/depois do arquivamento) ---
+
+def _consultas_quentes():
+    hoje = timezone.now().date()
+    evento = Evento.objects.order_by('-data_final').only('pk', 'organizador_id').first()
+    consultas = {
+        'lista_eventos': lambda: list(Evento.objects.filter(data_inicial__gt=hoje).order_by('data_inicial')),
+        'eventos_ativos': lambda: Evento.objects.filter(data_final__gte=hoje).count(),
+        'total_eventos': lambda: Evento.objects.count(),
+        'total_inscricoes': lambda: Inscricao.objects.count(),
+    }
+    if evento is not None:
+        consultas['dashboard_organizador'] = lambda: list(
+            Evento.objects.filter(organizador_id=evento.organizador_id)
+            .select_related('professor_responsavel', 'estatistica').order_by('data_inicial')
+        )
+        consultas['vagas_evento'] = lambda: Inscricao.objects.filter(evento_id=evento.pk).count()
+    return consultas
+
+
+def medir_consultas(repeticoes=20):
+    """ Tempo médio (ms) de cada consulta do dia a dia sobre as tabelas ativas. """
+    resultados = {}
+    for nome, consulta in _consultas_quentes().items():
+        inicio = time.perf_counter()
+        for _ in range(repeticoes):
+            consulta()
+        resultados[nome] = (time.perf_counter() - inicio) * 1000 / repeticoes
+    return resultados
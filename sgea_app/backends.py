@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+# O AuthenticationMiddleware carrega o usuário do banco a cada requisição autenticada.
+# Este backend guarda o Usuario (com o perfil) no cache, então as checagens de
+# is_organizador/is_aluno_or_professor não precisam de consulta. A entrada é
+# removida quando o usuário é salvo (ex: troca de senha) ou faz logout (ver signals.py).
+# Sem cache compartilhado, a remoção só vale no processo que a fez: nos demais, a
+# entrada expira em poucos segundos.
+
+TEMPO_CACHE_USUARIO = 5 * 60 if settings.CACHE_COMPARTILHADO else 30
+
+
+def chave_usuario(usuario_id):
+    return f"auth:usuario:{usuario_id}"
+
+
+def invalidar_usuario(usuario_id):
+    cache.delete(chave_usuario(usuario_id))
+
+
+class UsuarioCacheBackend(ModelBackend):
+    """ ModelBackend com cache do usuário autenticado. """
+
+    def get_user(self, user_id):
+        chave = chave_usuario(user_id)
+        usuario = cache.get(chave)
+        if usuario is None:
+            usuario = super().get_user(user_id)
+            if usuario is None:
+                return None
+            cache.set(chave, usuario, TEMPO_CACHE_USUARIO)
+        return usuario if self.user_can_authenticate(usuario) else None
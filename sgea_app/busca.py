@@ -0,0 +1,340 @@
+import hashlib
+import re
+import time
+import unicodedata
+
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import FloatField, Q
+from django.db.models.expressions import Expression, RawSQL
+from django.db.models.sql.constants import INNER
+from django.db.models.sql.datastructures import Join
+
+# Tabela auxiliar do índice de busca (não é um modelo do Django):
+# - SQLite: tabela virtual FTS5, com rowid = id do Evento
+# - PostgreSQL: tabela comum com coluna tsvector e índice GIN
+TABELA_BUSCA = 'sgea_evento_busca'
+
+# Quantidade máxima de resultados exibidos numa busca (aplicada ao resultado final,
+# depois de todos os filtros).
+LIMITE_RESULTADOS = 200
+
+# Eventos por executemany na reindexação
+LOTE_INDEXACAO = 500
+
+
+def remover_acentos(texto):
+    """ 'Semana Acadêmica' -> 'semana academica' (busca sem acentos). """
+    normalizado = unicodedata.normalize('NFKD', texto or '')
+    return ''.join(c for c in normalizado if not unicodedata.combining(c)).lower()
+
+
+def _termos(consulta):
+    """ Quebra a consulta do usuário em termos simples (sem operadores da FTS). """
+    return re.findall(r'\w+', remover_acentos(consulta))[:10]
+
+
+def busca_disponivel():
+    return connection.vendor in ('sqlite', 'postgresql')
+
+
+def criar_indice():
+    """
+    Cria a tabela do índice, se ainda não existir, e popula com os eventos atuais.
+    Chamado após o 'migrate' (ver signals.py).
+    """
+    if not busca_disponivel():
+        return
+
+    tabelas = connection.introspection.table_names()
+    if TABELA_BUSCA in tabelas:
+        return
+
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE {TABELA_BUSCA} USING fts5("
+                "nome, tipo_evento, local, pessoas, "
+                "tokenize = 'unicode61 remove_diacritics 2')"
+            )
+        else:
+            cursor.execute(
+                f"CREATE TABLE {TABELA_BUSCA} ("
+                "evento_id bigint PRIMARY KEY, documento tsvector NOT NULL)"
+            )
+            cursor.execute(
+                f"CREATE INDEX {TABELA_BUSCA}_documento_idx ON {TABELA_BUSCA} USING GIN (documento)"
+            )
+
+    reindexar_todos()
+
+
+def _documento(evento):
+    pessoas = f"{evento.organizador.nome} {evento.professor_responsavel.nome}"
+    return [
+        remover_acentos(evento.nome),
+        remover_acentos(evento.tipo_evento),
+        remover_acentos(evento.local),
+        remover_acentos(pessoas),
+    ]
+
+
+def indexar_evento(evento):
+    """ Insere ou atualiza o evento no índice de busca. """
+    indexar_eventos([evento])
+
+
+def indexar_eventos(eventos):
+    """ Insere ou atualiza vários eventos no índice, com um executemany por comando. """
+    if not busca_disponivel() or not eventos:
+        return
+
+    documentos = [(evento.pk, *_documento(evento)) for evento in eventos]
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.executemany(
+                f"DELETE FROM {TABELA_BUSCA} WHERE rowid = %s", [(evento_id,) for evento_id, *_ in documentos]
+            )
+            cursor.executemany(
+                f"INSERT INTO {TABELA_BUSCA} (rowid, nome, tipo_evento, local, pessoas) "
+                "VALUES (%s, %s, %s, %s, %s)",
+                documentos,
+            )
+        else:
+            # Pesos: nome (A), tipo (B), pessoas (C), local (D)
+            cursor.executemany(
+                f"INSERT INTO {TABELA_BUSCA} (evento_id, documento) VALUES (%s, "
+                "setweight(to_tsvector('portuguese', %s), 'A') || "
+                "setweight(to_tsvector('portuguese', %s), 'B') || "
+                "setweight(to_tsvector('portuguese', %s), 'C') || "
+                "setweight(to_tsvector('portuguese', %s), 'D')) "
+                "ON CONFLICT (evento_id) DO UPDATE SET documento = EXCLUDED.documento",
+                [(evento_id, nome, tipo_evento, pessoas, local) for evento_id, nome, tipo_evento, local, pessoas in documentos],
+            )
+
+
+def remover_evento(evento_id):
+    """ Remove o evento do índice de busca. """
+    if not busca_disponivel():
+        return
+
+    coluna = 'rowid' if connection.vendor == 'sqlite' else 'evento_id'
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABELA_BUSCA} WHERE {coluna} = %s", [evento_id])
+
+
+def reindexar_todos():
+    """ Reconstrói o índice a partir da tabela de eventos. """
+    from .models import Evento
+
+    if not busca_disponivel():
+        return 0
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABELA_BUSCA}")
+    return reindexar_eventos(Evento.objects.all())
+
+
+def reindexar_eventos(eventos):
+    """ Reindexa os eventos do queryset em lotes de LOTE_INDEXACAO. Retorna quantos. """
+    if not busca_disponivel():
+        return 0
+
+    total = 0
+    lote = []
+    for evento in eventos.select_related('organizador', 'professor_responsavel').iterator(chunk_size=LOTE_INDEXACAO):
+        lote.append(evento)
+        if len(lote) == LOTE_INDEXACAO:
+            indexar_eventos(lote)
+            total += len(lote)
+            lote = []
+    indexar_eventos(lote)
+    return total + len(lote)
+
+
+def _expressao(consulta):
+    """ Consulta do usuário na sintaxe do índice, ou None se não houver termos. """
+    termos = _termos(consulta)
+    if not termos:
+        return None
+    if connection.vendor == 'sqlite':
+        # Cada termo vira uma busca por prefixo: "semana"* "acad"*
+        return ' '.join(f'"{termo}"*' for termo in termos)
+    return ' & '.join(f'{termo}:*' for termo in termos)
+
+
+def _ids_encontrados(expressao):
+    """ Subconsulta com os ids de todos os eventos que casam com a expressão (sem limite). """
+    if connection.vendor == 'sqlite':
+        return RawSQL(f"SELECT rowid FROM {TABELA_BUSCA} WHERE {TABELA_BUSCA} MATCH %s", [expressao])
+    return RawSQL(
+        f"SELECT evento_id FROM {TABELA_BUSCA} WHERE documento @@ to_tsquery('portuguese', %s)", [expressao]
+    )
+
+
+class JuncaoBusca(Join):
+    """
+    INNER JOIN dos eventos com os resultados do índice, (evento_id, relevancia), numa
+    subconsulta: o MATCH roda uma vez por busca e a relevância de cada evento (menor =
+    mais relevante) vem da junção, sem uma busca no índice por linha. O INNER JOIN já
+    restringe os eventos aos encontrados. Entra em Query.alias_map como as junções do
+    Django, então os aliases são renomeados quando o queryset vira subconsulta.
+    """
+
+    def __init__(self, expressao, parent_alias, table_alias=None, join_type=INNER):
+        self.table_name = 'sgea_evento_relevancia'
+        self.parent_alias = parent_alias
+        self.table_alias = table_alias
+        self.join_type = join_type
+        self.join_field = None
+        self.nullable = False
+        self.filtered_relation = None
+        self.expressao = expressao
+
+    @property
+    def identity(self):
+        # A expressão antes do filtered_relation, que Join.equals() ignora
+        return self.__class__, self.table_name, self.parent_alias, self.expressao, self.filtered_relation
+
+    def relabeled_clone(self, change_map):
+        return self.__class__(
+            self.expressao, change_map.get(self.parent_alias, self.parent_alias),
+            change_map.get(self.table_alias, self.table_alias), self.join_type,
+        )
+
+    def as_sql(self, compiler, connection):
+        if connection.vendor == 'sqlite':
+            # bm25 com pesos por coluna: nome, tipo_evento, local, pessoas
+            resultados = (
+                f"SELECT rowid AS evento_id, bm25({TABELA_BUSCA}, 10.0, 4.0, 1.0, 2.0) AS relevancia "
+                f"FROM {TABELA_BUSCA} WHERE {TABELA_BUSCA} MATCH %s"
+            )
+            parametros = [self.expressao]
+        else:
+            resultados = (
+                "SELECT evento_id, -ts_rank(documento, consulta) AS relevancia "
+                f"FROM {TABELA_BUSCA}, to_tsquery('portuguese', %s) consulta WHERE documento @@ consulta"
+            )
+            parametros = [self.expressao]
+        qn = compiler.quote_name_unless_alias
+        alias = qn(self.table_alias)
+        return (
+            f"{self.join_type} ({resultados}) {alias} ON ({qn(self.parent_alias)}.{qn('id')} = {alias}.evento_id)",
+            parametros,
+        )
+
+
+class Relevancia(Expression):
+    """ Coluna 'relevancia' da JuncaoBusca do queryset (acompanha a troca de alias). """
+    output_field = FloatField()
+
+    def __init__(self, alias):
+        super().__init__()
+        self.alias = alias
+
+    def relabeled_clone(self, change_map):
+        return self.__class__(change_map.get(self.alias, self.alias))
+
+    def get_group_by_cols(self):
+        return [self]
+
+    def as_sql(self, compiler, connection):
+        return f"{compiler.quote_name_unless_alias(self.alias)}.relevancia", []
+
+
+def filtro_busca(consulta):
+    """
+    Q que restringe eventos aos que casam com a consulta, com todos os resultados do
+    índice: os filtros do queryset (datas, inscrições, admin) são aplicados depois
+    pelo banco, na mesma consulta, e nenhum resultado válido se perde.
+    """
+    if not busca_disponivel():
+        filtro = Q()
+        for termo in consulta.split():
+            filtro &= (
+                Q(nome__icontains=termo) | Q(tipo_evento__icontains=termo) | Q(local__icontains=termo)
+                | Q(organizador__nome__icontains=termo) | Q(professor_responsavel__nome__icontains=termo)
+            )
+        return filtro
+
+    expressao = _expressao(consulta)
+    if expressao is None:
+        return Q(pk__in=[])
+    return Q(pk__in=_ids_encontrados(expressao))
+
+
+def buscar_eventos(queryset, consulta):
+    """
+    Filtra o queryset de eventos pela consulta 'q', ordenando por relevância.
+    Os demais filtros do queryset (datas, inscrições) continuam valendo; um limite de
+    resultados, se houver, deve ser aplicado pelo chamador ao resultado final.
+    """
+    expressao = _expressao(consulta) if busca_disponivel() else None
+    if expressao is None:
+        return queryset.filter(filtro_busca(consulta))
+
+    queryset = queryset.all()
+    alias = queryset.query.join(JuncaoBusca(expressao, queryset.query.get_initial_alias()))
+    return queryset.annotate(relevancia=Relevancia(alias)).order_by('relevancia', 'pk')
+
+
+def medir_busca(consultas, repeticoes=20):
+    """
+    Tempo médio (ms) da busca de cada consulta sobre todos os eventos, como na lista de
+    eventos e na API: {consulta: (eventos encontrados, ms)}.
+    """
+    from .models import Evento
+
+    resultados = {}
+    for consulta in consultas:
+        encontrados = len(buscar_eventos(Evento.objects.all(), consulta).values_list('pk', flat=True))
+        inicio = time.perf_counter()
+        for _ in range(repeticoes):
+            list(buscar_eventos(Evento.objects.all(), consulta)[:LIMITE_RESULTADOS])
+        resultados[consulta] = (encontrados, (time.perf_counter() - inicio) * 1000 / repeticoes)
+    return resultados
+
+
+# --- Sugestões de Professor (typeahead do formulário de evento) ---
+
+# Quantidade de sugestões devolvidas e tempo de cache de cada prefixo.
+LIMITE_SUGESTOES = 10
+TEMPO_CACHE_SUGESTOES = 60
+
+
+def sugerir_professores(consulta, limite=LIMITE_SUGESTOES):
+    """
+    Professores cujo nome começa com a consulta (sem diferenciar acentos/maiúsculas).
+    A busca é um intervalo em nome_busca (>= prefixo e < prefixo + '\uffff'),
+    que usa o índice (perfil, nome_busca) em qualquer banco.
+    """
+    from .models import Usuario
+
+    prefixo = remover_acentos(consulta).strip()[:50]
+    if not prefixo:
+        return []
+
+    # O prefixo pode ter espaços; o hash mantém a chave válida para qualquer backend de cache
+    chave = f"professores:prefixo:{limite}:{hashlib.md5(prefixo.encode('utf-8')).hexdigest()}"
+    resultados = cache.get(chave)
+    if resultados is None:
+        professores = Usuario.objects.filter(
+            perfil='Professor',
+            nome_busca__gte=prefixo,
+            nome_busca__lt=prefixo + '\uffff',
+        ).order_by('nome_busca').values('id', 'nome', 'instituicao_ensino')[:limite]
+        resultados = list(professores)
+        cache.set(chave, resultados, TEMPO_CACHE_SUGESTOES)
+    return resultados
+
+
+def preencher_nomes_busca():
+    """ Preenche nome_busca dos usuários criados antes da coluna existir. """
+    from .models import Usuario
+
+    pendentes = []
+    for usuario in Usuario.objects.filter(nome_busca='').exclude(nome='').only('id', 'nome').iterator():
+        usuario.nome_busca = remover_acentos(usuario.nome)[:50]
+        pendentes.append(usuario)
+    Usuario.objects.bulk_update(pendentes, ['nome_busca'], batch_size=500)
+    return len(pendentes)
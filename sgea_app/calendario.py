@@ -0,0 +1,250 @@
+import hashlib
+import secrets
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .horarios import interpretar_horario, intervalos_diarios
+
+# Os feeds .ics são consultados a cada poucos minutos pelos aplicativos de calendário.
+# Cada feed fica em cache sob uma chave de versão; os signals incrementam a versão
+# quando eventos ou inscrições mudam. Enquanto a versão não muda, a resposta (ou o 304)
+# é montada só com o cache, sem consultar o banco.
+# A versão guardada no banco (VersaoCalendario) é a de referência: o cache só é lido de
+# lá quando perde a entrada, e o incremento é um UPDATE atômico. Sem cache compartilhado
+# (ver settings.CACHES), as versões e os segredos em cache expiram em TEMPO_CACHE_VERSAO,
+# para que os outros processos vejam as mudanças.
+
+SALT_TOKEN = 'sgea.calendario'
+TEMPO_CACHE_FEED = 24 * 60 * 60
+TEMPO_CACHE_VERSAO = None if settings.CACHE_COMPARTILHADO else 60
+
+
+# --- Versões (invalidação) ---
+
+def _chave_versao(chave):
+    return f'calendario:versao:{chave}'
+
+def _versao(chave):
+    from .models import VersaoCalendario
+
+    versao = cache.get(_chave_versao(chave))
+    if versao is None:
+        versao = VersaoCalendario.objects.filter(pk=chave).values_list('versao', flat=True).first() or 1
+        cache.set(_chave_versao(chave), versao, TEMPO_CACHE_VERSAO)
+    return versao
+
+def _incrementar(chave):
+    """ UPDATE atômico (versao = versao + 1); a primeira mudança cria a linha já na versão 2. """
+    from .models import VersaoCalendario
+
+    if not VersaoCalendario.objects.filter(pk=chave).update(versao=F('versao') + 1):
+        try:
+            with transaction.atomic():
+                VersaoCalendario.objects.create(chave=chave, versao=2)
+        except IntegrityError:
+            # Outro processo criou a linha ao mesmo tempo
+            VersaoCalendario.objects.filter(pk=chave).update(versao=F('versao') + 1)
+    # Só depois do commit: antes dele, quem relesse o banco guardaria a versão antiga
+    transaction.on_commit(lambda: cache.delete(_chave_versao(chave)))
+
+def versao_eventos():
+    return _versao('eventos')
+
+def versao_usuario(usuario_id):
+    return _versao(f'usuario:{usuario_id}')
+
+def invalidar_eventos():
+    """ Qualquer mudança em Evento afeta o feed público e os feeds pessoais. """
+    _incrementar('eventos')
+
+def invalidar_usuario(usuario_id):
+    """ Mudança nas inscrições de um usuário afeta apenas o feed dele. """
+    _incrementar(f'usuario:{usuario_id}')
+
+
+# --- Tokens dos feeds pessoais ---
+# Aplicativos de calendário não fazem login, então o feed pessoal usa uma URL assinada.
+# A assinatura inclui o segredo de calendário do usuário: gerar um novo link troca o
+# segredo e o link antigo deixa de valer.
+
+def _chave_segredo(usuario_id):
+    return f'calendario:segredo:{usuario_id}'
+
+def _assinador(segredo):
+    # Segredo vazio: links gerados antes do campo existir continuam válidos
+    return signing.Signer(salt=f'{SALT_TOKEN}:{segredo}' if segredo else SALT_TOKEN)
+
+def _segredo(usuario_id):
+    """ Segredo de calendário do usuário (em cache), ou None se ele não existe. """
+    from .models import Usuario
+
+    segredo = cache.get(_chave_segredo(usuario_id))
+    if segredo is None:
+        segredo = Usuario.objects.filter(pk=usuario_id).values_list('segredo_calendario', flat=True).first()
+        if segredo is None:
+            return None
+        cache.set(_chave_segredo(usuario_id), segredo, TEMPO_CACHE_VERSAO)
+    return segredo
+
+def token_usuario(usuario):
+    return _assinador(usuario.segredo_calendario).sign(str(usuario.pk))
+
+def usuario_do_token(token):
+    """ Retorna o id do usuário do token, ou None se a assinatura for inválida ou antiga. """
+    usuario_id, _, _ = (token or '').partition(signing.Signer().sep)
+    if not usuario_id.isdigit():
+        return None
+    segredo = _segredo(int(usuario_id))
+    if segredo is None:
+        return None
+    try:
+        return int(_assinador(segredo).unsign(token))
+    except (signing.BadSignature, ValueError):
+        return None
+
+def renovar_token(usuario):
+    """ Troca o segredo do usuário: o link anterior do calendário para de funcionar. """
+    usuario.segredo_calendario = secrets.token_hex(16)
+    usuario.save(update_fields=['segredo_calendario'])
+    transaction.on_commit(lambda: cache.delete(_chave_segredo(usuario.pk)))
+    return token_usuario(usuario)
+
+
+# --- Geração do iCalendar (RFC 5545) ---
+
+def _escapar(texto):
+    return (
+        (texto or '').replace('\\', '\\\\').replace(';', '\\;')
+        .replace(',', '\\,').replace('\r\n', '\\n').replace('\n', '\\n')
+    )
+
+def _dobrar(linha):
+    """ Linhas com mais de 75 octetos são quebradas (continuação começa com espaço). """
+    dados = linha.encode('utf-8')
+    if len(dados) <= 75:
+        return linha
+
+    partes = []
+    atual = ''
+    limite = 75
+    for caractere in linha:
+        if len((atual + caractere).encode('utf-8')) > limite:
+            partes.append(atual)
+            atual = ''
+            limite = 74  # a continuação começa com um espaço
+        atual += caractere
+    partes.append(atual)
+    return '\r\n '.join(partes)
+
+def _vevento(evento, dtstamp):
+    """
+    Bloco VEVENT de um evento. Os horários são "flutuantes" (sem fuso): o evento
+    acontece no horário local do campus, que é o mesmo do aluno.
+    """
+    intervalos = intervalos_diarios(evento.data_inicial, evento.data_final, evento.horario)
+    inicio, fim = intervalos[0]
+    if interpretar_horario(evento.horario)[0] is None:
+        datas = [f"DTSTART;VALUE=DATE:{inicio:%Y%m%d}", f"DTEND;VALUE=DATE:{fim:%Y%m%d}"]
+    else:
+        # Vários dias com horário: o horário do primeiro dia, repetido diariamente
+        datas = [f"DTSTART:{inicio:%Y%m%dT%H%M%S}", f"DTEND:{fim:%Y%m%dT%H%M%S}"]
+        if len(intervalos) > 1:
+            datas.append(f"RRULE:FREQ=DAILY;COUNT={len(intervalos)}")
+
+    linhas = [
+        'BEGIN:VEVENT',
+        f'UID:evento-{evento.pk}@sgea',
+        f'DTSTAMP:{dtstamp}',
+        *datas,
+        f'SUMMARY:{_escapar(evento.nome)}',
+        f'LOCATION:{_escapar(evento.local)}',
+        f'DESCRIPTION:{_escapar(f"{evento.tipo_evento} - Horário: {evento.horario}")}',
+        f'CATEGORIES:{_escapar(evento.tipo_evento)}',
+        'END:VEVENT',
+    ]
+    return '\r\n'.join(_dobrar(linha) for linha in linhas)
+
+def _impressao_digital(evento):
+    campos = f"{evento.nome}|{evento.tipo_evento}|{evento.data_inicial}|{evento.data_final}|{evento.horario}|{evento.local}"
+    return hashlib.sha1(campos.encode('utf-8')).hexdigest()[:12]
+
+def _blocos_eventos(eventos):
+    """
+    Gera os VEVENTs de forma incremental: cada bloco fica em cache pela
+    impressão digital dos campos do evento, então só eventos alterados são
+    renderizados de novo quando o feed é reconstruído.
+    """
+    eventos = list(eventos)
+    chaves = {evento.pk: f"calendario:vevento:{evento.pk}:{_impressao_digital(evento)}" for evento in eventos}
+    em_cache = cache.get_many(list(chaves.values()))
+
+    dtstamp = timezone.now().strftime('%Y%m%dT%H%M%SZ')
+    novos = {}
+    blocos = []
+    for evento in eventos:
+        chave = chaves[evento.pk]
+        bloco = em_cache.get(chave)
+        if bloco is None:
+            bloco = novos[chave] = _vevento(evento, dtstamp)
+        blocos.append(bloco)
+
+    if novos:
+        cache.set_many(novos, TEMPO_CACHE_FEED)
+    return blocos
+
+def _documento(nome, blocos):
+    cabecalho = [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        'PRODID:-//SGEA//Eventos Academicos//PT-BR',
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+        _dobrar(f'X-WR-CALNAME:{_escapar(nome)}'),
+        'REFRESH-INTERVAL;VALUE=DURATION:PT1H',
+    ]
+    return '\r\n'.join(cabecalho + blocos + ['END:VCALENDAR']) + '\r\n'
+
+
+# --- Feeds ---
+
+CAMPOS_EVENTO = ('id', 'nome', 'tipo_evento', 'data_inicial', 'data_final', 'horario', 'local')
+
+def etag_publico():
+    # A data entra na versão porque o feed público só lista eventos futuros
+    hoje = timezone.now().date()
+    return f'"pub-{versao_eventos()}-{hoje:%Y%m%d}"'
+
+def etag_usuario(usuario_id):
+    return f'"usr-{usuario_id}-{versao_eventos()}-{versao_usuario(usuario_id)}"'
+
+def feed_publico(etag):
+    """ Feed com os eventos futuros, em cache enquanto a versão (ETag) não mudar. """
+    from .models import Evento
+
+    chave = f"calendario:feed:publico:{etag}"
+    documento = cache.get(chave)
+    if documento is None:
+        hoje = timezone.now().date()
+        eventos = Evento.objects.filter(data_inicial__gte=hoje).order_by('data_inicial').only(*CAMPOS_EVENTO)
+        documento = _documento('SGEA - Eventos Acadêmicos', _blocos_eventos(eventos))
+        cache.set(chave, documento, TEMPO_CACHE_FEED)
+    return documento
+
+def feed_usuario(usuario_id, etag):
+    """ Feed com os eventos em que o usuário está inscrito. """
+    from .models import Evento
+
+    chave = f"calendario:feed:usuario:{usuario_id}:{etag}"
+    documento = cache.get(chave)
+    if documento is None:
+        eventos = Evento.objects.filter(
+            inscricoes__usuario_id=usuario_id
+        ).order_by('data_inicial').only(*CAMPOS_EVENTO)
+        documento = _documento('SGEA - Minha Agenda', _blocos_eventos(eventos))
+        cache.set(chave, documento, TEMPO_CACHE_FEED)
+    return documento
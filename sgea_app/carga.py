@@ -0,0 +1,446 @@
+import gzip
+import http.client
+import json
+import math
+import random
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import timedelta
+from http.cookies import SimpleCookie
+from urllib.parse import urlencode, urlsplit
+
+from django.contrib.auth.hashers import make_password
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .busca import remover_acentos
+from .certificados import emitir_certificados, inscricoes_sem_certificado
+from .models import Certificado, Evento, EventoArquivado, Inscricao, TarefaFila, Usuario
+
+# Teste de carga: jornadas de usuários reais contra um SGEA já em execução (runserver,
+# 'servir' etc.), pelo HTTP, com a pilha inteira (middleware, sessão, CSRF, templates,
+# banco). Diferente do medir_consultas, que usa o cliente de testes no mesmo processo.
+#
+# As jornadas chegam segundo um processo de Poisson (taxa em jornadas por segundo, que
+# pode variar por etapas) e rodam num pool de threads; cada requisição é um passo com
+# latência e status registrados. Uma jornada para no primeiro passo que falhar.
+#
+# A massa de dados (usuários 'carga-...@carga.sgea', eventos, inscrições e certificados)
+# é criada por preparar() no mesmo banco do servidor e removida por limpar().
+
+PREFIXO = 'carga-'
+DOMINIO = '@carga.sgea'
+SENHA = 'Carga@2024'
+
+# Peso de cada jornada na mistura padrão
+MIX_PADRAO = {'aluno': 45, 'organizador': 10, 'checkin_offline': 5, 'cadastro': 10, 'certificado': 15, 'api': 15}
+
+
+class FalhaPasso(Exception):
+    pass
+
+
+# --- Massa de dados ---
+
+def _usuario(chave, nome, perfil, senha):
+    login = f'{PREFIXO}{chave}{DOMINIO}'
+    return Usuario(
+        login=login, email=login, nome=nome, nome_busca=remover_acentos(nome)[:50],
+        telefone='(11) 90000-0000', instituicao_ensino='Universidade Carga',
+        perfil=perfil, is_active=True, password=senha,
+    )
+
+def limpar():
+    """ Remove os usuários de carga (inclusive os criados pela jornada de cadastro) e os seus eventos. """
+    usuarios = Usuario.objects.filter(login__startswith=PREFIXO, login__endswith=DOMINIO)
+    with transaction.atomic():
+        # Eventos protegem o organizador e o professor (PROTECT): saem primeiro
+        Evento.objects.filter(organizador__in=usuarios).delete()
+        EventoArquivado.objects.filter(organizador__in=usuarios).delete()
+        return usuarios.delete()[1].get(Usuario._meta.label, 0)
+
+def preparar(alunos=200, organizadores=5, eventos_abertos=20, inscritos=40):
+    """
+    Cria a massa de dados do teste. Para cada organizador: um evento futuro com
+    'inscritos' alunos (check-in) e um evento encerrado com presenças e certificados
+    emitidos (download). Os 'eventos_abertos' têm vagas de sobra para inscrição.
+    """
+    limpar()
+    # Um único hash para todos: o PBKDF2 leva centenas de ms por usuário
+    senha = make_password(SENHA)
+    hoje = timezone.now().date()
+
+    with transaction.atomic():
+        Usuario.objects.bulk_create(
+            [_usuario(f'aluno-{i}', f'Carga Aluno {i}', 'Aluno', senha) for i in range(alunos)]
+            + [_usuario(f'org-{i}', f'Carga Organizador {i}', 'Organizador', senha) for i in range(organizadores)]
+            + [_usuario('prof', 'Carga Professor', 'Professor', senha)],
+            batch_size=500,
+        )
+        todos = list(Usuario.objects.filter(login__startswith=f'{PREFIXO}aluno-', login__endswith=DOMINIO).order_by('pk'))
+        orgs = list(Usuario.objects.filter(login__startswith=f'{PREFIXO}org-', login__endswith=DOMINIO).order_by('pk'))
+        professor = Usuario.objects.get(login=f'{PREFIXO}prof{DOMINIO}')
+
+        def evento(organizador, nome, dia, vagas):
+            return Evento.objects.create(
+                organizador=organizador, professor_responsavel=professor, nome=nome,
+                tipo_evento='Palestra', data_inicial=dia, data_final=dia, horario='10:00',
+                local='Auditório Carga', quantidade_participantes=vagas,
+            )
+
+        # Dias diferentes: as inscrições da jornada do aluno não entram em conflito de horário
+        for i in range(eventos_abertos):
+            evento(orgs[i % len(orgs)], f'Carga Aberto {i}', hoje + timedelta(days=30 + i), 100_000)
+
+        for i, organizador in enumerate(orgs):
+            participantes = [todos[(i * inscritos + j) % len(todos)] for j in range(min(inscritos, len(todos)))]
+
+            checkin = evento(organizador, f'Carga Check-in {i}', hoje + timedelta(days=3), inscritos)
+            for aluno in participantes:
+                Inscricao.objects.create(usuario=aluno, evento=checkin)
+
+            encerrado = evento(organizador, f'Carga Encerrado {i}', hoje - timedelta(days=7), inscritos)
+            for aluno in participantes:
+                Inscricao.objects.create(usuario=aluno, evento=encerrado, presenca_confirmada=True)
+            emitir_certificados(inscricoes_sem_certificado().filter(evento=encerrado))
+
+    return {'alunos': len(todos), 'organizadores': len(orgs), 'eventos': Evento.objects.filter(organizador__in=orgs).count()}
+
+def carregar_dados():
+    """ Ids e logins usados pelas jornadas, lidos uma vez antes do teste. """
+    alunos = list(Usuario.objects.filter(
+        login__startswith=f'{PREFIXO}aluno-', login__endswith=DOMINIO
+    ).order_by('pk').values_list('login', 'nome'))
+
+    eventos_abertos = list(Evento.objects.filter(
+        organizador__login__startswith=f'{PREFIXO}org-', nome__startswith='Carga Aberto'
+    ).order_by('pk').values_list('pk', 'nome'))
+
+    organizadores = []
+    for login, evento_id in Evento.objects.filter(
+        organizador__login__startswith=f'{PREFIXO}org-', nome__startswith='Carga Check-in'
+    ).order_by('pk').values_list('organizador__login', 'pk'):
+        inscricoes = list(Inscricao.objects.filter(evento_id=evento_id).values_list('pk', flat=True))
+        organizadores.append((login, evento_id, inscricoes))
+
+    certificados = list(Certificado.objects.filter(
+        inscricao__usuario__login__startswith=f'{PREFIXO}aluno-', inscricao__usuario__login__endswith=DOMINIO
+    ).order_by('pk').values_list('inscricao__usuario__login', 'pk'))
+
+    if not (alunos and eventos_abertos and organizadores and certificados):
+        return None
+    return {
+        'alunos': alunos,
+        'eventos_abertos': eventos_abertos,
+        'organizadores': organizadores,
+        'certificados': certificados,
+    }
+
+
+# --- Resultados ---
+
+def percentil(valores, percentual):
+    """ Percentil pelo método nearest-rank ('valores' já ordenados). """
+    if not valores:
+        return None
+    return valores[min(len(valores) - 1, max(math.ceil(percentual / 100 * len(valores)) - 1, 0))]
+
+class Resultados:
+    """ Latências e status por passo e contagem de jornadas, compartilhados entre as threads. """
+
+    def __init__(self):
+        self._trava = threading.Lock()
+        self.latencias = defaultdict(list)
+        self.status = defaultdict(Counter)
+        self.erros = defaultdict(list)
+        self.jornadas = defaultdict(Counter)
+        self.atrasos = []
+
+    def registrar(self, passo, duracao, status, ok, erro=None):
+        with self._trava:
+            self.latencias[passo].append(duracao)
+            self.status[passo]['ok' if ok else ('429' if status == 429 else 'erro')] += 1
+            if erro and len(self.erros[passo]) < 3:
+                self.erros[passo].append(erro)
+
+    def registrar_jornada(self, nome, concluida, atraso):
+        with self._trava:
+            self.jornadas[nome]['concluidas' if concluida else 'falhas'] += 1
+            self.atrasos.append(atraso)
+
+    def resumo(self, duracao):
+        """ Números por passo (latências em ms) e por jornada. """
+        passos = {}
+        for passo, latencias in self.latencias.items():
+            latencias = sorted(latencias)
+            contagem = self.status[passo]
+            total = len(latencias)
+            passos[passo] = {
+                'requisicoes': total,
+                'por_segundo': round(total / duracao, 2) if duracao else 0,
+                'erros': contagem['erro'],
+                'taxa_erro': round(contagem['erro'] / total, 4) if total else 0,
+                'limitadas_429': contagem['429'],
+                **{
+                    f'p{p}': round(percentil(latencias, p) * 1000, 1)
+                    for p in (50, 90, 95, 99)
+                },
+                'max': round(latencias[-1] * 1000, 1),
+                'exemplos_erro': self.erros[passo],
+            }
+        atrasos = sorted(self.atrasos)
+        return {
+            'duracao': round(duracao, 2),
+            'jornadas': {nome: dict(contagem) for nome, contagem in self.jornadas.items()},
+            'atraso_inicio_p95_ms': round(percentil(atrasos, 95) * 1000, 1) if atrasos else None,
+            'passos': passos,
+        }
+
+
+# --- Cliente HTTP ---
+
+class Navegador:
+    """
+    Um usuário virtual: guarda os cookies (sessão, CSRF, mensagens) e o token da API.
+    Uma conexão por requisição; os redirecionamentos não são seguidos (o 302 é o
+    resultado esperado de vários passos).
+    """
+
+    def __init__(self, url, resultados, tempo_limite):
+        partes = urlsplit(url)
+        self.classe = http.client.HTTPSConnection if partes.scheme == 'https' else http.client.HTTPConnection
+        self.host = partes.hostname
+        self.porta = partes.port
+        self.prefixo = partes.path.rstrip('/')
+        self.resultados = resultados
+        self.tempo_limite = tempo_limite
+        self.cookies = {}
+        self.token = None
+
+    def requisicao(self, passo, metodo, caminho, dados=None, json_=None, esperado=(200,)):
+        cabecalhos = {'Accept-Encoding': 'gzip', 'User-Agent': 'sgea-teste-carga'}
+        corpo = None
+        if dados is not None:
+            corpo = urlencode(dados)
+            cabecalhos['Content-Type'] = 'application/x-www-form-urlencoded'
+        elif json_ is not None:
+            corpo = json.dumps(json_)
+            cabecalhos['Content-Type'] = 'application/json'
+        if self.cookies:
+            cabecalhos['Cookie'] = '; '.join(f'{nome}={valor}' for nome, valor in self.cookies.items())
+        if metodo == 'POST' and 'csrftoken' in self.cookies:
+            cabecalhos['X-CSRFToken'] = self.cookies['csrftoken']
+        if self.token:
+            cabecalhos['Authorization'] = f'Token {self.token}'
+
+        conexao = self.classe(self.host, self.porta, timeout=self.tempo_limite)
+        inicio = time.perf_counter()
+        try:
+            conexao.request(metodo, self.prefixo + caminho, body=corpo, headers=cabecalhos)
+            resposta = conexao.getresponse()
+            conteudo = resposta.read()
+        except (OSError, http.client.HTTPException) as erro:
+            self.resultados.registrar(passo, time.perf_counter() - inicio, None, False, f'{type(erro).__name__}: {erro}')
+            raise FalhaPasso(passo)
+        finally:
+            conexao.close()
+        duracao = time.perf_counter() - inicio
+
+        for cabecalho in resposta.headers.get_all('Set-Cookie') or []:
+            for nome, morsel in SimpleCookie(cabecalho).items():
+                if morsel.value and morsel['max-age'] != '0':
+                    self.cookies[nome] = morsel.value
+                else:
+                    self.cookies.pop(nome, None)
+        if resposta.getheader('Content-Encoding') == 'gzip':
+            conteudo = gzip.decompress(conteudo)
+
+        ok = resposta.status in esperado
+        self.resultados.registrar(passo, duracao, resposta.status, ok, None if ok else f'HTTP {resposta.status} em {caminho}')
+        if not ok:
+            raise FalhaPasso(passo)
+        return resposta, conteudo
+
+    def get(self, passo, caminho, **kwargs):
+        return self.requisicao(passo, 'GET', caminho, **kwargs)
+
+    def post(self, passo, caminho, **kwargs):
+        return self.requisicao(passo, 'POST', caminho, **kwargs)
+
+
+def servidor_disponivel(url, tempo_limite=5):
+    """ True se o SGEA responde em 'url' (verificado antes de iniciar o teste). """
+    try:
+        Navegador(url, Resultados(), tempo_limite).get('verificacao', '/login/')
+    except FalhaPasso:
+        return False
+    return True
+
+
+# --- Jornadas ---
+# Cada jornada recebe o navegador (sem sessão), os dados do teste e um gerador aleatório.
+
+def _entrar(navegador, login):
+    navegador.get('login:formulario', '/login/')
+    resposta, _ = navegador.post('login:enviar', '/login/', dados={'login': login, 'password': SENHA}, esperado=(302,))
+    if 'dashboard' not in (resposta.getheader('Location') or ''):
+        raise FalhaPasso('login:enviar')
+
+def _entrar_api(navegador, login):
+    _, conteudo = navegador.post('api:login', '/api/login/', json_={'username': login, 'password': SENHA})
+    navegador.token = json.loads(conteudo)['token']
+
+def jornada_cadastro(navegador, dados, aleatorio):
+    """ Cadastro pelo formulário e ativação pelo link do e-mail de confirmação. """
+    chave = f'novo-{aleatorio.getrandbits(48):012x}'
+    login = f'{PREFIXO}{chave}{DOMINIO}'
+    navegador.get('cadastro:formulario', '/cadastro/')
+    navegador.post('cadastro:enviar', '/cadastro/', dados={
+        'nome': f'Carga {chave}', 'telefone': '(11) 91234-5678', 'instituicao_ensino': 'Universidade Carga',
+        'email': login, 'login': login, 'perfil': 'Aluno', 'password': SENHA, 'senha_confirmacao': SENHA,
+    }, esperado=(302,))
+
+    # O link é o mesmo que o worker da fila imprimiria no "e-mail"
+    try:
+        usuario_id = Usuario.objects.filter(login=login).values_list('pk', flat=True).first()
+        argumentos = TarefaFila.objects.filter(
+            nome='enviar_email_confirmacao', argumentos__usuario_id=usuario_id
+        ).values_list('argumentos', flat=True).first()
+    finally:
+        close_old_connections()
+    if not argumentos:
+        navegador.resultados.registrar('cadastro:confirmar_email', 0, None, False, 'Tarefa de e-mail não encontrada')
+        raise FalhaPasso('cadastro:confirmar_email')
+    navegador.get('cadastro:confirmar_email', urlsplit(argumentos['link']).path)
+
+def jornada_aluno(navegador, dados, aleatorio):
+    """ Login, lista de eventos, inscrição, dashboard e cancelamento da inscrição. """
+    login, _ = aleatorio.choice(dados['alunos'])
+    evento_id, _ = aleatorio.choice(dados['eventos_abertos'])
+    _entrar(navegador, login)
+    navegador.get('lista_eventos', '/')
+    navegador.get('inscrever', f'/inscrever/{evento_id}/', esperado=(302,))
+    navegador.get('dashboard', '/dashboard/')
+    navegador.post('desinscrever', f'/evento/{evento_id}/desinscrever/', dados={}, esperado=(302,))
+
+def jornada_organizador(navegador, dados, aleatorio):
+    """ Login, roster do evento, confirmação de presença e emissão de certificados. """
+    login, evento_id, inscricoes = aleatorio.choice(dados['organizadores'])
+    _entrar(navegador, login)
+    navegador.get('dashboard', '/dashboard/')
+    navegador.get('checkin:lista_inscritos', f'/evento/{evento_id}/inscritos/')
+    acao = aleatorio.choice(('confirmar', 'desconfirmar'))
+    navegador.post('checkin:confirmar', f'/evento/{evento_id}/inscritos/', dados={acao: aleatorio.choice(inscricoes)}, esperado=(302,))
+    navegador.get('emitir_certificados', f'/evento/{evento_id}/emitir_certificados/', esperado=(302,))
+
+def jornada_checkin_offline(navegador, dados, aleatorio):
+    """ Dispositivo de check-in: token, lista do evento pela API e envio de um lote. """
+    login, evento_id, inscricoes = aleatorio.choice(dados['organizadores'])
+    _entrar_api(navegador, login)
+    _, conteudo = navegador.get('api:checkin_lista', f'/api/eventos/{evento_id}/checkin/')
+    lote = [[inscricao_id, aleatorio.randint(0, 1)] for inscricao_id in aleatorio.sample(inscricoes, min(10, len(inscricoes)))]
+    navegador.post('api:checkin_envio', f'/api/eventos/{evento_id}/checkin/', json_={
+        'cursor': json.loads(conteudo)['cursor'], 'checkins': lote,
+    })
+
+def jornada_certificado(navegador, dados, aleatorio):
+    """ Login, lista de certificados e download de um deles. """
+    login, certificado_id = aleatorio.choice(dados['certificados'])
+    _entrar(navegador, login)
+    navegador.get('meus_certificados', '/meus_certificados/')
+    navegador.get('certificado:download', f'/meus_certificados/?download={certificado_id}')
+
+def jornada_api(navegador, dados, aleatorio):
+    """ Cliente da API com token: eventos, inscrição e conflitos de horário. """
+    login, nome = aleatorio.choice(dados['alunos'])
+    _, evento_nome = aleatorio.choice(dados['eventos_abertos'])
+    _entrar_api(navegador, login)
+    navegador.get('api:eventos', '/api/eventos/')
+    # 400: o aluno já estava inscrito (resposta de negócio, não falha do servidor)
+    navegador.post('api:inscricao', '/api/inscricoes/', json_={'usuario_nome': nome, 'evento_nome': evento_nome}, esperado=(201, 400))
+    navegador.get('api:conflitos', '/api/inscricoes/conflitos/')
+
+JORNADAS = {
+    'aluno': jornada_aluno,
+    'organizador': jornada_organizador,
+    'checkin_offline': jornada_checkin_offline,
+    'cadastro': jornada_cadastro,
+    'certificado': jornada_certificado,
+    'api': jornada_api,
+}
+
+
+# --- Execução ---
+
+def _executar_jornada(nome, url, dados, resultados, tempo_limite, semente, chegada):
+    atraso = time.perf_counter() - chegada
+    navegador = Navegador(url, resultados, tempo_limite)
+    try:
+        JORNADAS[nome](navegador, dados, random.Random(semente))
+    except FalhaPasso:
+        resultados.registrar_jornada(nome, False, atraso)
+    except Exception as erro:
+        resultados.registrar(f'{nome}:excecao', 0, None, False, f'{type(erro).__name__}: {erro}')
+        resultados.registrar_jornada(nome, False, atraso)
+    else:
+        resultados.registrar_jornada(nome, True, atraso)
+
+def executar(url, dados, mix=None, etapas=((60, 2.0),), concorrencia=50, tempo_limite=30, semente=None):
+    """
+    Dispara as jornadas em chegadas de Poisson. 'etapas' é uma sequência de
+    (segundos, jornadas por segundo); 'mix' dá o peso de cada jornada.
+    Retorna o resumo (ver Resultados.resumo).
+    """
+    mix = {nome: peso for nome, peso in (mix or MIX_PADRAO).items() if peso > 0}
+    nomes, pesos = list(mix), list(mix.values())
+    aleatorio = random.Random(semente)
+    resultados = Resultados()
+
+    inicio = time.perf_counter()
+    pendentes = []
+    with ThreadPoolExecutor(max_workers=concorrencia, thread_name_prefix='sgea-carga') as executor:
+        fim_etapa = inicio
+        for segundos, taxa in etapas:
+            inicio_etapa, fim_etapa = fim_etapa, fim_etapa + segundos
+            if taxa <= 0:
+                continue
+            # Intervalos exponenciais entre chegadas (processo de Poisson)
+            proxima = inicio_etapa + aleatorio.expovariate(taxa)
+            while proxima < fim_etapa:
+                espera = proxima - time.perf_counter()
+                if espera > 0:
+                    time.sleep(espera)
+                nome = aleatorio.choices(nomes, pesos)[0]
+                pendentes.append(executor.submit(
+                    _executar_jornada, nome, url, dados, resultados, tempo_limite, aleatorio.getrandbits(64), proxima,
+                ))
+                proxima += aleatorio.expovariate(taxa)
+        wait(pendentes)
+    return resultados.resumo(time.perf_counter() - inicio)
+
+def relatorio(resumo):
+    """ Tabela de texto com o resumo do teste. """
+    linhas = [f"Duração: {resumo['duracao']:.1f} s"]
+    jornadas = resumo['jornadas']
+    linhas.append("Jornadas: " + ', '.join(
+        f"{nome} {contagem.get('concluidas', 0)}/{contagem.get('concluidas', 0) + contagem.get('falhas', 0)}"
+        for nome, contagem in sorted(jornadas.items())
+    ) + " (concluídas/iniciadas)")
+    if resumo['atraso_inicio_p95_ms'] is not None:
+        linhas.append(f"Atraso de início p95: {resumo['atraso_inicio_p95_ms']:.1f} ms (alto = gerador saturado; aumente --concorrencia)")
+    linhas.append("")
+    linhas.append(f"{'passo':<26}{'reqs':>7}{'req/s':>8}{'erros':>7}{'%erro':>7}{'429':>6}{'p50':>9}{'p90':>9}{'p95':>9}{'p99':>9}{'max':>9}  (ms)")
+    for passo, dados in sorted(resumo['passos'].items()):
+        linhas.append(
+            f"{passo:<26}{dados['requisicoes']:>7}{dados['por_segundo']:>8.2f}{dados['erros']:>7}"
+            f"{dados['taxa_erro'] * 100:>6.1f}%{dados['limitadas_429']:>6}"
+            f"{dados['p50']:>9.1f}{dados['p90']:>9.1f}{dados['p95']:>9.1f}{dados['p99']:>9.1f}{dados['max']:>9.1f}"
+        )
+    exemplos = [(passo, erro) for passo, dados in sorted(resumo['passos'].items()) for erro in dados['exemplos_erro']]
+    if exemplos:
+        linhas.append("")
+        linhas.append("Exemplos de erro:")
+        linhas += [f"  {passo}: {erro}" for passo, erro in exemplos]
+    return '\n'.join(linhas) + '\n'
@@ -0,0 +1,203 @@
+import re
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .estatisticas import registrar_certificados
+from .models import (
+    ALFABETO_CODIGO_VERIFICACAO, TAMANHO_CODIGO_VERIFICACAO, Certificado, CertificadoArquivado, Evento, Inscricao,
+    Usuario, gerar_codigo_verificacao,
+)
+from .utils import log_auditoria
+
+
+def texto_certificado(inscricao):
+    """ Texto padrão do certificado de participação. """
+    evento = inscricao.evento
+    return f"Certificamos que {inscricao.usuario.nome} participou do evento {evento.nome}, organizado por {evento.organizador.nome}."
+
+
+def inscricoes_sem_certificado():
+    """
+    Inscrições com presença confirmada que ainda não têm certificado.
+    Já traz usuário, evento e organizador (usados no texto) na mesma consulta.
+    """
+    return Inscricao.objects.filter(
+        presenca_confirmada=True,
+        certificado__isnull=True,
+    ).select_related('usuario', 'evento__organizador')
+
+
+def inscricoes_prontas_para_emissao(hoje=None):
+    """ Inscrições de eventos já encerrados, prontas para a emissão automática. """
+    hoje = hoje or timezone.now().date()
+    return inscricoes_sem_certificado().filter(evento__data_final__lt=hoje)
+
+
+def emitir_certificados(inscricoes):
+    """
+    Cria os certificados das inscrições informadas em um único INSERT.
+    Como cada inscrição só pode ter um certificado (OneToOne), conflitos são
+    ignorados: duas execuções simultâneas nunca geram certificados duplicados.
+    Retorna a quantidade de certificados realmente criados.
+    """
+    certificados = [
+        Certificado(
+            inscricao=inscricao,
+            texto_certificado=texto_certificado(inscricao),
+            status_emissao='Emitido',
+            # bulk_create não chama o save(), que gera o código
+            codigo_verificacao=gerar_codigo_verificacao(),
+        )
+        for inscricao in inscricoes
+    ]
+    if not certificados:
+        return 0
+    Certificado.objects.bulk_create(certificados, ignore_conflicts=True)
+
+    # Os conflitos ignorados não informam quais linhas ficaram de fora: cada objeto tem
+    # um código de verificação único, então só os códigos gravados são destas inscrições
+    criados = set(Certificado.objects.filter(
+        codigo_verificacao__in=[certificado.codigo_verificacao for certificado in certificados]
+    ).values_list('inscricao_id', flat=True))
+
+    # bulk_create não dispara signals: atualiza as estatísticas diretamente
+    registrar_certificados([
+        certificado.inscricao for certificado in certificados if certificado.inscricao_id in criados
+    ])
+    return len(criados)
+
+
+def preencher_codigos_verificacao():
+    """
+    Gera o código de verificação dos certificados emitidos antes da coluna existir.
+    Chamado após o 'migrate' (ver signals.py). Retorna quantos foram preenchidos.
+    """
+    pendentes = []
+    for certificado in Certificado.objects.filter(codigo_verificacao__isnull=True).only('id').iterator():
+        certificado.codigo_verificacao = gerar_codigo_verificacao()
+        pendentes.append(certificado)
+    Certificado.objects.bulk_update(pendentes, ['codigo_verificacao'], batch_size=500)
+    return len(pendentes)
+
+
+def emitir_certificados_evento(evento_id, usuario_id=None):
+    """
+    Tarefa da fila: emissão manual dos certificados de um evento, pedida pelo organizador.
+    A linha do evento fica travada durante a emissão, então duas tarefas do mesmo evento
+    não contam os mesmos certificados duas vezes nas estatísticas.
+    """
+    with transaction.atomic():
+        evento = Evento.objects.select_for_update().filter(pk=evento_id).first()
+        if evento is None:
+            return 0
+        total = emitir_certificados(inscricoes_sem_certificado().filter(evento_id=evento_id))
+
+    usuario = Usuario.objects.filter(pk=usuario_id).first() if usuario_id else None
+    log_auditoria(usuario, f'Emissão MANUAL de {total} certificados para o evento {evento.nome}')
+    return total
+
+
+# --- Verificação Pública de Autenticidade ---
+
+# Resultado das verificações fica em cache. Consultas a códigos inexistentes também
+# (cache negativo), por menos tempo, para que varreduras não cheguem ao banco.
+TEMPO_CACHE_VERIFICACAO = 24 * 60 * 60
+TEMPO_CACHE_VERIFICACAO_NEGATIVA = 10 * 60
+CODIGO_INEXISTENTE = 'inexistente'
+
+
+def normalizar_codigo(codigo):
+    """
+    Aceita o código como digitado ('k7qm-2xpd 9rta-hw4e') e devolve a forma
+    armazenada, ou None se não puder ser um código válido (nem consulta o banco).
+    """
+    codigo = re.sub(r'[^0-9A-Za-z]', '', codigo or '').upper()
+    if len(codigo) != TAMANHO_CODIGO_VERIFICACAO:
+        return None
+    if any(caractere not in ALFABETO_CODIGO_VERIFICACAO for caractere in codigo):
+        return None
+    return codigo
+
+
+def _chave_verificacao(codigo):
+    return f"certificado:verificacao:{codigo}"
+
+
+def dados_verificacao(codigo):
+    """
+    Dados mínimos para confirmar a autenticidade do certificado, ou None.
+    Uma única consulta pelo índice único de 'codigo_verificacao'.
+    """
+    codigo = normalizar_codigo(codigo)
+    if codigo is None:
+        return None
+
+    chave = _chave_verificacao(codigo)
+    dados = cache.get(chave)
+    if dados == CODIGO_INEXISTENTE:
+        return None
+    if dados is not None:
+        return dados
+
+    # Certificados de eventos arquivados continuam verificáveis (mesmo código)
+    for modelo in (Certificado, CertificadoArquivado):
+        linha = modelo.objects.filter(codigo_verificacao=codigo).values(
+            'data_emissao',
+            'status_emissao',
+            'inscricao__usuario__nome',
+            'inscricao__evento__nome',
+            'inscricao__evento__tipo_evento',
+            'inscricao__evento__data_inicial',
+            'inscricao__evento__data_final',
+        ).first()
+        if linha is not None:
+            break
+
+    if linha is None:
+        cache.set(chave, CODIGO_INEXISTENTE, TEMPO_CACHE_VERIFICACAO_NEGATIVA)
+        return None
+
+    dados = {
+        'codigo': codigo,
+        'valido': linha['status_emissao'] == 'Emitido',
+        'participante': linha['inscricao__usuario__nome'],
+        'evento': linha['inscricao__evento__nome'],
+        'tipo_evento': linha['inscricao__evento__tipo_evento'],
+        'data_inicial': linha['inscricao__evento__data_inicial'].isoformat(),
+        'data_final': linha['inscricao__evento__data_final'].isoformat(),
+        'data_emissao': linha['data_emissao'].isoformat(),
+    }
+    cache.set(chave, dados, TEMPO_CACHE_VERIFICACAO)
+    return dados
+
+
+def buscar_certificado(certificado_id, *filtros):
+    """
+    Certificado pelo id, procurando nas tabelas ativas e depois no arquivo
+    (os ids são preservados no arquivamento). Os filtros (Q) valem para os dois
+    modelos, que têm as mesmas relações. Retorna None se não encontrar.
+    """
+    for modelo in (Certificado, CertificadoArquivado):
+        certificado = modelo.objects.select_related(
+            'inscricao__evento', 'inscricao__usuario'
+        ).filter(*filtros, pk=certificado_id).first()
+        if certificado is not None:
+            return certificado
+    return None
+
+
+def certificados_do_usuario(usuario):
+    """ Certificados ativos e arquivados do usuário, do mais recente ao mais antigo. """
+    certificados = []
+    for modelo in (Certificado, CertificadoArquivado):
+        certificados.extend(
+            modelo.objects.filter(inscricao__usuario=usuario).select_related('inscricao__evento')
+        )
+    certificados.sort(key=lambda certificado: certificado.data_emissao, reverse=True)
+    return certificados
+
+
+def invalidar_verificacao(codigo):
+    cache.delete(_chave_verificacao(codigo))
@@ -0,0 +1,201 @@
+import hashlib
+import json
+
+from django.core import signing
+from django.db import transaction
+from django.db.models import Case, F, Max, Value, When
+
+from . import estatisticas
+from .models import EstatisticaEvento, Inscricao, chave_codigo_checkin
+
+# Check-in offline: o organizador baixa a lista do evento para um dispositivo, confirma
+# presenças sem conexão e envia tudo em lote quando a rede volta.
+#
+# Cada mudança na lista (inscrição criada, removida ou com presença alterada) avança a
+# versão do evento (EstatisticaEvento.versao_lista) e grava essa versão na inscrição.
+# O dispositivo guarda o cursor assinado da última lista recebida e pede só o que
+# mudou depois dele. Remoções não deixam rastro nas linhas, então um cursor anterior
+# à última remoção recebe a lista completa.
+
+SALT_CURSOR = 'sgea.checkin.cursor'
+
+# Os códigos de check-in não vão nas linhas: o dispositivo os calcula com a chave do
+# evento (ver models.gerar_codigo_checkin), o que reduz a lista pela metade.
+COLUNAS = ('id', 'nome', 'presenca')
+
+# Máximo de check-ins aceitos num único envio
+TAMANHO_MAXIMO_LOTE = 5000
+
+
+# --- Versões ---
+
+def proxima_versao(evento_id, remocao=False):
+    """
+    Avança a versão da lista do evento e a retorna. O UPDATE trava a linha até o
+    commit, então as versões de um evento são confirmadas na ordem em que são geradas.
+    """
+    linhas = EstatisticaEvento.objects.filter(evento_id=evento_id)
+    if not linhas.update(versao_lista=F('versao_lista') + 1):
+        # Sem a linha numa remoção (ex: exclusão do evento em cascata) não há o que versionar;
+        # se ela for recriada depois, os cursores antigos recebem a lista completa
+        if remocao or estatisticas.recalcular_evento(evento_id) is None:
+            return 0
+        # Linha recriada: continua depois da maior versão já gravada nas inscrições e
+        # força a lista completa para os cursores antigos
+        ultima = Inscricao.objects.filter(evento_id=evento_id).aggregate(versao=Max('versao_lista'))['versao'] or 0
+        linhas.update(versao_lista=ultima + 1, versao_remocao=ultima + 1)
+    if remocao:
+        linhas.update(versao_remocao=F('versao_lista'))
+    return linhas.values_list('versao_lista', flat=True).first() or 0
+
+def versoes(evento_id):
+    """ (versao_lista, versao_remocao) atuais do evento. """
+    return EstatisticaEvento.objects.filter(evento_id=evento_id).values_list(
+        'versao_lista', 'versao_remocao'
+    ).first() or (0, 0)
+
+
+# --- Cursores ---
+# O cursor identifica a lista entregue (evento, versão e resumo das linhas). Assinado,
+# ele não pode ser forjado para pular mudanças nem reaproveitado em outro evento, e o
+# resumo amarra o cursor ao conteúdo exato que foi entregue junto com ele.
+
+def resumo_lista(completo, linhas):
+    """ SHA-256 das linhas entregues, no mesmo JSON compacto enviado ao dispositivo. """
+    conteudo = json.dumps([completo, linhas], separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(conteudo.encode()).hexdigest()
+
+def gerar_cursor(evento_id, versao, resumo=''):
+    return signing.Signer(salt=SALT_CURSOR).sign(f'{evento_id}:{versao}:{resumo}')
+
+def resumo_do_cursor(evento_id, cursor):
+    """ Resumo das linhas assinado no cursor, ou None se o cursor for inválido ou de outro evento. """
+    try:
+        evento, _versao, resumo = signing.Signer(salt=SALT_CURSOR).unsign(cursor or '').split(':')
+        if int(evento) != int(evento_id):
+            return None
+        return resumo
+    except (signing.BadSignature, ValueError):
+        return None
+
+def versao_do_cursor(evento_id, cursor):
+    """ Versão contida no cursor, ou None se for inválido ou de outro evento. """
+    try:
+        # Cursores emitidos antes do resumo têm só evento e versão e continuam válidos
+        evento, versao = signing.Signer(salt=SALT_CURSOR).unsign(cursor or '').split(':')[:2]
+        if int(evento) != int(evento_id):
+            return None
+        return int(versao)
+    except (signing.BadSignature, ValueError):
+        return None
+
+
+# --- Download da lista ---
+
+def lista_checkin(evento_id, cursor=None):
+    """
+    Lista do evento no formato compacto (uma lista por inscrito, na ordem de COLUNAS).
+    Com um cursor válido, retorna só as inscrições alteradas depois dele. O cursor
+    retornado assina o resumo das linhas (também em 'resumo'), que o dispositivo confere
+    antes de aplicar a lista.
+    """
+    # A versão é lida antes das linhas: o que for confirmado entre as duas consultas
+    # vem junto agora e de novo na próxima sincronização (reaplicar é inofensivo).
+    versao, versao_remocao = versoes(evento_id)
+
+    desde = versao_do_cursor(evento_id, cursor)
+    completo = desde is None or desde < versao_remocao or desde > versao
+
+    inscricoes = Inscricao.objects.filter(evento_id=evento_id)
+    if not completo:
+        inscricoes = inscricoes.filter(versao_lista__gt=desde)
+
+    linhas = [
+        [inscricao_id, nome, int(presenca)]
+        for inscricao_id, nome, presenca in inscricoes.order_by('pk').values_list(
+            'pk', 'usuario__nome', 'presenca_confirmada'
+        )
+    ] if completo or desde < versao else []
+    resumo = resumo_lista(completo, linhas)
+
+    return {
+        'evento': evento_id,
+        'versao': versao,
+        'cursor': gerar_cursor(evento_id, versao, resumo),
+        'resumo': resumo,
+        'completo': completo,
+        'chave_codigo': chave_codigo_checkin(evento_id),
+        'colunas': COLUNAS,
+        'inscritos': linhas,
+    }
+
+
+# --- Envio dos check-ins feitos offline ---
+
+def aplicar_checkins(evento_id, cursor, checkins):
+    """
+    Aplica os check-ins [(inscricao_id, presenca), ...] feitos a partir da lista do
+    cursor. O envio é idempotente: presenças que já estão no valor enviado são só
+    contadas. Uma inscrição alterada no servidor depois do cursor, com valor diferente
+    do enviado, é um conflito: não é aplicada e volta com o valor do servidor.
+    Retorna None se o cursor for inválido.
+    """
+    base = versao_do_cursor(evento_id, cursor)
+    if base is None:
+        return None
+
+    # O último valor enviado para cada inscrição é o que vale
+    desejado = {int(inscricao_id): bool(presenca) for inscricao_id, presenca in checkins}
+
+    resultado = {'aplicados': 0, 'ja_aplicados': 0, 'conflitos': [], 'inexistentes': []}
+    with transaction.atomic():
+        atuais = {
+            inscricao_id: (presenca, versao)
+            for inscricao_id, presenca, versao in Inscricao.objects.select_for_update().filter(
+                evento_id=evento_id, pk__in=desejado
+            ).values_list('pk', 'presenca_confirmada', 'versao_lista')
+        }
+
+        confirmar, desconfirmar = [], []
+        for inscricao_id, presenca in sorted(desejado.items()):
+            if inscricao_id not in atuais:
+                resultado['inexistentes'].append(inscricao_id)
+                continue
+            presenca_atual, versao = atuais[inscricao_id]
+            if presenca_atual == presenca:
+                resultado['ja_aplicados'] += 1
+            elif versao > base:
+                resultado['conflitos'].append([inscricao_id, int(presenca_atual)])
+            else:
+                (confirmar if presenca else desconfirmar).append(inscricao_id)
+
+        if confirmar or desconfirmar:
+            # Um único UPDATE para o lote inteiro, todas as linhas na mesma versão nova
+            versao = proxima_versao(evento_id)
+            Inscricao.objects.filter(pk__in=confirmar + desconfirmar).update(
+                presenca_confirmada=Case(When(pk__in=confirmar, then=Value(True)), default=Value(False)),
+                versao_lista=versao,
+            )
+            # QuerySet.update não dispara signals
+            estatisticas.registrar_presencas(evento_id, len(confirmar) - len(desconfirmar))
+            resultado['aplicados'] = len(confirmar) + len(desconfirmar)
+
+    return resultado
+
+
+def definir_presencas(inscricoes, presenca):
+    """
+    Confirma (ou desfaz) a presença de um conjunto de inscrições, de qualquer evento,
+    com um UPDATE por evento na nova versão da lista dele (ações em lote do admin).
+    Retorna a quantidade de inscrições alteradas.
+    """
+    pendentes = inscricoes.filter(presenca_confirmada=not presenca).order_by()
+    alteradas = 0
+    with transaction.atomic():
+        for evento_id in list(pendentes.values_list('evento_id', flat=True).distinct()):
+            versao = proxima_versao(evento_id)
+            quantidade = pendentes.filter(evento_id=evento_id).update(presenca_confirmada=presenca, versao_lista=versao)
+            # QuerySet.update não dispara signals
+            estatisticas.registrar_presencas(evento_id, quantidade if presenca else -quantidade)
+            alteradas += quantidade
+    return alteradas
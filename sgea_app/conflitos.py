@@ -0,0 +1,111 @@
+from django.db.models import Q
+from django.utils import timezone
+
+from .horarios import intervalos_diarios, intervalos_sobrepostos
+from .models import Evento, Inscricao
+
+# Conflito = os intervalos [inicio, fim) de dois eventos se sobrepõem:
+#   A.inicio < B.fim AND A.fim > B.inicio
+# 'inicio' e 'fim' são colunas indexadas do Evento, calculadas no save(). Num evento de
+# vários dias com horário, esse período vai do primeiro ao último dia, mas o evento só
+# ocupa o horário de cada dia: o banco seleciona os candidatos pelo período e os horários
+# diários são conferidos em seguida (intervalos_diarios), sem falsos conflitos à noite.
+
+CAMPOS_CONFLITO = ('id', 'nome', 'inicio', 'fim', 'data_inicial', 'data_final', 'horario', 'politica_conflito')
+
+
+def _intervalos(evento):
+    return intervalos_diarios(evento.data_inicial, evento.data_final, evento.horario)
+
+
+def conflitam(evento_a, evento_b):
+    """ Se os horários diários de dois eventos (já com períodos sobrepostos) coincidem. """
+    return intervalos_sobrepostos(_intervalos(evento_a), _intervalos(evento_b))
+
+
+def eventos_conflitantes(usuario, evento):
+    """
+    Eventos em que o usuário está inscrito e que se sobrepõem ao evento informado.
+    Uma única consulta por intervalo (sem carregar todas as inscrições do usuário).
+    """
+    if evento.inicio is None or evento.fim is None:
+        return []
+
+    candidatos = Evento.objects.filter(
+        inscricoes__usuario=usuario,
+        inicio__lt=evento.fim,
+        fim__gt=evento.inicio,
+    ).exclude(pk=evento.pk).order_by('inicio').only(*CAMPOS_CONFLITO)
+    intervalos = _intervalos(evento)
+    return [candidato for candidato in candidatos if intervalos_sobrepostos(intervalos, _intervalos(candidato))]
+
+
+def conflitos_por_usuario(usuario_ids, evento):
+    """
+    eventos_conflitantes() de vários usuários numa única consulta (ex: um lote da lista
+    de espera): {usuario_id: [eventos]}. Usuários sem conflito ficam de fora.
+    """
+    if evento.inicio is None or evento.fim is None or not usuario_ids:
+        return {}
+
+    inscricoes = Inscricao.objects.filter(
+        usuario_id__in=usuario_ids,
+        evento__inicio__lt=evento.fim,
+        evento__fim__gt=evento.inicio,
+    ).exclude(evento_id=evento.pk).select_related('evento').only(
+        'usuario_id', *(f'evento__{campo}' for campo in CAMPOS_CONFLITO)
+    ).order_by('evento__inicio')
+    intervalos = _intervalos(evento)
+    conflitos = {}
+    for inscricao in inscricoes:
+        if intervalos_sobrepostos(intervalos, _intervalos(inscricao.evento)):
+            conflitos.setdefault(inscricao.usuario_id, []).append(inscricao.evento)
+    return conflitos
+
+
+def inscricao_bloqueada(evento, conflitos):
+    """ Bloqueia se o evento novo ou algum dos conflitantes usar a política 'bloquear'. """
+    if not conflitos:
+        return False
+    return evento.politica_conflito == 'bloquear' or any(
+        conflito.politica_conflito == 'bloquear' for conflito in conflitos
+    )
+
+
+def mensagem_conflito(conflitos):
+    nomes = ', '.join(f"'{conflito.nome}'" for conflito in conflitos)
+    return f"O horário deste evento conflita com: {nomes}."
+
+
+def conflitos_do_usuario(usuario):
+    """
+    Pares de eventos do usuário que se sobrepõem, como lista de (evento_a, evento_b).
+    Os eventos vêm ordenados por início numa consulta e os pares são encontrados
+    com uma varredura (cada evento só é comparado com os que ainda estão em andamento),
+    conferindo os horários diários dos eventos de vários dias.
+    """
+    eventos = Evento.objects.filter(
+        inscricoes__usuario=usuario, inicio__isnull=False
+    ).order_by('inicio').only('local', *CAMPOS_CONFLITO)
+
+    pares = []
+    em_andamento = []
+    for evento in eventos:
+        em_andamento = [anterior for anterior in em_andamento if anterior.fim > evento.inicio]
+        pares.extend((anterior, evento) for anterior in em_andamento if conflitam(anterior, evento))
+        em_andamento.append(evento)
+    return pares
+
+
+def preencher_intervalos():
+    """ Calcula 'inicio' e 'fim' dos eventos criados antes das colunas existirem. """
+    agora = timezone.now()
+    pendentes = []
+    for evento in Evento.objects.filter(Q(inicio__isnull=True) | Q(fim__isnull=True)).only(
+        'id', 'data_inicial', 'data_final', 'horario'
+    ).iterator():
+        evento.atualizar_intervalo()
+        evento.atualizado_em = agora
+        pendentes.append(evento)
+    Evento.objects.bulk_update(pendentes, ['inicio', 'fim', 'atualizado_em'], batch_size=500)
+    return len(pendentes)
@@ -0,0 +1,285 @@
+import csv
+import io
+import json
+import os
+import secrets
+import zipfile
+from datetime import timedelta
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+
+from . import fila
+from .midia import TAMANHO_BLOCO
+from .models import (
+    Certificado, CertificadoArquivado, ExportacaoDados, Inscricao, InscricaoArquivada, RegistroAuditoria,
+)
+
+# Exportação dos dados de um usuário ("Meus Dados"): perfil, inscrições (ativas e
+# arquivadas), certificados com seus arquivos e registros de auditoria, num ZIP.
+#
+# O ZIP é montado como fluxo: cada parte é escrita a partir de um iterador (linhas do
+# banco lidas aos poucos, arquivos copiados em blocos) e os bytes comprimidos saem
+# assim que acumulam um bloco. Nada além de um bloco fica na memória. Contas pequenas
+# baixam o ZIP durante a própria requisição; as grandes têm o arquivo gerado pela fila
+# de tarefas e baixado depois, com Range (o download pode ser retomado).
+
+# Acima destes limites a exportação vai para a fila
+LIMITE_LINHAS_DIRETO = 5000
+LIMITE_ARQUIVOS_DIRETO = 20
+
+# Dias que o arquivo gerado fica disponível
+DIAS_EXPORTACAO = 7
+
+# Prazo para a fila montar o arquivo. Passado o prazo (ex: tarefa esgotou as tentativas),
+# a exportação vence como as prontas e o usuário pode pedir outra.
+PRAZO_PREPARACAO = timedelta(hours=6)
+
+LINHAS_POR_LEITURA = 1000
+
+
+# --- Partes do pacote (iteradores de bytes) ---
+
+def _json(dados):
+    yield json.dumps(dados, cls=DjangoJSONEncoder, ensure_ascii=False, indent=2).encode()
+
+
+def _json_lista(itens):
+    yield b'['
+    for indice, item in enumerate(itens):
+        yield ((',\n' if indice else '\n') + json.dumps(item, cls=DjangoJSONEncoder, ensure_ascii=False)).encode()
+    yield b'\n]\n'
+
+
+def _csv(cabecalho, linhas):
+    # BOM: o Excel abre o UTF-8 com acentos corretamente
+    buffer = io.StringIO()
+    buffer.write('\ufeff')
+    escritor = csv.writer(buffer)
+    escritor.writerow(cabecalho)
+    for linha in linhas:
+        escritor.writerow(linha)
+        if buffer.tell() >= TAMANHO_BLOCO:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+def _arquivo(nome, storage):
+    with storage.open(nome, 'rb') as arquivo:
+        for bloco in iter(lambda: arquivo.read(TAMANHO_BLOCO), b''):
+            yield bloco
+
+
+def _perfil(usuario):
+    return {
+        'id': usuario.pk,
+        'nome': usuario.nome,
+        'login': usuario.login,
+        'email': usuario.email,
+        'telefone': usuario.telefone,
+        'instituicao_ensino': usuario.instituicao_ensino,
+        'perfil': usuario.perfil,
+        'ativo': usuario.is_active,
+        'ultimo_acesso': usuario.last_login,
+        'exportado_em': timezone.now(),
+    }
+
+
+def _linhas_inscricoes(usuario):
+    colunas = (
+        'evento_id', 'evento__nome', 'evento__data_inicial', 'evento__data_final',
+        'evento__local', 'presenca_confirmada',
+    )
+    for modelo, situacao in ((Inscricao, 'ativa'), (InscricaoArquivada, 'arquivada')):
+        linhas = modelo.objects.filter(usuario=usuario).order_by('pk').values_list(*colunas)
+        for linha in linhas.iterator(chunk_size=LINHAS_POR_LEITURA):
+            yield (*linha[:-1], 'sim' if linha[-1] else 'não', situacao)
+
+
+def _certificados(usuario):
+    for modelo in (Certificado, CertificadoArquivado):
+        consulta = modelo.objects.filter(inscricao__usuario=usuario).select_related('inscricao__evento').order_by('pk')
+        yield from consulta.iterator(chunk_size=LINHAS_POR_LEITURA)
+
+
+def _nome_no_pacote(certificado):
+    return f"certificados/{certificado.pk}-{os.path.basename(certificado.arquivo_certificado.name)}"
+
+
+def _dados_certificados(usuario):
+    for certificado in _certificados(usuario):
+        yield {
+            'id': certificado.pk,
+            'evento': certificado.inscricao.evento.nome,
+            'data_emissao': certificado.data_emissao,
+            'codigo_verificacao': certificado.codigo_formatado(),
+            'status': certificado.status_emissao,
+            'texto': certificado.texto_certificado,
+            'arquivo': _nome_no_pacote(certificado) if certificado.arquivo_certificado else None,
+        }
+
+
+def _linhas_auditoria(usuario):
+    registros = RegistroAuditoria.objects.filter(usuario=usuario).order_by('data_hora', 'pk').values_list('data_hora', 'acao')
+    for data_hora, acao in registros.iterator(chunk_size=LINHAS_POR_LEITURA):
+        yield timezone.localtime(data_hora).isoformat(timespec='seconds'), acao
+
+
+def partes(usuario):
+    """ (nome no ZIP, compressão, iterador de bytes) de cada parte do pacote. """
+    yield 'perfil.json', zipfile.ZIP_DEFLATED, _json(_perfil(usuario))
+    yield 'inscricoes.csv', zipfile.ZIP_DEFLATED, _csv(
+        ('evento_id', 'evento', 'data_inicial', 'data_final', 'local', 'presenca_confirmada', 'situacao'),
+        _linhas_inscricoes(usuario),
+    )
+    yield 'certificados.json', zipfile.ZIP_DEFLATED, _json_lista(_dados_certificados(usuario))
+    yield 'auditoria.csv', zipfile.ZIP_DEFLATED, _csv(('data_hora', 'acao'), _linhas_auditoria(usuario))
+    # Os arquivos (PDFs, imagens) já são comprimidos: vão sem recompressão
+    for certificado in _certificados(usuario):
+        arquivo = certificado.arquivo_certificado
+        if arquivo and arquivo.storage.exists(arquivo.name):
+            yield _nome_no_pacote(certificado), zipfile.ZIP_STORED, _arquivo(arquivo.name, arquivo.storage)
+
+
+# --- ZIP em fluxo ---
+
+class _Destino:
+    """
+    Saída só de escrita para o zipfile. Sem seek, o zipfile grava o tamanho de cada
+    parte depois dela (data descriptor), e o ZIP pode ser enviado enquanto é montado.
+    """
+    def __init__(self):
+        self.blocos = []
+        self.tamanho = 0
+
+    def write(self, dados):
+        self.blocos.append(bytes(dados))
+        self.tamanho += len(dados)
+        return len(dados)
+
+    def flush(self):
+        pass
+
+    def retirar(self):
+        dados = b''.join(self.blocos)
+        self.blocos, self.tamanho = [], 0
+        return dados
+
+
+def gerar_zip(usuario):
+    """ Gera o ZIP com os dados do usuário, em blocos de bytes. """
+    destino = _Destino()
+    agora = timezone.localtime().timetuple()[:6]
+    with zipfile.ZipFile(destino, 'w') as pacote:
+        for nome, compressao, conteudo in partes(usuario):
+            info = zipfile.ZipInfo(nome, date_time=agora)
+            info.compress_type = compressao
+            with pacote.open(info, 'w', force_zip64=True) as saida:
+                for bloco in conteudo:
+                    saida.write(bloco)
+                    if destino.tamanho >= TAMANHO_BLOCO:
+                        yield destino.retirar()
+        if destino.tamanho:
+            yield destino.retirar()
+    # Diretório central, escrito ao fechar o ZIP
+    yield destino.retirar()
+
+
+def nome_download(usuario):
+    return f"sgea-meus-dados-{usuario.pk}.zip"
+
+
+# --- Exportação em segundo plano ---
+
+def conta_grande(usuario):
+    """ Se a exportação do usuário deve ir para a fila em vez de sair na hora. """
+    linhas = (
+        Inscricao.objects.filter(usuario=usuario).count()
+        + InscricaoArquivada.objects.filter(usuario=usuario).count()
+        + RegistroAuditoria.objects.filter(usuario=usuario).count()
+    )
+    if linhas > LIMITE_LINHAS_DIRETO:
+        return True
+    arquivos = sum(
+        modelo.objects.filter(inscricao__usuario=usuario).exclude(arquivo_certificado='').exclude(
+            arquivo_certificado__isnull=True
+        ).count()
+        for modelo in (Certificado, CertificadoArquivado)
+    )
+    return arquivos > LIMITE_ARQUIVOS_DIRETO
+
+
+def exportacao_atual(usuario):
+    """ Última exportação do usuário ainda válida (em preparação ou pronta), ou None. """
+    return ExportacaoDados.objects.filter(usuario=usuario, expira_em__gt=timezone.now()).order_by('-criada_em').first()
+
+
+def _remover(exportacoes):
+    for exportacao in exportacoes:
+        if exportacao.arquivo:
+            exportacao.arquivo.delete(save=False)
+        exportacao.delete()
+
+
+def remover_expiradas():
+    """ Apaga as exportações vencidas (prontas ou não concluídas no prazo) e seus arquivos. """
+    _remover(ExportacaoDados.objects.filter(expira_em__lte=timezone.now()))
+
+
+def solicitar(usuario):
+    """
+    Agenda a montagem do pacote do usuário na fila. Uma exportação ainda em preparação
+    (dentro do prazo) é reaproveitada; as demais são apagadas.
+    """
+    with transaction.atomic():
+        pendente = ExportacaoDados.objects.filter(
+            usuario=usuario, estado='pendente', expira_em__gt=timezone.now()
+        ).first()
+        if pendente is not None:
+            return pendente
+        # Inclui pendentes vencidas, cuja tarefa não vai mais concluir
+        _remover(ExportacaoDados.objects.filter(usuario=usuario))
+        exportacao = ExportacaoDados.objects.create(usuario=usuario, expira_em=timezone.now() + PRAZO_PREPARACAO)
+        fila.enfileirar('gerar_exportacao_dados', exportacao_id=exportacao.pk)
+    return exportacao
+
+
+def gerar_exportacao_dados(exportacao_id):
+    """
+    Tarefa da fila: grava o ZIP no disco, bloco a bloco, num arquivo temporário que só
+    recebe o nome final quando completo.
+    """
+    exportacao = ExportacaoDados.objects.select_related('usuario').filter(
+        pk=exportacao_id, estado='pendente', expira_em__gt=timezone.now()
+    ).first()
+    if exportacao is None:
+        return
+
+    storage = exportacao.arquivo.storage
+    nome = f"exportacoes/{exportacao.usuario_id}-{exportacao.pk}-{secrets.token_hex(8)}.zip"
+    caminho = storage.path(nome)
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    temporario = caminho + '.parcial'
+    tamanho = 0
+    try:
+        with open(temporario, 'wb') as saida:
+            for bloco in gerar_zip(exportacao.usuario):
+                saida.write(bloco)
+                tamanho += len(bloco)
+        os.replace(temporario, caminho)
+    finally:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+
+    agora = timezone.now()
+    atualizadas = ExportacaoDados.objects.filter(pk=exportacao.pk, estado='pendente').update(
+        estado='pronta', arquivo=nome, tamanho=tamanho, concluida_em=agora,
+        expira_em=agora + timedelta(days=DIAS_EXPORTACAO),
+    )
+    if not atualizadas:
+        # Exportação apagada (ou vencida) durante a montagem
+        storage.delete(nome)
+    remover_expiradas()
@@ -0,0 +1,251 @@
+from django.core.mail import send_mass_mail
+from django.db import transaction
+from django.db.models import Count, F, Max, Min, Q
+from django.utils import timezone
+
+from . import calendario, checkin, estatisticas, fila
+from .conflitos import conflitos_por_usuario, inscricao_bloqueada
+from .models import DesistenciaEspera, EstatisticaEvento, Evento, Inscricao, ListaEspera, RegistroAuditoria, Usuario
+
+# Lista de espera dos eventos lotados, por ordem de chegada.
+#
+# Cada entrada recebe um número de chegada ('posicao') do contador espera_fim da
+# EstatisticaEvento; promover as primeiras só avança espera_inicio, e quem desiste só
+# apaga a própria linha (os números não são refeitos, ficam lacunas). A posição na fila
+# é posicao - espera_inicio menos as desistências com número entre os dois, contadas
+# numa árvore de Fenwick (DesistenciaEspera): registrar uma desistência e ler uma
+# posição tocam O(log n) nós, buscados pela chave única (evento, no), sem COUNT das
+# entradas à frente. As operações travam a linha de estatística do evento, o que
+# serializa a lista de cada evento.
+#
+# Quem cancela a inscrição libera a vaga e promove as próximas entradas na mesma
+# transação (promover()); os promovidos são avisados por e-mail pela fila de tarefas.
+
+# Números de chegada cobertos pela árvore (cada caminho tem no máximo 32 nós)
+LIMITE_FENWICK = 1 << 32
+
+
+def _nos_atualizacao(numero):
+    """ Nós que somam a desistência do número 'numero'. """
+    while 0 < numero < LIMITE_FENWICK:
+        yield numero
+        numero += numero & -numero
+
+
+def _nos_prefixo(numero):
+    """ Nós cuja soma é o total de desistências com número até 'numero'. """
+    while numero > 0:
+        yield numero
+        numero -= numero & -numero
+
+
+def _registrar_desistencia(evento_id, numero):
+    nos = list(_nos_atualizacao(numero))
+    existentes = set(DesistenciaEspera.objects.filter(evento_id=evento_id, no__in=nos).values_list('no', flat=True))
+    DesistenciaEspera.objects.filter(evento_id=evento_id, no__in=existentes).update(total=F('total') + 1)
+    DesistenciaEspera.objects.bulk_create([
+        DesistenciaEspera(evento_id=evento_id, no=no, total=1) for no in nos if no not in existentes
+    ])
+
+
+def _travar_estatistica(evento_id):
+    """ Linha de estatística do evento, travada até o fim da transação. None se o evento não existe. """
+    estatistica = EstatisticaEvento.objects.select_for_update().filter(evento_id=evento_id).first()
+    if estatistica is not None:
+        return estatistica
+    if estatisticas.recalcular_evento(evento_id) is None:
+        return None
+    # Linha recriada: os contadores da lista voltam a cobrir as entradas existentes
+    limites = ListaEspera.objects.filter(evento_id=evento_id).aggregate(
+        inicio=Min('posicao'), fim=Max('posicao'), total=Count('id')
+    )
+    if limites['fim'] is not None:
+        EstatisticaEvento.objects.filter(evento_id=evento_id).update(
+            espera_inicio=limites['inicio'] - 1, espera_fim=limites['fim'], espera_total=limites['total']
+        )
+    return EstatisticaEvento.objects.select_for_update().get(evento_id=evento_id)
+
+
+def posicoes(entradas):
+    """
+    Posição atual (1 = próxima a ser promovida) de cada entrada: {entrada.pk: posição}.
+    Duas consultas para qualquer quantidade de entradas: o início das filas e os nós
+    da árvore de desistências (somados com sinal: até o número, menos até o início).
+    """
+    entradas = list(entradas)
+    if not entradas:
+        return {}
+    inicios = dict(EstatisticaEvento.objects.filter(
+        evento_id__in={entrada.evento_id for entrada in entradas}
+    ).values_list('evento_id', 'espera_inicio'))
+
+    sinais = {}
+    for entrada in entradas:
+        inicio = inicios.get(entrada.evento_id, 0)
+        for no in _nos_prefixo(entrada.posicao):
+            sinais.setdefault(entrada.evento_id, {}).setdefault(no, {})[entrada.pk] = 1
+        for no in _nos_prefixo(inicio):
+            no_entrada = sinais.setdefault(entrada.evento_id, {}).setdefault(no, {})
+            no_entrada[entrada.pk] = no_entrada.get(entrada.pk, 0) - 1
+
+    filtro = Q()
+    for evento_id, nos in sinais.items():
+        filtro |= Q(evento_id=evento_id, no__in=list(nos))
+    desistencias = dict.fromkeys((entrada.pk for entrada in entradas), 0)
+    for evento_id, no, total in DesistenciaEspera.objects.filter(filtro).values_list('evento_id', 'no', 'total'):
+        for entrada_id, sinal in sinais[evento_id][no].items():
+            desistencias[entrada_id] += sinal * total
+
+    return {
+        entrada.pk: entrada.posicao - inicios.get(entrada.evento_id, 0) - desistencias[entrada.pk]
+        for entrada in entradas
+    }
+
+
+def posicao(entrada):
+    """ Posição atual da entrada na fila (1 = próxima a ser promovida). """
+    return posicoes([entrada])[entrada.pk]
+
+
+def entrar(usuario, evento):
+    """
+    Coloca o usuário no fim da lista de espera do evento.
+    Retorna (entrada, posição); se ele já estava na lista, a entrada existente.
+    """
+    with transaction.atomic():
+        estatistica = _travar_estatistica(evento.pk)
+        entrada = ListaEspera.objects.filter(usuario=usuario, evento=evento).first()
+        if entrada is not None:
+            return entrada, posicao(entrada)
+
+        numero = estatistica.espera_fim + 1
+        EstatisticaEvento.objects.filter(evento_id=evento.pk).update(
+            espera_fim=numero, espera_total=F('espera_total') + 1
+        )
+        entrada = ListaEspera.objects.create(usuario=usuario, evento=evento, posicao=numero)
+        return entrada, estatistica.espera_total + 1
+
+
+def sair(usuario, evento):
+    """
+    Retira o usuário da lista de espera. Só a entrada dele é apagada e a desistência é
+    somada na árvore: quem está atrás avança uma posição. Retorna False se ele não estava na lista.
+    """
+    with transaction.atomic():
+        _travar_estatistica(evento.pk)
+        entrada = ListaEspera.objects.filter(usuario=usuario, evento=evento).first()
+        if entrada is None:
+            return False
+        entrada.delete()
+        _registrar_desistencia(evento.pk, entrada.posicao)
+        EstatisticaEvento.objects.filter(evento_id=evento.pk).update(espera_total=F('espera_total') - 1)
+        return True
+
+
+def promover(evento_id):
+    """
+    Preenche as vagas livres do evento com as primeiras entradas da lista de espera.
+    Deve ser chamada na transação que liberou a vaga: quem recarregar a página depois
+    já encontra o evento lotado de novo. As inscrições são criadas em lote; entradas de
+    quem passou a ter um conflito bloqueante são descartadas (os conflitos de cada lote
+    vêm numa única consulta). Eventos que já começaram não promovem ninguém.
+    Retorna as inscrições criadas.
+    """
+    with transaction.atomic():
+        estatistica = _travar_estatistica(evento_id)
+        if estatistica is None or not estatistica.espera_total:
+            return []
+
+        evento = Evento.objects.get(pk=evento_id)
+        if evento.data_inicial < timezone.now().date():
+            # Evento já começou: ninguém é inscrito em sessões passadas
+            return []
+        # Inscritos pelo contador da linha travada (atualizado na mesma transação)
+        vagas = evento.quantidade_participantes - estatistica.total_inscritos
+
+        promovidas, descartadas = [], []
+        ultima = estatistica.espera_inicio
+        while vagas > 0:
+            lote = list(
+                ListaEspera.objects.filter(evento_id=evento_id, posicao__gt=ultima)
+                .select_related('usuario').order_by('posicao')[:vagas]
+            )
+            if not lote:
+                break
+            # Quem já se inscreveu por outro caminho (ex: API) só sai da lista
+            ja_inscritos = set(Inscricao.objects.filter(
+                evento_id=evento_id, usuario_id__in=[entrada.usuario_id for entrada in lote]
+            ).values_list('usuario_id', flat=True))
+            conflitos = conflitos_por_usuario(
+                [entrada.usuario_id for entrada in lote if entrada.usuario_id not in ja_inscritos], evento
+            )
+            for entrada in lote:
+                ultima = entrada.posicao
+                if entrada.usuario_id in ja_inscritos:
+                    continue
+                if inscricao_bloqueada(evento, conflitos.get(entrada.usuario_id)):
+                    descartadas.append(entrada)
+                else:
+                    promovidas.append(entrada)
+                    vagas -= 1
+
+        if ultima == estatistica.espera_inicio:
+            return []
+
+        # bulk_create não dispara signals: versão do check-in, contadores e calendários aqui
+        versao = checkin.proxima_versao(evento_id) if promovidas else 0
+        inscricoes = Inscricao.objects.bulk_create([
+            Inscricao(usuario=entrada.usuario, evento=evento, versao_lista=versao, nome_busca=entrada.usuario.nome_busca)
+            for entrada in promovidas
+        ])
+        removidas, _ = ListaEspera.objects.filter(evento_id=evento_id, posicao__lte=ultima).delete()
+        EstatisticaEvento.objects.filter(evento_id=evento_id).update(
+            espera_inicio=ultima, espera_total=F('espera_total') - removidas
+        )
+        if inscricoes:
+            estatisticas.registrar_variacao(evento_id, evento.organizador_id, total_inscritos=len(inscricoes))
+        RegistroAuditoria.objects.bulk_create([
+            RegistroAuditoria(usuario=entrada.usuario, acao=f"Inscrição no evento: {evento.nome} (lista de espera)")
+            for entrada in promovidas
+        ])
+        for entrada in promovidas:
+            calendario.invalidar_usuario(entrada.usuario_id)
+
+        if promovidas or descartadas:
+            fila.enfileirar(
+                'notificar_lista_espera', evento_id=evento_id,
+                promovidos=[entrada.usuario_id for entrada in promovidas],
+                descartados=[entrada.usuario_id for entrada in descartadas],
+            )
+        return inscricoes
+
+
+def notificar_lista_espera(evento_id, promovidos, descartados=()):
+    """ Tarefa da fila: avisa por e-mail quem saiu da lista de espera (uma conexão para o lote). """
+    evento = Evento.objects.filter(pk=evento_id).first()
+    if evento is None:
+        return
+
+    usuarios = Usuario.objects.in_bulk(list(promovidos) + list(descartados))
+    mensagens = []
+    for usuario_id in promovidos:
+        usuario = usuarios.get(usuario_id)
+        if usuario is not None:
+            mensagens.append((
+                f"Vaga confirmada: {evento.nome} - SGEA",
+                f"Olá {usuario.nome},\n\nAbriu uma vaga no evento '{evento.nome}' "
+                f"({evento.data_inicial:%d/%m/%Y}) e sua inscrição foi feita a partir da lista de espera.\n"
+                "Se não puder comparecer, cancele a inscrição pelo painel para liberar a vaga.",
+                None, [usuario.email],
+            ))
+    for usuario_id in descartados:
+        usuario = usuarios.get(usuario_id)
+        if usuario is not None:
+            mensagens.append((
+                f"Lista de espera: {evento.nome} - SGEA",
+                f"Olá {usuario.nome},\n\nAbriu uma vaga no evento '{evento.nome}', mas ele conflita com o horário "
+                "de outra inscrição sua e a inscrição não é permitida. Você saiu da lista de espera.",
+                None, [usuario.email],
+            ))
+    if mensagens:
+        send_mass_mail(mensagens)
@@ -0,0 +1,184 @@
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from . import ao_vivo
+from .models import EstatisticaEvento, EstatisticaOrganizador, Evento, Inscricao
+
+# Os contadores são atualizados com UPDATE ... SET campo = campo + delta, sem COUNT.
+# Operações em massa que não disparam signals (bulk_create, QuerySet.update) devem
+# chamar registrar_variacao diretamente; o que escapar é corrigido por reconciliar().
+
+CONTADORES = ('total_inscritos', 'presencas_confirmadas', 'certificados_emitidos')
+
+_estado = threading.local()
+
+
+@contextmanager
+def suspender():
+    """
+    Desliga as atualizações incrementais na thread atual. Usado por operações em massa
+    (ex: arquivamento) que recalculam os contadores afetados ao final.
+    """
+    anterior = getattr(_estado, 'suspenso', False)
+    _estado.suspenso = True
+    try:
+        yield
+    finally:
+        _estado.suspenso = anterior
+
+
+def _suspenso():
+    return getattr(_estado, 'suspenso', False)
+
+
+def _aplicar(modelo, filtro, deltas):
+    valores = {campo: F(campo) + delta for campo, delta in deltas.items() if delta}
+    if not valores:
+        return 1
+    valores['atualizado_em'] = timezone.now()
+    return modelo.objects.filter(**filtro).update(**valores)
+
+
+def registrar_variacao(evento_id, organizador_id=None, **deltas):
+    """
+    Aplica as variações (ex: total_inscritos=1) ao evento e ao seu organizador.
+    Se a linha de estatística ainda não existir, ela é criada já recalculada, exceto
+    em remoções: na exclusão do evento em cascata a linha já foi apagada e recriá-la
+    violaria a chave estrangeira no commit.
+    """
+    if _suspenso():
+        return
+
+    if not _aplicar(EstatisticaEvento, {'evento_id': evento_id}, deltas) and min(deltas.values(), default=0) >= 0:
+        recalcular_evento(evento_id)
+
+    # Contadores ao vivo (SSE): avisados só depois do commit
+    transaction.on_commit(lambda: ao_vivo.publicar_variacao(evento_id, deltas))
+
+    if organizador_id is None:
+        organizador_id = Evento.objects.filter(pk=evento_id).values_list('organizador_id', flat=True).first()
+        if organizador_id is None:
+            return
+    if not _aplicar(EstatisticaOrganizador, {'organizador_id': organizador_id}, deltas):
+        recalcular_organizador(organizador_id)
+
+
+def registrar_certificados(inscricoes):
+    """ Contabiliza certificados criados em lote (bulk_create não dispara signals). """
+    por_evento = Counter((inscricao.evento_id, inscricao.evento.organizador_id) for inscricao in inscricoes)
+    for (evento_id, organizador_id), quantidade in por_evento.items():
+        registrar_variacao(evento_id, organizador_id, certificados_emitidos=quantidade)
+
+
+def registrar_presencas(evento_id, variacao):
+    """ Contabiliza presenças alteradas em lote (QuerySet.update não dispara signals). """
+    if variacao:
+        registrar_variacao(evento_id, presencas_confirmadas=variacao)
+
+
+# --- Recalculo (usado na criação das linhas e na reconciliação) ---
+
+def _contagens_inscricoes(**filtro):
+    return Inscricao.objects.filter(**filtro).aggregate(
+        total_inscritos=Count('id'),
+        presencas_confirmadas=Count('id', filter=Q(presenca_confirmada=True)),
+        certificados_emitidos=Count('certificado'),
+    )
+
+
+def recalcular_evento(evento_id):
+    if not Evento.objects.filter(pk=evento_id).exists():
+        return None
+    estatistica, _ = EstatisticaEvento.objects.update_or_create(
+        evento_id=evento_id, defaults=_contagens_inscricoes(evento_id=evento_id)
+    )
+    return estatistica
+
+
+def _totais_eventos(organizador_id):
+    totais = Evento.objects.filter(organizador_id=organizador_id).aggregate(
+        total_eventos=Count('id'),
+        vagas_ofertadas=Sum('quantidade_participantes'),
+    )
+    totais['vagas_ofertadas'] = totais['vagas_ofertadas'] or 0
+    return totais
+
+
+def recalcular_organizador(organizador_id):
+    valores = _totais_eventos(organizador_id)
+    valores.update(_contagens_inscricoes(evento__organizador_id=organizador_id))
+    estatistica, _ = EstatisticaOrganizador.objects.update_or_create(
+        organizador_id=organizador_id, defaults=valores
+    )
+    return estatistica
+
+
+def atualizar_eventos_organizador(organizador_id):
+    """
+    Atualiza total de eventos e vagas ofertadas do organizador.
+    Chamado quando um evento é criado, editado ou excluído (operações raras).
+    """
+    if _suspenso():
+        return
+
+    atualizados = EstatisticaOrganizador.objects.filter(organizador_id=organizador_id).update(
+        atualizado_em=timezone.now(), **_totais_eventos(organizador_id)
+    )
+    if not atualizados:
+        recalcular_organizador(organizador_id)
+
+
+# --- Reconciliação periódica ---
+
+def reconciliar():
+    """
+    Recalcula todos os contadores com consultas agrupadas e corrige os que divergirem.
+    Retorna (eventos_corrigidos, organizadores_corrigidos).
+    """
+    agora = timezone.now()
+
+    por_evento = {
+        linha.pop('evento_id'): linha
+        for linha in Inscricao.objects.order_by().values('evento_id').annotate(
+            total_inscritos=Count('id'),
+            presencas_confirmadas=Count('id', filter=Q(presenca_confirmada=True)),
+            certificados_emitidos=Count('certificado'),
+        )
+    }
+    vazio = dict.fromkeys(CONTADORES, 0)
+    atuais = {estatistica.evento_id: estatistica for estatistica in EstatisticaEvento.objects.all()}
+
+    corrigir, criar = [], []
+    for evento_id in Evento.objects.values_list('id', flat=True).iterator():
+        esperado = por_evento.get(evento_id, vazio)
+        estatistica = atuais.get(evento_id)
+        if estatistica is None:
+            criar.append(EstatisticaEvento(evento_id=evento_id, atualizado_em=agora, **esperado))
+        elif any(getattr(estatistica, campo) != esperado[campo] for campo in CONTADORES):
+            for campo in CONTADORES:
+                setattr(estatistica, campo, esperado[campo])
+            estatistica.atualizado_em = agora
+            corrigir.append(estatistica)
+
+    EstatisticaEvento.objects.bulk_create(criar, batch_size=500)
+    EstatisticaEvento.objects.bulk_update(corrigir, CONTADORES + ('atualizado_em',), batch_size=500)
+    eventos_corrigidos = len(criar) + len(corrigir)
+
+    organizadores_corrigidos = 0
+    campos_organizador = ('total_eventos', 'vagas_ofertadas') + CONTADORES
+    organizadores = Evento.objects.order_by().values_list('organizador_id', flat=True).distinct()
+    atuais_org = {estatistica.organizador_id: estatistica for estatistica in EstatisticaOrganizador.objects.all()}
+    for organizador_id in organizadores:
+        estatistica = atuais_org.get(organizador_id)
+        esperado = _totais_eventos(organizador_id)
+        esperado.update(_contagens_inscricoes(evento__organizador_id=organizador_id))
+        if estatistica is None or any(getattr(estatistica, campo) != esperado[campo] for campo in campos_organizador):
+            EstatisticaOrganizador.objects.update_or_create(organizador_id=organizador_id, defaults=esperado)
+            organizadores_corrigidos += 1
+
+    return eventos_corrigidos, organizadores_corrigidos
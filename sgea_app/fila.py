@@ -0,0 +1,248 @@
+import math
+import traceback
+from datetime import timedelta
+
+from django.db import IntegrityError, close_old_connections, connection, transaction
+from django.db.models import Count, F, Min
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import TarefaFila
+
+# Fila de tarefas no próprio banco do projeto, sem serviço externo.
+#
+# As views chamam enfileirar() e respondem na hora; a linha é inserida na mesma
+# transação dos dados da requisição, então o worker só a enxerga após o commit.
+# O comando 'processar_fila' reserva as tarefas pendentes (da maior prioridade para a
+# menor) com um UPDATE condicional, como em tarefas.py, e as executa num pool de
+# threads ou processos. Enquanto elas rodam, o worker renova a reserva (renovar_reservas),
+# então só a de um worker que caiu vence. Falhas são repetidas com espera crescente;
+# esgotadas as tentativas, a tarefa fica em 'falha' (dead letter) com o traceback.
+
+PRIORIDADE_ALTA = 10
+PRIORIDADE_NORMAL = 0
+PRIORIDADE_BAIXA = -10
+
+# Tarefas conhecidas: nome -> (função, prioridade padrão, máximo de tentativas).
+# A função recebe os argumentos da tarefa como parâmetros nomeados.
+TAREFAS = {
+    'enviar_email_confirmacao': ('sgea_app.utils.imprimir_email_confirmacao', PRIORIDADE_ALTA, 5),
+    'notificar_lista_espera': ('sgea_app.espera.notificar_lista_espera', PRIORIDADE_ALTA, 5),
+    'enviar_lembretes': ('sgea_app.lembretes.enviar_lembretes', PRIORIDADE_NORMAL, 5),
+    'processar_banner': ('sgea_app.imagens.processar_banner', PRIORIDADE_NORMAL, 3),
+    'gerar_exportacao_dados': ('sgea_app.dados_pessoais.gerar_exportacao_dados', PRIORIDADE_BAIXA, 3),
+    'emitir_certificados_evento': ('sgea_app.certificados.emitir_certificados_evento', PRIORIDADE_NORMAL, 5),
+}
+
+# Prazo da reserva: se o worker cair, a tarefa volta para a fila depois dele. O worker
+# renova a reserva das tarefas em execução a cada RENOVACAO, por mais longas que sejam.
+RESERVA = timedelta(minutes=10)
+RENOVACAO = RESERVA / 3
+
+# Espera antes da nova tentativa: ESPERA_BASE * 2^(tentativas - 1), até ESPERA_MAXIMA
+ESPERA_BASE = timedelta(seconds=10)
+ESPERA_MAXIMA = timedelta(hours=1)
+
+
+def enfileirar(nome, prioridade=None, atraso=None, chave='', **argumentos):
+    """
+    Cria a tarefa 'nome' com os argumentos (serializáveis em JSON).
+    Com 'chave', reaproveita a tarefa com a mesma chave que ainda não começou; uma que
+    já esteja em execução (ou aguardando nova tentativa) pode ter lido dados antigos,
+    então outra é criada. A restrição única de (chave, pendente sem tentativas) resolve
+    duas chamadas simultâneas: a segunda recebe a tarefa criada pela primeira.
+    """
+    _, prioridade_padrao, max_tentativas = TAREFAS[nome]
+    while True:
+        if chave:
+            existente = TarefaFila.objects.filter(chave=chave, estado='pendente', tentativas=0).first()
+            if existente is not None:
+                return existente
+        try:
+            with transaction.atomic():
+                return TarefaFila.objects.create(
+                    nome=nome,
+                    argumentos=argumentos,
+                    prioridade=prioridade_padrao if prioridade is None else prioridade,
+                    max_tentativas=max_tentativas,
+                    chave=chave,
+                    executar_em=timezone.now() + (atraso or timedelta()),
+                )
+        except IntegrityError:
+            if not chave:
+                raise
+
+def enfileirar_lote(nome, lista_argumentos, prioridade=None, atraso=None):
+    """ Cria várias tarefas 'nome' (uma por item de 'lista_argumentos') num único INSERT. """
+    _, prioridade_padrao, max_tentativas = TAREFAS[nome]
+    executar_em = timezone.now() + (atraso or timedelta())
+    return TarefaFila.objects.bulk_create([
+        TarefaFila(
+            nome=nome,
+            argumentos=argumentos,
+            prioridade=prioridade_padrao if prioridade is None else prioridade,
+            max_tentativas=max_tentativas,
+            executar_em=executar_em,
+        )
+        for argumentos in lista_argumentos
+    ], batch_size=500)
+
+
+# --- Reserva ---
+
+def _proximas(agora):
+    return TarefaFila.objects.filter(
+        estado='pendente', executar_em__lte=agora
+    ).order_by('-prioridade', 'executar_em', 'pk')
+
+def reservar(dono, quantidade):
+    """
+    Reserva até 'quantidade' tarefas para o worker 'dono' e retorna os ids.
+    No PostgreSQL, SKIP LOCKED deixa cada worker com linhas diferentes; nos demais
+    bancos, o UPDATE condicional (estado='pendente') garante que só um worker vence.
+    """
+    agora = timezone.now()
+    reserva = {
+        'estado': 'executando',
+        'dono': dono,
+        'reservada_ate': agora + RESERVA,
+        'iniciada_em': agora,
+        'tentativas': F('tentativas') + 1,
+    }
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            ids = list(_proximas(agora).select_for_update(skip_locked=True).values_list('pk', flat=True)[:quantidade])
+            TarefaFila.objects.filter(pk__in=ids).update(**reserva)
+        return ids
+
+    ids = []
+    # Busca algumas a mais: outro worker pode levar parte delas no meio do caminho
+    for tarefa_id in _proximas(agora).values_list('pk', flat=True)[:quantidade * 2]:
+        if TarefaFila.objects.filter(pk=tarefa_id, estado='pendente').update(**reserva):
+            ids.append(tarefa_id)
+            if len(ids) == quantidade:
+                break
+    return ids
+
+def renovar_reservas(dono, ids):
+    """ Estende a reserva das tarefas que o worker 'dono' ainda está executando. """
+    if not ids:
+        return 0
+    return TarefaFila.objects.filter(pk__in=ids, dono=dono, estado='executando').update(
+        reservada_ate=timezone.now() + RESERVA
+    )
+
+def recuperar_abandonadas():
+    """
+    Devolve à fila as tarefas cujo worker caiu (reserva vencida). As que já esgotaram
+    as tentativas (ex: derrubam o worker toda vez) vão para 'falha'. Retorna quantas.
+    """
+    agora = timezone.now()
+    abandonadas = TarefaFila.objects.filter(estado='executando', reservada_ate__lt=agora)
+    esgotadas = abandonadas.filter(tentativas__gte=F('max_tentativas')).update(
+        estado='falha', erro='Reserva vencida: o worker foi interrompido durante a execução.',
+        reservada_ate=None, concluida_em=agora,
+    )
+    return esgotadas + abandonadas.update(estado='pendente', dono='', reservada_ate=None)
+
+
+# --- Execução ---
+
+def _espera(tentativas):
+    return min(ESPERA_BASE * 2 ** max(tentativas - 1, 0), ESPERA_MAXIMA)
+
+def executar(tarefa_id):
+    """
+    Executa uma tarefa já reservada. Roda nas threads/processos do worker; cada
+    execução usa e descarta a conexão com o banco como uma requisição faria.
+    Retorna o estado final ('concluida', 'pendente' para nova tentativa ou 'falha').
+    """
+    close_old_connections()
+    try:
+        tarefa = TarefaFila.objects.filter(pk=tarefa_id, estado='executando').first()
+        if tarefa is None:
+            return None
+
+        minha = TarefaFila.objects.filter(pk=tarefa.pk, dono=tarefa.dono, estado='executando')
+        try:
+            funcao = import_string(TAREFAS[tarefa.nome][0])
+            funcao(**tarefa.argumentos)
+        except Exception:
+            erro = traceback.format_exc()
+            if tarefa.tentativas >= tarefa.max_tentativas:
+                minha.update(estado='falha', erro=erro, reservada_ate=None, concluida_em=timezone.now())
+                return 'falha'
+            minha.update(
+                estado='pendente', erro=erro, dono='', reservada_ate=None,
+                executar_em=timezone.now() + _espera(tarefa.tentativas),
+            )
+            return 'pendente'
+
+        minha.update(estado='concluida', erro='', reservada_ate=None, concluida_em=timezone.now())
+        return 'concluida'
+    finally:
+        close_old_connections()
+
+def reenfileirar(tarefas):
+    """
+    Devolve tarefas em 'falha' (dead letter) para a fila, com um novo ciclo de tentativas.
+    As tentativas já feitas continuam contadas: a tarefa não passa por uma que nunca
+    começou (ver a deduplicação em enfileirar).
+    """
+    return tarefas.filter(estado='falha').update(
+        estado='pendente', max_tentativas=F('tentativas') + F('max_tentativas'), dono='', erro='',
+        executar_em=timezone.now(), concluida_em=None,
+    )
+
+def limpar_concluidas(dias=7):
+    """ Remove as tarefas concluídas há mais de 'dias' dias. As falhas ficam para análise. """
+    limite = timezone.now() - timedelta(days=dias)
+    return TarefaFila.objects.filter(estado='concluida', concluida_em__lt=limite).delete()[0]
+
+
+# --- Métricas ---
+
+def _percentil(valores, percentual):
+    if not valores:
+        return None
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, math.ceil(percentual / 100 * len(valores)) - 1)]
+
+def _resumo(valores):
+    return {
+        'media': round(sum(valores) / len(valores), 3) if valores else None,
+        'p95': round(_percentil(valores, 95), 3) if valores else None,
+        'maximo': round(max(valores), 3) if valores else None,
+    }
+
+def metricas(janela=timedelta(hours=1)):
+    """
+    Profundidade da fila (por estado e por tarefa), idade da tarefa pendente mais
+    antiga e latência das tarefas concluídas na janela: espera na fila (de quando
+    ficou disponível até começar) e duração da execução, em segundos.
+    """
+    agora = timezone.now()
+    por_estado = dict(TarefaFila.objects.order_by().values_list('estado').annotate(total=Count('id')))
+    pendentes_por_tarefa = dict(
+        TarefaFila.objects.filter(estado='pendente').order_by().values_list('nome').annotate(total=Count('id'))
+    )
+    mais_antiga = _proximas(agora).aggregate(inicio=Min('executar_em'))['inicio']
+
+    espera, duracao = [], []
+    concluidas = TarefaFila.objects.filter(
+        estado='concluida', concluida_em__gte=agora - janela
+    ).values_list('executar_em', 'iniciada_em', 'concluida_em')
+    for executar_em, iniciada_em, concluida_em in concluidas.iterator():
+        espera.append(max((iniciada_em - executar_em).total_seconds(), 0))
+        duracao.append((concluida_em - iniciada_em).total_seconds())
+
+    return {
+        'profundidade': {estado: por_estado.get(estado, 0) for estado, _ in TarefaFila.ESTADO_CHOICES},
+        'pendentes_por_tarefa': pendentes_por_tarefa,
+        'atraso_mais_antiga': round((agora - mais_antiga).total_seconds(), 3) if mais_antiga else 0,
+        'janela_segundos': int(janela.total_seconds()),
+        'concluidas_na_janela': len(duracao),
+        'espera': _resumo(espera),
+        'duracao': _resumo(duracao),
+    }
@@ -2,8 +2,11 @@ from django import forms
 from django.core.exceptions import ValidationError
 from django.contrib.auth import get_user_model
 from django.utils import timezone
+from django.urls import reverse
 import re # Usado para validação de formato (Regex)
 from .models import *
+from .imagens import validar_banner
+from .series import CAMPOS_EDITAVEIS_EM_LOTE, erro_deslocamento
 
 # Obtém o modelo de usuário customizado (sgea_app.Usuario)
 Usuario = get_user_model()
@@ -125,6 +128,28 @@ class CadastroUsuarioForm(forms.ModelForm):
         return user
 
 
+class ProfessorAutocompleteWidget(forms.Widget):
+    """
+    Campo de texto com sugestões (typeahead) para escolher o professor responsável.
+    O id escolhido vai num campo oculto; as sugestões vêm da rota 'buscar_professores',
+    então a página não precisa carregar todos os professores num <select>.
+    """
+    template_name = 'widgets/professor_autocomplete.html'
+
+    class Media:
+        js = ('sgea/js/professor_autocomplete.js',)
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        rotulo = ''
+        if value:
+            # Só o professor selecionado é consultado (para exibir o nome ao editar)
+            rotulo = Usuario.objects.filter(pk=value, perfil='Professor').values_list('nome', flat=True).first() or ''
+        context['widget']['rotulo'] = rotulo
+        context['widget']['url_busca'] = reverse('buscar_professores')
+        return context
+
+
 class FormularioEvento(forms.ModelForm):
     """
     Formulário para a criação de novos eventos.
@@ -136,7 +161,7 @@ class FormularioEvento(forms.ModelForm):
         # Organizador e Professor Responsável serão definidos pela lógica da view/validação.
         fields = [
             'nome', 'tipo_evento', 'data_inicial', 'data_final', 'horario', 
-            'local', 'quantidade_participantes', 'professor_responsavel', 'banner'
+            'local', 'quantidade_participantes', 'professor_responsavel', 'politica_conflito', 'banner'
         ]
         
         # Requisito de validação avançada: usar seletor de data e hora (datepicker/timepicker)[cite: 8].
@@ -145,19 +170,25 @@ class FormularioEvento(forms.ModelForm):
             'data_inicial': forms.DateInput(attrs={'type': 'date'}),
             'data_final': forms.DateInput(attrs={'type': 'date'}),
             'horario': forms.TextInput(attrs={'placeholder': 'Ex: 14:00'}),
-            # Professor Responsável será um dropdown filtrado
-            'professor_responsavel': forms.Select(attrs={'class': 'form-control'}),
+            # Professor Responsável: campo com sugestões enquanto o organizador digita
+            'professor_responsavel': ProfessorAutocompleteWidget(attrs={'class': 'form-control'}),
         }
         labels = {
             'professor_responsavel': 'Professor Responsável',
         }
+        help_texts = {
+            'politica_conflito': 'Ação quando o participante já está inscrito em outro evento no mesmo horário.',
+        }
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         
-        # Filtra o campo 'professor_responsavel' para mostrar apenas usuários com perfil 'Professor'.
-        professores = Usuario.objects.filter(perfil='Professor')
-        self.fields['professor_responsavel'].queryset = professores
+        # Restringe o campo 'professor_responsavel' a usuários com perfil 'Professor'.
+        # O queryset não é listado (o widget busca as sugestões sob demanda), mas
+        # continua validando no servidor o id enviado.
+        campo = self.fields['professor_responsavel']
+        campo.queryset = Usuario.objects.filter(perfil='Professor')
+        campo.error_messages['invalid_choice'] = "Selecione um professor da lista de sugestões."
 
     def clean_data_inicial(self):
         """
@@ -172,6 +203,15 @@ class FormularioEvento(forms.ModelForm):
                 "A data de início do evento não pode ser anterior à data atual."
             )
         return data_inicial
+
+    def clean_banner(self):
+        """
+        Valida tamanho, formato e resolução do banner enviado.
+        """
+        banner = self.cleaned_data.get('banner')
+        if banner:
+            validar_banner(banner)
+        return banner
         
     def clean(self):
         """
@@ -186,4 +226,111 @@ class FormularioEvento(forms.ModelForm):
                 "A data final do evento não pode ser anterior à data inicial."
             )
             
-        return cleaned_data
\ No newline at end of file
+        return cleaned_data
+
+# --- Séries de Eventos (evento principal + sessões criadas em lote) ---
+
+MAX_SESSOES = 100
+
+class SessaoForm(forms.Form):
+    """
+    Uma sessão da série. Local, vagas e professor em branco herdam os valores
+    do evento principal.
+    """
+    nome = forms.CharField(max_length=100, label="Nome da Sessão")
+    tipo_evento = forms.ChoiceField(choices=Evento.TIPO_EVENTO_CHOICES, label="Tipo")
+    data = forms.DateField(widget=forms.DateInput(attrs={'type': 'date'}), label="Data")
+    horario = forms.CharField(max_length=50, label="Horário", widget=forms.TextInput(attrs={'placeholder': 'Ex: 14:00 - 16:00'}))
+    local = forms.CharField(max_length=50, required=False, label="Local")
+    quantidade_participantes = forms.IntegerField(min_value=1, required=False, label="Vagas")
+    # Só o id: a validação de todos os professores da série é feita numa consulta (ver clean do formset)
+    professor_responsavel = forms.IntegerField(required=False, widget=ProfessorAutocompleteWidget, label="Professor")
+
+
+class BaseSessoesFormSet(forms.BaseFormSet):
+
+    def __init__(self, *args, periodo=None, **kwargs):
+        # (data_inicial, data_final) do evento principal, para validar as datas das sessões
+        self.periodo = periodo
+        super().__init__(*args, **kwargs)
+
+    def clean(self):
+        """
+        Regras de Negócio: sessões dentro do período do evento principal e
+        professores com perfil 'Professor' (uma consulta para todas as sessões).
+        """
+        if any(self.errors):
+            return
+
+        sessoes = [form.cleaned_data for form in self.forms if form.cleaned_data]
+        hoje = timezone.now().date()
+        for sessao in sessoes:
+            if sessao['data'] < hoje:
+                raise ValidationError(f"A sessão '{sessao['nome']}' não pode ter data anterior à data atual.")
+            if self.periodo and not (self.periodo[0] <= sessao['data'] <= self.periodo[1]):
+                raise ValidationError(f"A sessão '{sessao['nome']}' está fora do período do evento principal.")
+
+        ids = {sessao['professor_responsavel'] for sessao in sessoes if sessao.get('professor_responsavel')}
+        validos = set(Usuario.objects.filter(pk__in=ids, perfil='Professor').values_list('pk', flat=True))
+        if ids - validos:
+            raise ValidationError("Selecione professores da lista de sugestões para todas as sessões.")
+
+
+def formset_sessoes(extra=10):
+    """ Classe do formset de sessões com 'extra' linhas em branco. """
+    return forms.formset_factory(
+        SessaoForm, formset=BaseSessoesFormSet, extra=min(extra, MAX_SESSOES),
+        min_num=1, validate_min=True, max_num=MAX_SESSOES, validate_max=True,
+    )
+
+
+class FormularioEdicaoSessoes(forms.Form):
+    """
+    Edição em lote das sessões de uma série: os campos preenchidos são aplicados
+    a todas as sessões marcadas; campos em branco não são alterados.
+    """
+    sessoes = forms.ModelMultipleChoiceField(
+        queryset=Evento.objects.none(), widget=forms.CheckboxSelectMultiple, label="Sessões"
+    )
+    tipo_evento = forms.ChoiceField(choices=[('', '---------')] + Evento.TIPO_EVENTO_CHOICES, required=False, label="Tipo")
+    local = forms.CharField(max_length=50, required=False, label="Local")
+    horario = forms.CharField(max_length=50, required=False, label="Horário")
+    quantidade_participantes = forms.IntegerField(min_value=1, required=False, label="Vagas")
+    professor_responsavel = forms.ModelChoiceField(
+        queryset=Usuario.objects.filter(perfil='Professor'), required=False,
+        widget=ProfessorAutocompleteWidget, label="Professor Responsável",
+        error_messages={'invalid_choice': "Selecione um professor da lista de sugestões."},
+    )
+    politica_conflito = forms.ChoiceField(
+        choices=[('', '---------')] + Evento.POLITICA_CONFLITO_CHOICES, required=False, label="Conflito de Horário"
+    )
+    deslocar_dias = forms.IntegerField(
+        required=False, label="Deslocar datas (dias)",
+        help_text="Ex: 7 adia as sessões marcadas em uma semana; -1 antecipa um dia.",
+    )
+
+    def __init__(self, *args, evento_principal, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.evento_principal = evento_principal
+        self.fields['sessoes'].queryset = evento_principal.sessoes.order_by('data_inicial', 'inicio')
+
+    def clean(self):
+        """
+        Regra de Negócio: como na criação da série, as sessões deslocadas não podem
+        ficar com data anterior à data atual nem fora do período do evento principal.
+        """
+        cleaned_data = super().clean()
+        sessoes, dias = cleaned_data.get('sessoes'), cleaned_data.get('deslocar_dias')
+        if sessoes and dias:
+            erro = erro_deslocamento(self.evento_principal, sessoes, dias)
+            if erro:
+                self.add_error('deslocar_dias', erro)
+        return cleaned_data
+
+    def alteracoes(self):
+        """ Campos diretos (UPDATE) que foram preenchidos. """
+        return {
+            campo: self.cleaned_data[campo]
+            for campo in CAMPOS_EDITAVEIS_EM_LOTE
+            if self.cleaned_data.get(campo) not in (None, '')
+        }
@@ -0,0 +1,86 @@
+import re
+from datetime import datetime, time, timedelta
+
+# O campo 'horario' do Evento é texto livre ("14:00", "14h", "14:00 - 18:00", "19h30 às 22h").
+# Estas funções extraem dele o início e o fim do evento.
+
+HORARIO_RE = re.compile(r'(?<!\d)(\d{1,2})\s*(?:[:h]\s*(\d{2})?)?(?!\d)', re.IGNORECASE)
+
+# Duração assumida quando o horário informa só o início.
+DURACAO_PADRAO = timedelta(hours=2)
+
+
+def interpretar_horario(texto):
+    """
+    Retorna (hora_inicio, hora_fim) a partir do texto do horário.
+    hora_fim é None quando só o início foi informado; (None, None) se não
+    for possível interpretar.
+    """
+    horas = []
+    for hora, minuto in HORARIO_RE.findall(texto or ''):
+        hora, minuto = int(hora), int(minuto or 0)
+        if hora < 24 and minuto < 60:
+            horas.append(time(hora, minuto))
+        if len(horas) == 2:
+            break
+
+    if not horas:
+        return None, None
+    if len(horas) == 1:
+        return horas[0], None
+    return horas[0], horas[1]
+
+
+def intervalo_evento(data_inicial, data_final, horario):
+    """
+    Calcula (inicio, fim, dia_inteiro) do evento, em horário local (datetime sem fuso).
+    Sem horário reconhecível, o evento ocupa os dias inteiros de data_inicial a data_final.
+    Com horário e mais de um dia, é o período que vai do início do primeiro dia ao fim do
+    último: o evento ocupa só o horário em cada dia (ver intervalos_diarios).
+    """
+    hora_inicio, hora_fim = interpretar_horario(horario)
+
+    if hora_inicio is None:
+        inicio = datetime.combine(data_inicial, time.min)
+        fim = datetime.combine(data_final + timedelta(days=1), time.min)
+        return inicio, fim, True
+
+    inicio = datetime.combine(data_inicial, hora_inicio)
+    if hora_fim is not None and hora_fim > hora_inicio:
+        fim = datetime.combine(data_final, hora_fim)
+    else:
+        fim = datetime.combine(data_final, hora_inicio) + DURACAO_PADRAO
+    return inicio, fim, False
+
+
+def intervalos_diarios(data_inicial, data_final, horario):
+    """
+    Intervalos (inicio, fim) realmente ocupados pelo evento, em ordem: um por dia quando
+    há horário ("14:00 - 18:00" de segunda a sexta), ou um bloco único sem horário.
+    """
+    if data_final <= data_inicial:
+        return [intervalo_evento(data_inicial, data_final, horario)[:2]]
+
+    inicio, fim, dia_inteiro = intervalo_evento(data_inicial, data_inicial, horario)
+    if dia_inteiro:
+        return [intervalo_evento(data_inicial, data_final, horario)[:2]]
+    return [
+        (inicio + timedelta(days=dia), fim + timedelta(days=dia))
+        for dia in range((data_final - data_inicial).days + 1)
+    ]
+
+
+def intervalos_sobrepostos(intervalos_a, intervalos_b):
+    """ Se algum intervalo de A se sobrepõe a algum de B (listas ordenadas, sem sobreposição interna). """
+    a = b = 0
+    while a < len(intervalos_a) and b < len(intervalos_b):
+        inicio_a, fim_a = intervalos_a[a]
+        inicio_b, fim_b = intervalos_b[b]
+        if inicio_a < fim_b and fim_a > inicio_b:
+            return True
+        # Avança a lista cujo intervalo termina primeiro
+        if fim_a <= fim_b:
+            a += 1
+        else:
+            b += 1
+    return False
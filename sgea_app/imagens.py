@@ -0,0 +1,167 @@
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.utils import timezone
+
+# Variantes geradas para cada banner: nome -> (largura, altura).
+# O 'thumbnail' é usado na listagem de eventos (o card exibe 150x100, geramos 2x
+# para telas de alta densidade), o 'card' em blocos maiores e o 'hero' em páginas
+# de destaque.
+VARIANTES_BANNER = {
+    'hero': (1600, 600),
+    'card': (800, 450),
+    'thumbnail': (300, 200),
+}
+
+# Formatos de saída: WebP para navegadores modernos e JPEG como fallback.
+FORMATOS_VARIANTE = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+FORMATOS_BANNER_ACEITOS = ('JPEG', 'PNG', 'WEBP')
+
+
+def validar_banner(arquivo):
+    """
+    Valida o banner enviado pelo organizador.
+    O forms.ImageField do Django já abriu e verificou a imagem com o Pillow
+    (atributo 'image'), então aqui apenas reaproveitamos esse resultado, sem
+    decodificar o arquivo novamente.
+    """
+    tamanho_maximo = getattr(settings, 'BANNER_TAMANHO_MAXIMO', 10 * 1024 * 1024)
+    pixels_maximo = getattr(settings, 'BANNER_PIXELS_MAXIMO', 40_000_000)
+
+    if arquivo.size > tamanho_maximo:
+        raise ValidationError(
+            f"O banner deve ter no máximo {tamanho_maximo // (1024 * 1024)} MB."
+        )
+
+    imagem = getattr(arquivo, 'image', None)
+    if imagem is None:
+        # Arquivo já salvo anteriormente (edição sem novo upload).
+        return arquivo
+
+    if imagem.format not in FORMATOS_BANNER_ACEITOS:
+        raise ValidationError("O banner deve ser uma imagem JPEG, PNG ou WebP.")
+
+    largura, altura = imagem.size
+    if largura * altura > pixels_maximo:
+        raise ValidationError("A resolução do banner é grande demais.")
+
+    return arquivo
+
+
+def nome_variante(nome_original, variante, extensao):
+    """ Caminho da variante, salvo ao lado do arquivo original. """
+    base, _ = os.path.splitext(nome_original)
+    return f"{base}__{variante}.{extensao}"
+
+
+def gerar_variantes_banner(evento):
+    """
+    Decodifica o banner original uma única vez e gera, a partir dele, as
+    variantes recortadas e redimensionadas em WebP e JPEG.
+    Retorna o dicionário salvo em 'evento.banner_variantes'.
+    """
+    from PIL import Image, ImageOps
+
+    if not evento.banner:
+        return {}
+
+    storage = evento.banner.storage
+    nome_original = evento.banner.name
+
+    with storage.open(nome_original, 'rb') as arquivo:
+        imagem = Image.open(arquivo)
+        imagem.draft('RGB', VARIANTES_BANNER['hero'])  # JPEG: decodifica já reduzido
+        imagem = ImageOps.exif_transpose(imagem)
+        imagem = imagem.convert('RGB')
+
+    variantes = {}
+    for variante, tamanho in VARIANTES_BANNER.items():
+        redimensionada = ImageOps.fit(imagem, tamanho, method=Image.LANCZOS)
+        variantes[variante] = {}
+        for extensao, (formato, opcoes) in FORMATOS_VARIANTE.items():
+            buffer = BytesIO()
+            redimensionada.save(buffer, formato, **opcoes)
+            nome = nome_variante(nome_original, variante, extensao)
+            if storage.exists(nome):
+                storage.delete(nome)
+            variantes[variante][extensao] = storage.save(nome, ContentFile(buffer.getvalue()))
+
+    return variantes
+
+
+def hashes_banner(nome_original, variantes, storage):
+    """ Hash do conteúdo do original e de cada variante (Evento.banner_hashes). """
+    from .midia import hash_arquivo
+
+    nomes = [nome_original] + [nome for formatos in variantes.values() for nome in formatos.values()]
+    return {nome: hash_arquivo(nome, storage) for nome in nomes}
+
+
+def remover_variantes_orfas(nome_original, storage=None):
+    """
+    Apaga as variantes de um banner que nenhum evento usa mais (trocado ou removido).
+    Os nomes são os de nome_variante(), pois gerar_variantes_banner() substitui os
+    arquivos existentes. Retorna quantos arquivos foram apagados.
+    """
+    from django.core.files.storage import default_storage
+
+    from .models import Evento
+
+    if not nome_original or Evento.objects.filter(banner=nome_original).exists():
+        return 0
+
+    storage = storage or default_storage
+    apagados = 0
+    for variante in VARIANTES_BANNER:
+        for extensao in FORMATOS_VARIANTE:
+            nome = nome_variante(nome_original, variante, extensao)
+            if storage.exists(nome):
+                storage.delete(nome)
+                apagados += 1
+    return apagados
+
+
+def processar_banner(evento_id, banner_anterior=''):
+    """
+    Gera as variantes do banner e grava o resultado nos eventos que usam o arquivo.
+    Só atualiza se o banner não tiver sido trocado durante o processamento; nesse caso,
+    e com o 'banner_anterior' de uma troca, as variantes que ficaram sem evento são apagadas.
+    """
+    from .models import Evento
+
+    evento = Evento.objects.filter(pk=evento_id).first()
+    if evento is None:
+        return
+    if banner_anterior and banner_anterior != evento.banner.name:
+        remover_variantes_orfas(banner_anterior, evento.banner.storage)
+    if not evento.banner:
+        return
+
+    nome_processado = evento.banner.name
+    variantes = gerar_variantes_banner(evento)
+    hashes = hashes_banner(nome_processado, variantes, evento.banner.storage)
+    # Sessões de uma série compartilham o arquivo do banner e recebem as mesmas variantes
+    atualizados = Evento.objects.filter(banner=nome_processado).update(
+        banner_variantes=variantes, banner_hashes=hashes, atualizado_em=timezone.now()
+    )
+    if not atualizados:
+        remover_variantes_orfas(nome_processado, evento.banner.storage)
+
+
+def agendar_processamento_banner(evento, banner_anterior=''):
+    """
+    Agenda a geração das variantes na fila de tarefas (worker 'processar_fila'),
+    para não bloquear a resposta do organizador. Novos uploads do mesmo evento
+    antes do processamento reaproveitam a tarefa pendente (o banner anterior dela é o
+    único que pode ter variantes: os intermediários nunca foram processados).
+    """
+    from . import fila
+
+    fila.enfileirar('processar_banner', chave=f'banner:{evento.pk}', evento_id=evento.pk, banner_anterior=banner_anterior)
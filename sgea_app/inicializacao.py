@@ -0,0 +1,174 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+
+from django.template import TemplateDoesNotExist, TemplateSyntaxError, engines
+
+# Inicialização rápida (principalmente do executável gerado pelo PyInstaller).
+#
+# O que fica para depois da primeira resposta:
+# - DRF: as views da API são importadas na primeira requisição a /api/ (api/urls.py);
+# - Pillow: só é importado ao processar um banner (imagens.py);
+# - templates: compilados em segundo plano depois da primeira resposta, quando
+#   SGEA_INICIO_RAPIDO está ativo (padrão no executável).
+#
+# medir_inicializacao() mede o tempo até a primeira resposta e o custo de cada import;
+# o comando 'perfil_inicializacao' gera o relatório que vai junto no build (sgea.spec).
+
+# Meta de tempo até a primeira resposta, em segundos
+META_PRIMEIRA_RESPOSTA = 1.0
+
+# Módulos que não devem ser importados antes da primeira resposta
+MODULOS_ADIADOS = ('PIL', 'rest_framework.views', 'rest_framework.serializers', 'rest_framework.authentication')
+
+
+# --- Templates ---
+
+_aquecidos = False
+_trava = threading.Lock()
+
+def precompilar_templates():
+    """ Compila todos os templates no cache do loader. Retorna quantos foram compilados. """
+    global _aquecidos
+    total = 0
+    for engine in engines.all():
+        carregadores = getattr(getattr(engine, 'engine', None), 'template_loaders', [])
+        for carregador in carregadores:
+            for subcarregador in getattr(carregador, 'loaders', [carregador]):
+                for diretorio in subcarregador.get_dirs():
+                    for raiz, _, arquivos in os.walk(diretorio):
+                        for arquivo in arquivos:
+                            if not arquivo.endswith(('.html', '.txt', '.xml')):
+                                continue
+                            nome = os.path.relpath(os.path.join(raiz, arquivo), diretorio).replace(os.sep, '/')
+                            try:
+                                engine.get_template(nome)
+                                total += 1
+                            except (TemplateDoesNotExist, TemplateSyntaxError):
+                                pass
+    _aquecidos = True
+    return total
+
+def aquecer_apos_primeira_resposta(sender, **kwargs):
+    """
+    Receiver de request_finished: na primeira resposta, compila os demais templates numa
+    thread em segundo plano. Processos que herdaram o cache já compilado (workers do
+    'servir') não fazem nada.
+    """
+    global _aquecidos
+    with _trava:
+        if _aquecidos:
+            return
+        _aquecidos = True
+    threading.Thread(target=precompilar_templates, name='sgea-templates', daemon=True).start()
+
+
+# --- Perfil de inicialização ---
+
+# Executado num interpretador novo, com -X importtime: carrega o Django e atende uma
+# requisição pela interface WSGI, sem abrir socket. Imprime os tempos em JSON.
+_SCRIPT_MEDICAO = r'''
+import io, json, os, sys, time
+inicio = time.perf_counter()
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sgea.settings')
+from django.core.wsgi import get_wsgi_application
+aplicacao = get_wsgi_application()
+carregado = time.perf_counter()
+status = []
+ambiente = {
+    'REQUEST_METHOD': 'GET', 'PATH_INFO': sys.argv[1], 'QUERY_STRING': '',
+    'SERVER_NAME': '127.0.0.1', 'SERVER_PORT': '80', 'HTTP_HOST': '127.0.0.1',
+    'wsgi.input': io.BytesIO(), 'wsgi.errors': sys.stderr, 'wsgi.url_scheme': 'http',
+}
+resposta = aplicacao(ambiente, lambda codigo, cabecalhos: status.append(codigo))
+b''.join(resposta)
+resposta.close()
+fim = time.perf_counter()
+from django.conf import settings
+print(json.dumps({
+    'inicio_rapido': settings.SGEA_INICIO_RAPIDO,
+    'carregamento': carregado - inicio,
+    'primeira_resposta': fim - carregado,
+    'status': status[0] if status else '',
+    'modulos': len(sys.modules),
+    'carregados': sorted(sys.modules),
+}))
+'''
+
+def _ler_importtime(saida):
+    """ Linhas 'import time: próprio | acumulado | módulo' -> lista de (módulo, próprio, acumulado) em segundos. """
+    modulos = []
+    for linha in saida.splitlines():
+        if not linha.startswith('import time:') or 'self [us]' in linha:
+            continue
+        proprio, acumulado, nome = linha[len('import time:'):].split('|')
+        modulos.append((nome.strip(), int(proprio) / 1e6, int(acumulado) / 1e6))
+    return modulos
+
+def medir_inicializacao(caminho='/login/', inicio_rapido=True):
+    """
+    Mede, num processo novo, o tempo até a primeira resposta de 'caminho' e o custo de
+    importação de cada módulo. Só funciona a partir do código-fonte (não no executável);
+    por padrão com SGEA_INICIO_RAPIDO ativo, como no executável.
+    """
+    ambiente = {
+        **os.environ,
+        'PYTHONPATH': os.pathsep.join(filter(None, [os.getcwd(), os.environ.get('PYTHONPATH')])),
+        'SGEA_INICIO_RAPIDO': '1' if inicio_rapido else '0',
+    }
+    inicio = time.perf_counter()
+    processo = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', _SCRIPT_MEDICAO, caminho],
+        capture_output=True, text=True, cwd=os.getcwd(), env=ambiente,
+    )
+    total = time.perf_counter() - inicio
+    if processo.returncode != 0:
+        raise RuntimeError(processo.stderr.strip().splitlines()[-1] if processo.stderr.strip() else 'falha na medição')
+
+    tempos = json.loads(processo.stdout.strip().splitlines()[-1])
+    modulos = _ler_importtime(processo.stderr)
+
+    pacotes = defaultdict(float)
+    for nome, proprio, _ in modulos:
+        pacotes[nome.split('.')[0]] += proprio
+
+    carregados = set(tempos.pop('carregados'))
+    return {
+        **tempos,
+        'caminho': caminho,
+        'total': total,
+        'importacao': sum(proprio for _, proprio, _ in modulos),
+        'modulos_lentos': sorted(modulos, key=lambda modulo: modulo[1], reverse=True),
+        'pacotes': sorted(pacotes.items(), key=lambda pacote: pacote[1], reverse=True),
+        'adiados': {nome: nome not in carregados for nome in MODULOS_ADIADOS},
+    }
+
+def relatorio(medicao, limite=20, meta=META_PRIMEIRA_RESPOSTA):
+    """ Texto do relatório de perfil de inicialização. """
+    ms = lambda segundos: f"{segundos * 1000:8.1f} ms"
+    linhas = [
+        "SGEA - perfil de inicialização",
+        f"Python {sys.version.split()[0]} ({sys.platform}), SGEA_INICIO_RAPIDO {'ativo' if medicao['inicio_rapido'] else 'inativo'}",
+        "",
+        f"Tempo até a primeira resposta ({medicao['caminho']}): {ms(medicao['total']).strip()} "
+        f"(meta: {meta * 1000:.0f} ms) - {'OK' if medicao['total'] <= meta else 'ACIMA DA META'}",
+        f"  carregamento do Django:  {ms(medicao['carregamento'])}",
+        f"  primeira requisição:     {ms(medicao['primeira_resposta'])} (status {medicao['status']})",
+        f"  interpretador e outros:  {ms(medicao['total'] - medicao['carregamento'] - medicao['primeira_resposta'])}",
+        f"Módulos carregados: {medicao['modulos']} (importação: {ms(medicao['importacao']).strip()})",
+        "",
+        "Importações adiadas (não carregadas antes da primeira resposta):",
+    ]
+    linhas += [f"  {'sim' if adiado else 'NÃO'}  {nome}" for nome, adiado in medicao['adiados'].items()]
+    linhas += ["", f"Pacotes por tempo de importação (top {limite}):"]
+    linhas += [f"  {ms(tempo)}  {nome}" for nome, tempo in medicao['pacotes'][:limite]]
+    linhas += ["", f"Módulos mais lentos, tempo próprio / acumulado (top {limite}):"]
+    linhas += [
+        f"  {ms(proprio)} {ms(acumulado)}  {nome}"
+        for nome, proprio, acumulado in medicao['modulos_lentos'][:limite]
+    ]
+    return '\n'.join(linhas) + '\n'
@@ -0,0 +1,85 @@
+from django.db.models import OuterRef, Q, Subquery
+
+from .busca import remover_acentos
+from .models import Inscricao, Usuario
+
+# Lista de inscritos do organizador (roster), para eventos de qualquer tamanho.
+#
+# Cada inscrição guarda uma cópia do nome de busca do participante (sem acentos, em
+# minúsculas) e o índice (evento, nome_busca, id) entrega as linhas já em ordem
+# alfabética. A paginação é por chave: cada página continua depois do último
+# (nome_busca, id) da anterior, então a centésima página custa o mesmo que a primeira.
+# A busca pelo início do nome é um intervalo no mesmo índice; com o filtro de presença,
+# o índice usado é (evento, presenca_confirmada, nome_busca, id). Os totais da página
+# vêm dos contadores de EstatisticaEvento, sem COUNT.
+
+TAMANHO_PAGINA = 50
+
+# ?presenca= -> valor de presenca_confirmada
+FILTROS_PRESENCA = {'confirmadas': True, 'pendentes': False}
+
+
+def gerar_cursor(inscricao):
+    """ Posição da inscrição na lista: 'id-nome_busca'. """
+    return f"{inscricao.pk}-{inscricao.nome_busca}"
+
+
+def ler_cursor(valor):
+    """ 'id-nome_busca' -> (nome_busca, id), ou None se o cursor for inválido. """
+    inscricao_id, separador, nome = (valor or '').partition('-')
+    # isdigit() aceita outros algarismos Unicode ('²', '١'), que o int() recusa ou converte
+    if not separador or not (inscricao_id.isascii() and inscricao_id.isdigit()):
+        return None
+    return nome, int(inscricao_id)
+
+
+def pagina(evento_id, busca='', presenca=None, apos=None, antes=None, tamanho=TAMANHO_PAGINA):
+    """
+    Uma página da lista do evento em ordem alfabética, a partir de um cursor:
+    'apos' (página seguinte) ou 'antes' (página anterior).
+    Retorna (inscrições, cursor da página anterior, cursor da seguinte); None nas pontas.
+    """
+    inscricoes = Inscricao.objects.filter(evento_id=evento_id).select_related('usuario')
+    if presenca is not None:
+        inscricoes = inscricoes.filter(presenca_confirmada=presenca)
+    prefixo = remover_acentos(busca).strip()[:50]
+    if prefixo:
+        inscricoes = inscricoes.filter(nome_busca__gte=prefixo, nome_busca__lt=prefixo + '\uffff')
+
+    chave_antes = ler_cursor(antes)
+    chave_apos = None if chave_antes else ler_cursor(apos)
+    if chave_antes:
+        # Lida de trás para frente a partir do cursor e devolvida na ordem normal
+        nome, inscricao_id = chave_antes
+        linhas = list(inscricoes.filter(
+            Q(nome_busca__lt=nome) | Q(nome_busca=nome, id__lt=inscricao_id), nome_busca__lte=nome
+        ).order_by('-nome_busca', '-id')[:tamanho + 1])
+        tem_anterior, tem_seguinte = len(linhas) > tamanho, True
+        linhas = linhas[:tamanho][::-1]
+    else:
+        if chave_apos:
+            nome, inscricao_id = chave_apos
+            # O nome_busca >= nome isolado é o início do intervalo lido no índice
+            inscricoes = inscricoes.filter(
+                Q(nome_busca__gt=nome) | Q(nome_busca=nome, id__gt=inscricao_id), nome_busca__gte=nome
+            )
+        linhas = list(inscricoes.order_by('nome_busca', 'id')[:tamanho + 1])
+        tem_anterior, tem_seguinte = chave_apos is not None, len(linhas) > tamanho
+        linhas = linhas[:tamanho]
+
+    if not linhas:
+        return [], None, None
+    return (
+        linhas,
+        gerar_cursor(linhas[0]) if tem_anterior else None,
+        gerar_cursor(linhas[-1]) if tem_seguinte else None,
+    )
+
+
+def sincronizar_nomes():
+    """
+    Corrige as inscrições cujo nome_busca difere do nome do participante (ex: linhas
+    anteriores ao campo). Um único UPDATE; retorna a quantidade de inscrições corrigidas.
+    """
+    nome_atual = Usuario.objects.filter(pk=OuterRef('usuario_id')).values('nome_busca')[:1]
+    return Inscricao.objects.exclude(nome_busca=Subquery(nome_atual)).update(nome_busca=Subquery(nome_atual))
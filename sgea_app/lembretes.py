@@ -0,0 +1,106 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from . import fila
+from .models import Inscricao, LembreteEnviado
+
+# Lembretes antes dos eventos, agendados pelo comando 'enviar_lembretes' (cron).
+#
+# Cada janela seleciona, numa consulta pelo índice de início do evento, as inscrições
+# que ainda não receberam o seu lembrete. As inscrições são agrupadas por usuário (um
+# e-mail com todos os eventos dele na janela) e os e-mails vão para a fila em lotes: cada
+# tarefa envia o seu lote numa única conexão SMTP. Os lembretes são registrados na mesma
+# transação que cria as tarefas, então rodar de novo não repete nada.
+
+# Janelas de antecedência, da maior para a menor. A faixa de cada janela termina onde
+# começa a seguinte: quem se inscreve em cima da hora só recebe o lembrete mais próximo.
+JANELAS = (
+    ('vespera', timedelta(hours=24)),
+    ('proximo', timedelta(hours=2)),
+)
+
+# E-mails (um por usuário) enviados por tarefa da fila
+EMAILS_POR_TAREFA = 50
+
+
+def faixas(agora):
+    """ (janela, de, ate) de cada janela: eventos com início em (de, ate]. """
+    for indice, (janela, antecedencia) in enumerate(JANELAS):
+        seguinte = JANELAS[indice + 1][1] if indice + 1 < len(JANELAS) else timedelta()
+        yield janela, agora + seguinte, agora + antecedencia
+
+
+def inscricoes_pendentes(janela, de, ate):
+    """ Inscrições em eventos com início em (de, ate] sem o lembrete da janela. """
+    registrado = LembreteEnviado.objects.filter(inscricao=OuterRef('pk'), janela=janela)
+    return Inscricao.objects.filter(evento__inicio__gt=de, evento__inicio__lte=ate).exclude(Exists(registrado))
+
+
+def agendar(agora=None, simular=False):
+    """
+    Enfileira os lembretes devidos em cada janela, agrupados por usuário.
+    Retorna {janela: (inscrições, e-mails)}; com 'simular', só conta.
+    """
+    agora = agora or timezone.now()
+    resumo = {}
+    for janela, de, ate in faixas(agora):
+        with transaction.atomic():
+            por_usuario = defaultdict(list)
+            pendentes = inscricoes_pendentes(janela, de, ate).order_by('usuario_id', 'pk').values_list('pk', 'usuario_id')
+            for inscricao_id, usuario_id in pendentes:
+                por_usuario[usuario_id].append(inscricao_id)
+
+            digestos = list(por_usuario.items())
+            resumo[janela] = (sum(len(inscricoes) for _, inscricoes in digestos), len(digestos))
+            if simular or not digestos:
+                continue
+
+            LembreteEnviado.objects.bulk_create([
+                LembreteEnviado(inscricao_id=inscricao_id, janela=janela)
+                for _, inscricoes in digestos for inscricao_id in inscricoes
+            ], batch_size=500, ignore_conflicts=True)
+            fila.enfileirar_lote('enviar_lembretes', [
+                {'janela': janela, 'digestos': digestos[inicio:inicio + EMAILS_POR_TAREFA]}
+                for inicio in range(0, len(digestos), EMAILS_POR_TAREFA)
+            ])
+    return resumo
+
+
+def mensagem_lembrete(usuario, inscricoes):
+    """ E-mail com os próximos eventos do usuário (inscrições ordenadas por início). """
+    if len(inscricoes) == 1:
+        assunto = f"Lembrete: {inscricoes[0].evento.nome} - SGEA"
+    else:
+        assunto = f"Lembrete: seus {len(inscricoes)} próximos eventos - SGEA"
+
+    linhas = [f"Olá {usuario.nome},", "", "Lembrete dos seus próximos eventos no SGEA:", ""]
+    for inscricao in inscricoes:
+        evento = inscricao.evento
+        linhas.append(f"- {evento.nome}: {timezone.localtime(evento.inicio):%d/%m/%Y %H:%M}, {evento.local}")
+        linhas.append(f"  Código de check-in: {inscricao.codigo_checkin}")
+    linhas += ["", "Se não puder comparecer, cancele a inscrição pelo painel para liberar a vaga."]
+    return EmailMessage(assunto, '\n'.join(linhas), to=[usuario.email])
+
+
+def enviar_lembretes(janela, digestos):
+    """
+    Tarefa da fila: envia os e-mails do lote numa única conexão SMTP.
+    'digestos' é uma lista de [usuario_id, [inscricao_id, ...]]. Inscrições canceladas e
+    eventos já iniciados desde o agendamento ficam de fora.
+    """
+    ids = [inscricao_id for _, inscricoes in digestos for inscricao_id in inscricoes]
+    por_usuario = defaultdict(list)
+    for inscricao in Inscricao.objects.filter(
+        pk__in=ids, evento__inicio__gt=timezone.now()
+    ).select_related('usuario', 'evento').order_by('evento__inicio'):
+        por_usuario[inscricao.usuario_id].append(inscricao)
+
+    mensagens = [mensagem_lembrete(inscricoes[0].usuario, inscricoes) for inscricoes in por_usuario.values()]
+    if mensagens:
+        with get_connection() as conexao:
+            conexao.send_messages(mensagens)
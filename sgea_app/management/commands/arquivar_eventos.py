@@ -0,0 +1,43 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from sgea_app.arquivamento import (
+    TAMANHO_LOTE, arquivar_eventos, data_limite, eventos_para_arquivar, medir_consultas,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Move os eventos encerrados há mais de N meses (com inscrições e certificados) "
+        "para as tabelas de arquivo. Pode ser agendado no cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--meses', type=int, default=settings.ARQUIVO_MESES,
+                            help="Idade mínima (em meses desde a data final) para arquivar.")
+        parser.add_argument('--lote', type=int, default=TAMANHO_LOTE,
+                            help="Eventos arquivados por transação.")
+        parser.add_argument('--simular', action='store_true',
+                            help="Apenas informa quantos eventos seriam arquivados.")
+        parser.add_argument('--medir', action='store_true',
+                            help="Mede as consultas do dia a dia antes e depois do arquivamento.")
+
+    def handle(self, *args, **options):
+        limite = data_limite(options['meses'])
+        elegiveis = eventos_para_arquivar(limite).count()
+        self.stdout.write(f"Eventos encerrados antes de {limite:%d/%m/%Y} elegíveis: {elegiveis}")
+        if options['simular'] or not elegiveis:
+            return
+
+        antes = medir_consultas() if options['medir'] else None
+
+        eventos, inscricoes, certificados = arquivar_eventos(tamanho_lote=options['lote'], limite=limite)
+        self.stdout.write(self.style.SUCCESS(
+            f"Arquivados: {eventos} eventos, {inscricoes} inscrições, {certificados} certificados."
+        ))
+
+        if antes is not None:
+            depois = medir_consultas()
+            self.stdout.write("Consulta: antes -> depois (ms)")
+            for nome, tempo in antes.items():
+                self.stdout.write(f"  {nome}: {tempo:.2f} -> {depois.get(nome, 0):.2f}")
@@ -0,0 +1,69 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from sgea_app.certificados import emitir_certificados, inscricoes_prontas_para_emissao
+from sgea_app.tarefas import (
+    adquirir_tarefa, concluir_tarefa, identificacao_no, liberar_tarefa, salvar_checkpoint,
+)
+from sgea_app.utils import log_auditoria
+
+NOME_TAREFA = 'emissao_automatica_certificados'
+
+
+class Command(BaseCommand):
+    help = (
+        "Emite os certificados das inscrições com presença confirmada em eventos encerrados. "
+        "Pode ser agendado no cron de vários servidores: apenas um executa por vez."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=500, help="Inscrições processadas por transação.")
+        parser.add_argument(
+            '--reserva', type=int, default=300,
+            help="Segundos de reserva da tarefa; renovada a cada lote. Se o nó cair, outro assume após esse prazo."
+        )
+
+    def handle(self, *args, **options):
+        tamanho_lote = options['lote']
+        reserva = timedelta(seconds=options['reserva'])
+
+        tarefa = adquirir_tarefa(NOME_TAREFA, identificacao_no(), reserva)
+        if tarefa is None:
+            self.stdout.write("A emissão automática já está em execução em outro nó.")
+            return
+
+        if tarefa.checkpoint:
+            self.stdout.write(f"Retomando a partir da inscrição {tarefa.checkpoint}.")
+
+        checkpoint = tarefa.checkpoint
+        total = 0
+        try:
+            while True:
+                # Consulta indexada por id (keyset): cada lote continua após o último id processado
+                lote = list(
+                    inscricoes_prontas_para_emissao()
+                    .filter(pk__gt=checkpoint)
+                    .order_by('pk')[:tamanho_lote]
+                )
+                if not lote:
+                    break
+
+                with transaction.atomic():
+                    total += emitir_certificados(lote)
+                    checkpoint = lote[-1].pk
+                    if not salvar_checkpoint(tarefa, checkpoint, reserva):
+                        # A reserva expirou e outro nó assumiu: desfaz o lote e para
+                        transaction.set_rollback(True)
+                        self.stderr.write("A reserva da tarefa foi perdida; interrompendo.")
+                        return
+        except Exception:
+            liberar_tarefa(tarefa)
+            raise
+
+        concluir_tarefa(tarefa)
+
+        if total:
+            log_auditoria(None, f'Emissão AUTOMÁTICA de {total} certificados para eventos encerrados')
+        self.stdout.write(self.style.SUCCESS(f"{total} certificados emitidos."))
@@ -0,0 +1,35 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from sgea_app import lembretes
+from sgea_app.tarefas import adquirir_tarefa, concluir_tarefa, identificacao_no, liberar_tarefa
+
+NOME_TAREFA = 'agendamento_lembretes'
+
+
+class Command(BaseCommand):
+    help = (
+        "Enfileira os lembretes dos próximos eventos (um e-mail por usuário em cada janela). "
+        "Agende no cron, ex: a cada 15 minutos. Rodar de novo não repete lembretes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--simular', action='store_true', help="Só conta os lembretes devidos, sem enfileirar.")
+
+    def handle(self, *args, **options):
+        tarefa = adquirir_tarefa(NOME_TAREFA, identificacao_no(), timedelta(minutes=10))
+        if tarefa is None:
+            self.stdout.write("O agendamento de lembretes já está em execução em outro nó.")
+            return
+
+        try:
+            resumo = lembretes.agendar(simular=options['simular'])
+        except Exception:
+            liberar_tarefa(tarefa)
+            raise
+        concluir_tarefa(tarefa)
+
+        verbo = "devidos" if options['simular'] else "enfileirados"
+        for janela, (inscricoes, emails) in resumo.items():
+            self.stdout.write(f"Janela '{janela}': {inscricoes} lembretes {verbo} em {emails} e-mails.")
@@ -0,0 +1,62 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from sgea_app.models import Evento, Usuario
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede consultas ao banco, tempo e bytes transferidos (com e sem gzip) por requisição "
+        "autenticada (dashboard, meus_certificados, lista_inscritos, auditoria)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--login', required=True, help="Login do usuário usado nas requisições.")
+        parser.add_argument('--repeticoes', type=int, default=20, help="Requisições por página.")
+
+    def handle(self, *args, **options):
+        usuario = Usuario.objects.filter(login=options['login']).first()
+        if usuario is None:
+            raise CommandError(f"Usuário '{options['login']}' não encontrado.")
+
+        paginas = [reverse('dashboard')]
+        if usuario.perfil == 'Organizador':
+            # O evento com mais inscritos é o caso mais pesado do roster
+            evento = Evento.objects.filter(organizador=usuario).order_by('-estatistica__total_inscritos').first()
+            if evento is not None:
+                paginas.append(reverse('lista_inscritos', args=[evento.pk]))
+            paginas.append(reverse('registros_auditoria'))
+        else:
+            paginas.append(reverse('meus_certificados'))
+
+        cliente = Client(HTTP_HOST='localhost')
+        cliente.force_login(usuario)
+
+        self.stdout.write(f"Sessão: {settings.SESSION_ENGINE}")
+        self.stdout.write(f"Backend de autenticação: {', '.join(settings.AUTHENTICATION_BACKENDS)}")
+
+        for pagina in paginas:
+            cliente.get(pagina)  # aquece caches (usuário, sessão, templates)
+
+            consultas = 0
+            inicio = time.perf_counter()
+            for _ in range(options['repeticoes']):
+                with CaptureQueriesContext(connection) as capturadas:
+                    resposta = cliente.get(pagina)
+                consultas += len(capturadas.captured_queries)
+            duracao = (time.perf_counter() - inicio) / options['repeticoes']
+
+            comprimida = cliente.get(pagina, HTTP_ACCEPT_ENCODING='gzip')
+
+            self.stdout.write(
+                f"{pagina}: HTTP {resposta.status_code}, "
+                f"{consultas / options['repeticoes']:.1f} consultas/requisição, "
+                f"{duracao * 1000:.1f} ms/requisição, "
+                f"{len(resposta.content)} bytes ({len(comprimida.content)} com gzip)"
+            )
@@ -0,0 +1,49 @@
+import os
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from sgea_app import inicializacao
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede o tempo até a primeira resposta num processo novo e o custo de importação de "
+        "cada módulo (python -X importtime). O sgea.spec grava o relatório no build."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--caminho', default='/login/', help="URL da primeira requisição (padrão: /login/).")
+        parser.add_argument('--saida', help="Arquivo onde gravar o relatório (padrão: só exibe).")
+        parser.add_argument('--limite', type=int, default=20, help="Quantos pacotes e módulos listar (padrão: 20).")
+        parser.add_argument(
+            '--sem-inicio-rapido', action='store_true',
+            help="Mede com SGEA_INICIO_RAPIDO desativado (como no runserver a partir do código-fonte).",
+        )
+        parser.add_argument(
+            '--meta', type=float, default=inicializacao.META_PRIMEIRA_RESPOSTA,
+            help="Meta de tempo até a primeira resposta, em segundos (padrão: 1).",
+        )
+
+    def handle(self, *args, **options):
+        if getattr(sys, 'frozen', False):
+            raise CommandError("O perfil é gerado a partir do código-fonte, antes do build.")
+
+        try:
+            medicao = inicializacao.medir_inicializacao(options['caminho'], not options['sem_inicio_rapido'])
+        except RuntimeError as erro:
+            raise CommandError(f"Falha ao medir a inicialização: {erro}")
+
+        texto = inicializacao.relatorio(medicao, options['limite'], options['meta'])
+        self.stdout.write(texto)
+
+        if options['saida']:
+            os.makedirs(os.path.dirname(os.path.abspath(options['saida'])), exist_ok=True)
+            with open(options['saida'], 'w', encoding='utf-8') as arquivo:
+                arquivo.write(texto)
+            self.stdout.write(self.style.SUCCESS(f"Relatório gravado em {options['saida']}."))
+
+        if medicao['total'] > options['meta']:
+            self.stderr.write(self.style.WARNING(
+                f"Primeira resposta em {medicao['total']:.2f} s, acima da meta de {options['meta']:.2f} s."
+            ))
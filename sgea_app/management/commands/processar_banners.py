@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from sgea_app.imagens import processar_banner
+from sgea_app.models import Evento
+
+
+class Command(BaseCommand):
+    help = (
+        "Gera as variantes (thumbnail, card, hero) dos banners de eventos que ainda não as possuem "
+        "ou que não têm os hashes gravados (processados antes de Evento.banner_hashes)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--todos', action='store_true',
+            help="Reprocessa também os eventos que já possuem variantes."
+        )
+
+    def handle(self, *args, **options):
+        eventos = Evento.objects.exclude(banner='').exclude(banner__isnull=True)
+        if not options['todos']:
+            eventos = eventos.filter(Q(banner_variantes={}) | Q(banner_hashes={}))
+
+        total = 0
+        for evento_id in eventos.values_list('id', flat=True).iterator():
+            try:
+                processar_banner(evento_id)
+                total += 1
+            except Exception as e:
+                self.stderr.write(f"Erro ao processar o banner do evento {evento_id}: {e}")
+
+        self.stdout.write(self.style.SUCCESS(f"{total} banners processados."))
@@ -0,0 +1,133 @@
+import json
+import multiprocessing
+import signal
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+from django.core.management.base import BaseCommand
+
+# Este módulo não importa os models no topo: com o pool de processos, cada processo
+# filho (spawn) o importa antes de configurar o Django em _iniciar_processo.
+
+INTERVALO_MANUTENCAO = 60
+
+
+def _iniciar_processo():
+    import django
+    django.setup()
+
+def _executar(tarefa_id):
+    from sgea_app.fila import executar
+    return executar(tarefa_id)
+
+
+class Command(BaseCommand):
+    help = (
+        "Worker da fila de tarefas (sgea_app/fila.py): reserva as tarefas pendentes e as "
+        "executa em um pool de threads ou de processos. Vários workers podem rodar juntos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=4,
+                            help="Tarefas executadas ao mesmo tempo (pool de threads).")
+        parser.add_argument('--processos', type=int, default=0,
+                            help="Usa um pool de N processos em vez de threads (tarefas que usam muita CPU).")
+        parser.add_argument('--intervalo', type=float, default=1.0,
+                            help="Segundos entre as consultas à fila quando não há tarefas.")
+        parser.add_argument('--uma-vez', action='store_true',
+                            help="Executa o que estiver pendente e termina.")
+        parser.add_argument('--metricas', action='store_true',
+                            help="Apenas mostra a profundidade da fila e a latência das tarefas.")
+
+    def handle(self, *args, **options):
+        from sgea_app import fila
+        from sgea_app.tarefas import identificacao_no
+
+        if options['metricas']:
+            self.stdout.write(json.dumps(fila.metricas(), indent=2, ensure_ascii=False))
+            return
+
+        if options['processos']:
+            capacidade = options['processos']
+            pool = ProcessPoolExecutor(
+                capacidade, mp_context=multiprocessing.get_context('spawn'), initializer=_iniciar_processo
+            )
+        else:
+            capacidade = max(options['threads'], 1)
+            pool = ThreadPoolExecutor(capacidade, thread_name_prefix='sgea-fila')
+
+        dono = identificacao_no()
+        parar = []
+
+        def interromper(signum, frame):
+            # Para de reservar; as tarefas em execução terminam normalmente
+            parar.append(signum)
+
+        signal.signal(signal.SIGTERM, interromper)
+        signal.signal(signal.SIGINT, interromper)
+
+        self.stdout.write(f"Worker {dono} iniciado com {capacidade} {'processos' if options['processos'] else 'threads'}.")
+        em_execucao = {}
+        ultima_manutencao = 0
+        ultima_renovacao = time.monotonic()
+        renovacao = fila.RENOVACAO.total_seconds()
+
+        def renovar():
+            # Heartbeat: a reserva das tarefas em execução só vence se este worker cair
+            nonlocal ultima_renovacao
+            if time.monotonic() - ultima_renovacao >= renovacao:
+                fila.renovar_reservas(dono, list(em_execucao.values()))
+                ultima_renovacao = time.monotonic()
+
+        try:
+            while not parar:
+                renovar()
+                if time.monotonic() - ultima_manutencao > INTERVALO_MANUTENCAO:
+                    recuperadas = fila.recuperar_abandonadas()
+                    if recuperadas:
+                        self.stdout.write(f"{recuperadas} tarefas abandonadas devolvidas à fila.")
+                    fila.limpar_concluidas()
+                    ultima_manutencao = time.monotonic()
+
+                livres = capacidade - len(em_execucao)
+                ids = fila.reservar(dono, livres) if livres else []
+                for tarefa_id in ids:
+                    em_execucao[pool.submit(_executar, tarefa_id)] = tarefa_id
+
+                if not em_execucao:
+                    if options['uma_vez']:
+                        break
+                    time.sleep(options['intervalo'])
+                    continue
+
+                # Com o pool cheio, espera a primeira tarefa terminar (ou a hora de renovar as
+                # reservas); com vagas, volta a consultar a fila depois do intervalo
+                cheio = len(em_execucao) >= capacidade
+                prontas, _ = wait(em_execucao, timeout=renovacao if cheio else options['intervalo'],
+                                  return_when=FIRST_COMPLETED)
+                for futuro in prontas:
+                    self._relatar(em_execucao.pop(futuro), futuro)
+        finally:
+            # Encerramento (sinal ou fim da fila): as tarefas reservadas terminam antes de sair
+            while em_execucao:
+                renovar()
+                prontas, _ = wait(em_execucao, timeout=renovacao, return_when=FIRST_COMPLETED)
+                for futuro in prontas:
+                    self._relatar(em_execucao.pop(futuro), futuro)
+            pool.shutdown(wait=True)
+
+        self.stdout.write("Worker encerrado.")
+
+    def _relatar(self, tarefa_id, futuro):
+        try:
+            estado = futuro.result()
+        except Exception as erro:
+            # Erro fora da tarefa (ex: processo filho morto); a reserva vencida a devolve à fila
+            self.stderr.write(f"Tarefa #{tarefa_id}: erro no worker: {erro}")
+            return
+        if estado == 'concluida':
+            self.stdout.write(f"Tarefa #{tarefa_id}: concluída.")
+        elif estado == 'pendente':
+            self.stdout.write(f"Tarefa #{tarefa_id}: falhou, nova tentativa agendada.")
+        elif estado == 'falha':
+            self.stderr.write(f"Tarefa #{tarefa_id}: falhou definitivamente (dead letter).")
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from sgea_app.estatisticas import reconciliar
+from sgea_app.inscritos import sincronizar_nomes
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula as estatísticas de eventos e organizadores e corrige divergências dos contadores incrementais "
+        "e dos nomes copiados nas inscrições (lista de inscritos)."
+    )
+
+    def handle(self, *args, **options):
+        eventos, organizadores = reconciliar()
+        inscricoes = sincronizar_nomes()
+        self.stdout.write(self.style.SUCCESS(
+            f"Reconciliação concluída: {eventos} eventos, {organizadores} organizadores e "
+            f"{inscricoes} nomes de inscrições corrigidos."
+        ))
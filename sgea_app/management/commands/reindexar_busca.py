@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from sgea_app import busca
+
+
+class Command(BaseCommand):
+    help = "Reconstrói o índice de busca textual de eventos (FTS5 no SQLite, tsvector no PostgreSQL)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--medir', action='append', metavar='CONSULTA',
+                            help="Só mede o tempo médio da busca pela consulta, sem reconstruir o índice (repetível).")
+        parser.add_argument('--repeticoes', type=int, default=20, help="Buscas por consulta na medição.")
+
+    def handle(self, *args, **options):
+        if not busca.busca_disponivel():
+            self.stdout.write("Banco de dados sem suporte a busca textual; nada a fazer.")
+            return
+
+        if options['medir']:
+            for consulta, (encontrados, tempo) in busca.medir_busca(options['medir'], options['repeticoes']).items():
+                self.stdout.write(f"'{consulta}': {encontrados} eventos, {tempo:.2f} ms/busca")
+            return
+
+        busca.criar_indice()
+        total = busca.reindexar_todos()
+        self.stdout.write(self.style.SUCCESS(f"{total} eventos indexados."))
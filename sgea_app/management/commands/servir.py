@@ -0,0 +1,71 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from sgea_app import servidor
+
+
+class Command(BaseCommand):
+    help = (
+        "Servidor de produção: carrega o Django uma vez e cria N workers WSGI (ou ASGI, com "
+        "uvicorn) por fork. Envie SIGHUP ao processo mestre para recarregar o código sem "
+        "derrubar conexões."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('endereco', nargs='?', default='127.0.0.1:8000',
+                            help="Endereço e porta (padrão 127.0.0.1:8000).")
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 2,
+                            help="Quantidade de processos worker (padrão: número de CPUs).")
+        parser.add_argument('--asgi', action='store_true',
+                            help="Workers ASGI (uvicorn), necessários para os contadores ao vivo.")
+        parser.add_argument('--max-requisicoes', type=int, default=1000,
+                            help="Requisições atendidas por worker antes de ser substituído (limita o crescimento de memória).")
+        parser.add_argument('--variacao-max-requisicoes', type=int, default=100,
+                            help="Variação aleatória somada ao limite, para os workers não reiniciarem juntos.")
+        parser.add_argument('--backlog', type=int, default=2048,
+                            help="Conexões aguardando na fila do socket.")
+        parser.add_argument('--tempo-encerramento', type=int, default=30,
+                            help="Segundos para os workers terminarem as requisições ao encerrar.")
+        parser.add_argument('--arquivo-pid', help="Grava o PID do mestre (ex: kill -HUP $(cat sgea.pid)).")
+
+    def handle(self, *args, **options):
+        if not hasattr(os, 'fork'):
+            raise CommandError("O comando 'servir' usa fork e sinais POSIX (Linux/macOS). No Windows, use o runserver.")
+
+        endereco, _, porta = options['endereco'].rpartition(':')
+        if not porta.isdigit():
+            raise CommandError(f"Endereço inválido: {options['endereco']} (use host:porta).")
+        endereco = endereco.strip('[]') or '127.0.0.1'
+
+        if options['asgi']:
+            try:
+                import uvicorn  # noqa: F401
+            except ImportError:
+                raise CommandError("Os workers ASGI precisam do uvicorn: pip install uvicorn")
+            servir = servidor.servir_asgi
+        else:
+            servir = servidor.servir_wsgi
+
+        sock = servidor.abrir_socket(endereco, int(porta), options['backlog'])
+        aplicacao, templates = servidor.carregar_aplicacao(asgi=options['asgi'])
+
+        if options['arquivo_pid']:
+            with open(options['arquivo_pid'], 'w') as arquivo:
+                arquivo.write(str(os.getpid()))
+
+        self.stdout.write(
+            f"SGEA em http://{endereco}:{porta}/ ({'ASGI' if options['asgi'] else 'WSGI'}, "
+            f"{options['workers']} workers, {templates} templates pré-compilados)."
+        )
+        self.stdout.flush()
+
+        mestre = servidor.Mestre(
+            sock, aplicacao, servir,
+            workers=max(options['workers'], 1),
+            max_requisicoes=options['max_requisicoes'],
+            variacao=options['variacao_max_requisicoes'],
+            tempo_encerramento=options['tempo_encerramento'],
+            saida=self.stdout.write,
+        )
+        mestre.executar()
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from sgea_app.smtp_local import ServidorSMTPLocal
+
+
+class Command(BaseCommand):
+    help = (
+        "Servidor SMTP local para testes: aceita os e-mails do SGEA sem entregá-los. "
+        "Use com EMAIL_BACKEND=django.core.mail.backends.smtp.EmailBackend e EMAIL_PORT=1025."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--endereco', default='127.0.0.1', help="Endereço de escuta (padrão: 127.0.0.1).")
+        parser.add_argument('--porta', type=int, default=1025, help="Porta de escuta (padrão: 1025).")
+        parser.add_argument('--pasta', help="Pasta onde gravar cada mensagem recebida (.eml).")
+
+    def handle(self, *args, **options):
+        def ao_receber(remetente, destinatarios, mensagem):
+            self.stdout.write(f"{mensagem['Subject']}  ({remetente} -> {', '.join(destinatarios)})")
+
+        try:
+            servidor = ServidorSMTPLocal((options['endereco'], options['porta']), options['pasta'], ao_receber)
+        except OSError as erro:
+            raise CommandError(f"Não foi possível abrir {options['endereco']}:{options['porta']}: {erro}")
+
+        self.stdout.write(f"SMTP local em {options['endereco']}:{options['porta']}. Ctrl+C para sair.")
+        with servidor:
+            try:
+                servidor.serve_forever()
+            except KeyboardInterrupt:
+                pass
+        self.stdout.write(f"{len(servidor.mensagens)} mensagens recebidas.")
@@ -0,0 +1,104 @@
+import json
+from argparse import ArgumentTypeError
+
+from django.core.management.base import BaseCommand, CommandError
+
+from sgea_app import carga
+
+
+def _mix(valor):
+    """ 'aluno=45,api=15' -> {'aluno': 45, 'api': 15} """
+    mix = {}
+    for parte in filter(None, valor.split(',')):
+        nome, _, peso = parte.partition('=')
+        nome = nome.strip()
+        if nome not in carga.JORNADAS:
+            raise ArgumentTypeError(f"Jornada desconhecida: '{nome}'. Opções: {', '.join(carga.JORNADAS)}.")
+        try:
+            mix[nome] = float(peso)
+        except ValueError:
+            raise ArgumentTypeError(f"Peso inválido para '{nome}': '{peso}'.")
+    if not any(peso > 0 for peso in mix.values()):
+        raise ArgumentTypeError("O mix precisa de ao menos uma jornada com peso positivo.")
+    return mix
+
+def _etapas(valor):
+    """ '30:2,60:10' -> [(30, 2.0), (60, 10.0)] (segundos:jornadas por segundo) """
+    etapas = []
+    for parte in filter(None, valor.split(',')):
+        try:
+            segundos, taxa = parte.split(':')
+            etapas.append((float(segundos), float(taxa)))
+        except ValueError:
+            raise ArgumentTypeError(f"Etapa inválida: '{parte}' (use segundos:taxa, ex: 30:2).")
+    return etapas
+
+
+class Command(BaseCommand):
+    help = (
+        "Teste de carga com jornadas reais (cadastro, login, inscrição, check-in, certificados, API) "
+        "contra um SGEA em execução. Relata vazão, taxa de erro e percentis de latência por passo."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help="Endereço do SGEA em execução.")
+        parser.add_argument('--preparar', action='store_true', help="Cria a massa de dados do teste e sai.")
+        parser.add_argument('--limpar', action='store_true', help="Remove a massa de dados do teste e sai.")
+        parser.add_argument('--alunos', type=int, default=200, help="Alunos criados por --preparar (padrão: 200).")
+        parser.add_argument('--organizadores', type=int, default=5, help="Organizadores criados por --preparar (padrão: 5).")
+        parser.add_argument(
+            '--mix', type=_mix, default=carga.MIX_PADRAO,
+            help="Peso de cada jornada, ex: aluno=45,organizador=10,checkin_offline=5,cadastro=10,certificado=15,api=15.",
+        )
+        parser.add_argument('--taxa', type=float, default=2.0, help="Jornadas iniciadas por segundo (padrão: 2).")
+        parser.add_argument('--duracao', type=float, default=60, help="Duração em segundos (padrão: 60).")
+        parser.add_argument(
+            '--etapas', type=_etapas,
+            help="Taxa variável, substitui --taxa/--duracao: segundos:taxa separados por vírgula (ex: 30:2,60:10,30:2).",
+        )
+        parser.add_argument('--concorrencia', type=int, default=50, help="Jornadas simultâneas no máximo (padrão: 50).")
+        parser.add_argument('--tempo-limite', type=float, default=30, help="Tempo limite de cada requisição, em segundos.")
+        parser.add_argument('--semente', type=int, help="Semente do gerador aleatório (teste reprodutível).")
+        parser.add_argument('--json', help="Arquivo onde gravar o resumo em JSON.")
+
+    def handle(self, *args, **options):
+        if options['limpar']:
+            total = carga.limpar()
+            self.stdout.write(self.style.SUCCESS(f"{total} usuários de carga removidos (com eventos e inscrições)."))
+            return
+
+        if options['preparar']:
+            if options['alunos'] < 1 or options['organizadores'] < 1:
+                raise CommandError("--alunos e --organizadores precisam ser positivos.")
+            criados = carga.preparar(options['alunos'], options['organizadores'])
+            self.stdout.write(self.style.SUCCESS(
+                f"Massa de dados criada: {criados['alunos']} alunos, {criados['organizadores']} organizadores, "
+                f"{criados['eventos']} eventos (senha: {carga.SENHA})."
+            ))
+            return
+
+        dados = carga.carregar_dados()
+        if dados is None:
+            raise CommandError("Massa de dados não encontrada. Rode antes: python manage.py teste_carga --preparar")
+
+        if not carga.servidor_disponivel(options['url']):
+            raise CommandError(
+                f"O SGEA não respondeu em {options['url']}. Inicie o servidor antes (ex: python manage.py servir)."
+            )
+
+        etapas = options['etapas'] or [(options['duracao'], options['taxa'])]
+        self.stdout.write(
+            f"Teste de carga em {options['url']}: "
+            + ', '.join(f"{taxa:g}/s por {segundos:g} s" for segundos, taxa in etapas)
+            + f", concorrência máxima {options['concorrencia']}."
+        )
+        resumo = carga.executar(
+            options['url'], dados, mix=options['mix'], etapas=etapas,
+            concorrencia=options['concorrencia'], tempo_limite=options['tempo_limite'], semente=options['semente'],
+        )
+        self.stdout.write(carga.relatorio(resumo))
+
+        if options['json']:
+            with open(options['json'], 'w', encoding='utf-8') as arquivo:
+                json.dump(resumo, arquivo, ensure_ascii=False, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Resumo gravado em {options['json']}."))
@@ -0,0 +1,22 @@
+from django.middleware.gzip import GZipMiddleware
+
+# Tipos que valem a pena comprimir. Imagens e PDFs já são comprimidos, e
+# comprimir uma resposta parcial (206) quebraria o Content-Range.
+TIPOS_COMPRIMIVEIS = (
+    'text/',
+    'application/json',
+    'application/x-ndjson',
+    'application/javascript',
+    'image/svg+xml',
+)
+
+
+class CompressaoMiddleware(GZipMiddleware):
+    """ GZip apenas para respostas completas de conteúdo textual (HTML, CSS, JSON, .ics). """
+
+    def process_response(self, request, response):
+        tipo = response.get('Content-Type', '')
+        # Server-sent events precisam chegar ao navegador sem buffer
+        if response.status_code == 206 or tipo.startswith('text/event-stream') or not tipo.startswith(TIPOS_COMPRIMIVEIS):
+            return response
+        return super().process_response(request, response)
@@ -0,0 +1,209 @@
+import hashlib
+import mimetypes
+import os
+import posixpath
+import re
+from functools import lru_cache
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.urls import get_script_prefix, reverse
+from django.utils.http import quote_etag
+
+# Tamanho dos blocos lidos do disco (hash e respostas parciais).
+TAMANHO_BLOCO = 64 * 1024
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+# Caracteres que o reverse() mantém sem escape num <path:...> (RFC 3986)
+SEGUROS_URL = "!$&'()*+,;=/~:@"
+
+
+# Nomes com hash do manifesto dos estáticos, montado uma vez por manifesto carregado:
+# (hashed_files, frozenset dos nomes com hash).
+_estaticos_com_hash = (None, frozenset())
+
+
+def estatico_com_hash(storage, caminho):
+    """
+    Se 'caminho' é um arquivo com hash no nome (ManifestStaticFilesStorage). O manifesto
+    mapeia original -> nome com hash; o conjunto inverso é montado só na primeira consulta.
+    """
+    global _estaticos_com_hash
+    arquivos = getattr(storage, 'hashed_files', None) or {}
+    if _estaticos_com_hash[0] is not arquivos:
+        _estaticos_com_hash = (arquivos, frozenset(arquivos.values()))
+    return caminho in _estaticos_com_hash[1]
+
+
+def hash_arquivo(nome, storage=default_storage):
+    """
+    Hash curto do conteúdo do arquivo, usado na URL e como ETag.
+    O arquivo é lido em blocos (nunca inteiro na memória) e o resultado fica
+    em cache enquanto o tamanho e a data de modificação não mudarem.
+    """
+    caminho = storage.path(nome)
+    info = os.stat(caminho)
+    chave = f"midia:hash:{nome}:{info.st_size}:{info.st_mtime_ns}"
+
+    valor = cache.get(chave)
+    if valor is None:
+        digest = hashlib.sha256()
+        with open(caminho, 'rb') as arquivo:
+            for bloco in iter(lambda: arquivo.read(TAMANHO_BLOCO), b''):
+                digest.update(bloco)
+        valor = digest.hexdigest()[:16]
+        cache.set(chave, valor, None)
+    return valor
+
+
+@lru_cache(maxsize=8)
+def _prefixo_midia(prefixo_script):
+    """ '/midia/' já resolvido: o reverse() custa mais que o resto da URL montada. """
+    return reverse('servir_midia', args=['0', 'x'])[:-len('0/x')]
+
+
+def url_midia(nome, storage=default_storage, hash_conteudo=None):
+    """
+    URL com hash de conteúdo para um arquivo público de mídia.
+    Como a URL muda quando o conteúdo muda, a resposta pode ser cacheada para sempre.
+    Com 'hash_conteudo' já conhecido (ex: Evento.banner_hashes), o arquivo não é consultado.
+    Se o arquivo não existir (ainda), devolve a URL comum do storage.
+    """
+    if hash_conteudo is None:
+        try:
+            hash_conteudo = hash_arquivo(nome, storage)
+        except (OSError, NotImplementedError):
+            return storage.url(nome)
+    # Mesmo escape do reverse() para o <path:caminho>
+    return f"{_prefixo_midia(get_script_prefix())}{hash_conteudo}/{quote(nome, safe=SEGUROS_URL)}"
+
+
+def caminho_midia_publica(nome):
+    """
+    Caminho normalizado de um arquivo público do MEDIA_ROOT, ou None.
+    Caminhos absolutos e com '..' são recusados antes de comparar o prefixo:
+    'eventos/banners/../../certificados/x' não pode sair do diretório público.
+    """
+    nome = (nome or '').replace('\\', '/')
+    if not nome or '\x00' in nome or nome.startswith('/') or '..' in nome.split('/'):
+        return None
+    normalizado = posixpath.normpath(nome)
+    if normalizado.startswith('/') or '..' in normalizado.split('/'):
+        return None
+    prefixos = getattr(settings, 'MIDIA_PREFIXOS_PUBLICOS', ('eventos/banners/',))
+    return normalizado if normalizado.startswith(tuple(prefixos)) else None
+
+
+def eh_midia_publica(nome):
+    """ Apenas alguns diretórios do MEDIA_ROOT podem ser servidos sem autenticação. """
+    return caminho_midia_publica(nome) is not None
+
+
+def _intervalo_solicitado(request, tamanho, etag):
+    """
+    Interpreta o cabeçalho Range (apenas um intervalo, em bytes).
+    Retorna (inicio, fim) inclusivo, None para resposta completa
+    ou False se o intervalo for inválido (416).
+    """
+    cabecalho = request.headers.get('Range')
+    if not cabecalho:
+        return None
+
+    # If-Range: só atende o intervalo se o cliente ainda tiver a mesma versão
+    if_range = request.headers.get('If-Range')
+    if if_range and if_range != etag:
+        return None
+
+    correspondencia = RANGE_RE.match(cabecalho.strip())
+    if not correspondencia:
+        return None
+
+    inicio, fim = correspondencia.groups()
+    if inicio == '' and fim == '':
+        return False
+    if inicio == '':
+        # bytes=-N: os últimos N bytes
+        inicio = max(tamanho - int(fim), 0)
+        fim = tamanho - 1
+    else:
+        inicio = int(inicio)
+        fim = min(int(fim), tamanho - 1) if fim else tamanho - 1
+
+    if inicio >= tamanho or inicio > fim:
+        return False
+    return inicio, fim
+
+
+def _ler_intervalo(caminho, inicio, fim):
+    with open(caminho, 'rb') as arquivo:
+        arquivo.seek(inicio)
+        restante = fim - inicio + 1
+        while restante > 0:
+            bloco = arquivo.read(min(TAMANHO_BLOCO, restante))
+            if not bloco:
+                break
+            restante -= len(bloco)
+            yield bloco
+
+
+def resposta_arquivo(request, nome, storage=default_storage, etag_hash=None,
+                     cache_control='public, max-age=31536000, immutable',
+                     nome_download=None):
+    """
+    Monta a resposta para um arquivo do MEDIA_ROOT com ETag/If-None-Match e Range.
+    A resposta completa usa FileResponse, que aproveita o sendfile do servidor
+    (wsgi.file_wrapper). Com MIDIA_X_ACCEL_REDIRECT configurado, a entrega é
+    delegada ao nginx.
+    """
+    caminho = storage.path(nome)
+    tamanho = os.path.getsize(caminho)
+    etag = quote_etag(etag_hash or hash_arquivo(nome, storage))
+    tipo, _ = mimetypes.guess_type(caminho)
+    tipo = tipo or 'application/octet-stream'
+
+    cabecalhos = {
+        'ETag': etag,
+        'Cache-Control': cache_control,
+        'Accept-Ranges': 'bytes',
+    }
+    if nome_download:
+        cabecalhos['Content-Disposition'] = f'attachment; filename="{nome_download}"'
+
+    if_none_match = request.headers.get('If-None-Match', '')
+    if etag in [valor.strip() for valor in if_none_match.split(',')] or if_none_match.strip() == '*':
+        resposta = HttpResponseNotModified()
+        for chave, valor in cabecalhos.items():
+            resposta[chave] = valor
+        return resposta
+
+    x_accel = getattr(settings, 'MIDIA_X_ACCEL_REDIRECT', None)
+    # O location do nginx aponta para o MEDIA_ROOT: outros storages são entregues aqui
+    if x_accel and storage is default_storage:
+        # O nginx atende Range e sendfile; o Django só autoriza e define os cabeçalhos
+        resposta = HttpResponse(content_type=tipo)
+        resposta['X-Accel-Redirect'] = x_accel.rstrip('/') + '/' + nome
+        for chave, valor in cabecalhos.items():
+            resposta[chave] = valor
+        return resposta
+
+    intervalo = _intervalo_solicitado(request, tamanho, etag)
+    if intervalo is False:
+        resposta = HttpResponse(status=416)
+        resposta['Content-Range'] = f'bytes */{tamanho}'
+        return resposta
+
+    if intervalo is None:
+        resposta = FileResponse(open(caminho, 'rb'), content_type=tipo)
+    else:
+        inicio, fim = intervalo
+        resposta = StreamingHttpResponse(_ler_intervalo(caminho, inicio, fim), content_type=tipo, status=206)
+        resposta['Content-Range'] = f'bytes {inicio}-{fim}/{tamanho}'
+        resposta['Content-Length'] = str(fim - inicio + 1)
+
+    for chave, valor in cabecalhos.items():
+        resposta[chave] = valor
+    return resposta
@@ -1,7 +1,14 @@
+import hashlib
+import hmac
+import secrets
 from django.db import models
 from django.conf import settings
+from django.core.files.storage import FileSystemStorage
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin
+from django.utils.crypto import salted_hmac
 from .managers import UsuarioManager 
+from .busca import remover_acentos
+from .horarios import intervalo_evento
 from django.utils import timezone
 
 class Usuario(AbstractBaseUser, PermissionsMixin):
@@ -26,6 +33,12 @@ class Usuario(AbstractBaseUser, PermissionsMixin):
     # Campo usado para login. O Django cuidará do hashing da senha (campo 'password' ou 'senha' se renomeado)
     login = models.CharField(max_length=50, unique=True, verbose_name="Login (E-mail)") 
     perfil = models.CharField(max_length=50, choices=PERFIL_CHOICES, default='Aluno', verbose_name="Perfil")
+
+    # Nome em minúsculas e sem acentos, usado na busca por prefixo (sugestões de professor)
+    nome_busca = models.CharField(max_length=50, blank=True, editable=False)
+
+    # Segredo do link do calendário pessoal (ver calendario.py): trocá-lo invalida o link antigo
+    segredo_calendario = models.CharField(max_length=32, blank=True, default='', editable=False)
     
     # Campos de estado do Django
     is_active = models.BooleanField(default=False, verbose_name="Ativo") # Novo usuário só pode acessar após confirmação (link ou código) [cite: 97]
@@ -40,9 +53,29 @@ class Usuario(AbstractBaseUser, PermissionsMixin):
     class Meta:
         verbose_name = "Usuário"
         verbose_name_plural = "Usuários"
+        indexes = [
+            # Busca de professores por prefixo do nome: WHERE perfil = ... AND nome_busca >= ...
+            models.Index(fields=['perfil', 'nome_busca'], name='usuario_perfil_nome_idx'),
+            # Busca por prefixo do nome sem filtro de perfil (admin, lista de inscritos)
+            models.Index(fields=['nome_busca'], name='usuario_nome_busca_idx'),
+        ]
 
     def __str__(self):
         return self.nome
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instancia = super().from_db(db, field_names, values)
+        # Guarda o nome carregado do banco para detectar renomeações (exportação do catálogo)
+        instancia._nome_original = instancia.__dict__.get('nome')
+        return instancia
+
+    def save(self, *args, **kwargs):
+        self.nome_busca = remover_acentos(self.nome)[:50]
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'nome' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'nome_busca'}
+        super().save(*args, **kwargs)
         
         
 class Evento(models.Model):
@@ -74,6 +107,15 @@ class Evento(models.Model):
     # [cite_start]Requisito de Banner[cite: 34]:
     # Usamos ImageField para lidar com o upload e validação de imagem.
     banner = models.ImageField(upload_to='eventos/banners/', null=True, blank=True, verbose_name="Banner do Evento")
+
+    # Variantes redimensionadas do banner (thumbnail, card, hero), geradas em segundo plano.
+    # Formato: {'thumbnail': {'webp': 'eventos/banners/x__thumbnail.webp', 'jpeg': '...'}, ...}
+    banner_variantes = models.JSONField(default=dict, blank=True, editable=False, verbose_name="Variantes do Banner")
+
+    # Hash do conteúdo do original e de cada variante, calculado junto com as variantes:
+    # {'eventos/banners/x.jpg': '3f2a...', 'eventos/banners/x__thumbnail.webp': '9c1d...', ...}.
+    # Monta as URLs com hash (banner_urls) sem consultar o disco nem o cache.
+    banner_hashes = models.JSONField(default=dict, blank=True, editable=False, verbose_name="Hashes do Banner")
     
     # [cite_start]Quantidade de Participantes é o limite de vagas[cite: 92].
     quantidade_participantes = models.IntegerField(verbose_name="Limite de Participantes")
@@ -81,9 +123,58 @@ class Evento(models.Model):
     # Requisito 'nome' do Evento não está no diagrama, mas é crucial.
     nome = models.CharField(max_length=100, verbose_name="Nome do Evento", default='Novo Evento') 
 
+    # Início e fim calculados a partir das datas e do texto do 'horario' (ver horarios.py),
+    # usados na detecção de conflitos de horário entre inscrições.
+    inicio = models.DateTimeField(null=True, editable=False, verbose_name="Início")
+    fim = models.DateTimeField(null=True, editable=False, verbose_name="Fim")
+
+    # O que fazer quando a inscrição neste evento conflita com outra do mesmo usuário
+    POLITICA_CONFLITO_CHOICES = [
+        ('avisar', 'Permitir e avisar'),
+        ('bloquear', 'Bloquear inscrição'),
+    ]
+    politica_conflito = models.CharField(
+        max_length=10, choices=POLITICA_CONFLITO_CHOICES, default='avisar',
+        verbose_name="Conflito de Horário",
+    )
+
+    # Sessões de uma série (ex: palestras de uma Semana Acadêmica) apontam para o evento principal.
+    # As sessões criadas em lote usam o mesmo arquivo de banner do evento principal.
+    serie = models.ForeignKey(
+        'self', on_delete=models.CASCADE, null=True, blank=True, editable=False,
+        related_name='sessoes', verbose_name="Evento Principal",
+    )
+
+    # Última alteração (exportação incremental da API, ?updated_since=). Operações em massa
+    # (QuerySet.update, bulk_update) não passam pelo auto_now e devem atualizá-lo explicitamente.
+    atualizado_em = models.DateTimeField(auto_now=True, verbose_name="Atualizado em")
+
     class Meta:
         verbose_name = "Evento"
         verbose_name_plural = "Eventos"
+        indexes = [
+            # Busca de eventos encerrados (emissão automática de certificados)
+            models.Index(fields=['data_final'], name='evento_data_final_idx'),
+            # Sobreposição de intervalos: inicio < fim_outro AND fim > inicio_outro
+            models.Index(fields=['inicio', 'fim'], name='evento_intervalo_idx'),
+            # Eventos alterados desde uma data, na ordem da exportação
+            models.Index(fields=['atualizado_em', 'id'], name='evento_atualizado_idx'),
+        ]
+
+    def atualizar_intervalo(self):
+        """ Recalcula 'inicio' e 'fim' (chamado no save; bulk_create deve chamar antes). """
+        inicio, fim, _ = intervalo_evento(self.data_inicial, self.data_final, self.horario)
+        if settings.USE_TZ:
+            fuso = timezone.get_default_timezone()
+            inicio, fim = timezone.make_aware(inicio, fuso), timezone.make_aware(fim, fuso)
+        self.inicio, self.fim = inicio, fim
+
+    def save(self, *args, **kwargs):
+        self.atualizar_intervalo()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'data_inicial', 'data_final', 'horario'} & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'inicio', 'fim'}
+        super().save(*args, **kwargs)
 
     def esta_encerrado(self):
         """ Verifica se a data final do evento já passou. """
@@ -99,6 +190,30 @@ class Evento(models.Model):
         # Uma lógica mais robusta checaria se a automação já rodou.
         return 'Pronto para Emissão'
 
+    def banner_urls(self):
+        """
+        URLs das variantes do banner, por variante e formato.
+        Enquanto as variantes não forem geradas, todas apontam para o original.
+        Os hashes vêm de 'banner_hashes'; só arquivos sem hash gravado vão ao disco.
+        """
+        if not self.banner:
+            return {}
+
+        from .imagens import VARIANTES_BANNER, FORMATOS_VARIANTE
+        from .midia import url_midia
+        storage = self.banner.storage
+        hashes = self.banner_hashes or {}
+        original = url_midia(self.banner.name, storage, hashes.get(self.banner.name))
+        urls = {}
+        for variante in VARIANTES_BANNER:
+            arquivos = self.banner_variantes.get(variante, {})
+            urls[variante] = {
+                extensao: url_midia(arquivos[extensao], storage, hashes.get(arquivos[extensao]))
+                if extensao in arquivos else original
+                for extensao in FORMATOS_VARIANTE
+            }
+        return urls
+
     def __str__(self):
         return self.nome
 
@@ -114,15 +229,140 @@ class Inscricao(models.Model):
     # A emissão de certificados ocorre após a presença ser confirmada.
     presenca_confirmada = models.BooleanField(default=False, verbose_name="Presença Confirmada")
 
+    # Versão da lista de check-in do evento em que a inscrição mudou pela última vez
+    # (criação ou presença). Usada na sincronização incremental (ver checkin.py).
+    versao_lista = models.PositiveBigIntegerField(default=0, editable=False)
+
+    # Cópia do Usuario.nome_busca: ordena e filtra a lista de inscritos pelo índice do
+    # evento, sem JOIN (ver inscritos.py). Mantida pelo signal de alteração do usuário.
+    nome_busca = models.CharField(max_length=50, blank=True, editable=False)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instancia = super().from_db(db, field_names, values)
+        # Guarda o valor carregado do banco para detectar mudanças de presença (estatísticas)
+        instancia._presenca_original = instancia.__dict__.get('presenca_confirmada')
+        return instancia
+
     class Meta:
         # [cite_start]Garante que um usuário só pode se inscrever uma vez no mesmo evento[cite: 46].
         unique_together = ('usuario', 'evento')
         verbose_name = "Inscrição"
         verbose_name_plural = "Inscrições"
+        indexes = [
+            # Inscrições com presença confirmada de um evento (emissão de certificados) e
+            # lista de inscritos filtrada por presença, em ordem alfabética
+            models.Index(fields=['evento', 'presenca_confirmada', 'nome_busca', 'id'], name='inscricao_evento_presenca_idx'),
+            # Lista de inscritos em ordem alfabética, paginada por (nome_busca, id)
+            models.Index(fields=['evento', 'nome_busca', 'id'], name='inscricao_evento_nome_idx'),
+            # Inscrições alteradas desde uma versão (check-in offline)
+            models.Index(fields=['evento', 'versao_lista'], name='inscricao_evento_versao_idx'),
+        ]
 
     def __str__(self):
         return f"{self.usuario.nome} inscrito em {self.evento.nome}"
 
+    def save(self, *args, **kwargs):
+        if self._state.adding and not self.nome_busca:
+            self.nome_busca = self.usuario.nome_busca
+        super().save(*args, **kwargs)
+
+    @property
+    def codigo_checkin(self):
+        """ Código apresentado pelo participante na entrada do evento. """
+        return gerar_codigo_checkin(self.pk, chave_codigo_checkin(self.evento_id))
+
+class ListaEspera(models.Model):
+    """
+    Lugar de um usuário na lista de espera de um evento lotado, por ordem de chegada.
+    Quando uma vaga é liberada, as primeiras entradas viram inscrições (ver espera.py).
+    """
+    usuario = models.ForeignKey(Usuario, on_delete=models.CASCADE, related_name='esperas')
+    evento = models.ForeignKey(Evento, on_delete=models.CASCADE, related_name='lista_espera')
+    # Ordem de chegada no evento (contador EstatisticaEvento.espera_fim)
+    posicao = models.PositiveBigIntegerField(editable=False)
+    criada_em = models.DateTimeField(auto_now_add=True, verbose_name="Entrada na Lista")
+
+    class Meta:
+        unique_together = ('usuario', 'evento')
+        verbose_name = "Lista de Espera"
+        verbose_name_plural = "Listas de Espera"
+        indexes = [
+            # Início da fila de um evento (promoção) e posição de cada entrada
+            models.Index(fields=['evento', 'posicao'], name='espera_evento_posicao_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.usuario.nome} na lista de espera de {self.evento.nome}"
+
+
+class DesistenciaEspera(models.Model):
+    """
+    Desistências da lista de espera de um evento, numa árvore de Fenwick sobre os
+    números de chegada (ver espera.py): cada nó soma as desistências de um intervalo
+    de números, então a posição de uma entrada sai de poucos nós lidos pelo índice.
+    """
+    evento = models.ForeignKey(Evento, on_delete=models.CASCADE, related_name='+')
+    no = models.PositiveBigIntegerField()
+    total = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('evento', 'no')
+        verbose_name = "Desistência da Lista de Espera"
+        verbose_name_plural = "Desistências da Lista de Espera"
+
+    def __str__(self):
+        return f"Nó {self.no} do evento {self.evento_id}: {self.total}"
+
+class LembreteEnviado(models.Model):
+    """
+    Lembrete de evento já agendado para uma inscrição, em uma janela de antecedência
+    (ver lembretes.py). Gravado junto com a tarefa de envio: rodar o agendador de novo
+    não repete o lembrete.
+    """
+    inscricao = models.ForeignKey(Inscricao, on_delete=models.CASCADE, related_name='lembretes')
+    janela = models.CharField(max_length=20, verbose_name="Janela")
+    agendado_em = models.DateTimeField(auto_now_add=True, verbose_name="Agendado em")
+
+    class Meta:
+        unique_together = ('inscricao', 'janela')
+        verbose_name = "Lembrete Enviado"
+        verbose_name_plural = "Lembretes Enviados"
+
+    def __str__(self):
+        return f"Lembrete '{self.janela}' da inscrição {self.inscricao_id}"
+
+# Alfabeto dos códigos de verificação: sem caracteres ambíguos (0/O, 1/I/L).
+ALFABETO_CODIGO_VERIFICACAO = 'ABCDEFGHJKMNPQRSTUVWXYZ23456789'
+TAMANHO_CODIGO_VERIFICACAO = 16  # ~79 bits: inviável de adivinhar
+TAMANHO_CODIGO_CHECKIN = 6  # conferido só dentro da lista do evento
+
+def gerar_codigo_verificacao():
+    """ Código aleatório impresso no certificado (ex: 'K7QM-2XPD-9RTA-HW4E' na exibição). """
+    return ''.join(secrets.choice(ALFABETO_CODIGO_VERIFICACAO) for _ in range(TAMANHO_CODIGO_VERIFICACAO))
+
+def formatar_codigo_verificacao(codigo):
+    return '-'.join(codigo[i:i + 4] for i in range(0, len(codigo), 4))
+
+def chave_codigo_checkin(evento_id):
+    """ Chave dos códigos de check-in de um evento (vai na lista offline do organizador). """
+    return salted_hmac('sgea.checkin.codigo', str(evento_id), algorithm='sha256').hexdigest()
+
+def gerar_codigo_checkin(inscricao_id, chave):
+    """
+    Código curto de check-in: HMAC-SHA256 do id da inscrição com a chave do evento,
+    primeiros 8 bytes (big-endian) escritos na base do alfabeto, do dígito menos
+    significativo para o mais significativo. O dispositivo offline refaz o cálculo com
+    a chave recebida, então os códigos não precisam viajar na lista.
+    """
+    digest = hmac.new(chave.encode(), str(inscricao_id).encode(), hashlib.sha256).digest()
+    numero = int.from_bytes(digest[:8], 'big')
+    codigo = ''
+    for _ in range(TAMANHO_CODIGO_CHECKIN):
+        numero, resto = divmod(numero, len(ALFABETO_CODIGO_VERIFICACAO))
+        codigo += ALFABETO_CODIGO_VERIFICACAO[resto]
+    return codigo
+
 class Certificado(models.Model):
     """
     Modelo para armazenar os certificados emitidos.
@@ -143,9 +383,31 @@ class Certificado(models.Model):
     # Campo opcional: O caminho ou URL para o arquivo do certificado gerado.
     arquivo_certificado = models.FileField(upload_to='certificados/', null=True, blank=True)
 
+    # Código público de verificação de autenticidade (índice único: uma busca por consulta).
+    # Sem default: um default na migração gravaria o mesmo código em todos os certificados
+    # já existentes e violaria o índice. A coluna entra nula neles, o post_migrate gera os
+    # códigos (certificados.preencher_codigos_verificacao) e os novos recebem o seu no save().
+    codigo_verificacao = models.CharField(
+        max_length=TAMANHO_CODIGO_VERIFICACAO, unique=True, null=True,
+        editable=False, verbose_name="Código de Verificação"
+    )
+
     class Meta:
         verbose_name = "Certificado"
         verbose_name_plural = "Certificados"
+        indexes = [
+            # Navegação por data de emissão no admin (date_hierarchy)
+            models.Index(fields=['data_emissao'], name='certificado_emissao_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if not self.codigo_verificacao:
+            self.codigo_verificacao = gerar_codigo_verificacao()
+        super().save(*args, **kwargs)
+
+    def codigo_formatado(self):
+        """ Código em grupos de 4 caracteres, como impresso no documento. """
+        return formatar_codigo_verificacao(self.codigo_verificacao)
 
     def __str__(self):
         return f"Certificado para {self.inscricao.usuario.nome} - Status: {self.status_emissao}"
@@ -176,7 +438,288 @@ class RegistroAuditoria(models.Model):
         verbose_name_plural = "Registros de Auditoria"
         # Ordena para que as ações mais recentes apareçam primeiro na consulta.
         ordering = ['-data_hora'] 
+        indexes = [
+            # Listagens mais recentes primeiro e navegação por data no admin
+            models.Index(fields=['data_hora'], name='auditoria_data_hora_idx'),
+        ]
 
     def __str__(self):
         # Para fácil visualização no admin ou no shell
-        return f"[{self.data_hora.strftime('%d/%m/%Y %H:%M')}] {self.usuario.nome if self.usuario else 'Sistema'} - {self.acao}"
\ No newline at end of file
+        return f"[{self.data_hora.strftime('%d/%m/%Y %H:%M')}] {self.usuario.nome if self.usuario else 'Sistema'} - {self.acao}"
+
+
+class EstatisticaEvento(models.Model):
+    """
+    Contadores de um evento, mantidos incrementalmente pelos signals de Inscricao
+    e Certificado (ver estatisticas.py). O comando 'reconciliar_estatisticas'
+    corrige eventuais divergências.
+    """
+    evento = models.OneToOneField(Evento, on_delete=models.CASCADE, primary_key=True, related_name='estatistica')
+    total_inscritos = models.IntegerField(default=0, verbose_name="Total de Inscritos")
+    presencas_confirmadas = models.IntegerField(default=0, verbose_name="Presenças Confirmadas")
+    certificados_emitidos = models.IntegerField(default=0, verbose_name="Certificados Emitidos")
+    atualizado_em = models.DateTimeField(auto_now=True, verbose_name="Atualizado em")
+
+    # Versão da lista de check-in: avança a cada inscrição criada, removida ou com
+    # presença alterada. 'versao_remocao' é a última versão em que houve remoção.
+    versao_lista = models.PositiveBigIntegerField(default=0, editable=False)
+    versao_remocao = models.PositiveBigIntegerField(default=0, editable=False)
+
+    # Lista de espera (ver espera.py): as entradas ativas têm 'posicao' no intervalo
+    # (espera_inicio, espera_fim], com lacunas deixadas por desistências; 'espera_total'
+    # é a quantidade de entradas ativas.
+    espera_inicio = models.PositiveBigIntegerField(default=0, editable=False)
+    espera_fim = models.PositiveBigIntegerField(default=0, editable=False)
+    espera_total = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        verbose_name = "Estatística do Evento"
+        verbose_name_plural = "Estatísticas dos Eventos"
+
+    def taxa_ocupacao(self):
+        """ Percentual das vagas preenchidas. """
+        vagas = self.evento.quantidade_participantes
+        return round(100 * self.total_inscritos / vagas, 1) if vagas else 0.0
+
+    def taxa_presenca(self):
+        """ Percentual dos inscritos com presença confirmada. """
+        return round(100 * self.presencas_confirmadas / self.total_inscritos, 1) if self.total_inscritos else 0.0
+
+    @property
+    def total_espera(self):
+        """ Quantidade de pessoas na lista de espera. """
+        return self.espera_total
+
+    def __str__(self):
+        return f"Estatísticas de {self.evento_id}"
+
+class EstatisticaOrganizador(models.Model):
+    """
+    Totais de todos os eventos de um organizador, mantidos da mesma forma.
+    """
+    organizador = models.OneToOneField(Usuario, on_delete=models.CASCADE, primary_key=True, related_name='estatistica_organizador')
+    total_eventos = models.IntegerField(default=0, verbose_name="Total de Eventos")
+    vagas_ofertadas = models.IntegerField(default=0, verbose_name="Vagas Ofertadas")
+    total_inscritos = models.IntegerField(default=0, verbose_name="Total de Inscritos")
+    presencas_confirmadas = models.IntegerField(default=0, verbose_name="Presenças Confirmadas")
+    certificados_emitidos = models.IntegerField(default=0, verbose_name="Certificados Emitidos")
+    atualizado_em = models.DateTimeField(auto_now=True, verbose_name="Atualizado em")
+
+    class Meta:
+        verbose_name = "Estatística do Organizador"
+        verbose_name_plural = "Estatísticas dos Organizadores"
+
+    def taxa_ocupacao(self):
+        return round(100 * self.total_inscritos / self.vagas_ofertadas, 1) if self.vagas_ofertadas else 0.0
+
+    def taxa_presenca(self):
+        return round(100 * self.presencas_confirmadas / self.total_inscritos, 1) if self.total_inscritos else 0.0
+
+    def __str__(self):
+        return f"Estatísticas do organizador {self.organizador_id}"
+
+
+class VersaoCalendario(models.Model):
+    """
+    Versões dos feeds .ics (ver calendario.py): 'eventos' ou 'usuario:<id>'.
+    Ficam no banco, e não no cache, para nunca serem descartadas nem perderem incrementos.
+    """
+    chave = models.CharField(max_length=50, primary_key=True, verbose_name="Chave")
+    versao = models.PositiveBigIntegerField(default=1, verbose_name="Versão")
+
+    class Meta:
+        verbose_name = "Versão do Calendário"
+        verbose_name_plural = "Versões do Calendário"
+
+    def __str__(self):
+        return f"{self.chave} (v{self.versao})"
+
+
+class TarefaAgendada(models.Model):
+    """
+    Controle das tarefas executadas via cron (ex: emissão automática de certificados).
+    Funciona como um "lock" com prazo: só o nó que conseguir marcar 'bloqueada_ate'
+    executa a tarefa. O 'checkpoint' guarda o último id processado, para retomar
+    de onde parou em caso de falha.
+    """
+    nome = models.CharField(max_length=100, unique=True, verbose_name="Nome da Tarefa")
+    dono = models.CharField(max_length=255, blank=True, verbose_name="Nó em Execução")
+    bloqueada_ate = models.DateTimeField(null=True, blank=True, verbose_name="Bloqueada Até")
+    checkpoint = models.BigIntegerField(default=0, verbose_name="Último ID Processado")
+    ultima_execucao = models.DateTimeField(null=True, blank=True, verbose_name="Última Execução Concluída")
+
+    class Meta:
+        verbose_name = "Tarefa Agendada"
+        verbose_name_plural = "Tarefas Agendadas"
+
+    def __str__(self):
+        return self.nome
+
+
+class TarefaFila(models.Model):
+    """
+    Trabalho em segundo plano (ver fila.py). As views só inserem a linha e respondem;
+    o comando 'processar_fila' reserva as tarefas pendentes e as executa.
+    Tarefas que esgotam as tentativas ficam no estado 'falha' (dead letter) para análise.
+    """
+    ESTADO_CHOICES = [
+        ('pendente', 'Pendente'),
+        ('executando', 'Executando'),
+        ('concluida', 'Concluída'),
+        ('falha', 'Falha'),
+    ]
+
+    nome = models.CharField(max_length=100, verbose_name="Tarefa")
+    argumentos = models.JSONField(default=dict, blank=True, verbose_name="Argumentos")
+    # Maior prioridade sai primeiro
+    prioridade = models.SmallIntegerField(default=0, verbose_name="Prioridade")
+    estado = models.CharField(max_length=10, choices=ESTADO_CHOICES, default='pendente', verbose_name="Estado")
+    # Evita duplicatas: só uma tarefa pendente e ainda não iniciada por chave (restrição abaixo)
+    chave = models.CharField(max_length=150, blank=True, db_index=True, verbose_name="Chave de Deduplicação")
+
+    tentativas = models.PositiveSmallIntegerField(default=0, verbose_name="Tentativas")
+    max_tentativas = models.PositiveSmallIntegerField(default=5, verbose_name="Máximo de Tentativas")
+    erro = models.TextField(blank=True, verbose_name="Último Erro")
+
+    criada_em = models.DateTimeField(auto_now_add=True, verbose_name="Criada em")
+    # Quando a tarefa pode ser executada (adiada nas novas tentativas)
+    executar_em = models.DateTimeField(default=timezone.now, verbose_name="Executar em")
+    iniciada_em = models.DateTimeField(null=True, blank=True, verbose_name="Iniciada em")
+    concluida_em = models.DateTimeField(null=True, blank=True, verbose_name="Concluída em")
+
+    # Worker que reservou a tarefa e até quando; vencido o prazo, outro worker a retoma
+    dono = models.CharField(max_length=255, blank=True, verbose_name="Worker")
+    reservada_ate = models.DateTimeField(null=True, blank=True, verbose_name="Reservada Até")
+
+    class Meta:
+        verbose_name = "Tarefa da Fila"
+        verbose_name_plural = "Fila de Tarefas"
+        indexes = [
+            # Próximas tarefas a executar
+            models.Index(fields=['estado', '-prioridade', 'executar_em'], name='tarefafila_proximas_idx'),
+        ]
+        constraints = [
+            # Duas requisições simultâneas não criam a mesma tarefa duas vezes (ver enfileirar)
+            models.UniqueConstraint(
+                fields=['chave'], condition=models.Q(estado='pendente', tentativas=0) & ~models.Q(chave=''),
+                name='tarefafila_chave_pendente_uniq',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.nome} #{self.pk} ({self.estado})"
+
+
+def armazenamento_privado():
+    """ Arquivos fora do MEDIA_ROOT, entregues só por views que checam o dono. """
+    return FileSystemStorage(location=settings.ARQUIVOS_PRIVADOS_ROOT)
+
+
+class ExportacaoDados(models.Model):
+    """
+    Pacote ZIP com os dados de um usuário, montado em segundo plano para contas
+    grandes (ver dados_pessoais.py). O arquivo fica em ARQUIVOS_PRIVADOS_ROOT, fora do
+    MEDIA_ROOT (nenhuma URL de mídia chega nele), e só sai pela view do próprio usuário,
+    com suporte a download retomável (Range). Enquanto pendente, expira_em é o prazo da
+    preparação: se a tarefa falhar de vez, a exportação vence e pode ser pedida de novo.
+    """
+    ESTADO_CHOICES = [
+        ('pendente', 'Em preparação'),
+        ('pronta', 'Pronta'),
+    ]
+
+    usuario = models.ForeignKey(Usuario, on_delete=models.CASCADE, related_name='exportacoes')
+    estado = models.CharField(max_length=10, choices=ESTADO_CHOICES, default='pendente', verbose_name="Estado")
+    arquivo = models.FileField(upload_to='exportacoes/', storage=armazenamento_privado, blank=True, verbose_name="Arquivo")
+    tamanho = models.PositiveBigIntegerField(default=0, verbose_name="Tamanho (bytes)")
+    criada_em = models.DateTimeField(auto_now_add=True, verbose_name="Solicitada em")
+    concluida_em = models.DateTimeField(null=True, blank=True, verbose_name="Concluída em")
+    expira_em = models.DateTimeField(null=True, blank=True, db_index=True, verbose_name="Expira em")
+
+    class Meta:
+        verbose_name = "Exportação de Dados"
+        verbose_name_plural = "Exportações de Dados"
+
+    def __str__(self):
+        return f"Exportação {self.pk} de {self.usuario.nome} ({self.get_estado_display()})"
+
+
+class EventoRemovido(models.Model):
+    """
+    Registro de evento excluído ou arquivado, para a exportação incremental do catálogo
+    (api/exportacao.py) avisar os espelhos dos parceiros que a linha deve sair.
+    """
+    evento_id = models.BigIntegerField(verbose_name="Evento")
+    removido_em = models.DateTimeField(auto_now_add=True, verbose_name="Removido em")
+
+    class Meta:
+        verbose_name = "Evento Removido"
+        verbose_name_plural = "Eventos Removidos"
+        indexes = [
+            # Exportação incremental: WHERE removido_em >= ... ORDER BY removido_em, id
+            models.Index(fields=['removido_em', 'id'], name='evento_removido_idx'),
+        ]
+
+    def __str__(self):
+        return f"Evento {self.evento_id} removido em {self.removido_em:%d/%m/%Y %H:%M}"
+
+
+# --- Arquivo de Eventos Encerrados (ver arquivamento.py) ---
+# Eventos encerrados há mais de ARQUIVO_MESES meses são movidos, com suas inscrições e
+# certificados, para estas tabelas. Os ids originais são mantidos, então links de
+# certificados e códigos de verificação continuam válidos. Os nomes dos campos e das
+# relações espelham os modelos ativos (certificado.inscricao.evento.nome funciona nos dois).
+
+class EventoArquivado(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    organizador = models.ForeignKey(Usuario, on_delete=models.PROTECT, related_name='eventos_arquivados', verbose_name="Organizador Responsável")
+    professor_responsavel = models.ForeignKey(Usuario, on_delete=models.PROTECT, related_name='eventos_arquivados_professor', verbose_name="Professor Responsável")
+    nome = models.CharField(max_length=100, verbose_name="Nome do Evento")
+    tipo_evento = models.CharField(max_length=50, choices=Evento.TIPO_EVENTO_CHOICES, verbose_name="Tipo de Evento")
+    data_inicial = models.DateField(verbose_name="Data de Início")
+    data_final = models.DateField(verbose_name="Data de Fim")
+    horario = models.CharField(max_length=50, verbose_name="Horário")
+    local = models.CharField(max_length=50, verbose_name="Local")
+    quantidade_participantes = models.IntegerField(verbose_name="Limite de Participantes")
+    banner = models.CharField(max_length=100, blank=True, verbose_name="Banner do Evento")
+    arquivado_em = models.DateTimeField(auto_now_add=True, verbose_name="Arquivado em")
+
+    class Meta:
+        verbose_name = "Evento Arquivado"
+        verbose_name_plural = "Eventos Arquivados"
+
+    def __str__(self):
+        return self.nome
+
+class InscricaoArquivada(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    usuario = models.ForeignKey(Usuario, on_delete=models.CASCADE, related_name='inscricoes_arquivadas')
+    evento = models.ForeignKey(EventoArquivado, on_delete=models.CASCADE, related_name='inscricoes')
+    presenca_confirmada = models.BooleanField(default=False, verbose_name="Presença Confirmada")
+
+    class Meta:
+        unique_together = ('usuario', 'evento')
+        verbose_name = "Inscrição Arquivada"
+        verbose_name_plural = "Inscrições Arquivadas"
+
+    def __str__(self):
+        return f"{self.usuario.nome} inscrito em {self.evento.nome}"
+
+class CertificadoArquivado(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    inscricao = models.OneToOneField(InscricaoArquivada, on_delete=models.CASCADE, related_name='certificado', verbose_name="Inscrição Referente")
+    data_emissao = models.DateField(verbose_name="Data de Emissão")
+    texto_certificado = models.CharField(max_length=255, verbose_name="Texto do Certificado")
+    status_emissao = models.CharField(max_length=50, choices=Certificado.STATUS_CHOICES, verbose_name="Status de Emissão")
+    arquivo_certificado = models.FileField(upload_to='certificados/', null=True, blank=True)
+    codigo_verificacao = models.CharField(max_length=TAMANHO_CODIGO_VERIFICACAO, unique=True, verbose_name="Código de Verificação")
+
+    class Meta:
+        verbose_name = "Certificado Arquivado"
+        verbose_name_plural = "Certificados Arquivados"
+
+    def codigo_formatado(self):
+        return formatar_codigo_verificacao(self.codigo_verificacao)
+
+    def __str__(self):
+        return f"Certificado para {self.inscricao.usuario.nome} - Status: {self.status_emissao}"
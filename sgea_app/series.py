@@ -0,0 +1,153 @@
+from datetime import timedelta
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+
+from . import busca, calendario, espera, estatisticas
+from .models import EstatisticaEvento, Evento, Usuario
+from .utils import log_auditoria
+
+# Séries de eventos: um evento principal (ex: Semana Acadêmica) e suas sessões.
+# As sessões são criadas com bulk_create, que não dispara signals; por isso o índice
+# de busca, as estatísticas e o calendário são atualizados aqui, uma vez por lote.
+
+# Campos que a edição em lote pode alterar diretamente com UPDATE.
+CAMPOS_EDITAVEIS_EM_LOTE = ('tipo_evento', 'local', 'quantidade_participantes', 'professor_responsavel', 'politica_conflito')
+
+
+def _pos_criacao(eventos, organizador_id):
+    """ O que os signals de post_save fariam, mas em lote. """
+    EstatisticaEvento.objects.bulk_create([EstatisticaEvento(evento=evento) for evento in eventos])
+    estatisticas.atualizar_eventos_organizador(organizador_id)
+    busca.indexar_eventos(eventos)
+    calendario.invalidar_eventos()
+
+
+def criar_serie(evento_principal, sessoes):
+    """
+    Cria o evento principal (já preenchido pelo FormularioEvento, ainda não salvo) e
+    todas as sessões numa única transação. Cada sessão é um dict com os campos do
+    SessaoForm; os campos vazios herdam os valores do evento principal.
+    Retorna a lista de sessões criadas.
+    """
+    organizador = evento_principal.organizador
+    professores = {
+        professor.pk: professor
+        for professor in Usuario.objects.filter(
+            pk__in={sessao['professor_responsavel'] for sessao in sessoes if sessao.get('professor_responsavel')}
+        )
+    }
+
+    with transaction.atomic():
+        evento_principal.save()
+
+        filhos = []
+        for sessao in sessoes:
+            professor = professores.get(sessao.get('professor_responsavel')) or evento_principal.professor_responsavel
+            filho = Evento(
+                serie=evento_principal,
+                organizador=organizador,
+                professor_responsavel=professor,
+                nome=sessao['nome'],
+                tipo_evento=sessao['tipo_evento'],
+                data_inicial=sessao['data'],
+                data_final=sessao['data'],
+                horario=sessao['horario'],
+                local=sessao.get('local') or evento_principal.local,
+                quantidade_participantes=sessao.get('quantidade_participantes') or evento_principal.quantidade_participantes,
+                politica_conflito=evento_principal.politica_conflito,
+                # Mesmo arquivo do evento principal: o upload e o processamento acontecem uma vez
+                banner=evento_principal.banner.name if evento_principal.banner else None,
+                banner_variantes=evento_principal.banner_variantes,
+                banner_hashes=evento_principal.banner_hashes,
+            )
+            filho.atualizar_intervalo()
+            filhos.append(filho)
+
+        Evento.objects.bulk_create(filhos)
+        _pos_criacao(filhos, organizador.pk)
+
+        log_auditoria(
+            organizador,
+            f"Cadastro da série: {evento_principal.nome} com {len(filhos)} sessões (Organizador: {organizador.nome})",
+        )
+    return filhos
+
+
+def erro_deslocamento(evento_principal, sessoes, dias):
+    """
+    Mensagem de erro se deslocar as sessões em 'dias' deixar alguma com data anterior à
+    data atual ou fora do período do evento principal (as regras da criação da série).
+    None se o deslocamento for válido.
+    """
+    hoje = timezone.now().date()
+    deslocamento = timedelta(days=dias)
+    for sessao in sessoes:
+        data_inicial, data_final = sessao.data_inicial + deslocamento, sessao.data_final + deslocamento
+        if data_inicial < hoje:
+            return f"A sessão '{sessao.nome}' ficaria com data anterior à data atual."
+        if not (evento_principal.data_inicial <= data_inicial and data_final <= evento_principal.data_final):
+            return f"A sessão '{sessao.nome}' ficaria fora do período do evento principal."
+    return None
+
+
+def editar_sessoes(evento_principal, sessoes, alteracoes, deslocar_dias=0, horario=''):
+    """
+    Aplica as mesmas alterações às sessões escolhidas da série.
+    'alteracoes' contém só os campos de CAMPOS_EDITAVEIS_EM_LOTE que devem mudar.
+    Mudanças de horário ou de datas recalculam o intervalo (inicio/fim) de cada sessão,
+    e as sessões que ganharam vagas promovem a lista de espera. Retorna o número de sessões alteradas.
+    ValidationError se o deslocamento levar alguma sessão para o passado ou para fora da série.
+    """
+    ids = [sessao.pk for sessao in sessoes]
+    if not ids or not (alteracoes or deslocar_dias or horario):
+        return 0
+
+    agora = timezone.now()
+    with transaction.atomic():
+        if alteracoes:
+            vagas_anteriores = {}
+            if 'quantidade_participantes' in alteracoes:
+                vagas_anteriores = dict(Evento.objects.filter(pk__in=ids, serie=evento_principal).values_list(
+                    'id', 'quantidade_participantes'
+                ))
+            Evento.objects.filter(pk__in=ids, serie=evento_principal).update(atualizado_em=agora, **alteracoes)
+
+        if deslocar_dias or horario:
+            atualizados = list(Evento.objects.filter(pk__in=ids, serie=evento_principal).only(
+                'id', 'nome', 'data_inicial', 'data_final', 'horario'
+            ))
+            # Conferido de novo com as datas atuais, dentro da transação (desfaz as alterações acima)
+            erro = deslocar_dias and erro_deslocamento(evento_principal, atualizados, deslocar_dias)
+            if erro:
+                raise ValidationError(erro)
+            for sessao in atualizados:
+                if deslocar_dias:
+                    sessao.data_inicial += timedelta(days=deslocar_dias)
+                    sessao.data_final += timedelta(days=deslocar_dias)
+                if horario:
+                    sessao.horario = horario
+                sessao.atualizar_intervalo()
+                sessao.atualizado_em = agora
+            Evento.objects.bulk_update(
+                atualizados, ['data_inicial', 'data_final', 'horario', 'inicio', 'fim', 'atualizado_em'], batch_size=500
+            )
+
+        # QuerySet.update e bulk_update não disparam signals
+        if 'quantidade_participantes' in alteracoes:
+            estatisticas.atualizar_eventos_organizador(evento_principal.organizador_id)
+            # Vagas novas vão para a lista de espera (como na edição de um evento)
+            for sessao_id, vagas in vagas_anteriores.items():
+                if alteracoes['quantidade_participantes'] > vagas:
+                    espera.promover(sessao_id)
+        busca.indexar_eventos(list(
+            Evento.objects.filter(pk__in=ids).select_related('organizador', 'professor_responsavel')
+        ))
+        calendario.invalidar_eventos()
+
+        log_auditoria(
+            evento_principal.organizador,
+            f"Edição em lote de {len(ids)} sessões da série: {evento_principal.nome}",
+        )
+    return len(ids)
@@ -0,0 +1,243 @@
+import gc
+import os
+import random
+import signal
+import socket
+import sys
+import time
+import traceback
+from importlib import import_module
+
+from django.conf import settings
+from django.core.servers.basehttp import WSGIRequestHandler, WSGIServer, get_internal_wsgi_application
+from django.db import connections
+from django.urls import get_resolver
+from django.utils.module_loading import import_string
+
+from .inicializacao import precompilar_templates
+
+# Servidor de produção com pré-fork (comando 'servir').
+#
+# O processo mestre abre o socket, carrega o Django (aplicação, URLs, templates
+# compilados) e só então cria os workers com fork: o código e os templates ficam em
+# páginas de memória compartilhadas (copy-on-write) em vez de repetidos em cada worker.
+# gc.freeze() tira esses objetos das coletas do GC, que de outra forma tocariam nas
+# páginas e forçariam a cópia.
+#
+# Cada worker atende até 'max_requisicoes' (com uma variação aleatória, para que não
+# reiniciem todos juntos) e sai; o mestre cria outro no lugar.
+#
+# SIGHUP recarrega sem derrubar conexões: o mestre se reexecuta (os.execv) mantendo o
+# socket aberto, carrega o código novo, cria a nova geração de workers e só então pede
+# aos antigos que terminem a requisição em andamento e saiam. O socket nunca fecha,
+# então as conexões que chegam no meio do caminho esperam na fila do kernel.
+
+VARIAVEL_SOCKET = 'SGEA_SERVIR_FD'
+VARIAVEL_ANTIGOS = 'SGEA_SERVIR_ANTIGOS'
+
+INTERVALO_SUPERVISAO = 0.5
+
+
+# --- Preparação (no mestre, antes do fork) ---
+
+def abrir_socket(endereco, porta, backlog):
+    """ Socket de escuta, ou o herdado do mestre anterior num reload (SIGHUP). """
+    herdado = os.environ.pop(VARIAVEL_SOCKET, None)
+    if herdado is not None:
+        sock = socket.socket(fileno=int(herdado))
+    else:
+        sock = socket.create_server((endereco, porta), backlog=backlog)
+    sock.set_inheritable(True)
+    return sock
+
+def carregar_aplicacao(asgi=False):
+    """ Carrega a aplicação, as views (via URLconf) e os templates. Retorna (aplicacao, templates). """
+    if asgi:
+        caminho = getattr(settings, 'ASGI_APPLICATION', None)
+        if caminho:
+            aplicacao = import_string(caminho)
+        else:
+            from django.core.asgi import get_asgi_application
+            aplicacao = get_asgi_application()
+    else:
+        aplicacao = get_internal_wsgi_application()
+
+    get_resolver().url_patterns
+    # As views da API (DRF) são importadas sob demanda (api/urls.py); aqui, antes do
+    # fork, para que fiquem na memória compartilhada
+    import_module('api.views')
+    templates = precompilar_templates()
+
+    # Conexões não podem ser compartilhadas entre processos: cada worker abre a sua
+    connections.close_all()
+    gc.collect()
+    gc.freeze()
+    return aplicacao, templates
+
+
+# --- Workers ---
+
+class ServidorWSGI(WSGIServer):
+    """
+    Servidor WSGI do Django (o mesmo do runserver) sobre o socket herdado do mestre.
+    Sem threads, cada worker atende uma requisição por vez e fecha a conexão
+    (Connection: close), então uma conexão ociosa não prende o worker.
+    """
+    atendidas = 0
+
+    def __init__(self, sock, aplicacao):
+        super().__init__(sock.getsockname()[:2], WSGIRequestHandler, bind_and_activate=False)
+        self.socket.close()
+        self.socket = sock
+        self.server_address = sock.getsockname()
+        host, porta = self.server_address[:2]
+        self.server_name = socket.getfqdn(host)
+        self.server_port = porta
+        self.setup_environ()
+        self.set_app(aplicacao)
+
+    def get_request(self):
+        # O socket de escuta é não bloqueante (vários workers disputam cada conexão);
+        # a conexão aceita volta a ser bloqueante
+        conexao, endereco = super().get_request()
+        conexao.setblocking(True)
+        return conexao, endereco
+
+    def process_request(self, request, client_address):
+        super().process_request(request, client_address)
+        self.atendidas += 1
+
+def servir_wsgi(sock, aplicacao, max_requisicoes):
+    sock.setblocking(False)
+    servidor = ServidorWSGI(sock, aplicacao)
+    servidor.timeout = 1
+
+    parar = []
+    signal.signal(signal.SIGTERM, lambda *args: parar.append(True))
+    signal.signal(signal.SIGINT, lambda *args: parar.append(True))
+
+    while not parar and servidor.atendidas < max_requisicoes:
+        servidor.handle_request()
+
+def servir_asgi(sock, aplicacao, max_requisicoes):
+    import uvicorn
+
+    config = uvicorn.Config(
+        aplicacao, lifespan='off', log_level='warning',
+        limit_max_requests=max_requisicoes, timeout_graceful_shutdown=30,
+    )
+    # O uvicorn trata SIGTERM/SIGINT: para de aceitar e espera as requisições em andamento
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+# --- Mestre ---
+
+class Mestre:
+    def __init__(self, sock, aplicacao, servir, workers, max_requisicoes, variacao, tempo_encerramento, saida):
+        self.sock = sock
+        self.aplicacao = aplicacao
+        self.servir = servir
+        self.quantidade = workers
+        self.max_requisicoes = max_requisicoes
+        self.variacao = variacao
+        self.tempo_encerramento = tempo_encerramento
+        self.saida = saida
+        self.workers = {}
+        self.parar = False
+        self.recarregar = False
+
+    def _log(self, mensagem):
+        self.saida(f"[mestre {os.getpid()}] {mensagem}")
+
+    def iniciar_worker(self):
+        limite = self.max_requisicoes + random.randint(0, self.variacao)
+        pid = os.fork()
+        if pid:
+            self.workers[pid] = time.monotonic()
+            return pid
+
+        # Processo filho
+        codigo = 0
+        try:
+            signal.signal(signal.SIGHUP, signal.SIG_IGN)
+            signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+            self.servir(self.sock, self.aplicacao, limite)
+        except BaseException:
+            traceback.print_exc()
+            codigo = 1
+        finally:
+            os._exit(codigo)
+
+    def _recolher(self):
+        """ Recolhe os workers que saíram; os da geração atual são substituídos. """
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            iniciado = self.workers.pop(pid, None)
+            if iniciado is None or self.parar:
+                continue
+            if os.waitstatus_to_exitcode(status) != 0:
+                self._log(f"worker {pid} terminou com erro (status {os.waitstatus_to_exitcode(status)})")
+                # Worker que morre logo ao iniciar: evita recriar em laço apertado
+                if time.monotonic() - iniciado < 1:
+                    time.sleep(1)
+            self.iniciar_worker()
+
+    def _encerrar_antigos(self):
+        """ Após um reload, pede aos workers da geração anterior que terminem. """
+        antigos = os.environ.pop(VARIAVEL_ANTIGOS, '')
+        for pid in filter(None, antigos.split(',')):
+            try:
+                os.kill(int(pid), signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def _reexecutar(self):
+        self._log("SIGHUP: recarregando (os workers atuais terminam o que estão atendendo)")
+        os.environ[VARIAVEL_SOCKET] = str(self.sock.fileno())
+        os.environ[VARIAVEL_ANTIGOS] = ','.join(str(pid) for pid in self.workers)
+        # No executável do PyInstaller, sys.argv[0] já é o próprio executável
+        argumentos = sys.argv if getattr(sys, 'frozen', False) else [sys.executable] + sys.argv
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os.execv(sys.executable, argumentos)
+
+    def _sinal_parar(self, signum, frame):
+        self.parar = True
+
+    def _sinal_recarregar(self, signum, frame):
+        self.recarregar = True
+
+    def executar(self):
+        signal.signal(signal.SIGTERM, self._sinal_parar)
+        signal.signal(signal.SIGINT, self._sinal_parar)
+        signal.signal(signal.SIGHUP, self._sinal_recarregar)
+
+        for _ in range(self.quantidade):
+            self.iniciar_worker()
+        self._encerrar_antigos()
+        self._log(f"{self.quantidade} workers: {', '.join(str(pid) for pid in self.workers)}")
+
+        while not self.parar:
+            time.sleep(INTERVALO_SUPERVISAO)
+            self._recolher()
+            if self.recarregar:
+                self._reexecutar()
+
+        self._log("encerrando")
+        for pid in list(self.workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        prazo = time.monotonic() + self.tempo_encerramento
+        while self.workers and time.monotonic() < prazo:
+            time.sleep(0.1)
+            self._recolher()
+        for pid in list(self.workers):
+            os.kill(pid, signal.SIGKILL)
+        self._recolher()
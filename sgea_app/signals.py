@@ -0,0 +1,169 @@
+from django.contrib.auth.signals import user_logged_out
+from django.db.models.signals import post_delete, post_migrate, post_save, pre_save
+from django.db.models import Q
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import busca, calendario, checkin, conflitos, estatisticas
+from .backends import invalidar_usuario
+from .certificados import invalidar_verificacao, preencher_codigos_verificacao
+from .models import Certificado, EstatisticaEvento, Evento, EventoRemovido, Inscricao, Usuario
+
+
+# --- Cache do Usuário Autenticado ---
+
+@receiver(post_save, sender=Usuario)
+@receiver(post_delete, sender=Usuario)
+def invalidar_cache_usuario(sender, instance, **kwargs):
+    """ Qualquer alteração (perfil, senha, is_active) descarta o usuário do cache. """
+    invalidar_usuario(instance.pk)
+
+@receiver(user_logged_out)
+def invalidar_cache_usuario_logout(sender, request, user, **kwargs):
+    if user is not None:
+        invalidar_usuario(user.pk)
+
+# --- Índice de Busca de Eventos ---
+
+@receiver(post_save, sender=Evento)
+def indexar_evento_salvo(sender, instance, **kwargs):
+    """ Mantém o índice de busca atualizado a cada criação/edição de evento. """
+    busca.indexar_evento(instance)
+
+@receiver(post_delete, sender=Evento)
+def remover_evento_do_indice(sender, instance, **kwargs):
+    busca.remover_evento(instance.pk)
+
+@receiver(post_save, sender=Usuario)
+def reindexar_eventos_do_usuario(sender, instance, created, update_fields=None, **kwargs):
+    """
+    O nome do organizador e do professor faz parte do índice.
+    Saves parciais que não mexem no nome (ex: last_login no login) são ignorados.
+    """
+    if created or (update_fields is not None and 'nome' not in update_fields):
+        return
+
+    eventos = Evento.objects.filter(
+        organizador=instance
+    ) | Evento.objects.filter(
+        professor_responsavel=instance
+    )
+    # Um DELETE e um INSERT (executemany) por lote, não um par de comandos por evento
+    busca.reindexar_eventos(eventos)
+
+@receiver(post_save, sender=Usuario)
+def atualizar_nome_nas_inscricoes(sender, instance, created, update_fields=None, **kwargs):
+    """ A lista de inscritos ordena pela cópia do nome guardada em cada inscrição. """
+    if created or (update_fields is not None and 'nome' not in update_fields):
+        return
+    Inscricao.objects.filter(usuario=instance).exclude(nome_busca=instance.nome_busca).update(
+        nome_busca=instance.nome_busca
+    )
+
+# --- Exportação Incremental do Catálogo ---
+
+@receiver(post_save, sender=Usuario)
+def marcar_eventos_do_usuario_alterados(sender, instance, created, update_fields=None, **kwargs):
+    """
+    organizador_nome e professor_nome saem na exportação incremental, que só envia os
+    eventos com atualizado_em novo: renomear o usuário conta como alteração dos eventos dele.
+    """
+    original = getattr(instance, '_nome_original', None)
+    instance._nome_original = instance.nome
+    if created or (update_fields is not None and 'nome' not in update_fields) or original == instance.nome:
+        return
+    # QuerySet.update não aplica o auto_now
+    Evento.objects.filter(Q(organizador=instance) | Q(professor_responsavel=instance)).update(
+        atualizado_em=timezone.now()
+    )
+
+@receiver(post_delete, sender=Evento)
+def registrar_evento_removido(sender, instance, **kwargs):
+    """ Exclusões e arquivamentos viram registros de remoção na exportação incremental. """
+    EventoRemovido.objects.create(evento_id=instance.pk)
+
+# --- Versões dos Feeds de Calendário ---
+
+@receiver(post_save, sender=Evento)
+@receiver(post_delete, sender=Evento)
+def invalidar_calendario_eventos(sender, instance, **kwargs):
+    calendario.invalidar_eventos()
+
+@receiver(post_save, sender=Inscricao)
+@receiver(post_delete, sender=Inscricao)
+def invalidar_calendario_usuario(sender, instance, **kwargs):
+    calendario.invalidar_usuario(instance.usuario_id)
+
+# --- Cache da Verificação de Certificados ---
+
+@receiver(post_save, sender=Certificado)
+@receiver(post_delete, sender=Certificado)
+def invalidar_cache_verificacao(sender, instance, **kwargs):
+    invalidar_verificacao(instance.codigo_verificacao)
+
+# --- Estatísticas Incrementais ---
+
+@receiver(post_save, sender=Evento)
+def atualizar_estatisticas_evento(sender, instance, created, **kwargs):
+    if created:
+        EstatisticaEvento.objects.get_or_create(evento=instance)
+    estatisticas.atualizar_eventos_organizador(instance.organizador_id)
+
+@receiver(post_delete, sender=Evento)
+def atualizar_estatisticas_evento_excluido(sender, instance, **kwargs):
+    estatisticas.atualizar_eventos_organizador(instance.organizador_id)
+
+@receiver(post_save, sender=Inscricao)
+def contabilizar_inscricao(sender, instance, created, **kwargs):
+    if created:
+        estatisticas.registrar_variacao(
+            instance.evento_id,
+            total_inscritos=1,
+            presencas_confirmadas=1 if instance.presenca_confirmada else 0,
+        )
+    else:
+        original = getattr(instance, '_presenca_original', None)
+        if original is not None and original != instance.presenca_confirmada:
+            estatisticas.registrar_variacao(
+                instance.evento_id,
+                presencas_confirmadas=1 if instance.presenca_confirmada else -1,
+            )
+    instance._presenca_original = instance.presenca_confirmada
+
+@receiver(post_delete, sender=Inscricao)
+def descontabilizar_inscricao(sender, instance, **kwargs):
+    estatisticas.registrar_variacao(
+        instance.evento_id,
+        total_inscritos=-1,
+        presencas_confirmadas=-1 if instance.presenca_confirmada else 0,
+    )
+
+@receiver(post_save, sender=Certificado)
+def contabilizar_certificado(sender, instance, created, **kwargs):
+    if created:
+        estatisticas.registrar_variacao(instance.inscricao.evento_id, certificados_emitidos=1)
+
+@receiver(post_delete, sender=Certificado)
+def descontabilizar_certificado(sender, instance, **kwargs):
+    evento_id = Inscricao.objects.filter(pk=instance.inscricao_id).values_list('evento_id', flat=True).first()
+    if evento_id is not None:
+        estatisticas.registrar_variacao(evento_id, certificados_emitidos=-1)
+
+# --- Versão da Lista de Check-in ---
+
+@receiver(pre_save, sender=Inscricao)
+def versionar_inscricao(sender, instance, **kwargs):
+    """ Inscrição nova ou com presença alterada entra na próxima sincronização offline. """
+    original = getattr(instance, '_presenca_original', None)
+    if instance._state.adding or (original is not None and original != instance.presenca_confirmada):
+        instance.versao_lista = checkin.proxima_versao(instance.evento_id)
+
+@receiver(post_delete, sender=Inscricao)
+def versionar_remocao_inscricao(sender, instance, **kwargs):
+    checkin.proxima_versao(instance.evento_id, remocao=True)
+
+def criar_indice_busca(sender, **kwargs):
+    busca.criar_indice()
+    busca.preencher_nomes_busca()
+    conflitos.preencher_intervalos()
+    preencher_codigos_verificacao()
@@ -0,0 +1,105 @@
+import os
+import socketserver
+import threading
+from email import message_from_bytes, policy
+
+# Servidor SMTP mínimo para testes locais (comando 'smtp_local'): aceita qualquer
+# mensagem, guarda em memória e, se houver pasta, grava um .eml por mensagem.
+# Não entrega nada a ninguém. Suporta só o necessário para o smtplib/Django:
+# HELO/EHLO, MAIL, RCPT, DATA, RSET, NOOP e QUIT (sem TLS nem autenticação).
+
+
+def _endereco(argumento):
+    """ 'FROM:<a@b.com> SIZE=100' -> 'a@b.com' """
+    return argumento.partition(':')[2].strip().split(' ')[0].strip('<>')
+
+
+class _Sessao(socketserver.StreamRequestHandler):
+
+    def _responder(self, linha):
+        self.wfile.write(linha.encode() + b'\r\n')
+
+    def _ler_dados(self):
+        linhas = []
+        while True:
+            linha = self.rfile.readline()
+            if not linha or linha in (b'.\r\n', b'.\n'):
+                return b''.join(linhas)
+            # "Dot-stuffing": linhas que começam com '.' chegam com um '.' a mais
+            linhas.append(linha[1:] if linha.startswith(b'..') else linha)
+
+    def handle(self):
+        self._responder('220 sgea-smtp-local pronto')
+        remetente, destinatarios = None, []
+        while True:
+            linha = self.rfile.readline()
+            if not linha:
+                return
+            comando = linha.decode('utf-8', 'replace').strip()
+            verbo, _, argumento = comando.partition(' ')
+            verbo = verbo.upper()
+
+            if verbo == 'EHLO':
+                self._responder('250-sgea-smtp-local')
+                self._responder('250-8BITMIME')
+                self._responder('250 SMTPUTF8')
+            elif verbo == 'HELO':
+                self._responder('250 sgea-smtp-local')
+            elif verbo == 'MAIL':
+                remetente, destinatarios = _endereco(argumento), []
+                self._responder('250 OK')
+            elif verbo == 'RCPT':
+                destinatarios.append(_endereco(argumento))
+                self._responder('250 OK')
+            elif verbo == 'DATA':
+                if not destinatarios:
+                    self._responder('503 RCPT antes de DATA')
+                    continue
+                self._responder('354 Envie a mensagem; termine com "." numa linha')
+                self.server.receber(remetente, destinatarios, self._ler_dados())
+                remetente, destinatarios = None, []
+                self._responder('250 OK')
+            elif verbo == 'RSET':
+                remetente, destinatarios = None, []
+                self._responder('250 OK')
+            elif verbo == 'NOOP':
+                self._responder('250 OK')
+            elif verbo == 'QUIT':
+                self._responder('221 Até logo')
+                return
+            else:
+                self._responder('502 Comando não suportado')
+
+
+class ServidorSMTPLocal(socketserver.ThreadingTCPServer):
+    """
+    Servidor SMTP de teste. Use a porta 0 para uma porta livre (self.server_address).
+    'ao_receber(remetente, destinatarios, mensagem)' é chamado a cada mensagem.
+    """
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, endereco, pasta=None, ao_receber=None):
+        super().__init__(endereco, _Sessao)
+        self.pasta = pasta
+        self.ao_receber = ao_receber
+        self.mensagens = []
+        self._trava = threading.Lock()
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+
+    def receber(self, remetente, destinatarios, dados):
+        mensagem = message_from_bytes(dados, policy=policy.default)
+        with self._trava:
+            self.mensagens.append((remetente, destinatarios, mensagem))
+            numero = len(self.mensagens)
+        if self.pasta:
+            with open(os.path.join(self.pasta, f'{numero:06d}.eml'), 'wb') as arquivo:
+                arquivo.write(dados)
+        if self.ao_receber:
+            self.ao_receber(remetente, destinatarios, mensagem)
+
+    def iniciar_em_segundo_plano(self):
+        """ Atende numa thread daemon (testes); pare com shutdown(). """
+        threading.Thread(target=self.serve_forever, name='sgea-smtp-local', daemon=True).start()
+        return self
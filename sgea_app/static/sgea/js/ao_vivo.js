@@ -0,0 +1,25 @@
+// Contadores ao vivo da lista de inscritos.
+// Recebe do servidor (server-sent events) o total de inscritos, as vagas restantes
+// e as presenças confirmadas, sem recarregar a página.
+document.addEventListener("DOMContentLoaded", function () {
+    const painel = document.querySelector("[data-ao-vivo]");
+    if (!painel || !window.EventSource) return;
+
+    const fonte = new EventSource(painel.dataset.aoVivo);
+
+    function atualizar(evento) {
+        const dados = JSON.parse(evento.data);
+        painel.querySelectorAll("[data-contador]").forEach(function (elemento) {
+            const campo = elemento.dataset.contador;
+            if (dados[campo] === undefined) return;
+            elemento.textContent = dados[campo];
+            if (campo === "vagas_restantes") {
+                elemento.classList.toggle("destaque-positivo", dados[campo] > 0);
+                elemento.classList.toggle("destaque-negativo", dados[campo] <= 0);
+            }
+        });
+    }
+
+    fonte.addEventListener("contadores", atualizar);
+    fonte.addEventListener("variacao", atualizar);
+});
@@ -0,0 +1,104 @@
+// Sugestões de professor no formulário de evento.
+// O texto digitado é enviado (com atraso de 200 ms) para a rota de busca;
+// ao escolher uma sugestão, o id vai para o campo oculto que o formulário envia.
+document.addEventListener("DOMContentLoaded", function () {
+    document.querySelectorAll("[data-autocomplete-professor]").forEach(function (caixa) {
+        const oculto = caixa.querySelector("input[type='hidden']");
+        const texto = caixa.querySelector("input[type='text']");
+        const lista = caixa.querySelector(".autocomplete-lista");
+        let temporizador = null;
+        let requisicao = null;
+        let ativo = -1;
+
+        function fechar() {
+            lista.hidden = true;
+            lista.innerHTML = "";
+            texto.setAttribute("aria-expanded", "false");
+            ativo = -1;
+        }
+
+        function escolher(item) {
+            oculto.value = item.dataset.id;
+            texto.value = item.dataset.nome;
+            fechar();
+        }
+
+        function destacar(indice) {
+            const itens = lista.querySelectorAll("li");
+            if (!itens.length) return;
+            ativo = (indice + itens.length) % itens.length;
+            itens.forEach(function (item, i) { item.classList.toggle("ativo", i === ativo); });
+        }
+
+        function mostrar(resultados) {
+            lista.innerHTML = "";
+            if (!resultados.length) {
+                fechar();
+                return;
+            }
+            resultados.forEach(function (professor) {
+                const item = document.createElement("li");
+                item.setAttribute("role", "option");
+                item.dataset.id = professor.id;
+                item.dataset.nome = professor.nome;
+                item.textContent = professor.nome;
+                if (professor.instituicao_ensino) {
+                    const detalhe = document.createElement("small");
+                    detalhe.textContent = " - " + professor.instituicao_ensino;
+                    item.appendChild(detalhe);
+                }
+                // mousedown (e não click) para escolher antes do blur fechar a lista
+                item.addEventListener("mousedown", function (e) {
+                    e.preventDefault();
+                    escolher(item);
+                });
+                lista.appendChild(item);
+            });
+            lista.hidden = false;
+            texto.setAttribute("aria-expanded", "true");
+        }
+
+        function buscar() {
+            const consulta = texto.value.trim();
+            if (consulta.length < 2) {
+                fechar();
+                return;
+            }
+            // Cancela a busca anterior para não exibir resultados fora de ordem
+            if (requisicao) requisicao.abort();
+            requisicao = new AbortController();
+            fetch(caixa.dataset.url + "?q=" + encodeURIComponent(consulta), {
+                signal: requisicao.signal,
+                headers: { "Accept": "application/json" },
+            })
+                .then(function (resposta) { return resposta.ok ? resposta.json() : { resultados: [] }; })
+                .then(function (dados) { mostrar(dados.resultados); })
+                .catch(function () {});
+        }
+
+        texto.addEventListener("input", function () {
+            // Texto alterado: a escolha anterior deixa de valer até nova seleção
+            oculto.value = "";
+            clearTimeout(temporizador);
+            temporizador = setTimeout(buscar, 200);
+        });
+
+        texto.addEventListener("keydown", function (e) {
+            if (lista.hidden) return;
+            if (e.key === "ArrowDown") {
+                e.preventDefault();
+                destacar(ativo + 1);
+            } else if (e.key === "ArrowUp") {
+                e.preventDefault();
+                destacar(ativo - 1);
+            } else if (e.key === "Enter" && ativo >= 0) {
+                e.preventDefault();
+                escolher(lista.querySelectorAll("li")[ativo]);
+            } else if (e.key === "Escape") {
+                fechar();
+            }
+        });
+
+        texto.addEventListener("blur", fechar);
+    });
+});
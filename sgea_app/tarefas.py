@@ -0,0 +1,58 @@
+import os
+import socket
+
+from django.db import IntegrityError
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import TarefaAgendada
+
+
+def identificacao_no():
+    """ Identifica o nó/processo que está executando a tarefa. """
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def adquirir_tarefa(nome, dono, duracao):
+    """
+    Tenta reservar a tarefa para este nó por 'duracao'.
+    O UPDATE condicional é atômico: se dois nós tentarem ao mesmo tempo,
+    apenas um deles altera a linha. Retorna a TarefaAgendada ou None.
+    """
+    try:
+        TarefaAgendada.objects.get_or_create(nome=nome)
+    except IntegrityError:
+        pass  # outro nó criou a linha ao mesmo tempo
+
+    agora = timezone.now()
+    adquirida = TarefaAgendada.objects.filter(
+        Q(bloqueada_ate__isnull=True) | Q(bloqueada_ate__lt=agora),
+        nome=nome,
+    ).update(dono=dono, bloqueada_ate=agora + duracao)
+
+    if not adquirida:
+        return None
+    return TarefaAgendada.objects.get(nome=nome)
+
+
+def salvar_checkpoint(tarefa, checkpoint, duracao):
+    """ Grava o progresso e renova a reserva (só se este nó ainda for o dono). """
+    return TarefaAgendada.objects.filter(pk=tarefa.pk, dono=tarefa.dono).update(
+        checkpoint=checkpoint,
+        bloqueada_ate=timezone.now() + duracao,
+    )
+
+
+def concluir_tarefa(tarefa):
+    """ Zera o checkpoint e libera a tarefa para a próxima execução. """
+    TarefaAgendada.objects.filter(pk=tarefa.pk, dono=tarefa.dono).update(
+        checkpoint=0,
+        dono='',
+        bloqueada_ate=None,
+        ultima_execucao=timezone.now(),
+    )
+
+
+def liberar_tarefa(tarefa):
+    """ Libera a tarefa mantendo o checkpoint (execução interrompida). """
+    TarefaAgendada.objects.filter(pk=tarefa.pk, dono=tarefa.dono).update(dono='', bloqueada_ate=None)
@@ -1,3 +1,1125 @@
-from django.test import TestCase
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import zipfile
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, connection, transaction
+from django.core.cache import cache
+from django.db.models import Q
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.test import APIClient
+
+from api import exportacao
+
+from . import (
+    admin as sgea_admin, ao_vivo, arquivamento, backends, busca, calendario, certificados, checkin, conflitos,
+    dados_pessoais, espera, estatisticas, fila, imagens, inscritos, lembretes, series,
+)
+from .midia import caminho_midia_publica, estatico_com_hash, hash_arquivo
+from .smtp_local import ServidorSMTPLocal
+from .models import (
+    Certificado, EstatisticaEvento, EstatisticaOrganizador, Evento, ExportacaoDados, Inscricao, InscricaoArquivada,
+    LembreteEnviado, ListaEspera, TarefaFila, Usuario,
+)
+
+
+class MidiaPublicaTests(TestCase):
+    """ /midia/ só serve os diretórios públicos, mesmo com '..' no caminho. """
+
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        configuracao = override_settings(MEDIA_ROOT=self.media)
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+        self.banner = default_storage.save('eventos/banners/banner.jpg', ContentFile(b'banner'))
+        self.certificado = default_storage.save('certificados/cert_x.txt', ContentFile(b'certificado privado'))
+
+    def test_caminho_normalizado(self):
+        self.assertEqual(caminho_midia_publica('eventos/banners/./banner.jpg'), 'eventos/banners/banner.jpg')
+        self.assertIsNone(caminho_midia_publica('eventos/banners/../../certificados/cert_x.txt'))
+        self.assertIsNone(caminho_midia_publica('/eventos/banners/banner.jpg'))
+        self.assertIsNone(caminho_midia_publica('eventos\\banners\\..\\..\\certificados\\cert_x.txt'))
+        self.assertIsNone(caminho_midia_publica('certificados/cert_x.txt'))
+
+    def test_banner_publico(self):
+        url = reverse('servir_midia', args=[hash_arquivo(self.banner), self.banner])
+        resposta = self.client.get(url)
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(b''.join(resposta.streaming_content), b'banner')
+
+    def test_travessia_recusada(self):
+        hash_qualquer = hash_arquivo(self.certificado)
+        for caminho in (
+            'eventos/banners/../../certificados/cert_x.txt',
+            'eventos/banners/%2e%2e/%2e%2e/certificados/cert_x.txt',
+            'eventos/banners/..%2f..%2fcertificados/cert_x.txt',
+        ):
+            with self.subTest(caminho=caminho):
+                resposta = self.client.get(f'/midia/{hash_qualquer}/{caminho}', follow=True)
+                self.assertEqual(resposta.status_code, 404)
+
+
+class EstaticosTests(TestCase):
+    """ Nomes com hash do manifesto: conjunto montado uma vez por manifesto carregado. """
+
+    def test_conjunto_por_manifesto(self):
+        class Armazenamento:
+            hashed_files = {'css/site.css': 'css/site.1a2b3c.css'}
+
+        armazenamento = Armazenamento()
+        self.assertTrue(estatico_com_hash(armazenamento, 'css/site.1a2b3c.css'))
+        self.assertFalse(estatico_com_hash(armazenamento, 'css/site.css'))
+        # Manifesto recarregado (novo dicionário): o conjunto é refeito
+        armazenamento.hashed_files = {'css/site.css': 'css/site.4d5e6f.css'}
+        self.assertTrue(estatico_com_hash(armazenamento, 'css/site.4d5e6f.css'))
+        self.assertFalse(estatico_com_hash(object(), 'css/site.4d5e6f.css'))
+
+
+def criar_usuario(login, perfil='Aluno', nome=None):
+    return Usuario.objects.create_user(
+        login, 'Senha@123', nome=nome or login, telefone='(11) 11111-1111',
+        instituicao_ensino='X', email=login, perfil=perfil, is_active=True,
+    )
+
+
+class ExportacaoDadosTests(TestCase):
+    """ Exportações em segundo plano: prazo de preparação e armazenamento privado. """
+
+    def setUp(self):
+        self.usuario = criar_usuario('aluno@x.com')
+
+    def test_pendente_vencida_pode_ser_pedida_de_novo(self):
+        primeira = dados_pessoais.solicitar(self.usuario)
+        self.assertEqual(primeira.estado, 'pendente')
+        self.assertIsNotNone(primeira.expira_em)
+        self.assertEqual(dados_pessoais.solicitar(self.usuario).pk, primeira.pk)
+
+        # A tarefa esgotou as tentativas (dead letter) e o prazo passou
+        ExportacaoDados.objects.filter(pk=primeira.pk).update(expira_em=timezone.now() - timedelta(minutes=1))
+        self.assertIsNone(dados_pessoais.exportacao_atual(self.usuario))
+
+        segunda = dados_pessoais.solicitar(self.usuario)
+        self.assertNotEqual(segunda.pk, primeira.pk)
+        self.assertFalse(ExportacaoDados.objects.filter(pk=primeira.pk).exists())
+        self.assertEqual(dados_pessoais.exportacao_atual(self.usuario).pk, segunda.pk)
+
+    def test_arquivo_fora_do_media_root(self):
+        exportacao = dados_pessoais.solicitar(self.usuario)
+        dados_pessoais.gerar_exportacao_dados(exportacao.pk)
+        exportacao.refresh_from_db()
+        self.addCleanup(exportacao.arquivo.delete, save=False)
+
+        self.assertEqual(exportacao.estado, 'pronta')
+        caminho = os.path.realpath(exportacao.arquivo.path)
+        self.assertTrue(caminho.startswith(os.path.realpath(settings.ARQUIVOS_PRIVADOS_ROOT) + os.sep))
+        self.assertFalse(caminho.startswith(os.path.realpath(settings.MEDIA_ROOT) + os.sep))
+        with zipfile.ZipFile(caminho) as pacote:
+            self.assertIn('perfil.json', pacote.namelist())
+
+        self.client.force_login(self.usuario)
+        resposta = self.client.get(reverse('baixar_exportacao_dados', args=[exportacao.pk]), HTTP_RANGE='bytes=0-3')
+        self.assertEqual(resposta.status_code, 206)
+        self.assertEqual(b''.join(resposta.streaming_content), b'PK\x03\x04')
+
+
+def criar_evento(organizador, professor, nome, data, **campos):
+    valores = {
+        'tipo_evento': 'Palestra', 'horario': '14:00', 'local': 'Auditório', 'quantidade_participantes': 50,
+        'data_inicial': data, 'data_final': data, **campos,
+    }
+    return Evento.objects.create(nome=nome, organizador=organizador, professor_responsavel=professor, **valores)
+
+
+class ArquivamentoSeriesTests(TestCase):
+    """ Arquivar o evento principal não pode apagar sessões que não foram arquivadas. """
+
+    def setUp(self):
+        self.organizador = criar_usuario('org@x.com', 'Organizador')
+        self.professor = criar_usuario('prof@x.com', 'Professor')
+        self.aluno = criar_usuario('aluno@x.com')
+        self.hoje = timezone.now().date()
+
+    def test_principal_com_sessao_ativa_fica(self):
+        principal = criar_evento(self.organizador, self.professor, 'Semana', self.hoje - timedelta(days=500))
+        sessao = criar_evento(self.organizador, self.professor, 'Sessão', self.hoje + timedelta(days=5), serie=principal)
+        inscricao = Inscricao.objects.create(usuario=self.aluno, evento=sessao)
+
+        self.assertEqual(arquivamento.arquivar_eventos(meses=12), (0, 0, 0))
+        # Mesmo chamado direto com o principal, o lote o deixa de fora
+        self.assertEqual(arquivamento.arquivar_lote([principal.pk]), (0, 0, 0))
+        self.assertTrue(Evento.objects.filter(pk=principal.pk).exists())
+        self.assertTrue(Inscricao.objects.filter(pk=inscricao.pk).exists())
+
+    def test_serie_encerrada_e_arquivada_inteira(self):
+        principal = criar_evento(self.organizador, self.professor, 'Semana', self.hoje - timedelta(days=500))
+        sessao = criar_evento(self.organizador, self.professor, 'Sessão', self.hoje - timedelta(days=499), serie=principal)
+        inscricao = Inscricao.objects.create(usuario=self.aluno, evento=sessao)
+
+        self.assertEqual(arquivamento.arquivar_eventos(meses=12), (2, 1, 0))
+        self.assertFalse(Evento.objects.filter(pk__in=[principal.pk, sessao.pk]).exists())
+        self.assertTrue(InscricaoArquivada.objects.filter(pk=inscricao.pk, evento_id=sessao.pk).exists())
+
+
+class BuscaEventosTests(TestCase):
+    """ A busca textual não pode perder resultados antes dos filtros do queryset. """
+
+    def setUp(self):
+        organizador = criar_usuario('org@x.com', 'Organizador')
+        professor = criar_usuario('prof@x.com', 'Professor')
+        hoje = timezone.now().date()
+        # Mais de LIMITE_RESULTADOS eventos encerrados, todos mais relevantes (termo no nome)
+        for numero in range(busca.LIMITE_RESULTADOS + 30):
+            criar_evento(organizador, professor, f'Oficina de Robótica {numero}', hoje - timedelta(days=10))
+        # Eventos futuros com o termo só no local (menos relevantes)
+        self.futuros = [
+            criar_evento(organizador, professor, f'Palestra {numero}', hoje + timedelta(days=10), local='Lab Robótica')
+            for numero in range(5)
+        ]
+        self.melhor = criar_evento(organizador, professor, 'Robótica Avançada', hoje + timedelta(days=10))
+        self.hoje = hoje
+
+    def test_filtros_depois_da_busca(self):
+        futuros = busca.buscar_eventos(Evento.objects.filter(data_inicial__gt=self.hoje), 'robotica')
+        self.assertEqual([evento.pk for evento in futuros][0], self.melhor.pk)
+        self.assertEqual({evento.pk for evento in futuros}, {self.melhor.pk, *(evento.pk for evento in self.futuros)})
+
+    def test_lista_publica(self):
+        resposta = self.client.get(reverse('home'), {'q': 'robótica'})
+        self.assertEqual(len(resposta.context['eventos']), 6)
+
+    def test_subconsulta_do_admin(self):
+        encontrados = Evento.objects.filter(data_inicial__gt=self.hoje).filter(
+            pk__in=busca.buscar_eventos(Evento.objects.all(), 'robotica').values('pk')
+        )
+        self.assertEqual(encontrados.count(), 6)
+        self.assertEqual(Evento.objects.filter(busca.filtro_busca('robotica')).count(), busca.LIMITE_RESULTADOS + 36)
+
+    def test_um_match_por_busca(self):
+        with CaptureQueriesContext(connection) as consultas:
+            encontrados = list(busca.buscar_eventos(Evento.objects.all(), 'robotica')[:busca.LIMITE_RESULTADOS])
+        self.assertEqual(len(encontrados), busca.LIMITE_RESULTADOS)
+        self.assertEqual(encontrados[0].pk, self.melhor.pk)
+        self.assertEqual(len(consultas), 1)
+        self.assertEqual(consultas[0]['sql'].count('MATCH'), 1)
+
+    def test_renomear_reindexa_em_lote(self):
+        organizador = Usuario.objects.get(login='org@x.com')
+        organizador.nome = 'Coordenação Robótica'
+        # Os eventos dele num lote de DELETE + INSERT, não um par de comandos por evento
+        with CaptureQueriesContext(connection) as consultas:
+            organizador.save()
+        self.assertLess(len(consultas), 15)
+        self.assertEqual(busca.buscar_eventos(Evento.objects.all(), 'coordenacao').count(), busca.LIMITE_RESULTADOS + 36)
+
+
+class VersoesCalendarioTests(TestCase):
+    """ Versões dos feeds .ics: consultas repetidas só no cache, o banco como referência. """
+
+    def setUp(self):
+        cache.clear()
+
+    def test_versao_no_banco(self):
+        self.assertEqual(calendario.versao_usuario(7), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            calendario.invalidar_usuario(7)
+        with self.captureOnCommitCallbacks(execute=True):
+            calendario.invalidar_usuario(7)
+        etag = calendario.etag_usuario(7)
+        with self.assertNumQueries(0):
+            self.assertEqual(calendario.etag_usuario(7), etag)
+
+        cache.clear()
+        self.assertEqual(calendario.versao_usuario(7), 3)
+        self.assertEqual(calendario.etag_usuario(7), etag)
+        self.assertEqual(calendario.versao_usuario(8), 1)
+
+    def test_evento_alterado_muda_etag(self):
+        organizador = criar_usuario('org@x.com', 'Organizador')
+        professor = criar_usuario('prof@x.com', 'Professor')
+        etag = calendario.etag_publico()
+        with self.captureOnCommitCallbacks(execute=True):
+            criar_evento(organizador, professor, 'Palestra', timezone.now().date() + timedelta(days=3))
+        self.assertNotEqual(calendario.etag_publico(), etag)
+
+    def test_feed_repetido_sem_consultas(self):
+        aluno = criar_usuario('aluno@x.com')
+        url = reverse('calendario_usuario', args=[calendario.token_usuario(aluno)])
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_novo_link_invalida_o_anterior(self):
+        aluno = criar_usuario('aluno@x.com')
+        antigo = calendario.token_usuario(aluno)
+        self.assertEqual(calendario.usuario_do_token(antigo), aluno.pk)
+
+        self.client.force_login(aluno)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('renovar_link_calendario'))
+        aluno.refresh_from_db()
+        novo = calendario.token_usuario(aluno)
+        self.assertNotEqual(novo, antigo)
+        self.assertIsNone(calendario.usuario_do_token(antigo))
+        self.assertEqual(calendario.usuario_do_token(novo), aluno.pk)
+        self.assertEqual(self.client.get(reverse('calendario_usuario', args=[antigo])).status_code, 404)
+        self.assertIsNone(calendario.usuario_do_token('abc:def'))
+
+
+class EmissaoCertificadosTests(TestCase):
+    """ A emissão em lote conta só os certificados inseridos, não os ignorados por conflito. """
+
+    def test_conflitos_fora_da_contagem(self):
+        organizador = criar_usuario('org@x.com', 'Organizador')
+        professor = criar_usuario('prof@x.com', 'Professor')
+        evento = criar_evento(organizador, professor, 'Palestra', timezone.now().date() - timedelta(days=2))
+        inscricoes = [
+            Inscricao.objects.create(usuario=criar_usuario(f'aluno{numero}@x.com'), evento=evento, presenca_confirmada=True)
+            for numero in range(3)
+        ]
+        lote = list(certificados.inscricoes_sem_certificado().filter(evento=evento))
+
+        # Outra execução emitiu um dos certificados entre a leitura e o INSERT
+        self.assertEqual(certificados.emitir_certificados([lote[0]]), 1)
+        self.assertEqual(certificados.emitir_certificados(lote), 2)
+        self.assertEqual(certificados.emitir_certificados(lote), 0)
+
+        self.assertEqual(Certificado.objects.filter(inscricao__in=inscricoes).count(), 3)
+        self.assertEqual(EstatisticaEvento.objects.get(pk=evento.pk).certificados_emitidos, 3)
+
+    def test_codigos_preenchidos_apos_migrate(self):
+        # Sem default: a migração que cria a coluna não repete um código em todas as linhas
+        self.assertFalse(Certificado._meta.get_field('codigo_verificacao').has_default())
+
+        organizador = criar_usuario('org@x.com', 'Organizador')
+        professor = criar_usuario('prof@x.com', 'Professor')
+        evento = criar_evento(organizador, professor, 'Palestra', timezone.now().date() - timedelta(days=2))
+        for numero in range(3):
+            Inscricao.objects.create(usuario=criar_usuario(f'aluno{numero}@x.com'), evento=evento, presenca_confirmada=True)
+        self.assertEqual(certificados.emitir_certificados(certificados.inscricoes_sem_certificado()), 3)
+
+        # Certificados de antes da coluna existir
+        Certificado.objects.update(codigo_verificacao=None)
+        self.assertEqual(certificados.preencher_codigos_verificacao(), 3)
+        self.assertEqual(certificados.preencher_codigos_verificacao(), 0)
+        codigos = set(Certificado.objects.values_list('codigo_verificacao', flat=True))
+        self.assertEqual(len(codigos), 3)
+        self.assertTrue(all(codigo and len(codigo) == 16 for codigo in codigos))
+
+
+class ConflitosHorarioTests(TestCase):
+    """ Eventos de vários dias com horário ocupam só o horário de cada dia. """
+
+    def setUp(self):
+        self.organizador = criar_usuario('org@x.com', 'Organizador')
+        self.professor = criar_usuario('prof@x.com', 'Professor')
+        self.aluno = criar_usuario('aluno@x.com')
+        self.segunda = timezone.now().date() + timedelta(days=30)
+        self.semana = criar_evento(
+            self.organizador, self.professor, 'Semana Acadêmica', self.segunda,
+            data_final=self.segunda + timedelta(days=4), horario='14:00 - 18:00',
+        )
+        Inscricao.objects.create(usuario=self.aluno, evento=self.semana)
+
+    def evento(self, nome, dias, horario):
+        data = self.segunda + timedelta(days=dias)
+        return criar_evento(self.organizador, self.professor, nome, data, horario=horario)
+
+    def test_noite_de_um_dia_da_semana(self):
+        noturno = self.evento('Palestra noturna', 2, '19:00 - 21:00')
+        self.assertEqual(conflitos.eventos_conflitantes(self.aluno, noturno), [])
+
+    def test_mesmo_horario(self):
+        tarde = self.evento('Oficina', 3, '15:00 - 16:00')
+        self.assertEqual(conflitos.eventos_conflitantes(self.aluno, tarde), [self.semana])
+        Inscricao.objects.create(usuario=self.aluno, evento=tarde)
+        Inscricao.objects.create(usuario=self.aluno, evento=self.evento('Palestra noturna', 1, '19h'))
+        self.assertEqual(
+            [(a.pk, b.pk) for a, b in conflitos.conflitos_do_usuario(self.aluno)], [(self.semana.pk, tarde.pk)]
+        )
+
+    def test_sem_horario_ocupa_o_dia(self):
+        self.assertEqual(conflitos.eventos_conflitantes(self.aluno, self.evento('Visita', 1, 'A combinar')), [self.semana])
+        self.assertEqual(conflitos.eventos_conflitantes(self.aluno, self.evento('Visita', 9, 'A combinar')), [])
+
+    def test_calendario_repete_o_horario(self):
+        bloco = calendario._vevento(self.semana, '20260101T000000Z')
+        self.assertIn('RRULE:FREQ=DAILY;COUNT=5', bloco)
+        self.assertIn(f"DTEND:{self.segunda:%Y%m%d}T180000", bloco)
+
+
+class ListaEsperaTests(TestCase):
+    """ Desistências deixam lacunas nos números de chegada; a posição é contada. """
+
+    def setUp(self):
+        organizador = criar_usuario('org@x.com', 'Organizador')
+        professor = criar_usuario('prof@x.com', 'Professor')
+        self.evento = criar_evento(
+            organizador, professor, 'Minicurso', timezone.now().date() + timedelta(days=7), quantidade_participantes=1
+        )
+        Inscricao.objects.create(usuario=criar_usuario('inscrito@x.com'), evento=self.evento)
+        self.alunos = [criar_usuario(f'aluno{numero}@x.com') for numero in range(4)]
+        for numero, aluno in enumerate(self.alunos, start=1):
+            self.assertEqual(espera.entrar(aluno, self.evento)[1], numero)
+
+    def posicoes(self):
+        return {
+            entrada.usuario_id: espera.posicao(entrada)
+            for entrada in ListaEspera.objects.filter(evento=self.evento)
+        }
+
+    def test_desistencia_sem_renumerar(self):
+        self.assertTrue(espera.sair(self.alunos[1], self.evento))
+        self.assertFalse(espera.sair(self.alunos[1], self.evento))
+        self.assertEqual(
+            sorted(ListaEspera.objects.filter(evento=self.evento).values_list('posicao', flat=True)), [1, 3, 4]
+        )
+        self.assertEqual(self.posicoes(), {self.alunos[0].pk: 1, self.alunos[2].pk: 2, self.alunos[3].pk: 3})
+        self.assertEqual(EstatisticaEvento.objects.get(pk=self.evento.pk).total_espera, 3)
+
+        novo = criar_usuario('novo@x.com')
+        self.assertEqual(espera.entrar(novo, self.evento)[1], 4)
+
+        self.client.force_login(self.alunos[3])
+        resposta = self.client.get(reverse('dashboard'))
+        self.assertEqual([entrada.posicao_atual for entrada in resposta.context['minhas_esperas']], [3])
+
+    def test_posicoes_pela_arvore(self):
+        import random
+
+        sorteio = random.Random(7)
+        alunos = list(self.alunos) + [criar_usuario(f'extra{numero}@x.com') for numero in range(40)]
+        for aluno in alunos[4:]:
+            espera.entrar(aluno, self.evento)
+        for rodada in range(6):
+            na_lista = list(ListaEspera.objects.filter(evento=self.evento).select_related('usuario'))
+            for entrada in sorteio.sample(na_lista, 4):
+                espera.sair(entrada.usuario, self.evento)
+            self.evento.quantidade_participantes += 2
+            self.evento.save()
+            espera.promover(self.evento.pk)
+
+            entradas = list(ListaEspera.objects.filter(evento=self.evento).order_by('posicao'))
+            with self.assertNumQueries(2):
+                posicoes = espera.posicoes(entradas)
+            self.assertEqual([posicoes[entrada.pk] for entrada in entradas], list(range(1, len(entradas) + 1)))
+
+    def test_evento_iniciado_nao_promove(self):
+        Evento.objects.filter(pk=self.evento.pk).update(
+            data_inicial=timezone.now().date() - timedelta(days=1), quantidade_participantes=5
+        )
+        self.assertEqual(espera.promover(self.evento.pk), [])
+        self.assertEqual(ListaEspera.objects.filter(evento=self.evento).count(), 4)
+
+    def test_promocao_pula_lacunas(self):
+        espera.sair(self.alunos[0], self.evento)
+        self.evento.quantidade_participantes = 3
+        self.evento.save()
+        inscricoes = espera.promover(self.evento.pk)
+        self.assertEqual({inscricao.usuario_id for inscricao in inscricoes}, {self.alunos[1].pk, self.alunos[2].pk})
+        self.assertEqual(self.posicoes(), {self.alunos[3].pk: 1})
+        self.assertEqual(EstatisticaEvento.objects.get(pk=self.evento.pk).total_espera, 1)
+
+    def test_conflito_bloqueante_descarta(self):
+        outro = criar_evento(
+            self.evento.organizador, self.evento.professor_responsavel, 'Outro', self.evento.data_inicial,
+            politica_conflito='bloquear',
+        )
+        Inscricao.objects.create(usuario=self.alunos[0], evento=outro)
+        self.evento.quantidade_participantes = 2
+        self.evento.save()
+        inscricoes = espera.promover(self.evento.pk)
+        self.assertEqual([inscricao.usuario_id for inscricao in inscricoes], [self.alunos[1].pk])
+        self.assertFalse(ListaEspera.objects.filter(usuario=self.alunos[0]).exists())
+
+    def test_sessoes_com_mais_vagas_promovem(self):
+        principal = criar_evento(self.evento.organizador, self.evento.professor_responsavel, 'Semana', self.evento.data_inicial)
+        Evento.objects.filter(pk=self.evento.pk).update(serie=principal)
+        series.editar_sessoes(principal, [self.evento], {'quantidade_participantes': 3})
+        self.assertEqual(Inscricao.objects.filter(evento=self.evento).count(), 3)
+        self.assertEqual(self.posicoes(), {self.alunos[2].pk: 1, self.alunos[3].pk: 2})
+
+    def test_api_lotada_entra_na_lista(self):
+        novo = criar_usuario('novo@x.com', nome='Aluno Novo')
+        cliente = APIClient()
+        cliente.force_authenticate(novo)
+        resposta = cliente.post(reverse('api_inscricoes'), {'usuario_nome': 'Aluno Novo', 'evento_nome': 'Minicurso'})
+        self.assertEqual(resposta.status_code, 202)
+        self.assertEqual(resposta.json()['posicao_espera'], 5)
+        self.assertFalse(Inscricao.objects.filter(usuario=novo).exists())
+        self.assertTrue(ListaEspera.objects.filter(usuario=novo, evento=self.evento).exists())
+
+
+class AdminTabelasGrandesTests(TestCase):
+    """ Estimativa do total das listas do admin e busca padrão da base. """
+
+    def test_estimativa_sqlite(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('estatísticas do SQLite')
+        for numero in range(5):
+            criar_usuario(f'aluno{numero}@x.com')
+        # Buraco no início da tabela, como o deixado pelo arquivamento
+        Usuario.objects.filter(login='aluno0@x.com').delete()
+        self.assertIsNone(sgea_admin.estimar_linhas(Usuario))
+
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        self.assertEqual(sgea_admin.estimar_linhas(Usuario), 4)
+
+    def test_busca_padrao(self):
+        class ListaEsperaAdmin(sgea_admin.AdminTabelaGrande):
+            search_fields = ('usuario__login',)
+
+        modelo_admin = ListaEsperaAdmin(ListaEspera, sgea_admin.admin.site)
+        self.assertEqual(modelo_admin.filtro_busca('12'), Q(pk=12))
+        resultado, _ = modelo_admin.get_search_results(None, ListaEspera.objects.all(), 'aluno')
+        self.assertEqual(list(resultado), [])
+
+
+class FilaTarefasTests(TestCase):
+    """ Deduplicação por chave e renovação da reserva das tarefas em execução. """
+
+    def test_chave_unica_entre_pendentes(self):
+        primeira = fila.enfileirar('processar_banner', chave='banner:1', evento_id=1)
+        self.assertEqual(fila.enfileirar('processar_banner', chave='banner:1', evento_id=1).pk, primeira.pk)
+        # Um INSERT direto (como o de uma requisição concorrente) é barrado pelo banco
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            TarefaFila.objects.create(nome='processar_banner', chave='banner:1', argumentos={'evento_id': 1})
+
+        # Reservada, ela pode ter lido dados antigos: a próxima chamada cria outra
+        self.assertEqual(fila.reservar('worker-a', 1), [primeira.pk])
+        segunda = fila.enfileirar('processar_banner', chave='banner:1', evento_id=1)
+        self.assertNotEqual(segunda.pk, primeira.pk)
+
+        # A primeira falha de vez e volta pelo admin sem esbarrar na restrição
+        TarefaFila.objects.filter(pk=primeira.pk).update(estado='falha', tentativas=3)
+        self.assertEqual(fila.reenfileirar(TarefaFila.objects.filter(pk=primeira.pk)), 1)
+        primeira.refresh_from_db()
+        self.assertEqual((primeira.estado, primeira.tentativas, primeira.max_tentativas), ('pendente', 3, 6))
+
+    def test_reserva_renovada(self):
+        tarefa = fila.enfileirar('enviar_email_confirmacao', usuario_id=1)
+        fila.reservar('worker-a', 1)
+        vencida = timezone.now() - timedelta(seconds=1)
+        TarefaFila.objects.filter(pk=tarefa.pk).update(reservada_ate=vencida)
+
+        self.assertEqual(fila.renovar_reservas('worker-b', [tarefa.pk]), 0)
+        self.assertEqual(fila.renovar_reservas('worker-a', [tarefa.pk]), 1)
+        self.assertEqual(fila.recuperar_abandonadas(), 0)
+        tarefa.refresh_from_db()
+        self.assertEqual(tarefa.estado, 'executando')
+        self.assertGreater(tarefa.reservada_ate, timezone.now() + fila.RESERVA - timedelta(minutes=1))
+
+
+class VariantesBannerTests(TestCase):
+    """ Trocar o banner apaga as variantes antigas, a menos que outro evento ainda o use. """
+
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        configuracao = override_settings(MEDIA_ROOT=self.media)
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+        self.organizador = criar_usuario('org@x.com', 'Organizador')
+        self.professor = criar_usuario('prof@x.com', 'Professor')
+        self.data = timezone.now().date() + timedelta(days=10)
+
+    def banner(self, nome, cor):
+        from PIL import Image
+
+        buffer = BytesIO()
+        Image.new('RGB', (640, 360), cor).save(buffer, 'JPEG')
+        return default_storage.save(f'eventos/banners/{nome}.jpg', ContentFile(buffer.getvalue()))
+
+    def arquivos_variantes(self, evento):
+        return [nome for formatos in evento.banner_variantes.values() for nome in formatos.values()]
+
+    def test_urls_com_hashes_gravados(self):
+        evento = criar_evento(self.organizador, self.professor, 'Palestra', self.data, banner=self.banner('hash', 'red'))
+        imagens.processar_banner(evento.pk)
+        evento.refresh_from_db()
+        arquivos = [evento.banner.name] + self.arquivos_variantes(evento)
+        self.assertEqual(evento.banner_hashes, {nome: hash_arquivo(nome) for nome in arquivos})
+
+        # As URLs saem dos hashes gravados: nenhum arquivo é consultado
+        with mock.patch('sgea_app.midia.hash_arquivo', side_effect=AssertionError('consultou o disco')):
+            urls = evento.banner_urls()
+        self.assertEqual(
+            urls['card']['webp'],
+            reverse('servir_midia', args=[evento.banner_hashes[evento.banner_variantes['card']['webp']],
+                                          evento.banner_variantes['card']['webp']]),
+        )
+        self.assertEqual(self.client.get(urls['thumbnail']['jpeg']).status_code, 200)
+
+    def test_troca_apaga_variantes_antigas(self):
+        evento = criar_evento(self.organizador, self.professor, 'Palestra', self.data, banner=self.banner('antigo', 'red'))
+        imagens.processar_banner(evento.pk)
+        evento.refresh_from_db()
+        antigas = self.arquivos_variantes(evento)
+        self.assertEqual(len(antigas), 6)
+
+        anterior = evento.banner.name
+        Evento.objects.filter(pk=evento.pk).update(banner=self.banner('novo', 'blue'), banner_variantes={})
+        imagens.processar_banner(evento.pk, banner_anterior=anterior)
+        evento.refresh_from_db()
+
+        self.assertFalse(any(default_storage.exists(nome) for nome in antigas))
+        self.assertTrue(default_storage.exists(anterior))
+        self.assertTrue(all(default_storage.exists(nome) for nome in self.arquivos_variantes(evento)))
+
+    def test_banner_ainda_usado_fica(self):
+        nome = self.banner('compartilhado', 'green')
+        evento = criar_evento(self.organizador, self.professor, 'Principal', self.data, banner=nome)
+        criar_evento(self.organizador, self.professor, 'Sessão', self.data, banner=nome)
+        imagens.processar_banner(evento.pk)
+        evento.refresh_from_db()
+
+        Evento.objects.filter(pk=evento.pk).update(banner='')
+        imagens.processar_banner(evento.pk, banner_anterior=nome)
+        self.assertTrue(all(default_storage.exists(arquivo) for arquivo in self.arquivos_variantes(evento)))
+        self.assertEqual(imagens.remover_variantes_orfas(nome), 0)
+
+
+class CheckinOfflineTests(TestCase):
+    """ Lista versionada do check-in offline e mesclagem dos lotes enviados. """
+
+    def setUp(self):
+        self.organizador = criar_usuario('org@x.com', 'Organizador')
+        professor = criar_usuario('prof@x.com', 'Professor')
+        self.evento = criar_evento(self.organizador, professor, 'Palestra', timezone.now().date() + timedelta(days=7))
+        self.inscricoes = [
+            Inscricao.objects.create(usuario=criar_usuario(f'aluno{numero}@x.com'), evento=self.evento)
+            for numero in range(3)
+        ]
+        self.api = APIClient()
+        self.api.force_authenticate(self.organizador)
+        self.url = reverse('api_checkin', args=[self.evento.pk])
+
+    def enviar(self, cursor, checkins):
+        return self.api.post(self.url, {'cursor': cursor, 'checkins': checkins}, format='json')
+
+    def test_cursor_assina_o_resumo_das_linhas(self):
+        lista = self.api.get(self.url).json()
+        self.assertTrue(lista['completo'])
+        self.assertEqual(lista['resumo'], checkin.resumo_lista(lista['completo'], lista['inscritos']))
+        self.assertEqual(checkin.resumo_do_cursor(self.evento.pk, lista['cursor']), lista['resumo'])
+
+        # Trocar o resumo no cursor invalida a assinatura
+        adulterado = lista['cursor'].replace(lista['resumo'], '0' * 64)
+        self.assertIsNone(checkin.versao_do_cursor(self.evento.pk, adulterado))
+        self.assertEqual(self.enviar(adulterado, [[self.inscricoes[0].pk, 1]]).status_code, 400)
+
+    def test_presenca_fora_de_zero_ou_um(self):
+        cursor = self.api.get(self.url).json()['cursor']
+        resposta = self.enviar(cursor, [[self.inscricoes[0].pk, 7]])
+        self.assertEqual(resposta.status_code, 400)
+        self.assertIn('checkins', resposta.json())
+        self.assertFalse(Inscricao.objects.filter(presenca_confirmada=True).exists())
+
+    def test_cursor_antigo_aplica_o_que_nao_mudou(self):
+        antigo = self.api.get(self.url).json()['cursor']
+        # Outra inscrição mudou depois do cursor: a versão da lista avançou, mas a
+        # inscrição enviada continua na versão anterior e é aplicada normalmente
+        checkin.definir_presencas(Inscricao.objects.filter(pk=self.inscricoes[1].pk), True)
+
+        resultado = self.enviar(antigo, [[self.inscricoes[0].pk, 1]]).json()
+        self.assertEqual(resultado['aplicados'], 1)
+        self.assertEqual(resultado['conflitos'], [])
+        self.assertEqual(EstatisticaEvento.objects.get(evento=self.evento).presencas_confirmadas, 2)
+
+        # A lista incremental a partir do cursor antigo traz só as duas alteradas
+        incremental = self.api.get(self.url, {'desde': antigo}).json()
+        self.assertFalse(incremental['completo'])
+        self.assertEqual(
+            sorted(linha[0] for linha in incremental['inscritos']), [self.inscricoes[0].pk, self.inscricoes[1].pk]
+        )
+
+    def test_alteracao_concorrente_volta_como_conflito(self):
+        cursor = self.api.get(self.url).json()['cursor']
+        alvo = self.inscricoes[0]
+        # No servidor a presença foi confirmada e desfeita depois do cursor
+        checkin.definir_presencas(Inscricao.objects.filter(pk=alvo.pk), True)
+        checkin.definir_presencas(Inscricao.objects.filter(pk=alvo.pk), False)
+
+        # O dispositivo desconfirma: já é o valor do servidor, só é contado
+        resultado = self.enviar(cursor, [[alvo.pk, 0]]).json()
+        self.assertEqual((resultado['aplicados'], resultado['ja_aplicados']), (0, 1))
+
+        # O dispositivo confirma: valor diferente numa linha alterada depois do cursor
+        resultado = self.enviar(cursor, [[alvo.pk, 1]]).json()
+        self.assertEqual(resultado['aplicados'], 0)
+        self.assertEqual(resultado['conflitos'], [[alvo.pk, 0]])
+        self.assertFalse(Inscricao.objects.get(pk=alvo.pk).presenca_confirmada)
+
+        # Reenviar a partir de uma lista nova aplica
+        novo = self.api.get(self.url, {'desde': cursor}).json()['cursor']
+        self.assertEqual(self.enviar(novo, [[alvo.pk, 1]]).json()['aplicados'], 1)
+        self.assertEqual(self.enviar(novo, [[alvo.pk, 1]]).json()['ja_aplicados'], 1)
+
+    def test_inscricao_removida(self):
+        cursor = self.api.get(self.url).json()['cursor']
+        removida = self.inscricoes[2].pk
+        self.inscricoes[2].delete()
+
+        resultado = self.enviar(cursor, [[removida, 1], [self.inscricoes[0].pk, 1]]).json()
+        self.assertEqual(resultado['inexistentes'], [removida])
+        self.assertEqual(resultado['aplicados'], 1)
+
+        # Depois de uma remoção o cursor antigo recebe a lista completa, sem a removida
+        lista = self.api.get(self.url, {'desde': cursor}).json()
+        self.assertTrue(lista['completo'])
+        self.assertEqual(
+            sorted(linha[0] for linha in lista['inscritos']), [self.inscricoes[0].pk, self.inscricoes[1].pk]
+        )
+
+
+class LembretesTests(TestCase):
+    """ Lembretes entregues por SMTP de verdade (servidor local) sem repetir envios. """
+
+    def setUp(self):
+        self.servidor = ServidorSMTPLocal(('127.0.0.1', 0)).iniciar_em_segundo_plano()
+        self.addCleanup(self.servidor.server_close)
+        self.addCleanup(self.servidor.shutdown)
+        configuracao = override_settings(
+            EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+            EMAIL_HOST='127.0.0.1', EMAIL_PORT=self.servidor.server_address[1], EMAIL_USE_TLS=False,
+            EMAIL_HOST_USER='', EMAIL_HOST_PASSWORD='',
+        )
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+
+        organizador = criar_usuario('org@x.com', 'Organizador')
+        professor = criar_usuario('prof@x.com', 'Professor')
+        data = timezone.localdate() + timedelta(days=7)
+        eventos = [criar_evento(organizador, professor, f'Palestra {numero}', data, horario=f'1{numero}:00') for numero in range(2)]
+        alunos = [criar_usuario(f'aluno{numero}@x.com') for numero in range(3)]
+        # Dois alunos nos dois eventos (um e-mail com os dois) e um só no primeiro
+        self.inscricoes = [
+            Inscricao.objects.create(usuario=aluno, evento=evento)
+            for aluno in alunos for evento in (eventos if aluno != alunos[2] else eventos[:1])
+        ]
+        # Véspera do primeiro evento: os dois caem na janela de 24 horas
+        self.agora = eventos[0].inicio - timedelta(hours=20)
+
+    def executar_fila(self):
+        for tarefa_id in fila.reservar('teste', 100):
+            self.assertEqual(fila.executar(tarefa_id), 'concluida', TarefaFila.objects.get(pk=tarefa_id).erro)
+
+    def test_rodar_duas_vezes_nao_repete(self):
+        for _ in range(2):
+            lembretes.agendar(agora=self.agora)
+            self.executar_fila()
+
+        self.assertEqual(LembreteEnviado.objects.filter(janela='vespera').count(), len(self.inscricoes))
+        destinatarios = sorted(destinatario for _, para, _ in self.servidor.mensagens for destinatario in para)
+        self.assertEqual(destinatarios, ['aluno0@x.com', 'aluno1@x.com', 'aluno2@x.com'])
+
+        # Cada inscrição aparece (pelo código de check-in) em exatamente uma mensagem
+        corpos = [mensagem.get_content() for _, _, mensagem in self.servidor.mensagens]
+        for inscricao in self.inscricoes:
+            with self.subTest(inscricao=inscricao.pk):
+                self.assertEqual(sum(corpo.count(inscricao.codigo_checkin) for corpo in corpos), 1)
+
+
+class ExportacaoCatalogoTests(TestCase):
+    """ Exportação incremental em NDJSON: remoções, renomeações e a marca da próxima leitura. """
+
+    def setUp(self):
+        self.organizador = criar_usuario('org@x.com', 'Organizador')
+        self.professor = criar_usuario('prof@x.com', 'Professor')
+        self.api = APIClient()
+        self.api.force_authenticate(self.organizador)
+        self.hoje = timezone.now().date()
+
+    def exportar(self, desde=None, campos='id,organizador_nome'):
+        parametros = {'fields': campos}
+        if desde is not None:
+            parametros['updated_since'] = desde
+        resposta = self.api.get(reverse('api_exportar_eventos'), parametros, HTTP_ACCEPT='application/x-ndjson')
+        self.assertEqual(resposta.status_code, 200)
+        linhas = [json.loads(linha) for linha in b''.join(resposta.streaming_content).decode().splitlines()]
+        return linhas, resposta['X-Exportado-Em']
+
+    def test_excluidos_e_arquivados_saem_como_remocao(self):
+        excluido = criar_evento(self.organizador, self.professor, 'Excluído', self.hoje + timedelta(days=5))
+        encerrado = criar_evento(self.organizador, self.professor, 'Encerrado', self.hoje - timedelta(days=500))
+        mantido = criar_evento(self.organizador, self.professor, 'Mantido', self.hoje + timedelta(days=5))
+        _, marca = self.exportar()
+
+        excluido_id, encerrado_id = excluido.pk, encerrado.pk
+        excluido.delete()
+        self.assertEqual(arquivamento.arquivar_lote([encerrado_id]), (1, 0, 0))
+
+        linhas, _ = self.exportar(marca)
+        removidos = [linha for linha in linhas if linha.get('removido')]
+        self.assertEqual([linha['id'] for linha in removidos], [excluido_id, encerrado_id])
+        self.assertTrue(all('removido_em' in linha for linha in removidos))
+        # A exportação completa não traz remoções
+        completa, _ = self.exportar()
+        self.assertEqual([linha['id'] for linha in completa], [mantido.pk])
+
+    def test_renomear_organizador_altera_os_eventos(self):
+        evento = criar_evento(self.organizador, self.professor, 'Palestra', self.hoje + timedelta(days=5))
+        _, marca = self.exportar()
+        Evento.objects.filter(pk=evento.pk).update(atualizado_em=timezone.now() - timedelta(hours=1))
+
+        # Salvar sem mudar o nome (ex: troca de telefone) não conta como alteração
+        organizador = Usuario.objects.get(pk=self.organizador.pk)
+        organizador.telefone = '(22) 22222-2222'
+        organizador.save()
+        self.assertEqual(self.exportar(marca)[0], [])
+
+        organizador.nome = 'Organizadora Renomeada'
+        organizador.save()
+        self.assertEqual(self.exportar(marca)[0], [{'id': evento.pk, 'organizador_nome': 'Organizadora Renomeada'}])
+
+    def test_marca_recua_para_transacoes_atrasadas(self):
+        antes = timezone.now()
+        _, marca = self.exportar()
+        marca = parse_datetime(marca)
+        self.assertLessEqual(marca, antes - exportacao.SOBREPOSICAO + timedelta(seconds=5))
+        self.assertGreaterEqual(marca, antes - exportacao.SOBREPOSICAO)
+
+        # Evento salvo durante a leitura anterior, mas confirmado depois dela
+        evento = criar_evento(self.organizador, self.professor, 'Atrasado', self.hoje + timedelta(days=5))
+        Evento.objects.filter(pk=evento.pk).update(atualizado_em=antes - timedelta(seconds=1))
+        linhas, _ = self.exportar(marca.isoformat())
+        self.assertEqual([linha['id'] for linha in linhas], [evento.pk])
+
+
+class EdicaoSessoesTests(TestCase):
+    """ O deslocamento de datas em lote segue as regras de data da criação da série. """
+
+    def setUp(self):
+        self.organizador = criar_usuario('org@x.com', 'Organizador')
+        professor = criar_usuario('prof@x.com', 'Professor')
+        self.hoje = timezone.now().date()
+        self.principal = criar_evento(
+            self.organizador, professor, 'Semana', self.hoje + timedelta(days=2), data_final=self.hoje + timedelta(days=10)
+        )
+        self.sessoes = [
+            criar_evento(self.organizador, professor, f'Sessão {dia}', self.hoje + timedelta(days=dia), serie=self.principal)
+            for dia in (3, 5)
+        ]
+        self.client.force_login(self.organizador)
+
+    def deslocar(self, dias):
+        return self.client.post(reverse('editar_sessoes', args=[self.principal.pk]), {
+            'sessoes': [sessao.pk for sessao in self.sessoes], 'deslocar_dias': dias,
+        })
+
+    def datas(self):
+        return [data for data in Evento.objects.filter(serie=self.principal).order_by('pk').values_list('data_inicial', flat=True)]
+
+    def test_deslocamento_invalido_recusado(self):
+        for dias, mensagem in ((-4, 'anterior à data atual'), (-2, 'fora do período'), (6, 'fora do período')):
+            with self.subTest(dias=dias):
+                resposta = self.deslocar(dias)
+                self.assertEqual(resposta.status_code, 200)
+                self.assertIn(mensagem, str(resposta.context['form'].errors['deslocar_dias']))
+                self.assertEqual(self.datas(), [self.hoje + timedelta(days=3), self.hoje + timedelta(days=5)])
+
+    def test_deslocamento_valido(self):
+        self.assertRedirects(self.deslocar(5), reverse('editar_sessoes', args=[self.principal.pk]))
+        self.assertEqual(self.datas(), [self.hoje + timedelta(days=8), self.hoje + timedelta(days=10)])
+
+    def test_servico_desfaz_o_lote(self):
+        with self.assertRaises(ValidationError):
+            series.editar_sessoes(self.principal, self.sessoes, {'local': 'Outro'}, deslocar_dias=-4)
+        self.assertFalse(Evento.objects.filter(serie=self.principal, local='Outro').exists())
+
+
+class PaginacaoInscritosTests(TestCase):
+    """ Paginação por chave (nome_busca, id) da lista de inscritos. """
+
+    def setUp(self):
+        organizador = criar_usuario('org@x.com', 'Organizador')
+        professor = criar_usuario('prof@x.com', 'Professor')
+        self.evento = criar_evento(organizador, professor, 'Palestra', timezone.now().date() + timedelta(days=7))
+        self.numero = 0
+
+    def inscrever(self, nome):
+        self.numero += 1
+        usuario = criar_usuario(f'aluno{self.numero}@x.com', nome=nome)
+        return Inscricao.objects.create(usuario=usuario, evento=self.evento)
+
+    def percorrer(self, tamanho=3):
+        """ Todas as páginas para frente e, a partir da última, para trás. """
+        frente, cursor = [], None
+        while True:
+            linhas, anterior, seguinte = inscritos.pagina(self.evento.pk, apos=cursor, tamanho=tamanho)
+            frente.append([inscricao.pk for inscricao in linhas])
+            if seguinte is None:
+                break
+            cursor = seguinte
+        tras, cursor = [frente[-1]], anterior
+        while cursor is not None:
+            linhas, cursor, _ = inscritos.pagina(self.evento.pk, antes=cursor, tamanho=tamanho)
+            tras.insert(0, [inscricao.pk for inscricao in linhas])
+        return frente, tras
+
+    def test_nomes_empatados(self):
+        empatados = [self.inscrever('Maria Silva') for _ in range(7)]
+        primeiro = self.inscrever('Ana Souza')
+        frente, tras = self.percorrer()
+        self.assertEqual(sum(frente, []), [primeiro.pk] + [inscricao.pk for inscricao in empatados])
+        self.assertEqual(frente, tras)
+
+    def test_hifens_e_acentos(self):
+        nomes = ['Ána-Clara Lima', 'Ana Maria', 'ana-maria Ávila', 'Ânia', 'Zé-Carlos', 'João']
+        inscricoes = {self.inscrever(nome).pk: nome for nome in nomes}
+        frente, tras = self.percorrer(tamanho=2)
+        self.assertEqual(frente, tras)
+        self.assertEqual(
+            [inscricoes[pk] for pk in sum(frente, [])],
+            ['Ana Maria', 'Ána-Clara Lima', 'ana-maria Ávila', 'Ânia', 'João', 'Zé-Carlos'],
+        )
+        # O id vem antes do primeiro hífen: nomes com hífen ficam inteiros no cursor
+        pagina = inscritos.pagina(self.evento.pk, tamanho=2)
+        self.assertEqual(inscritos.ler_cursor(pagina[2]), ('ana-clara lima', pagina[0][-1].pk))
+
+    def test_cursor_invalido_volta_ao_inicio(self):
+        for nome in ('Bruno', 'Carla', 'Daniel', 'Elisa'):
+            self.inscrever(nome)
+        primeira = [inscricao.pk for inscricao in inscritos.pagina(self.evento.pk, tamanho=2)[0]]
+        for cursor in ('', 'abc', '12', 'x-bruno', '-bruno', '١٢-bruno', '²-bruno'):
+            with self.subTest(cursor=cursor):
+                linhas, anterior, _ = inscritos.pagina(self.evento.pk, apos=cursor, tamanho=2)
+                self.assertEqual([inscricao.pk for inscricao in linhas], primeira)
+                self.assertIsNone(anterior)
+                self.assertEqual(inscritos.pagina(self.evento.pk, antes=cursor, tamanho=2)[0], linhas)
+
+        self.client.force_login(self.evento.organizador)
+        resposta = self.client.get(reverse('lista_inscritos', args=[self.evento.pk]), {'apos': '²-bruno'})
+        self.assertEqual(resposta.status_code, 200)
+
+    def test_inscricao_entre_paginas(self):
+        for nome in ('Bruno', 'Carla', 'Daniel', 'Elisa'):
+            self.inscrever(nome)
+        linhas, _, cursor = inscritos.pagina(self.evento.pk, tamanho=2)
+        self.assertEqual([inscricao.usuario.nome for inscricao in linhas], ['Bruno', 'Carla'])
+
+        # Uma inscrição antes do cursor não desloca a página seguinte; uma depois entra nela
+        self.inscrever('Alice')
+        self.inscrever('Carlos')
+        seguinte = inscritos.pagina(self.evento.pk, apos=cursor, tamanho=2)[0]
+        self.assertEqual([inscricao.usuario.nome for inscricao in seguinte], ['Carlos', 'Daniel'])
+
+
+class EstatisticasIncrementaisTests(TestCase):
+    """ Contadores atualizados com F() e reconciliação periódica. """
+
+    def setUp(self):
+        self.organizador = criar_usuario('org@x.com', 'Organizador')
+        professor = criar_usuario('prof@x.com', 'Professor')
+        self.evento = criar_evento(self.organizador, professor, 'Palestra', timezone.now().date() + timedelta(days=7))
+        self.alunos = [criar_usuario(f'aluno{numero}@x.com') for numero in range(3)]
+
+    def contadores(self, modelo, **filtro):
+        return modelo.objects.filter(**filtro).values(*estatisticas.CONTADORES).get()
+
+    def test_variacoes_sem_contagem(self):
+        with CaptureQueriesContext(connection) as consultas:
+            inscricoes = [Inscricao.objects.create(usuario=aluno, evento=self.evento) for aluno in self.alunos]
+        self.assertFalse([consulta['sql'] for consulta in consultas if 'COUNT(' in consulta['sql'].upper()])
+
+        inscricoes[0].presenca_confirmada = True
+        inscricoes[0].save()
+        inscricoes[1].delete()
+        esperado = {'total_inscritos': 2, 'presencas_confirmadas': 1, 'certificados_emitidos': 0}
+        self.assertEqual(self.contadores(EstatisticaEvento, evento=self.evento), esperado)
+        self.assertEqual(self.contadores(EstatisticaOrganizador, organizador=self.organizador), esperado)
+
+    def test_incremento_nao_sobrescreve_valor_concorrente(self):
+        Inscricao.objects.create(usuario=self.alunos[0], evento=self.evento)
+        desatualizada = EstatisticaEvento.objects.get(evento=self.evento)
+        # Outro processo incrementa depois da leitura: o UPDATE com F() soma sobre o valor do banco
+        estatisticas.registrar_variacao(self.evento.pk, self.organizador.pk, total_inscritos=1)
+        estatisticas.registrar_variacao(self.evento.pk, self.organizador.pk, total_inscritos=1)
+        self.assertEqual(desatualizada.total_inscritos, 1)
+        self.assertEqual(self.contadores(EstatisticaEvento, evento=self.evento)['total_inscritos'], 3)
+
+    def test_linha_ausente_e_recalculada(self):
+        Inscricao.objects.create(usuario=self.alunos[0], evento=self.evento, presenca_confirmada=True)
+        EstatisticaEvento.objects.filter(evento=self.evento).delete()
+        Inscricao.objects.create(usuario=self.alunos[1], evento=self.evento)
+        self.assertEqual(
+            self.contadores(EstatisticaEvento, evento=self.evento),
+            {'total_inscritos': 2, 'presencas_confirmadas': 1, 'certificados_emitidos': 0},
+        )
+
+    def test_reconciliar_corrige_divergencias(self):
+        for aluno in self.alunos:
+            Inscricao.objects.create(usuario=aluno, evento=self.evento)
+        # Alterações em massa não disparam signals e deixam os contadores divergentes
+        Inscricao.objects.filter(evento=self.evento).update(presenca_confirmada=True)
+        EstatisticaOrganizador.objects.filter(organizador=self.organizador).update(total_eventos=9)
+
+        saida = StringIO()
+        call_command('reconciliar_estatisticas', stdout=saida)
+        self.assertIn('1 eventos, 1 organizadores', saida.getvalue())
+
+        esperado = {'total_inscritos': 3, 'presencas_confirmadas': 3, 'certificados_emitidos': 0}
+        self.assertEqual(self.contadores(EstatisticaEvento, evento=self.evento), esperado)
+        self.assertEqual(self.contadores(EstatisticaOrganizador, organizador=self.organizador), esperado)
+        self.assertEqual(EstatisticaOrganizador.objects.get(organizador=self.organizador).total_eventos, 1)
+        self.assertEqual(estatisticas.reconciliar(), (0, 0))
+
+
+class UsuarioCacheBackendTests(TestCase):
+    """ Cache do usuário autenticado e sua invalidação. """
+
+    def setUp(self):
+        cache.clear()
+        self.backend = backends.UsuarioCacheBackend()
+        self.usuario = criar_usuario('aluno@x.com')
+
+    def test_segunda_leitura_sem_consulta(self):
+        self.assertEqual(self.backend.get_user(self.usuario.pk), self.usuario)
+        with self.assertNumQueries(0):
+            usuario = self.backend.get_user(self.usuario.pk)
+        self.assertEqual(usuario.perfil, 'Aluno')
+
+    def test_salvar_invalida(self):
+        self.backend.get_user(self.usuario.pk)
+        self.usuario.perfil = 'Organizador'
+        self.usuario.save()
+        self.assertEqual(self.backend.get_user(self.usuario.pk).perfil, 'Organizador')
+
+        # Usuário desativado deixa de autenticar mesmo com a entrada ainda no cache
+        Usuario.objects.filter(pk=self.usuario.pk).update(is_active=False)
+        backends.invalidar_usuario(self.usuario.pk)
+        self.assertIsNone(self.backend.get_user(self.usuario.pk))
+
+    def test_excluir_invalida(self):
+        usuario_id = self.usuario.pk
+        self.backend.get_user(usuario_id)
+        self.usuario.delete()
+        self.assertIsNone(cache.get(backends.chave_usuario(usuario_id)))
+        self.assertIsNone(self.backend.get_user(usuario_id))
+
+    def test_logout_invalida(self):
+        self.client.force_login(self.usuario)
+        self.assertEqual(self.client.get(reverse('dashboard')).status_code, 200)
+        self.assertIsNotNone(cache.get(backends.chave_usuario(self.usuario.pk)))
+
+        self.client.logout()
+        self.assertIsNone(cache.get(backends.chave_usuario(self.usuario.pk)))
+
+
+class SugestaoProfessoresTests(TestCase):
+    """ Typeahead do campo 'Professor Responsável'. """
+
+    def setUp(self):
+        cache.clear()
+        self.organizador = criar_usuario('org@x.com', 'Organizador')
+        for numero, nome in enumerate(['José Álvares', 'Joana Lima', 'Jonas Prado', 'Mariana Jó']):
+            criar_usuario(f'prof{numero}@x.com', 'Professor', nome=nome)
+        criar_usuario('aluno@x.com', nome='Josué Aluno')
+
+    def nomes(self, consulta, **kwargs):
+        return [professor['nome'] for professor in busca.sugerir_professores(consulta, **kwargs)]
+
+    def test_prefixo_sem_acentos(self):
+        self.assertEqual(self.nomes('jo'), ['Joana Lima', 'Jonas Prado', 'José Álvares'])
+        self.assertEqual(self.nomes('JOSÉ á'), ['José Álvares'])
+        self.assertEqual(self.nomes('alv'), [])
+        self.assertEqual(self.nomes('jo', limite=2), ['Joana Lima', 'Jonas Prado'])
+        self.assertEqual(self.nomes('   '), [])
+
+    def test_resultado_em_cache(self):
+        self.assertEqual(self.nomes('jon'), ['Jonas Prado'])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.nomes('Jôn'), ['Jonas Prado'])
+
+    def test_view(self):
+        url = reverse('buscar_professores')
+        self.client.force_login(self.organizador)
+        resposta = self.client.get(url, {'q': 'jos'})
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(resposta['Cache-Control'], 'private, max-age=60')
+        self.assertEqual([professor['nome'] for professor in resposta.json()['resultados']], ['José Álvares'])
+        self.assertEqual(set(resposta.json()['resultados'][0]), {'id', 'nome', 'instituicao_ensino'})
+
+        # Menos de 2 caracteres não consulta os professores
+        with CaptureQueriesContext(connection) as consultas:
+            self.assertEqual(self.client.get(url, {'q': 'j'}).json(), {'resultados': []})
+        self.assertFalse([consulta['sql'] for consulta in consultas if 'nome_busca' in consulta['sql']])
+
+        # Só organizadores usam a busca
+        self.client.force_login(Usuario.objects.get(email='aluno@x.com'))
+        self.assertEqual(self.client.get(url, {'q': 'jos'}).status_code, 302)
+
+
+class ContadoresAoVivoTests(TestCase):
+    """ Fan-out em memória dos contadores da lista de inscritos (SSE). """
+
+    def setUp(self):
+        organizador = criar_usuario('org@x.com', 'Organizador')
+        professor = criar_usuario('prof@x.com', 'Professor')
+        self.evento = criar_evento(
+            organizador, professor, 'Palestra', timezone.now().date() + timedelta(days=7), quantidade_participantes=30,
+        )
+        self.transmissor = ao_vivo.Transmissor()
+
+    async def test_entrar_publicar_e_sair(self):
+        fila, estado = await self.transmissor.entrar(self.evento.pk)
+        outra, _ = await self.transmissor.entrar(self.evento.pk)
+        self.assertEqual(estado['total_inscritos'], 0)
+        self.assertEqual(estado['vagas_restantes'], 30)
+        self.assertEqual(self.transmissor.total_ouvintes(self.evento.pk), 2)
+        canal = self.transmissor._canais[self.evento.pk]
+
+        # Uma variação chega a todos os ouvintes sem consultar o banco
+        self.transmissor.publicar_variacao(self.evento.pk, {'total_inscritos': 1, 'certificados_emitidos': 1})
+        self.transmissor.publicar_variacao(self.evento.pk, {'certificados_emitidos': 1})
+        for ouvinte in (fila, outra):
+            tipo, dados, versao = await asyncio.wait_for(ouvinte.get(), 1)
+            self.assertEqual((tipo, versao), ('variacao', 1))
+            self.assertEqual(dados['total_inscritos'], 1)
+            self.assertEqual(dados['vagas_restantes'], 29)
+            self.assertEqual(dados['variacao'], {'total_inscritos': 1})
+            self.assertTrue(ouvinte.empty())
+
+        # O canal (e a tarefa de sincronia) some com o último ouvinte
+        self.transmissor.sair(self.evento.pk, fila)
+        self.assertFalse(canal.tarefa.done())
+        self.transmissor.sair(self.evento.pk, outra)
+        self.assertEqual(self.transmissor.total_ouvintes(self.evento.pk), 0)
+        with self.assertRaises(asyncio.CancelledError):
+            await canal.tarefa
+        self.transmissor.publicar_variacao(self.evento.pk, {'total_inscritos': 1})
+        self.assertTrue(outra.empty())
+
+    async def test_sincronia_com_outros_processos(self):
+        with mock.patch.object(ao_vivo, 'INTERVALO_SINCRONIA', 0.01):
+            fila, _ = await self.transmissor.entrar(self.evento.pk)
+            try:
+                await EstatisticaEvento.objects.filter(evento=self.evento).aupdate(presencas_confirmadas=4)
+                tipo, dados, _ = await asyncio.wait_for(fila.get(), 2)
+            finally:
+                self.transmissor.sair(self.evento.pk, fila)
+        self.assertEqual(tipo, 'contadores')
+        self.assertEqual(dados['presencas_confirmadas'], 4)
+
+    def test_variacao_publicada_apos_commit(self):
+        aluno = criar_usuario('aluno@x.com')
+        with mock.patch.object(ao_vivo, 'publicar_variacao') as publicar:
+            with self.captureOnCommitCallbacks(execute=True):
+                Inscricao.objects.create(usuario=aluno, evento=self.evento)
+                publicar.assert_not_called()
+        publicar.assert_called_once_with(self.evento.pk, {'total_inscritos': 1, 'presencas_confirmadas': 0})
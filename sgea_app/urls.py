@@ -16,15 +16,32 @@ urlpatterns = [
     path('dashboard/', views.dashboard, name='dashboard'), # Página inicial após login
     path('inscrever/<int:evento_id>/', views.inscrever_evento, name='inscrever_evento'),
     path('evento/<int:evento_id>/desinscrever/', views.desinscrever_evento, name='desinscrever_evento'),
+    path('evento/<int:evento_id>/sair-espera/', views.sair_lista_espera, name='sair_lista_espera'),
     path('meus_certificados/', views.meus_certificados, name='meus_certificados'),
+    path('meus-dados/', views.meus_dados, name='meus_dados'),
+    path('meus-dados/zip/', views.baixar_meus_dados, name='baixar_meus_dados'),
+    path('meus-dados/<int:exportacao_id>/arquivo/', views.baixar_exportacao_dados, name='baixar_exportacao_dados'),
     
     # Rotas de Organizador (Requer perfil 'Organizador')
     path('eventos/novo/', views.criar_evento, name='criar_evento'),
     path('eventos/editar/<int:evento_id>/', views.editar_evento, name='editar_evento'),
+    path('eventos/professores/', views.buscar_professores, name='buscar_professores'),
+    path('eventos/serie/nova/', views.criar_serie, name='criar_serie'),
+    path('eventos/serie/<int:evento_id>/sessoes/', views.editar_sessoes, name='editar_sessoes'),
     path('evento/<int:evento_id>/inscritos/', views.lista_inscritos, name='lista_inscritos'),
+    path('evento/<int:evento_id>/inscritos/ao-vivo/', views.ao_vivo_inscritos, name='ao_vivo_inscritos'),
     path('evento/<int:evento_id>/emitir_certificados/', views.emitir_certificados, name='emitir_certificados'),
     path('auditoria/', views.registros_auditoria, name='registros_auditoria'),
 
+    # Rotas de Arquivos (banners públicos e certificados com checagem de dono)
+    path('midia/<str:hash_conteudo>/<path:caminho>', views.servir_midia, name='servir_midia'),
+    path('certificado/<int:certificado_id>/arquivo/', views.baixar_arquivo_certificado, name='baixar_arquivo_certificado'),
+
+    # Feeds de Calendário (iCalendar)
+    path('calendario/eventos.ics', views.calendario_eventos, name='calendario_eventos'),
+    path('calendario/<str:token>/agenda.ics', views.calendario_usuario, name='calendario_usuario'),
+    path('calendario/novo-link/', views.renovar_link_calendario, name='renovar_link_calendario'),
+
     # Rota da confirmação por e-mail
     path("confirmar-email/<int:uid>/<str:token>/", confirmar_email, name="confirmar_email"),
 ]
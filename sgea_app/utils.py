@@ -1,11 +1,12 @@
 from django.urls import reverse
 from .tokens import token_ativacao
-from .models import RegistroAuditoria
+from .models import RegistroAuditoria, Usuario
+from . import fila
 
 def enviar_email_confirmacao(usuario, request):
     """
-    Agora NÃO envia e-mail de verdade.
-    Apenas SIMULA no terminal.
+    Agenda o e-mail de confirmação na fila de tarefas (o cadastro responde na hora).
+    O link depende da requisição (domínio), então é montado aqui.
     """
     token = token_ativacao.make_token(usuario)
     uid = usuario.pk
@@ -13,6 +14,16 @@ def enviar_email_confirmacao(usuario, request):
     link = request.build_absolute_uri(
         reverse("confirmar_email", args=[uid, token])
     )
+    fila.enfileirar('enviar_email_confirmacao', usuario_id=uid, link=link)
+
+def imprimir_email_confirmacao(usuario_id, link):
+    """
+    Tarefa da fila. Agora NÃO envia e-mail de verdade.
+    Apenas SIMULA no terminal do worker.
+    """
+    usuario = Usuario.objects.filter(pk=usuario_id).first()
+    if usuario is None:
+        return
 
     print("\n================ EMAIL SIMULADO ================")
     print(f"📨 Assunto: Confirmação de Cadastro - SGEA")
@@ -1,5 +1,9 @@
+import os
+from urllib.parse import urlencode
 from django.shortcuts import render, redirect, get_object_or_404
-from django.http import HttpResponse
+from django.core.exceptions import ValidationError
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, Http404, JsonResponse, StreamingHttpResponse
 from django.contrib import messages 
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib.auth import logout
@@ -7,11 +11,19 @@ from django.utils import timezone
 from .forms import * 
 from .models import *
 from .utils import log_auditoria
+from .imagens import agendar_processamento_banner
+from .midia import caminho_midia_publica, estatico_com_hash, hash_arquivo, resposta_arquivo
+from .busca import LIMITE_RESULTADOS, buscar_eventos, sugerir_professores
+from .conflitos import eventos_conflitantes, inscricao_bloqueada, mensagem_conflito
+from .series import criar_serie as criar_serie_em_lote, editar_sessoes as editar_sessoes_em_lote
+from . import ao_vivo, calendario, dados_pessoais, espera, estatisticas, fila, inscritos
+from .certificados import buscar_certificado, certificados_do_usuario
 from django.contrib.auth import get_user_model
 from .tokens import token_ativacao
 from django.contrib.auth import authenticate, login, logout
 from django.urls import reverse
-from django.db.models import Q
+from django.db import transaction
+from django.db.models import Count, Q
 # Importe o forms.py que criamos no passo anterior.
 
 # --- Funções Auxiliares de Permissão ---
@@ -34,13 +46,19 @@ def lista_eventos(request):
     """
     Exibe a lista de eventos que ainda não começaram e que o usuário (se logado)
     ainda não se inscreveu. Redireciona Organizadores para o dashboard.
+    Aceita o parâmetro 'q' para busca textual (ordenada por relevância).
     """
     hoje = timezone.now().date()
+    consulta = request.GET.get('q', '').strip()
     
     # Filtro base: Apenas eventos que ainda não começaram
     eventos_queryset = Evento.objects.filter(
         data_inicial__gt=hoje
     ).order_by('data_inicial')
+
+    # Busca textual por nome, tipo, local, organizador e professor
+    if consulta:
+        eventos_queryset = buscar_eventos(eventos_queryset, consulta)
     
     if request.user.is_authenticated:
         # 1. Restrição para Organizador
@@ -64,8 +82,13 @@ def lista_eventos(request):
         # 3. Usuário Não Logado (vê todos os eventos futuros)
         eventos_disponiveis = eventos_queryset
             
+    # O limite da busca vale para o resultado final, depois de todos os filtros
+    if consulta:
+        eventos_disponiveis = eventos_disponiveis[:LIMITE_RESULTADOS]
+
     context = {
         'eventos': eventos_disponiveis,
+        'consulta': consulta,
         'title': 'Eventos Acadêmicos Disponíveis'
     }
     return render(request, 'lista_eventos.html', context)
@@ -97,7 +120,7 @@ def cadastro_usuario(request):
             from .utils import enviar_email_confirmacao
             enviar_email_confirmacao(novo_usuario, request)
 
-            messages.success(request, "Cadastro realizado! O e-mail foi SIMULADO no terminal. Use o link exibido no console para ativar sua conta.")
+            messages.success(request, "Cadastro realizado! O e-mail é SIMULADO no terminal do worker da fila (processar_fila). Use o link exibido no console para ativar sua conta.")
             return redirect('login')
         else:
             messages.error(request, "Corrija os erros abaixo.")
@@ -158,11 +181,15 @@ def dashboard(request):
     
     if is_organizador(usuario):
         # Se for Organizador
+        # As estatísticas vêm dos contadores mantidos incrementalmente (sem COUNT por evento)
         eventos_organizados = Evento.objects.filter(
             organizador=usuario
+        ).select_related('professor_responsavel', 'estatistica').annotate(
+            total_sessoes=Count('sessoes')
         ).order_by('data_inicial')
         
         context['eventos_organizados'] = eventos_organizados
+        context['estatistica_organizador'] = EstatisticaOrganizador.objects.filter(organizador=usuario).first()
         
     elif usuario.perfil in ['Aluno', 'Professor']:
         # Se for Aluno ou Professor
@@ -173,6 +200,17 @@ def dashboard(request):
         ).select_related('evento').order_by('evento__data_inicial')
         
         context['minhas_inscricoes'] = minhas_inscricoes
+        # Posições na fila: início de cada fila e nós da árvore de desistências (ver espera.py)
+        minhas_esperas = list(ListaEspera.objects.filter(
+            usuario=usuario
+        ).select_related('evento').order_by('evento__data_inicial'))
+        posicoes = espera.posicoes(minhas_esperas)
+        for entrada in minhas_esperas:
+            entrada.posicao_atual = posicoes[entrada.pk]
+        context['minhas_esperas'] = minhas_esperas
+        context['url_calendario'] = request.build_absolute_uri(
+            reverse('calendario_usuario', args=[calendario.token_usuario(usuario)])
+        )
         
     return render(request, 'dashboard.html', context)
 
@@ -200,14 +238,25 @@ def inscrever_evento(request, evento_id):
         messages.warning(request, f"Você já está inscrito no evento '{evento.nome}'.")
         return redirect('home') 
 
-    # 4. Verificar Limite de Vagas
-    total_inscritos = Inscricao.objects.filter(evento=evento).count()
-    
-    if total_inscritos >= evento.quantidade_participantes:
-        messages.error(request, f"O evento '{evento.nome}' atingiu o limite de vagas.")
+    # 4. Verificar Conflito de Horário com outras inscrições do usuário
+    conflitos = eventos_conflitantes(usuario, evento)
+    if inscricao_bloqueada(evento, conflitos):
+        messages.error(request, f"Inscrição não permitida. {mensagem_conflito(conflitos)}")
         return redirect('home')
+
+    # 5. Verificar Limite de Vagas: lotado (ou com gente esperando) -> lista de espera
+    total_inscritos = Inscricao.objects.filter(evento=evento).count()
     
-    # 5. Criar Inscrição
+    if total_inscritos >= evento.quantidade_participantes or ListaEspera.objects.filter(evento=evento).exists():
+        _, posicao = espera.entrar(usuario, evento)
+        messages.info(
+            request,
+            f"O evento '{evento.nome}' atingiu o limite de vagas. Você está na posição {posicao} da lista de espera "
+            "e será inscrito automaticamente quando surgir uma vaga."
+        )
+        return redirect('dashboard')
+
+    # 6. Criar Inscrição
     try:
         Inscricao.objects.create(usuario=usuario, evento=evento)
         
@@ -216,6 +265,8 @@ def inscrever_evento(request, evento_id):
         log_auditoria(usuario, acao) 
         
         messages.success(request, f"Inscrição no evento '{evento.nome}' realizada com sucesso!")
+        if conflitos:
+            messages.warning(request, mensagem_conflito(conflitos))
         
     except Exception as e:
         messages.error(request, f"Ocorreu um erro ao processar sua inscrição. Tente novamente.")
@@ -243,7 +294,10 @@ def desinscrever_evento(request, evento_id):
     # 3. Processa a desinscrição (usando POST, que é mais seguro)
     if request.method == 'POST':
         try:
-            inscricao.delete()
+            # A vaga liberada vai para a lista de espera na mesma transação
+            with transaction.atomic():
+                inscricao.delete()
+                espera.promover(evento.id)
             messages.success(request, f"Inscrição no evento '{evento.nome}' cancelada com sucesso.")
         except Exception as e:
             messages.error(request, "Ocorreu um erro ao cancelar sua inscrição.")
@@ -251,6 +305,17 @@ def desinscrever_evento(request, evento_id):
     # Redireciona para o dashboard, onde a lista de inscrições será atualizada
     return redirect('dashboard')
 
+@login_required
+def sair_lista_espera(request, evento_id):
+    """ Retira o usuário da lista de espera de um evento (POST). """
+    evento = get_object_or_404(Evento, pk=evento_id)
+    if request.method == 'POST':
+        if espera.sair(request.user, evento):
+            messages.success(request, f"Você saiu da lista de espera do evento '{evento.nome}'.")
+        else:
+            messages.warning(request, f"Você não está na lista de espera do evento '{evento.nome}'.")
+    return redirect('dashboard')
+
 @login_required
 @user_passes_test(is_aluno_or_professor)
 def meus_certificados(request):
@@ -266,11 +331,10 @@ def meus_certificados(request):
         certificado_id = request.GET.get('download')
         
         # Garante que o usuário só pode baixar seus próprios certificados
-        certificado = get_object_or_404(
-            Certificado, 
-            pk=certificado_id, 
-            inscricao__usuario=request.user
-        )
+        # (inclusive os de eventos já arquivados)
+        certificado = buscar_certificado(certificado_id, Q(inscricao__usuario=request.user))
+        if certificado is None:
+            raise Http404("Certificado não encontrado.")
         
         # Log de Auditoria: Registro da consulta/download
         log_auditoria(
@@ -278,6 +342,10 @@ def meus_certificados(request):
             f'Download do certificado {certificado.id} para o evento {certificado.inscricao.evento.nome}'
         )
 
+        # Se houver arquivo gerado, ele é entregue direto do disco (sem carregar na memória)
+        if certificado.arquivo_certificado:
+            return baixar_arquivo_certificado(request, certificado.id)
+
         # ** SIMULAÇÃO DA CRIAÇÃO E ENTREGA DO ARQUIVO **
         
         # Conteúdo do certificado (usando o texto gerado na emissão)
@@ -289,6 +357,9 @@ __________________________________________________________________
 
 Data de Emissão: {certificado.data_emissao.strftime('%d/%m/%Y')}
 Status: Emitido e Válido.
+
+Código de Verificação: {certificado.codigo_formatado()}
+Verifique a autenticidade em: {request.build_absolute_uri(reverse('api_verificar_certificado', args=[certificado.codigo_verificacao]))}
 __________________________________________________________________
 
 """
@@ -309,11 +380,8 @@ __________________________________________________________________
     # ----------------------------------------------------
     
     # Busca todos os certificados vinculados às inscrições do usuário logado
-    certificados = Certificado.objects.filter(
-        inscricao__usuario=request.user
-    ).select_related(
-        'inscricao__evento' # Otimiza a busca para acessar dados do Evento
-    )
+    # (ativos e arquivados), já com os dados do Evento
+    certificados = certificados_do_usuario(request.user)
     
     context = {
         'certificados': certificados,
@@ -322,6 +390,172 @@ __________________________________________________________________
     
     return render(request, 'meus_certificados.html', context)
 
+# --- Entrega de Arquivos de Mídia ---
+
+def servir_midia(request, hash_conteudo, caminho):
+    """
+    Serve arquivos públicos do MEDIA_ROOT (banners) em produção (rota: /midia/<hash>/<caminho>).
+    A URL contém o hash do conteúdo, então a resposta é marcada como imutável.
+    """
+    caminho = caminho_midia_publica(caminho)
+    if caminho is None:
+        raise Http404("Arquivo não encontrado.")
+
+    try:
+        hash_atual = hash_arquivo(caminho)
+    except FileNotFoundError:
+        raise Http404("Arquivo não encontrado.")
+
+    # Hash antigo: o conteúdo mudou, redireciona para a URL atual
+    if hash_conteudo != hash_atual:
+        return redirect('servir_midia', hash_conteudo=hash_atual, caminho=caminho)
+
+    return resposta_arquivo(request, caminho, etag_hash=hash_atual)
+
+@login_required
+def meus_dados(request):
+    """
+    Exportação dos dados do usuário (rota: /meus-dados/).
+    Contas pequenas baixam o ZIP na hora; as grandes pedem a exportação, montada pela fila.
+    """
+    usuario = request.user
+    conta_grande = dados_pessoais.conta_grande(usuario)
+
+    if request.method == 'POST' and conta_grande:
+        dados_pessoais.solicitar(usuario)
+        log_auditoria(usuario, "Solicitação de exportação dos dados pessoais")
+        messages.success(request, "Estamos preparando seus dados. O arquivo aparece nesta página quando estiver pronto.")
+        return redirect('meus_dados')
+
+    context = {
+        'title': 'Meus Dados',
+        'conta_grande': conta_grande,
+        'exportacao': dados_pessoais.exportacao_atual(usuario),
+    }
+    return render(request, 'meus_dados.html', context)
+
+@login_required
+def baixar_meus_dados(request):
+    """ ZIP com os dados do usuário, montado durante o download (só contas pequenas). """
+    if dados_pessoais.conta_grande(request.user):
+        return redirect('meus_dados')
+
+    log_auditoria(request.user, "Download dos dados pessoais")
+    resposta = StreamingHttpResponse(dados_pessoais.gerar_zip(request.user), content_type='application/zip')
+    resposta['Content-Disposition'] = f'attachment; filename="{dados_pessoais.nome_download(request.user)}"'
+    resposta['Cache-Control'] = 'private, no-store'
+    return resposta
+
+@login_required
+def baixar_exportacao_dados(request, exportacao_id):
+    """
+    Entrega o ZIP montado em segundo plano (rota: /meus-dados/<id>/arquivo/).
+    Aceita Range/If-Range: um download interrompido continua de onde parou.
+    """
+    exportacao = get_object_or_404(
+        ExportacaoDados, pk=exportacao_id, usuario=request.user, estado='pronta', expira_em__gt=timezone.now()
+    )
+    # Download retomado chega com Range: registra só o início
+    if 'Range' not in request.headers:
+        log_auditoria(request.user, "Download dos dados pessoais")
+    try:
+        return resposta_arquivo(
+            request, exportacao.arquivo.name, storage=exportacao.arquivo.storage,
+            etag_hash=f"{exportacao.pk}-{exportacao.tamanho}",
+            cache_control='private, no-cache',
+            nome_download=dados_pessoais.nome_download(request.user),
+        )
+    except FileNotFoundError:
+        raise Http404("Arquivo da exportação não encontrado.")
+
+@login_required
+def baixar_arquivo_certificado(request, certificado_id):
+    """
+    Entrega o arquivo do certificado (rota: /certificado/<id>/arquivo/).
+    Apenas o dono da inscrição ou o organizador do evento têm acesso; a checagem
+    é feita na própria consulta, sem abrir o arquivo.
+    """
+    certificado = buscar_certificado(
+        certificado_id,
+        Q(inscricao__usuario=request.user) | Q(inscricao__evento__organizador=request.user),
+    )
+    if certificado is None:
+        raise Http404("Certificado não encontrado.")
+    if not certificado.arquivo_certificado:
+        raise Http404("Este certificado não possui arquivo gerado.")
+
+    arquivo = certificado.arquivo_certificado
+    nome_download = os.path.basename(arquivo.name)
+    try:
+        return resposta_arquivo(
+            request, arquivo.name, storage=arquivo.storage,
+            cache_control='private, max-age=3600',
+            nome_download=nome_download,
+        )
+    except FileNotFoundError:
+        raise Http404("Arquivo do certificado não encontrado.")
+
+def servir_estatico(request, caminho):
+    """
+    Serve os arquivos do STATIC_ROOT em produção (rota: /static/<caminho>).
+    Arquivos com hash no nome (ManifestStaticFilesStorage) recebem cache de um ano.
+    """
+    from django.contrib.staticfiles.storage import staticfiles_storage
+
+    try:
+        cache_control = (
+            'public, max-age=31536000, immutable' if estatico_com_hash(staticfiles_storage, caminho)
+            else 'public, max-age=3600'
+        )
+        return resposta_arquivo(request, caminho, storage=staticfiles_storage, cache_control=cache_control)
+    except FileNotFoundError:
+        raise Http404("Arquivo não encontrado.")
+
+# --- Feeds de Calendário (.ics) ---
+
+def _resposta_calendario(request, etag, gerar_documento, cache_control):
+    """
+    Responde 304 quando o aplicativo já tem a versão atual (só o cache é consultado);
+    caso contrário, entrega o feed (também em cache até a próxima mudança).
+    """
+    if etag in [valor.strip() for valor in request.headers.get('If-None-Match', '').split(',')]:
+        response = HttpResponse(status=304)
+    else:
+        response = HttpResponse(gerar_documento(), content_type='text/calendar; charset=utf-8')
+    response['ETag'] = etag
+    response['Cache-Control'] = cache_control
+    return response
+
+def calendario_eventos(request):
+    """ Feed público com os eventos futuros (rota: /calendario/eventos.ics). """
+    etag = calendario.etag_publico()
+    return _resposta_calendario(
+        request, etag, lambda: calendario.feed_publico(etag), 'public, max-age=300'
+    )
+
+def calendario_usuario(request, token):
+    """
+    Feed pessoal com os eventos em que o usuário está inscrito
+    (rota: /calendario/<token>/agenda.ics). O token assinado substitui o login.
+    """
+    usuario_id = calendario.usuario_do_token(token)
+    if usuario_id is None:
+        raise Http404("Calendário não encontrado.")
+
+    etag = calendario.etag_usuario(usuario_id)
+    return _resposta_calendario(
+        request, etag, lambda: calendario.feed_usuario(usuario_id, etag), 'private, max-age=300'
+    )
+
+@login_required
+def renovar_link_calendario(request):
+    """ Gera um novo link do calendário pessoal; o anterior deixa de funcionar (POST). """
+    if request.method == 'POST':
+        calendario.renovar_token(request.user)
+        log_auditoria(request.user, "Novo link do calendário pessoal gerado")
+        messages.success(request, "Novo link do calendário gerado. O link anterior não funciona mais.")
+    return redirect('dashboard')
+
 # --- Rotas de Organizador ---
 
 # sgea_app/views.py - Função criar_evento (Adição do log)
@@ -342,6 +576,10 @@ def criar_evento(request):
             evento = form.save(commit=False)
             evento.organizador = request.user 
             evento.save()
+
+            # As variantes do banner são geradas em segundo plano
+            if evento.banner:
+                agendar_processamento_banner(evento)
             
             # ** 🛠️ LOG DE CRIAÇÃO DE EVENTO **
             acao = f"Cadastro do evento: {evento.nome} (Organizador: {request.user.nome})"
@@ -356,6 +594,99 @@ def criar_evento(request):
         
     return render(request, 'criar_evento.html', {'form': form, 'title': 'Criar Novo Evento'})
 
+@login_required
+@user_passes_test(is_organizador)
+def criar_serie(request):
+    """
+    Cria um evento principal (ex: Semana Acadêmica) e todas as suas sessões
+    numa única requisição e transação (rota: /eventos/serie/nova/).
+    O parâmetro 'sessoes' define quantas linhas em branco exibir.
+    """
+    try:
+        linhas = max(1, int(request.GET.get('sessoes', 10)))
+    except ValueError:
+        linhas = 10
+    SessoesFormSet = formset_sessoes(extra=linhas)
+
+    if request.method == 'POST':
+        form = FormularioEvento(request.POST, request.FILES)
+        periodo = None
+        if form.is_valid():
+            periodo = (form.cleaned_data['data_inicial'], form.cleaned_data['data_final'])
+        formset = SessoesFormSet(request.POST, prefix='sessoes', periodo=periodo)
+
+        if form.is_valid() and formset.is_valid():
+            evento = form.save(commit=False)
+            evento.organizador = request.user
+            sessoes = [dados for dados in formset.cleaned_data if dados]
+            criadas = criar_serie_em_lote(evento, sessoes)
+
+            # O banner é processado uma vez; as sessões recebem as mesmas variantes
+            if evento.banner:
+                agendar_processamento_banner(evento)
+
+            messages.success(request, f"Série '{evento.nome}' criada com {len(criadas)} sessões!")
+            return redirect('dashboard')
+        messages.error(request, "Houve erros na validação. Verifique os campos abaixo.")
+    else:
+        form = FormularioEvento(initial={'tipo_evento': 'Semana Acadêmica'})
+        formset = SessoesFormSet(prefix='sessoes')
+
+    return render(request, 'criar_serie.html', {
+        'form': form, 'formset': formset, 'title': 'Criar Série de Eventos',
+    })
+
+@login_required
+@user_passes_test(is_organizador)
+def editar_sessoes(request, evento_id):
+    """
+    Edição em lote das sessões de uma série (rota: /eventos/serie/<id>/sessoes/).
+    """
+    evento = get_object_or_404(Evento, pk=evento_id, organizador=request.user, serie__isnull=True)
+
+    if request.method == 'POST':
+        form = FormularioEdicaoSessoes(request.POST, evento_principal=evento)
+        if form.is_valid():
+            try:
+                alteradas = editar_sessoes_em_lote(
+                    evento,
+                    form.cleaned_data['sessoes'],
+                    form.alteracoes(),
+                    deslocar_dias=form.cleaned_data.get('deslocar_dias') or 0,
+                    horario=form.cleaned_data.get('horario', ''),
+                )
+            except ValidationError as erro:
+                # Datas das sessões alteradas entre a validação do formulário e a gravação
+                form.add_error('deslocar_dias', erro)
+            else:
+                if alteradas:
+                    messages.success(request, f"{alteradas} sessões atualizadas!")
+                else:
+                    messages.warning(request, "Nenhuma alteração informada.")
+                return redirect('editar_sessoes', evento_id=evento.id)
+        messages.error(request, "Houve erros na validação. Verifique os campos abaixo.")
+    else:
+        form = FormularioEdicaoSessoes(evento_principal=evento)
+
+    return render(request, 'editar_sessoes.html', {
+        'form': form, 'evento': evento, 'title': f'Sessões da Série: {evento.nome}',
+    })
+
+@login_required
+@user_passes_test(is_organizador)
+def buscar_professores(request):
+    """
+    Sugestões para o campo 'Professor Responsável' (typeahead), em JSON.
+    Parâmetro: q (início do nome, mínimo 2 caracteres).
+    """
+    consulta = request.GET.get('q', '').strip()
+    resultados = sugerir_professores(consulta) if len(consulta) >= 2 else []
+
+    resposta = JsonResponse({'resultados': resultados})
+    # O navegador reaproveita as sugestões do mesmo prefixo por um minuto
+    resposta['Cache-Control'] = 'private, max-age=60'
+    return resposta
+
 @login_required
 @user_passes_test(is_organizador)
 def editar_evento(request, evento_id):
@@ -368,7 +699,28 @@ def editar_evento(request, evento_id):
     if request.method == 'POST':
         form = FormularioEvento(request.POST, request.FILES, instance=evento)
         if form.is_valid():
-            form.save()
+            banner_alterado = 'banner' in form.changed_data
+            # Nome do banner antes da troca: as variantes dele são apagadas no processamento
+            banner_anterior = banner_alterado and Evento.objects.filter(pk=evento.pk).values_list('banner', flat=True).first()
+            evento = form.save(commit=False)
+            if banner_alterado:
+                # Descarta as variantes antigas até o novo banner ser processado
+                evento.banner_variantes = {}
+                evento.banner_hashes = {}
+            with transaction.atomic():
+                evento.save()
+                if 'quantidade_participantes' in form.changed_data:
+                    # Vagas novas vão para a lista de espera
+                    espera.promover(evento.id)
+
+            if banner_alterado:
+                # As sessões de uma série acompanham o banner do evento principal
+                evento.sessoes.update(
+                    banner=evento.banner.name if evento.banner else None, banner_variantes={}, banner_hashes={},
+                    atualizado_em=timezone.now(),
+                )
+            if banner_alterado:
+                agendar_processamento_banner(evento, banner_anterior or '')
             
             # ** 🛠️ LOG DE EDIÇÃO DE EVENTO **
             acao = f"Alteração do evento: {evento.nome} (Organizador: {request.user.nome})"
@@ -394,6 +746,8 @@ def lista_inscritos(request, evento_id):
     """ 
     Lista de participantes inscritos em um evento (rota: /evento/<id>/inscritos/). 
     Permite ao Organizador confirmar presença.
+    Paginada por nome (?apos= / ?antes=), com busca pelo início do nome (?q=) e
+    filtro de presença (?presenca=confirmadas|pendentes); ver inscritos.py.
     """
     
     # 1. Garante que o Organizador só veja eventos que ele criou
@@ -401,8 +755,14 @@ def lista_inscritos(request, evento_id):
     
     # 2. Lógica de Confirmação de Presença
     if request.method == 'POST':
-        inscricao_id = request.POST.get('inscricao_id')
-        confirmar_presenca = request.POST.get('confirmar_presenca') == 'true'
+        # O roster envia o id no próprio botão ('confirmar' ou 'desconfirmar');
+        # o formato antigo (inscricao_id + confirmar_presenca) continua aceito.
+        if 'confirmar' in request.POST or 'desconfirmar' in request.POST:
+            confirmar_presenca = 'confirmar' in request.POST
+            inscricao_id = request.POST.get('confirmar') or request.POST.get('desconfirmar')
+        else:
+            inscricao_id = request.POST.get('inscricao_id')
+            confirmar_presenca = request.POST.get('confirmar_presenca') == 'true'
         
         inscricao = get_object_or_404(Inscricao, pk=inscricao_id, evento=evento)
         
@@ -419,31 +779,74 @@ def lista_inscritos(request, evento_id):
             inscricao.save()
             messages.success(request, f"Presença de {inscricao.usuario.nome} desconfirmada!")
         
-        # Redireciona para o GET da página para evitar submissão duplicada
-        return redirect('lista_inscritos', evento_id=evento_id) 
-
-    # 3. Busca todas as Inscrições para o Evento
-    inscritos = Inscricao.objects.filter(evento=evento).select_related('usuario').order_by('usuario__nome')
-    
-    # 4. Cálculo de Vagas
-    total_inscritos = inscritos.count()
+        # Redireciona para o GET da página (a mesma página da lista) para evitar submissão duplicada
+        destino = reverse('lista_inscritos', args=[evento_id])
+        if request.GET:
+            destino += '?' + request.GET.urlencode()
+        return redirect(destino)
+
+    # 3. Uma página de inscrições (ordem alfabética, paginação por chave)
+    busca = request.GET.get('q', '').strip()
+    filtro_presenca = request.GET.get('presenca', '')
+    if filtro_presenca not in inscritos.FILTROS_PRESENCA:
+        filtro_presenca = ''
+    inscricoes, cursor_anterior, cursor_seguinte = inscritos.pagina(
+        evento.pk, busca=busca, presenca=inscritos.FILTROS_PRESENCA.get(filtro_presenca),
+        apos=request.GET.get('apos'), antes=request.GET.get('antes'),
+    )
+    filtros = {chave: valor for chave, valor in (('q', busca), ('presenca', filtro_presenca)) if valor}
+    url_anterior = '?' + urlencode({**filtros, 'antes': cursor_anterior}) if cursor_anterior else None
+    url_seguinte = '?' + urlencode({**filtros, 'apos': cursor_seguinte}) if cursor_seguinte else None
+    
+    # 4. Cálculo de Vagas (contadores mantidos em EstatisticaEvento, sem COUNT)
+    estatistica = EstatisticaEvento.objects.filter(evento=evento).first() or estatisticas.recalcular_evento(evento.pk)
+    total_inscritos = estatistica.total_inscritos
+    presencas_confirmadas = estatistica.presencas_confirmadas
     vagas_restantes = evento.quantidade_participantes - total_inscritos
     
     context = {
         'evento': evento,
-        'inscritos': inscritos,
+        'inscritos': inscricoes,
         'total_inscritos': total_inscritos,
+        'presencas_confirmadas': presencas_confirmadas,
+        'presencas_pendentes': total_inscritos - presencas_confirmadas,
         'vagas_restantes': vagas_restantes,
+        'total_espera': estatistica.total_espera,
+        'busca': busca,
+        'filtro_presenca': filtro_presenca,
+        'url_anterior': url_anterior,
+        'url_seguinte': url_seguinte,
         'title': f'Inscritos no Evento: {evento.nome}'
     }
     return render(request, 'lista_inscritos.html', context)
 
 
+@login_required
+@user_passes_test(is_organizador)
+async def ao_vivo_inscritos(request, evento_id):
+    """
+    Stream SSE com os contadores de inscritos, vagas e presenças do evento
+    (rota: /evento/<id>/inscritos/ao-vivo/). Requer o servidor ASGI (sgea/asgi.py).
+    """
+    if not isinstance(request, ASGIRequest):
+        # Sob WSGI a conexão ficaria presa a uma thread; 204 faz o EventSource desistir
+        return HttpResponse(status=204)
+
+    usuario = await request.auser()
+    if not await Evento.objects.filter(pk=evento_id, organizador=usuario).aexists():
+        raise Http404("Evento não encontrado.")
+
+    resposta = StreamingHttpResponse(ao_vivo.fluxo_eventos(evento_id), content_type='text/event-stream')
+    resposta['Cache-Control'] = 'no-cache'
+    # Desliga o buffer do nginx para este stream
+    resposta['X-Accel-Buffering'] = 'no'
+    return resposta
+
 @login_required
 @user_passes_test(is_organizador)
 def emitir_certificados(request, evento_id):
     """ 
-    Gera certificados para o evento, independentemente da data_final,
+    Agenda a geração dos certificados do evento, independentemente da data_final,
     desde que a presença esteja confirmada.
     """
     evento = get_object_or_404(Evento, pk=evento_id, organizador=request.user)
@@ -455,39 +858,15 @@ def emitir_certificados(request, evento_id):
     # Ao removermos esta verificação aqui, assumimos que o Organizador 
     # está fazendo o processo MANUALMENTE.
         
-    # 2. Busca Inscrições com presença confirmada E que AINDA NÃO têm certificado
-    inscricoes_prontas = Inscricao.objects.filter(
-        evento=evento, 
-        presenca_confirmada=True
-    ).exclude(
-        certificado__isnull=False
+    # 2. A emissão (consulta das inscrições com presença confirmada e sem certificado,
+    # INSERT em lote e log de auditoria) roda no worker da fila; a resposta é imediata.
+    fila.enfileirar(
+        'emitir_certificados_evento',
+        chave=f'certificados:evento:{evento.pk}',
+        evento_id=evento.pk,
+        usuario_id=request.user.pk,
     )
-    
-    # ... (o resto da lógica de geração de certificado permanece igual) ...
-    
-    certificados_emitidos = 0
-    
-    # 3. Processo de Geração (Automação Simulada)
-    for inscricao in inscricoes_prontas:
-        # Conteúdo do certificado
-        texto_base = f"Certificamos que {inscricao.usuario.nome} participou do evento {evento.nome}, organizado por {evento.organizador.nome}."
-        
-        Certificado.objects.create(
-            inscricao=inscricao,
-            texto_certificado=texto_base,
-            status_emissao='Emitido',
-            # ...
-        )
-        certificados_emitidos += 1
-        
-    # 4. Log de Auditoria
-    from .utils import log_auditoria
-    log_auditoria(request.user, f'Emissão MANUAL de {certificados_emitidos} certificados para o evento {evento.nome}')
-    
-    if certificados_emitidos > 0:
-        messages.success(request, f"Emissão concluída! {certificados_emitidos} novos certificados foram gerados.")
-    else:
-        messages.info(request, "Nenhum novo certificado foi emitido (Verifique se a presença foi confirmada).")
+    messages.success(request, "Emissão de certificados agendada! Os certificados das presenças confirmadas serão gerados em instantes.")
         
     return redirect('lista_inscritos', evento_id=evento_id)
     